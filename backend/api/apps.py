@@ -9,3 +9,7 @@ class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
     verbose_name = "API"
+
+    def ready(self):
+        """シグナルハンドラーを登録する."""
+        from api import signals  # noqa: F401
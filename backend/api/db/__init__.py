@@ -0,0 +1 @@
+"""Database routing utilities for the API application."""
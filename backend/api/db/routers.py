@@ -0,0 +1,230 @@
+"""プライマリ/レプリカ構成のデータベースルーター.
+
+書き込みは常にプライマリ（default）へ送り、安全な読み取りのみを
+レプリカへ振り分ける。レプリカ読み取りはミドルウェアが明示的に許可した
+リクエスト（PATH_PREFIXES 配下のAPI）内でのみ行われ、管理画面・Wagtailの
+ページや、管理コマンド・シェルからの読み取りはプライマリに残る。
+
+レプリカの遅延は定期的に計測し、許容値を超えたレプリカは振り分け対象から外す。
+利用可能なレプリカがない場合はプライマリへフォールバックする。
+"""
+
+import random
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import DatabaseError
+
+DEFAULT_REPLICATION_SETTINGS = {
+    "REPLICAS": [],
+    "PATH_PREFIXES": ["/api/"],
+    "PIN_SECONDS": 5,
+    "PIN_COOKIE_NAME": "mb_primary_pin",
+    "MAX_LAG_SECONDS": 2.0,
+    "LAG_CHECK_INTERVAL": 1.0,
+}
+
+_replica_reads_allowed: ContextVar[bool] = ContextVar(
+    "replica_reads_allowed", default=False
+)
+_pinned_to_primary: ContextVar[bool] = ContextVar("pinned_to_primary", default=False)
+
+
+def get_replication_settings() -> dict:
+    """デフォルト値をマージしたレプリケーション設定を返す.
+
+    Returns:
+        settings.DATABASE_REPLICATION にデフォルト値を補完した辞書
+    """
+    return {
+        **DEFAULT_REPLICATION_SETTINGS,
+        **getattr(settings, "DATABASE_REPLICATION", {}),
+    }
+
+
+@contextmanager
+def replica_reads(*, pinned: bool = False) -> Iterator[None]:
+    """ブロック内の読み取りをレプリカへ振り分け可能にする.
+
+    Args:
+        pinned: Trueの場合、レプリカを使わずプライマリに固定する
+
+    Yields:
+        None
+    """
+    allowed_token = _replica_reads_allowed.set(True)
+    pinned_token = _pinned_to_primary.set(pinned)
+    try:
+        yield
+    finally:
+        _pinned_to_primary.reset(pinned_token)
+        _replica_reads_allowed.reset(allowed_token)
+
+
+def pin_to_primary(pinned: bool = True) -> None:
+    """現在のコンテキストの以降の読み取りをプライマリに固定する.
+
+    Args:
+        pinned: Falseの場合は固定を解除し、レプリカ読み取りを再び許可する
+    """
+    _pinned_to_primary.set(pinned)
+
+
+def measure_replica_lag(alias: str) -> float:
+    """レプリカの遅延秒数を計測する.
+
+    PostgreSQLのストリーミングレプリカでは最終リプレイ時刻から遅延を求める。
+    受信済みWALを全てリプレイ済みの場合は遅延0とみなす。
+    それ以外のバックエンドは遅延を計測できないため0を返す。
+
+    Args:
+        alias: レプリカのデータベースエイリアス
+
+    Returns:
+        遅延秒数
+
+    Raises:
+        DatabaseError: レプリカに接続できない場合
+    """
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT CASE"
+            " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+            " ELSE COALESCE("
+            "EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+            " END"
+        )
+        row = cursor.fetchone()
+    return float(row[0] or 0.0)
+
+
+class ReplicaHealth:
+    """レプリカごとの遅延計測結果を保持するキャッシュ.
+
+    計測はLAG_CHECK_INTERVAL秒に1回まで行い、結果をプロセス内で共有する。
+    接続エラーが発生したレプリカは次回計測まで利用不可として扱う。
+    """
+
+    def __init__(self) -> None:
+        """空の計測キャッシュを初期化する."""
+        self._lock = threading.Lock()
+        self._checked_at: dict[str, float] = {}
+        self._lag: dict[str, float] = {}
+
+    def lag(self, alias: str, interval: float) -> float:
+        """キャッシュ済みまたは新たに計測した遅延秒数を返す.
+
+        Args:
+            alias: レプリカのデータベースエイリアス
+            interval: 再計測までの秒数
+
+        Returns:
+            遅延秒数（接続不可の場合は無限大）
+        """
+        now = time.monotonic()
+        with self._lock:
+            checked_at = self._checked_at.get(alias)
+            if checked_at is not None and now - checked_at < interval:
+                return self._lag[alias]
+            # NOTE: 計測中に他スレッドが重複計測しないよう先に時刻を記録
+            self._checked_at[alias] = now
+            self._lag.setdefault(alias, 0.0)
+
+        try:
+            lag = measure_replica_lag(alias)
+        except DatabaseError:
+            lag = float("inf")
+
+        with self._lock:
+            self._lag[alias] = lag
+        return lag
+
+    def reset(self) -> None:
+        """全ての計測結果を破棄する."""
+        with self._lock:
+            self._checked_at.clear()
+            self._lag.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+def healthy_replicas() -> list[str]:
+    """遅延が許容範囲内のレプリカエイリアスを返す.
+
+    Returns:
+        読み取りに使用可能なレプリカエイリアスのリスト
+    """
+    config = get_replication_settings()
+    return [
+        alias
+        for alias in config["REPLICAS"]
+        if replica_health.lag(alias, config["LAG_CHECK_INTERVAL"])
+        <= config["MAX_LAG_SECONDS"]
+    ]
+
+
+class PrimaryReplicaRouter:
+    """書き込みをプライマリ、安全な読み取りをレプリカへ振り分けるルーター.
+
+    レプリカ読み取りは replica_reads() のコンテキスト内でのみ行う。
+    同一コンテキストで一度でも書き込みが発生した場合、
+    以降の読み取りはプライマリに固定され、自分の書き込みが必ず見える。
+    """
+
+    def db_for_read(self, model, **hints):
+        """読み取り先のデータベースを返す.
+
+        Args:
+            model: 対象モデル
+            **hints: ルーティングのヒント（instanceなど）
+
+        Returns:
+            データベースエイリアス
+        """
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if not _replica_reads_allowed.get() or _pinned_to_primary.get():
+            return DEFAULT_DB_ALIAS
+        replicas = healthy_replicas()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        """書き込み先のデータベースを返す.
+
+        Args:
+            model: 対象モデル
+            **hints: ルーティングのヒント
+
+        Returns:
+            常にプライマリのエイリアス
+        """
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """同一データセット内のリレーションを許可する.
+
+        Args:
+            obj1: 一方のモデルインスタンス
+            obj2: 他方のモデルインスタンス
+            **hints: ルーティングのヒント
+
+        Returns:
+            両方がプライマリまたはレプリカ上にある場合True
+        """
+        aliases = {DEFAULT_DB_ALIAS, *get_replication_settings()["REPLICAS"]}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
@@ -0,0 +1,98 @@
+"""列指向表現の転送量とデコード時間を計測する管理コマンド.
+
+指定したレス数を持つスレッド詳細を、通常のJSON、列指向JSON、
+列指向MessagePackで組み立て、サイズ（非圧縮/gzip）とデコード時間を比較する。
+計測用のカテゴリとスレッドは終了時に削除する。
+"""
+
+import gzip
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.models import Category, Post, Thread
+from api.renderers import ColumnarJSONRenderer, FastJSONRenderer, msgpack
+from api.v1.threads.readers import THREAD_DETAIL_READER
+
+SAMPLE_CONTENT = ">>{reply}\nそれな。"
+
+
+class Command(BaseCommand):
+    """列指向表現のベンチマークコマンド."""
+
+    help = "Benchmark payload size and decode time of columnar representations."
+
+    def add_arguments(self, parser):
+        """コマンドライン引数を定義する.
+
+        Args:
+            parser: 引数パーサー
+        """
+        parser.add_argument("--posts", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        """ベンチマークを実行して結果を出力する.
+
+        Args:
+            *args: 可変長引数
+            **options: コマンドオプション
+        """
+        plain, columnar = self._build_payloads(options["posts"])
+        cases = [
+            ("json", FastJSONRenderer().render(plain), json.loads),
+            ("columnar json", ColumnarJSONRenderer().render(columnar), json.loads),
+        ]
+        if msgpack is not None:
+            cases.append(("columnar msgpack", msgpack.packb(columnar), msgpack.unpackb))
+
+        repeat = options["repeat"]
+        for label, body, decode in cases:
+            started = time.perf_counter()
+            for _ in range(repeat):
+                decode(body)
+            elapsed = (time.perf_counter() - started) / repeat
+            self.stdout.write(
+                f"{label:>16}: {len(body):>9,} bytes, "
+                f"gzip {len(gzip.compress(body, 6, mtime=0)):>7,} bytes, "
+                f"decode {elapsed * 1000:6.2f} ms"
+            )
+
+    @staticmethod
+    def _build_payloads(post_count: int) -> tuple[dict, dict]:
+        """計測用スレッドを一時的に作成し、両方の表現を組み立てる.
+
+        Args:
+            post_count: スレッドに含めるレス数
+
+        Returns:
+            通常表現と列指向表現のスレッド詳細
+        """
+        category = Category.objects.create(
+            name=f"bench-{time.time_ns()}", slug=f"bench-{time.time_ns()}"
+        )
+        try:
+            thread = Thread.objects.create(
+                title="【実況】ベンチマークスレ Part1",
+                category=category,
+                post_count=post_count,
+            )
+            Post.objects.bulk_create(
+                Post(
+                    thread=thread,
+                    content=SAMPLE_CONTENT.format(reply=max(n - 1, 1)),
+                    post_number=n,
+                    is_op=(n == 1),
+                )
+                for n in range(1, post_count + 1)
+            )
+            rows = list(
+                THREAD_DETAIL_READER.values(Thread.objects.filter(pk=thread.pk))
+            )
+            return (
+                THREAD_DETAIL_READER.build(rows)[0],
+                THREAD_DETAIL_READER.build(rows, columnar=True)[0],
+            )
+        finally:
+            category.delete()
@@ -0,0 +1,94 @@
+"""レスポンス圧縮の性能を計測する管理コマンド.
+
+指定したレス数を持つスレッド詳細のJSONを生成し、
+利用可能なエンコーディングとレベルごとに圧縮後のサイズと処理時間を比較する。
+計測用のカテゴリとスレッドは終了時に削除する。
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.middleware.compression import available_codecs
+from api.models import Category, Post, Thread
+from api.renderers import FastJSONRenderer
+from api.v1.threads.readers import THREAD_DETAIL_READER
+
+SAMPLE_CONTENT = (
+    ">>{reply}\nそれな。Djangoのシリアライザーは便利だけど遅いんだよなあ\n"
+    "詳しくは https://example.com/docs/{number} を参照"
+)
+
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 5, 9, 11), "zstd": (1, 3, 6, 12, 19)}
+
+
+class Command(BaseCommand):
+    """レスポンス圧縮のベンチマークコマンド."""
+
+    help = "Benchmark response compression codecs on a thread detail payload."
+
+    def add_arguments(self, parser):
+        """コマンドライン引数を定義する.
+
+        Args:
+            parser: 引数パーサー
+        """
+        parser.add_argument("--posts", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        """ベンチマークを実行して結果を出力する.
+
+        Args:
+            *args: 可変長引数
+            **options: コマンドオプション
+        """
+        body = self._build_payload(options["posts"])
+        repeat = options["repeat"]
+        self.stdout.write(f"payload: {len(body):,} bytes")
+
+        for encoding, codec in available_codecs().items():
+            for level in LEVELS[encoding]:
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    compressed = codec(body, level)
+                elapsed = (time.perf_counter() - started) / repeat
+                self.stdout.write(
+                    f"{encoding:>4} level {level:>2}: {len(compressed):>9,} bytes "
+                    f"({len(compressed) / len(body):6.1%}), {elapsed * 1000:8.2f} ms, "
+                    f"{len(body) / elapsed / 1024 / 1024:7.1f} MB/s"
+                )
+
+    @staticmethod
+    def _build_payload(post_count: int) -> bytes:
+        """計測用スレッドを一時的に作成し、詳細JSONを生成する.
+
+        Args:
+            post_count: スレッドに含めるレス数
+
+        Returns:
+            レンダリング済みのスレッド詳細JSON
+        """
+        category = Category.objects.create(
+            name=f"bench-{time.time_ns()}", slug=f"bench-{time.time_ns()}"
+        )
+        try:
+            thread = Thread.objects.create(
+                title="【実況】ベンチマークスレ Part1",
+                category=category,
+                post_count=post_count,
+                momentum=48.0,
+            )
+            Post.objects.bulk_create(
+                Post(
+                    thread=thread,
+                    content=SAMPLE_CONTENT.format(reply=max(n - 1, 1), number=n),
+                    post_number=n,
+                    is_op=(n == 1),
+                )
+                for n in range(1, post_count + 1)
+            )
+            rows = THREAD_DETAIL_READER.values(Thread.objects.filter(pk=thread.pk))
+            return FastJSONRenderer().render(THREAD_DETAIL_READER.build(rows)[0])
+        finally:
+            category.delete()
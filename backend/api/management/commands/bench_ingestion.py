@@ -0,0 +1,102 @@
+"""レス投稿のスループットを計測する管理コマンド.
+
+1投稿1トランザクションの従来方式と、グループコミットキュー経由の方式で
+同じ件数の投稿を作成し、秒間投稿数を比較する。
+計測用のカテゴリとスレッドは終了時に削除する。
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from api.models import Category, Post, Thread
+from api.services.ingestion import PostIngestionQueue
+
+
+class Command(BaseCommand):
+    """投稿スループットのベンチマークコマンド."""
+
+    help = "Compare posts/sec of per-post transactions and group commit."
+
+    def add_arguments(self, parser):
+        """コマンドライン引数を定義する.
+
+        Args:
+            parser: 引数パーサー
+        """
+        parser.add_argument("--posts", type=int, default=2000)
+        parser.add_argument("--clients", type=int, default=32)
+        parser.add_argument("--batch-size", type=int, default=64)
+        parser.add_argument("--delay-ms", type=float, default=5)
+
+    def handle(self, *args, **options):
+        """ベンチマークを実行して結果を出力する.
+
+        Args:
+            *args: 可変長引数
+            **options: コマンドオプション
+        """
+        category = Category.objects.create(
+            name=f"bench-{time.time_ns()}", slug=f"bench-{time.time_ns()}"
+        )
+        try:
+            thread = Thread.objects.create(title="bench", category=category)
+            total = options["posts"]
+
+            started = time.perf_counter()
+            for index in range(total):
+                self._create_single(thread, f"single {index}")
+            single_elapsed = time.perf_counter() - started
+
+            ingestion_queue = PostIngestionQueue(
+                max_batch_size=options["batch_size"],
+                max_delay=options["delay_ms"] / 1000,
+            )
+
+            def submit(index):
+                try:
+                    return ingestion_queue.submit(
+                        thread_id=thread.pk, content=f"group {index}", timeout=30
+                    )
+                finally:
+                    connections.close_all()
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["clients"]) as executor:
+                list(executor.map(submit, range(total)))
+            group_elapsed = time.perf_counter() - started
+
+            thread.refresh_from_db()
+            assert thread.post_count == 2 * total
+
+            self.stdout.write(
+                f"per-post transaction: {total / single_elapsed:,.0f} posts/sec"
+            )
+            self.stdout.write(
+                f"group commit ({options['clients']} clients): "
+                f"{total / group_elapsed:,.0f} posts/sec"
+            )
+        finally:
+            category.delete()
+
+    @staticmethod
+    def _create_single(thread: Thread, content: str) -> None:
+        """PostViewSet.createと同じ手順で1件を1トランザクションで作成する.
+
+        Args:
+            thread: 投稿先スレッド
+            content: 投稿本文
+        """
+        with transaction.atomic():
+            last_post = (
+                Post.objects.filter(thread=thread).order_by("-post_number").first()
+            )
+            number = (last_post.post_number + 1) if last_post else 1
+            post = Post.objects.create(
+                thread=thread, content=content, post_number=number
+            )
+            thread.post_count = Post.objects.filter(thread=thread).count()
+            thread.last_post_at = post.created_at
+            thread.save()
@@ -0,0 +1,106 @@
+"""JSONレンダラー/パーサーの性能を計測する管理コマンド.
+
+指定したレス数を持つスレッド詳細のペイロードを生成し、
+DRF標準のJSONRenderer/JSONParserとFastJSONRenderer/FastJSONParserの
+処理時間を比較する。出力が一致することも確認する。
+計測用のカテゴリとスレッドは終了時に削除する。
+"""
+
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Category, Post, Thread
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from api.v1.threads.serializers import ThreadDetailSerializer
+
+SAMPLE_CONTENT = (
+    ">>{reply}\nそれな。Djangoのシリアライザーは便利だけど遅いんだよなあ\n"
+    "詳しくは https://example.com/docs/{number} を参照"
+)
+
+
+class Command(BaseCommand):
+    """JSONレンダリング/パースのベンチマークコマンド."""
+
+    help = "Benchmark JSON rendering and parsing of a thread detail payload."
+
+    def add_arguments(self, parser):
+        """コマンドライン引数を定義する.
+
+        Args:
+            parser: 引数パーサー
+        """
+        parser.add_argument("--posts", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        """ベンチマークを実行して結果を出力する.
+
+        Args:
+            *args: 可変長引数
+            **options: コマンドオプション
+        """
+        data = self._build_payload(options["posts"])
+        repeat = options["repeat"]
+
+        results = {}
+        for label, renderer, parser in (
+            ("stdlib", JSONRenderer(), JSONParser()),
+            ("fast", FastJSONRenderer(), FastJSONParser()),
+        ):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                body = renderer.render(data)
+            render_ms = (time.perf_counter() - started) * 1000 / repeat
+
+            started = time.perf_counter()
+            for _ in range(repeat):
+                parser.parse(io.BytesIO(body), parser_context={"encoding": "utf-8"})
+            parse_ms = (time.perf_counter() - started) * 1000 / repeat
+
+            results[label] = body
+            self.stdout.write(
+                f"{label:>6}: render {render_ms:7.2f} ms, parse {parse_ms:7.2f} ms "
+                f"({len(body):,} bytes)"
+            )
+
+        if results["stdlib"] != results["fast"]:
+            raise CommandError("Rendered output differs between renderers")
+        self.stdout.write("output is byte-for-byte identical")
+
+    @staticmethod
+    def _build_payload(post_count: int) -> dict:
+        """計測用スレッドを一時的に作成し、詳細ペイロードを生成する.
+
+        Args:
+            post_count: スレッドに含めるレス数
+
+        Returns:
+            ThreadDetailSerializerの出力データ
+        """
+        category = Category.objects.create(
+            name=f"bench-{time.time_ns()}", slug=f"bench-{time.time_ns()}"
+        )
+        try:
+            thread = Thread.objects.create(
+                title="【実況】ベンチマークスレ Part1", category=category
+            )
+            Post.objects.bulk_create(
+                Post(
+                    thread=thread,
+                    content=SAMPLE_CONTENT.format(reply=max(n - 1, 1), number=n),
+                    post_number=n,
+                    is_op=(n == 1),
+                )
+                for n in range(1, post_count + 1)
+            )
+            thread.post_count = post_count
+            thread.momentum = 48.0
+            return ThreadDetailSerializer(thread).data
+        finally:
+            category.delete()
@@ -0,0 +1,117 @@
+"""シリアライザーと高速読み取りパスの性能を比較する管理コマンド.
+
+指定したレス数を持つスレッドを一時的に作成し、
+ThreadDetailSerializer/PostSerializerとFastReaderによる
+辞書生成のスループット（行/秒）を比較する。出力が一致することも確認する。
+計測用のカテゴリとスレッドは終了時に削除する。
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Category, Post, Reaction, Thread
+from api.v1.posts.readers import POST_READER
+from api.v1.posts.serializers import PostSerializer
+from api.v1.threads.readers import THREAD_DETAIL_READER
+from api.v1.threads.serializers import ThreadDetailSerializer
+
+
+class Command(BaseCommand):
+    """読み取りパスのベンチマークコマンド."""
+
+    help = "Benchmark serializer and fast-path readers on a large thread."
+
+    def add_arguments(self, parser):
+        """コマンドライン引数を定義する.
+
+        Args:
+            parser: 引数パーサー
+        """
+        parser.add_argument("--posts", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        """ベンチマークを実行して結果を出力する.
+
+        Args:
+            *args: 可変長引数
+            **options: コマンドオプション
+        """
+        post_count = options["posts"]
+        repeat = options["repeat"]
+        category = Category.objects.create(
+            name=f"bench-{time.time_ns()}", slug=f"bench-{time.time_ns()}"
+        )
+        try:
+            thread = self._build_thread(category, post_count)
+            threads = Thread.objects.filter(pk=thread.pk)
+            posts = Post.objects.filter(thread=thread)
+
+            cases = (
+                (
+                    "thread detail",
+                    lambda: ThreadDetailSerializer(threads.get()).data,
+                    lambda: THREAD_DETAIL_READER.build(
+                        THREAD_DETAIL_READER.values(threads)
+                    )[0],
+                ),
+                (
+                    "post list",
+                    lambda: PostSerializer(posts, many=True).data,
+                    lambda: POST_READER.build(POST_READER.values(posts)),
+                ),
+            )
+            for label, serializer, reader in cases:
+                rendered = []
+                for name, produce in (("serializer", serializer), ("reader", reader)):
+                    started = time.perf_counter()
+                    for _ in range(repeat):
+                        data = produce()
+                    elapsed = (time.perf_counter() - started) / repeat
+                    rendered.append(JSONRenderer().render(data))
+                    self.stdout.write(
+                        f"{label:>13} / {name:<10}: {elapsed * 1000:8.2f} ms "
+                        f"({post_count / elapsed:,.0f} rows/sec)"
+                    )
+                if rendered[0] != rendered[1]:
+                    raise CommandError(f"{label}: reader output differs")
+            self.stdout.write("output is byte-for-byte identical")
+        finally:
+            category.delete()
+
+    @staticmethod
+    def _build_thread(category, post_count: int) -> Thread:
+        """返信とリアクションを含む計測用スレッドを作成する.
+
+        Args:
+            category: スレッドを作成するカテゴリ
+            post_count: スレッドに含めるレス数
+
+        Returns:
+            作成したスレッド
+        """
+        thread = Thread.objects.create(
+            title="【実況】ベンチマークスレ Part1",
+            category=category,
+            post_count=post_count,
+        )
+        posts = Post.objects.bulk_create(
+            Post(
+                thread=thread,
+                content=f"{n}ゲット",
+                post_number=n,
+                is_op=(n == 1),
+            )
+            for n in range(1, post_count + 1)
+        )
+        for post in posts[1:]:
+            post.reply_to_id = posts[0].pk
+        Post.objects.bulk_update(posts[1::2], ["reply_to"])
+        Reaction.objects.bulk_create(
+            Reaction(post=post, reaction_type=reaction_type)
+            for post in posts[::3]
+            for reaction_type in ("like", "funny")
+        )
+        return thread
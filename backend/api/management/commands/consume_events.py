@@ -0,0 +1,51 @@
+"""イベントログの未処理分をコンシューマーに処理させる管理コマンド.
+
+指定したコンシューマー（省略時は登録済みの全て）について、
+読み取り位置からログの末尾まで api.services.events.consume() を繰り返す。
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services.events import consume, get_event_settings
+
+
+class Command(BaseCommand):
+    """イベントログの処理コマンド."""
+
+    help = "Process new board events for the given consumers."
+
+    def add_arguments(self, parser):
+        """コマンドライン引数を定義する.
+
+        Args:
+            parser: 引数パーサー
+        """
+        parser.add_argument(
+            "consumers",
+            nargs="*",
+            help="Consumer names (default: every consumer in BOARD_EVENTS).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, help="Events read per transaction."
+        )
+
+    def handle(self, *args, **options):
+        """コンシューマーごとにログの末尾まで処理して件数を出力する.
+
+        Args:
+            *args: 可変長引数
+            **options: コマンドオプション
+
+        Raises:
+            CommandError: 登録されていないコンシューマー名が指定された場合
+        """
+        registered = get_event_settings()["CONSUMERS"]
+        names = options["consumers"] or list(registered)
+        unknown = sorted(set(names) - set(registered))
+        if unknown:
+            raise CommandError(f"Unknown consumer(s): {', '.join(unknown)}")
+        for name in names:
+            processed = 0
+            while count := consume(name, options["batch_size"]):
+                processed += count
+            self.stdout.write(f"{name}: processed {processed} event(s)")
@@ -0,0 +1,40 @@
+"""タグの使用回数を再集計する管理コマンド.
+
+Tag.usage_count を中間テーブルの実際の件数で1回のUPDATEにより更新する。
+シグナルを経由しないタグ付けの変更などで生じたずれの修正に使う。
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.services.tag_usage import recount_tag_usage
+
+
+class Command(BaseCommand):
+    """タグ使用回数の再集計コマンド."""
+
+    help = "Recount Tag.usage_count from thread tagging."
+
+    def add_arguments(self, parser):
+        """コマンドライン引数を定義する.
+
+        Args:
+            parser: 引数パーサー
+        """
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many tags have a drifted count.",
+        )
+
+    def handle(self, *args, **options):
+        """再集計を実行して結果を出力する.
+
+        Args:
+            *args: 可変長引数
+            **options: コマンドオプション
+        """
+        drifted = recount_tag_usage(dry_run=options["dry_run"])
+        if options["dry_run"]:
+            self.stdout.write(f"{drifted} tag(s) have a drifted usage_count")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Corrected {drifted} tag(s)"))
@@ -0,0 +1,43 @@
+"""イベントログを先頭から再生してコンシューマーの投影を作り直す管理コマンド.
+
+派生データが壊れた場合や新しいコンシューマーを追加した場合に、
+api.services.events.replay() でログ全体を並列に処理し直す。
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services.events import get_event_settings, replay
+
+
+class Command(BaseCommand):
+    """イベントログの再生コマンド."""
+
+    help = "Rebuild a consumer's projection by replaying the board event log."
+
+    def add_arguments(self, parser):
+        """コマンドライン引数を定義する.
+
+        Args:
+            parser: 引数パーサー
+        """
+        parser.add_argument("consumer", help="Consumer name in BOARD_EVENTS.")
+        parser.add_argument(
+            "--workers", type=int, help="Threads processing partitions in parallel."
+        )
+        parser.add_argument("--batch-size", type=int, help="Events read per batch.")
+
+    def handle(self, *args, **options):
+        """再生を実行して結果を出力する.
+
+        Args:
+            *args: 可変長引数
+            **options: コマンドオプション
+
+        Raises:
+            CommandError: 登録されていないコンシューマー名が指定された場合
+        """
+        name = options["consumer"]
+        if name not in get_event_settings()["CONSUMERS"]:
+            raise CommandError(f"Unknown consumer: {name}")
+        replayed = replay(name, options["workers"], options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{name}: replayed {replayed} event(s)"))
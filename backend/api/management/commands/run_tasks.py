@@ -0,0 +1,90 @@
+"""バックグラウンドタスクのワーカーを起動する管理コマンド.
+
+api.services.tasks.TaskWorker をスレッドプールとして動かす。
+--processes を指定すると、ワーカープロセスをその数だけフォークし、
+各プロセスが --workers 個のスレッドでタスクを実行する。
+SIGINT / SIGTERM を受け取ると新しいタスクの取り出しを止め、
+実行中のタスクが終わってから終了する。
+"""
+
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.services.tasks import TaskWorker
+
+
+def _run_worker(workers: int | None, drain: bool) -> None:
+    """現在のプロセスでワーカーを動かす.
+
+    Args:
+        workers: 同時に実行するスレッド数
+        drain: Trueの場合、実行可能なタスクが無くなった時点で終了する
+    """
+    worker = TaskWorker(workers)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: worker.stop())
+    worker.run(drain=drain)
+
+
+class Command(BaseCommand):
+    """バックグラウンドタスクのワーカーコマンド."""
+
+    help = "Run background tasks from the database queue."
+
+    def add_arguments(self, parser):
+        """コマンドライン引数を定義する.
+
+        Args:
+            parser: 引数パーサー
+        """
+        parser.add_argument(
+            "--workers", type=int, help="Threads executing tasks in each process."
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Worker processes to fork (POSIX only).",
+        )
+        parser.add_argument(
+            "--drain",
+            action="store_true",
+            help="Exit once no task is ready instead of polling for new ones.",
+        )
+
+    def handle(self, *args, **options):
+        """ワーカーを起動し、停止するまで待つ.
+
+        Args:
+            *args: 可変長引数
+            **options: コマンドオプション
+        """
+        workers, drain = options["workers"], options["drain"]
+        if options["processes"] <= 1:
+            _run_worker(workers, drain)
+            return
+
+        # NOTE: 親プロセスの接続をフォーク先で共有しないよう閉じておく
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        children = [
+            context.Process(target=_run_worker, args=(workers, drain), daemon=False)
+            for _ in range(options["processes"])
+        ]
+        for child in children:
+            child.start()
+
+        def forward(signum, frame):
+            """停止のシグナルを子プロセスへ伝える."""
+            for child in children:
+                if child.is_alive():
+                    child.terminate()
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, forward)
+        for child in children:
+            child.join()
+        self.stdout.write(f"{len(children)} worker process(es) stopped")
@@ -0,0 +1,107 @@
+"""プロセス内のメトリクスレジストリ.
+
+リクエスト処理の途中で発生した事象（レート制限による拒否など）を
+ラベル付きのカウンターとして記録する。処理時間のような観測値は observe() で
+累積ヒストグラム（_bucket / _sum / _count のカウンター）として記録する。
+記録はロック1回の辞書更新のみで、データベースや外部サービスには一切アクセスしない。
+
+値はプロセスごとに保持されるため、複数ワーカー構成では
+ワーカーごとの値を収集側で合算する。
+"""
+
+import math
+import threading
+from collections import Counter
+from collections.abc import Sequence
+
+# NOTE: observe() の既定のバケット境界（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 120.0)
+
+
+class MetricsRegistry:
+    """ラベル付きカウンターの集合.
+
+    カウンターは (名前, ラベルの組) ごとに保持する。
+    """
+
+    def __init__(self) -> None:
+        """空のレジストリを初期化する."""
+        self._lock = threading.Lock()
+        self._counters: Counter[tuple[str, tuple[tuple[str, str], ...]]] = Counter()
+
+    def increment(self, name: str, amount: int = 1, **labels: str) -> None:
+        """カウンターを加算する.
+
+        Args:
+            name: カウンター名
+            amount: 加算量
+            **labels: カウンターを区別するラベル
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += amount
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        **labels: str,
+    ) -> None:
+        """観測値を累積ヒストグラムに記録する.
+
+        {name}_bucket は le ラベルの境界以下の観測数、{name}_sum は観測値の合計、
+        {name}_count は観測数を表す。
+
+        Args:
+            name: ヒストグラム名
+            value: 観測値
+            buckets: 昇順のバケット境界（最後に +Inf が加わる）
+            **labels: ヒストグラムを区別するラベル
+        """
+        base = tuple(sorted(labels.items()))
+        keys = [
+            (f"{name}_bucket", tuple(sorted({**labels, "le": le}.items())))
+            for bound, le in [(b, str(b)) for b in buckets] + [(math.inf, "+Inf")]
+            if value <= bound
+        ]
+        with self._lock:
+            for key in keys:
+                self._counters[key] += 1
+            self._counters[(f"{name}_sum", base)] += value
+            self._counters[(f"{name}_count", base)] += 1
+
+    def value(self, name: str, **labels: str) -> int:
+        """カウンターの現在値を返す.
+
+        Args:
+            name: カウンター名
+            **labels: カウンターを区別するラベル
+
+        Returns:
+            現在値（未記録の場合は0）
+        """
+        with self._lock:
+            return self._counters[(name, tuple(sorted(labels.items())))]
+
+    def snapshot(self) -> dict[str, list[dict]]:
+        """全カウンターの現在値を返す.
+
+        Returns:
+            カウンター名から {"labels": {...}, "value": n} のリストへの辞書
+            （名前とラベルの順に並べる）
+        """
+        with self._lock:
+            items = sorted(self._counters.items())
+        result: dict[str, list[dict]] = {}
+        for (name, labels), value in items:
+            result.setdefault(name, []).append({"labels": dict(labels), "value": value})
+        return result
+
+    def clear(self) -> None:
+        """全てのカウンターを破棄する."""
+        with self._lock:
+            self._counters.clear()
+
+
+metrics = MetricsRegistry()
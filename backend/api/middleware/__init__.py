@@ -0,0 +1 @@
+"""HTTP middleware for the API application."""
@@ -0,0 +1,256 @@
+"""Accept-Encodingに応じてレスポンスを圧縮するミドルウェア.
+
+gzipに加え、brotli / zstandard パッケージがインストールされていれば
+br / zstd でも圧縮する。クライアントのq値が最も高いエンコーディングを選び、
+同じq値の場合は設定 ENCODINGS の順序（サーバー側の優先度）で決める。
+
+圧縮するのはAPIのレスポンス（JSON・列指向表現・NDJSON）のみで、
+CSRFトークンなどの秘密を含みうるHTMLやテキストは対象にしない
+（圧縮後のサイズから秘密を推測するBREACH攻撃を避けるため）。
+
+ストリーミングレスポンスは、チャンクごとに圧縮ストリームへ追記して
+フラッシュしながら返すため、全体をメモリに載せずに圧縮できる。
+"""
+
+import gzip
+import re
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+DEFAULT_COMPRESSION_SETTINGS = {
+    "ENABLED": True,
+    "MIN_SIZE": 1024,
+    "ENCODINGS": ["zstd", "br", "gzip"],
+    "LEVELS": {"gzip": 6, "br": 5, "zstd": 3},
+    "CONTENT_TYPES": [
+        "application/json",
+        "application/vnd.modern-board.",
+        "application/x-ndjson",
+    ],
+}
+
+_STRONG_ETAG = re.compile(r'^"')
+
+
+def get_compression_settings() -> dict:
+    """デフォルト値をマージしたレスポンス圧縮設定を返す.
+
+    Returns:
+        settings.RESPONSE_COMPRESSION にデフォルト値を補完した辞書
+    """
+    return {
+        **DEFAULT_COMPRESSION_SETTINGS,
+        **getattr(settings, "RESPONSE_COMPRESSION", {}),
+    }
+
+
+def _compress_zstd(data: bytes, level: int) -> bytes:
+    """zstdで圧縮する.
+
+    Args:
+        data: 圧縮するデータ
+        level: 圧縮レベル
+
+    Returns:
+        圧縮済みデータ
+    """
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def available_codecs() -> dict[str, Callable[[bytes, int], bytes]]:
+    """利用可能なエンコーディングと圧縮関数を返す.
+
+    Returns:
+        Content-Encodingの値から (データ, レベル) を受け取る圧縮関数への辞書
+    """
+    codecs = {"gzip": lambda data, level: gzip.compress(data, level, mtime=0)}
+    if brotli is not None:
+        codecs["br"] = lambda data, level: brotli.compress(data, quality=level)
+    if zstandard is not None:
+        codecs["zstd"] = _compress_zstd
+    return codecs
+
+
+def compress_stream(
+    chunks: Iterable[bytes], encoding: str, level: int
+) -> Iterator[bytes]:
+    """チャンクを1つの圧縮ストリームとして逐次圧縮する.
+
+    チャンクごとにフラッシュし、元のチャンクを受け取った時点で
+    クライアントが展開できるデータを送り出す。
+
+    Args:
+        chunks: 圧縮前のチャンク
+        encoding: Content-Encodingの値（available_codecs() のキー）
+        level: 圧縮レベル
+
+    Yields:
+        圧縮済みのチャンク
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        process, flush, finish = (
+            compressor.process,
+            compressor.flush,
+            compressor.finish,
+        )
+    elif encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        process, finish = compressor.compress, compressor.flush
+
+        def flush():
+            return compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    else:
+        # NOTE: wbits=31 でgzipのヘッダーとトレーラーを付ける（mtimeは0）
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+
+        def flush():
+            return compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    for chunk in chunks:
+        data = process(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+def negotiate_encoding(accept_encoding: str, encodings: list[str]) -> str | None:
+    """Accept-Encodingヘッダーから使用するエンコーディングを選ぶ.
+
+    Args:
+        accept_encoding: Accept-Encodingヘッダーの値
+        encodings: サーバーが対応するエンコーディング（優先度順）
+
+    Returns:
+        q値が最も高いエンコーディング。対応するものがなければNone
+    """
+    preferences: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        preferences[token] = quality
+
+    wildcard = preferences.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = preferences.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """レスポンスをgzip / br / zstdで圧縮するミドルウェア.
+
+    Attributes:
+        get_response: 次のミドルウェアまたはビューを呼び出す関数
+    """
+
+    def __init__(self, get_response):
+        """ミドルウェアを初期化する.
+
+        Args:
+            get_response: 次のミドルウェアまたはビューを呼び出す関数
+        """
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """レスポンスを取得し、条件を満たす場合は圧縮する.
+
+        Args:
+            request: HTTPリクエスト
+
+        Returns:
+            HTTPレスポンス（圧縮済みの場合はContent-Encodingを付与）
+        """
+        response = self.get_response(request)
+        config = get_compression_settings()
+        if (
+            not config["ENABLED"]
+            or response.has_header("Content-Encoding")
+            or not self._is_compressible(response, config["CONTENT_TYPES"])
+            # NOTE: 非同期のストリーミングレスポンスは対象外
+            or getattr(response, "is_async", False)
+            or (not response.streaming and len(response.content) < config["MIN_SIZE"])
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        codecs = available_codecs()
+        encoding = negotiate_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""),
+            [name for name in config["ENCODINGS"] if name in codecs],
+        )
+        if encoding is None:
+            return response
+        level = config["LEVELS"].get(
+            encoding, DEFAULT_COMPRESSION_SETTINGS["LEVELS"][encoding]
+        )
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding, level
+            )
+            del response.headers["Content-Length"]
+            self._mark_encoded(response, encoding)
+            return response
+
+        compressed = codecs[encoding](response.content, level)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        self._mark_encoded(response, encoding)
+        return response
+
+    @staticmethod
+    def _mark_encoded(response, encoding: str) -> None:
+        """圧縮済みのレスポンスのヘッダーを設定する.
+
+        Args:
+            response: HTTPレスポンス
+            encoding: 使用したエンコーディング
+        """
+        response.headers["Content-Encoding"] = encoding
+        # NOTE: 圧縮後のボディはバイト単位で異なるため、強いETagは弱いETagにする
+        if response.has_header("ETag"):
+            response.headers["ETag"] = _STRONG_ETAG.sub('W/"', response.headers["ETag"])
+
+    @staticmethod
+    def _is_compressible(response, content_types: list[str]) -> bool:
+        """Content-Typeが圧縮対象かどうかを判定する.
+
+        Args:
+            response: HTTPレスポンス
+            content_types: 圧縮対象のContent-Typeの前方一致リスト
+
+        Returns:
+            圧縮対象であればTrue
+        """
+        content_type = response.get("Content-Type", "").lower()
+        return content_type.startswith(tuple(content_types))
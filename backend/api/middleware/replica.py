@@ -0,0 +1,123 @@
+"""レプリカ読み取りとread-your-writesを制御するミドルウェア.
+
+PATH_PREFIXES 配下（API）への安全なHTTPメソッドのリクエストでのみ
+レプリカ読み取りを許可する。管理画面やWagtailのページは常にプライマリから読む。
+書き込みに成功したクライアントには短時間有効なCookieを付与し、
+その間の読み取りをプライマリに固定することで自分の投稿が必ず見えるようにする。
+
+POSTで受け付けるが読み取りしか行わないビュー（バッチリクエストなど）は
+replica_safe デコレーターを付けることで安全なメソッドと同様に扱う。
+"""
+
+import time
+
+from api.db.routers import get_replication_settings, pin_to_primary, replica_reads
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def replica_safe(view):
+    """書き込みを行わないビューであることを示すデコレーター.
+
+    Args:
+        view: ビュー関数
+
+    Returns:
+        マークを付けたビュー関数
+    """
+    view.replica_safe = True
+    return view
+
+
+class ReplicaPinningMiddleware:
+    """リクエスト単位でレプリカ読み取りの可否を決定するミドルウェア.
+
+    Attributes:
+        get_response: 次のミドルウェアまたはビューを呼び出す関数
+    """
+
+    def __init__(self, get_response):
+        """ミドルウェアを初期化する.
+
+        Args:
+            get_response: 次のミドルウェアまたはビューを呼び出す関数
+        """
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """リクエストを処理し、必要に応じてプライマリ固定Cookieを付与する.
+
+        Args:
+            request: HTTPリクエスト
+
+        Returns:
+            HTTPレスポンス
+        """
+        config = get_replication_settings()
+        if not config["REPLICAS"]:
+            return self.get_response(request)
+
+        cookie_name = config["PIN_COOKIE_NAME"]
+        is_safe = request.method in SAFE_METHODS
+        pinned = (
+            not is_safe
+            or not request.path.startswith(tuple(config["PATH_PREFIXES"]))
+            or self._is_pinned(request.COOKIES.get(cookie_name))
+        )
+
+        with replica_reads(pinned=pinned):
+            response = self.get_response(request)
+
+        replica_safe_view = getattr(request, "replica_safe", False)
+        if not is_safe and not replica_safe_view and response.status_code < 400:
+            pin_seconds = config["PIN_SECONDS"]
+            response.set_cookie(
+                cookie_name,
+                str(time.time() + pin_seconds),
+                max_age=pin_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """replica_safeなビューでは安全なメソッドと同様にレプリカ読み取りを許可する.
+
+        Args:
+            request: HTTPリクエスト
+            view_func: 呼び出されるビュー関数
+            view_args: ビューの位置引数
+            view_kwargs: ビューのキーワード引数
+
+        Returns:
+            None（ビューの呼び出しを継続する）
+        """
+        config = get_replication_settings()
+        if (
+            config["REPLICAS"]
+            and request.method not in SAFE_METHODS
+            and request.path.startswith(tuple(config["PATH_PREFIXES"]))
+            and getattr(view_func, "replica_safe", False)
+        ):
+            request.replica_safe = True
+            pin_to_primary(
+                self._is_pinned(request.COOKIES.get(config["PIN_COOKIE_NAME"]))
+            )
+        return None
+
+    @staticmethod
+    def _is_pinned(cookie_value: str | None) -> bool:
+        """Cookieの有効期限内かどうかを判定する.
+
+        Args:
+            cookie_value: プライマリ固定Cookieの値（UNIX時刻）
+
+        Returns:
+            有効期限内であればTrue
+        """
+        if not cookie_value:
+            return False
+        try:
+            return float(cookie_value) > time.time()
+        except ValueError:
+            return False
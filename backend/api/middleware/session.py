@@ -0,0 +1,110 @@
+"""匿名ユーザーセッションを解決するミドルウェア.
+
+署名付きCookieのsession_idを検証し、request.user_session に
+UserSession を遅延評価で設定する。セッションの参照・作成は
+request.user_session に初めてアクセスした時点で行うため、
+閲覧だけのリクエストでセッションが作られることはない。
+
+有効なCookieが無いリクエストでは request.user_session はNoneとし、
+書き込み（安全でないメソッド）のレスポンスで新しいsession_idのCookieを
+発行するだけで、データベースには保存しない。セッションの行は、発行した
+Cookieを送り返してきたリクエストで参照された時点で、そのsession_idで作成する。
+Cookieを保持しないクライアントが書き込みのたびにセッションの行を
+増やすことはない（このようなクライアントのレート制限はIPアドレス単位になる）。
+
+request.user_session_key には検証済みのCookieのsession_id
+（無い場合はNone）を設定する。セッションを特定するだけであれば
+こちらを使うことでデータベースやキャッシュへのアクセスを避けられる。
+"""
+
+import uuid
+
+from django.utils.functional import SimpleLazyObject
+
+from api.services.sessions import (
+    activity_buffer,
+    get_anonymous_session_settings,
+    session_directory,
+)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class AnonymousSessionMiddleware:
+    """request.user_session を設定し、アクティビティを記録するミドルウェア.
+
+    Attributes:
+        get_response: 次のミドルウェアまたはビューを呼び出す関数
+    """
+
+    def __init__(self, get_response):
+        """ミドルウェアを初期化する.
+
+        Args:
+            get_response: 次のミドルウェアまたはビューを呼び出す関数
+        """
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """セッションを設定してリクエストを処理する.
+
+        Args:
+            request: HTTPリクエスト
+
+        Returns:
+            HTTPレスポンス（Cookieの無い書き込みの場合はCookieを付与）
+        """
+        config = get_anonymous_session_settings()
+        session_key = self._read_cookie(request, config)
+        request.user_session_key = session_key
+
+        if session_key is None:
+            request.user_session = None
+            response = self.get_response(request)
+            if request.method not in SAFE_METHODS:
+                response.set_signed_cookie(
+                    config["COOKIE_NAME"],
+                    str(uuid.uuid4()),
+                    salt=config["COOKIE_SALT"],
+                    max_age=config["COOKIE_AGE"],
+                    secure=request.is_secure(),
+                    httponly=True,
+                    samesite="Lax",
+                )
+            return response
+
+        def resolve():
+            # NOTE: 署名付きCookieのsession_idはこのサーバーが発行したものなので、
+            # 行が無ければ（初回の送り返し、または削除済みのセッション）同じIDで作る
+            return session_directory.get(session_key) or session_directory.create(
+                session_key
+            )
+
+        request.user_session = SimpleLazyObject(resolve)
+        response = self.get_response(request)
+        activity_buffer.touch(session_key)
+        return response
+
+    @staticmethod
+    def _read_cookie(request, config: dict) -> str | None:
+        """署名を検証したCookieのsession_idを返す.
+
+        Args:
+            request: HTTPリクエスト
+            config: 匿名セッション設定
+
+        Returns:
+            session_id（Cookieが無いか署名が不正な場合None）
+        """
+        value = request.get_signed_cookie(
+            config["COOKIE_NAME"],
+            default=None,
+            salt=config["COOKIE_SALT"],
+            max_age=config["COOKIE_AGE"],
+        )
+        if not value:
+            return None
+        try:
+            return str(uuid.UUID(value))
+        except ValueError:
+            return None
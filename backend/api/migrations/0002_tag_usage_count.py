@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_usage_count(apps, schema_editor):
+    """既存のタグ付けからusage_countを1回のUPDATEで埋める."""
+    Tag = apps.get_model("api", "Tag")
+    ThreadTag = apps.get_model("api", "Thread").tags.through
+    counts = (
+        ThreadTag.objects.filter(tag_id=OuterRef("pk"))
+        .order_by()
+        .values("tag_id")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    Tag.objects.update(usage_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tag",
+            name="usage_count",
+            field=models.IntegerField(
+                default=0, help_text="Number of threads with this tag"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tag",
+            index=models.Index(
+                fields=["-usage_count", "name"], name="board_tag_usage_c_b7f804_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_usage_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0002_tag_usage_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tag",
+            name="trend_score",
+            field=models.FloatField(
+                default=0.0, help_text="Log of exponentially decayed recent activity"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tag",
+            index=models.Index(
+                fields=["-trend_score"], name="board_tag_trend_s_05b8f1_idx"
+            ),
+        ),
+    ]
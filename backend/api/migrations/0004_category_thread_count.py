@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_thread_count(apps, schema_editor):
+    """既存のスレッドからthread_countを1回のUPDATEで埋める."""
+    Category = apps.get_model("api", "Category")
+    Thread = apps.get_model("api", "Thread")
+    counts = (
+        Thread.objects.filter(category_id=OuterRef("pk"))
+        .order_by()
+        .values("category_id")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    Category.objects.update(thread_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0003_tag_trend_score"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="thread_count",
+            field=models.IntegerField(
+                default=0, help_text="Number of threads in this category"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="thread",
+            index=models.Index(
+                fields=["category", "-created_at"],
+                name="board_threa_categor_381225_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_thread_count, migrations.RunPython.noop),
+    ]
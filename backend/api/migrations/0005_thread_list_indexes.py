@@ -0,0 +1,109 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:22
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0004_category_thread_count"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="thread",
+            name="board_threa_created_a5b76d_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="thread",
+            name="board_threa_momentu_4923f0_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="thread",
+            name="board_threa_categor_b427d9_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="thread",
+            name="board_threa_categor_381225_idx",
+        ),
+        migrations.AddIndex(
+            model_name="thread",
+            index=models.Index(
+                fields=["-is_pinned", "-last_post_at", "-id"],
+                name="board_thread_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="thread",
+            index=models.Index(
+                fields=["category", "-is_pinned", "-last_post_at", "-id"],
+                name="board_thread_cat_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="thread",
+            index=models.Index(
+                fields=["-momentum", "-id"], name="board_thread_momentum_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="thread",
+            index=models.Index(
+                fields=["category", "-momentum", "-id"],
+                name="board_thread_cat_momentum_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="thread",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="board_thread_new_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="thread",
+            index=models.Index(
+                fields=["category", "-created_at", "-id"],
+                name="board_thread_cat_new_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="thread",
+            index=models.Index(
+                fields=["-post_count", "-id"], name="board_thread_posts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="thread",
+            index=models.Index(
+                fields=["category", "-post_count", "-id"],
+                name="board_thread_cat_posts_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="thread",
+            index=models.Index(
+                models.OrderBy(
+                    django.db.models.expressions.CombinedExpression(
+                        models.F("view_count"), "+", models.F("post_count")
+                    ),
+                    descending=True,
+                ),
+                models.OrderBy(models.F("id"), descending=True),
+                name="board_thread_popular_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="thread",
+            index=models.Index(
+                models.F("category"),
+                models.OrderBy(
+                    django.db.models.expressions.CombinedExpression(
+                        models.F("view_count"), "+", models.F("post_count")
+                    ),
+                    descending=True,
+                ),
+                models.OrderBy(models.F("id"), descending=True),
+                name="board_thread_cat_popular_idx",
+            ),
+        ),
+    ]
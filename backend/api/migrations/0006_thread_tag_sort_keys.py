@@ -0,0 +1,117 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:24
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_sort_keys(apps, schema_editor):
+    """既存のタグ付けにスレッドの並び替えキーを1回のUPDATEで写す."""
+    Thread = apps.get_model("api", "Thread")
+    ThreadTag = apps.get_model("api", "ThreadTag")
+    threads = Thread.objects.filter(pk=OuterRef("thread_id"))
+    ThreadTag.objects.update(
+        last_post_at=Subquery(
+            threads.values(activity=Coalesce("last_post_at", "created_at"))
+        ),
+        momentum=Subquery(threads.values("momentum")),
+        is_pinned=Subquery(threads.values("is_pinned")),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0005_thread_list_indexes"),
+    ]
+
+    # NOTE: 既存の自動生成中間テーブル（board_thread_tags）をそのまま
+    # 明示的な中間モデルとして引き継ぎ、並び替えキーの列だけを追加する
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="ThreadTag",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "tag",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="api.tag",
+                            ),
+                        ),
+                        (
+                            "thread",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="api.thread",
+                            ),
+                        ),
+                    ],
+                    options={
+                        "verbose_name": "Thread tag",
+                        "verbose_name_plural": "Thread tags",
+                        "db_table": "board_thread_tags",
+                        "unique_together": {("thread", "tag")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="thread",
+                    name="tags",
+                    field=models.ManyToManyField(
+                        blank=True,
+                        related_name="threads",
+                        through="api.ThreadTag",
+                        to="api.tag",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="threadtag",
+            name="last_post_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                help_text="Copy of the thread's last post time (creation time if none)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="threadtag",
+            name="momentum",
+            field=models.FloatField(
+                default=0.0, help_text="Copy of the thread's momentum score"
+            ),
+        ),
+        migrations.AddField(
+            model_name="threadtag",
+            name="is_pinned",
+            field=models.BooleanField(
+                default=False, help_text="Copy of the thread's pinned flag"
+            ),
+        ),
+        migrations.RunPython(backfill_sort_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="threadtag",
+            index=models.Index(
+                fields=["tag", "-last_post_at", "-thread"],
+                name="board_thread_tags_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="threadtag",
+            index=models.Index(
+                fields=["tag", "-momentum", "-thread"],
+                name="board_thread_tags_moment_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_thread_tag_sort_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post.created', 'Post Created'), ('post.deleted', 'Post Deleted'), ('thread.created', 'Thread Created'), ('thread.updated', 'Thread Updated'), ('thread.pinned', 'Thread Pinned'), ('thread.locked', 'Thread Locked'), ('thread.deleted', 'Thread Deleted'), ('reaction.created', 'Reaction Created'), ('reaction.deleted', 'Reaction Deleted')], max_length=32)),
+                ('object_id', models.BigIntegerField(help_text='ID of the affected row')),
+                ('thread_id', models.BigIntegerField(blank=True, help_text='Thread the affected row belongs to', null=True)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Board event',
+                'verbose_name_plural': 'Board events',
+                'db_table': 'board_event',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ConsumerOffset',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('position', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Consumer offset',
+                'verbose_name_plural': 'Consumer offsets',
+                'db_table': 'board_event_offset',
+            },
+        ),
+    ]
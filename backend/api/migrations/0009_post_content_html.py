@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_background_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='content_html',
+            field=models.TextField(blank=True, default='', help_text='Sanitized HTML rendered from content'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='render_version',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Renderer version content_html was produced with'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['render_version', 'id'], name='board_post_render_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_post_content_html'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['thread', 'reply_to'], name='board_post_reply_idx'),
+        ),
+    ]
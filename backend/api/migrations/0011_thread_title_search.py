@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:22
+
+from django.db import migrations
+
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE board_thread_title_fts USING fts5("
+    "title, content='board_thread', content_rowid='id', tokenize='trigram')",
+    "INSERT INTO board_thread_title_fts(board_thread_title_fts) VALUES ('rebuild')",
+    "CREATE TRIGGER board_thread_title_fts_ai AFTER INSERT ON board_thread BEGIN"
+    " INSERT INTO board_thread_title_fts(rowid, title) VALUES (new.id, new.title);"
+    " END",
+    "CREATE TRIGGER board_thread_title_fts_ad AFTER DELETE ON board_thread BEGIN"
+    " INSERT INTO board_thread_title_fts(board_thread_title_fts, rowid, title)"
+    " VALUES ('delete', old.id, old.title);"
+    " END",
+    "CREATE TRIGGER board_thread_title_fts_au AFTER UPDATE OF title ON board_thread"
+    " BEGIN"
+    " INSERT INTO board_thread_title_fts(board_thread_title_fts, rowid, title)"
+    " VALUES ('delete', old.id, old.title);"
+    " INSERT INTO board_thread_title_fts(rowid, title) VALUES (new.id, new.title);"
+    " END",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS board_thread_title_fts_au",
+    "DROP TRIGGER IF EXISTS board_thread_title_fts_ad",
+    "DROP TRIGGER IF EXISTS board_thread_title_fts_ai",
+    "DROP TABLE IF EXISTS board_thread_title_fts",
+]
+
+# NOTE: icontains は UPPER("title"::text) LIKE UPPER(...) になるため、同じ式に張る
+POSTGRESQL_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX board_thread_title_trgm_idx ON board_thread"
+    " USING gin (UPPER(title::text) gin_trgm_ops)",
+]
+
+POSTGRESQL_DROP = ["DROP INDEX IF EXISTS board_thread_title_trgm_idx"]
+
+
+def _execute(schema_editor, statements):
+    """データベースに応じたSQLを実行する."""
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_title_search(apps, schema_editor):
+    """タイトルの部分一致検索用の全文検索インデックスを作成する."""
+    _execute(
+        schema_editor, {"sqlite": SQLITE_CREATE, "postgresql": POSTGRESQL_CREATE}
+    )
+
+
+def drop_title_search(apps, schema_editor):
+    """タイトルの部分一致検索用の全文検索インデックスを削除する."""
+    _execute(schema_editor, {"sqlite": SQLITE_DROP, "postgresql": POSTGRESQL_DROP})
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0010_post_reply_index"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="thread",
+            name="board_thread_cat_momentum_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="thread",
+            name="board_thread_posts_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="thread",
+            name="board_thread_cat_posts_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="thread",
+            name="board_thread_popular_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="thread",
+            name="board_thread_cat_popular_idx",
+        ),
+        migrations.RunPython(create_title_search, drop_title_search),
+    ]
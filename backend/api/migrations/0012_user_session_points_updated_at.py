@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_thread_title_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usersession',
+            name='points_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(fields=['points_updated_at'], name='board_user__points__e1e11b_idx'),
+        ),
+    ]
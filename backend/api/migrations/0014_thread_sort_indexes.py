@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:01
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_consumer_offset_gaps'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['category', '-momentum', '-id'], name='board_thread_cat_momentum_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-post_count', '-id'], name='board_thread_posts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['category', '-post_count', '-id'], name='board_thread_cat_posts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('view_count'), '+', models.F('post_count')), descending=True), models.OrderBy(models.F('id'), descending=True), name='board_thread_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(models.F('category'), models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('view_count'), '+', models.F('post_count')), descending=True), models.OrderBy(models.F('id'), descending=True), name='board_thread_cat_popular_idx'),
+        ),
+    ]
@@ -1,17 +1,24 @@
 """Models for the API application."""
 
+from .background_task import BackgroundTask
+from .board_event import BoardEvent, ConsumerOffset
 from .category import Category
 from .post import Post
 from .reaction import Reaction
 from .tag import Tag
 from .thread import Thread
+from .thread_tag import ThreadTag
 from .user_session import UserSession
 
 __all__ = [
+    "BackgroundTask",
+    "BoardEvent",
     "Category",
+    "ConsumerOffset",
     "Post",
     "Reaction",
     "Tag",
     "Thread",
+    "ThreadTag",
     "UserSession",
 ]
@@ -0,0 +1,81 @@
+"""バックグラウンドで実行するタスクのキューのモデル.
+
+リクエストの処理中に行う必要のない処理（勢いの再計算や周期的な後片付けなど）は
+このテーブルに1行追加し、manage.py run_tasks のワーカーが取り出して実行する。
+外部のメッセージブローカーは使わない。
+"""
+
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class BackgroundTask(models.Model):
+    """キューに積まれたタスクの1件.
+
+    Attributes:
+        name: 実行する関数のドットパス
+        kwargs: 関数に渡すキーワード引数
+        key: 重複排除のキー（同じキーの待機中のタスクは1件だけ）
+        status: 状態（待機中・実行中・成功・失敗）
+        run_at: 実行可能になる日時
+        attempts: 実行を開始した回数
+        max_attempts: 失敗時に再試行する上限の回数
+        claimed_by: 実行中のワーカーが取り出し時に付けた識別子
+        claimed_at: ワーカーが取り出した日時
+        finished_at: 成功または失敗が確定した日時
+        last_error: 最後の失敗の内容
+        created_at: 登録日時
+    """
+
+    class Status(models.TextChoices):
+        """タスクの状態."""
+
+        PENDING = "pending"
+        RUNNING = "running"
+        SUCCEEDED = "succeeded"
+        FAILED = "failed"
+
+    name = models.CharField(max_length=200, help_text="Dotted path of the function")
+    kwargs = models.JSONField(default=dict, blank=True)
+    key = models.CharField(
+        max_length=200,
+        null=True,
+        blank=True,
+        help_text="At most one pending task may hold the same key",
+    )
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.PENDING
+    )
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "board_task"
+        ordering = ["run_at", "id"]
+        verbose_name = "Background task"
+        verbose_name_plural = "Background tasks"
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="board_task_queue_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["key"],
+                condition=Q(status="pending"),
+                name="board_task_pending_key_uniq",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        """タスクの文字列表現を返す.
+
+        Returns:
+            ID、関数のドットパスと状態
+        """
+        return f"#{self.pk} {self.name} ({self.status})"
@@ -0,0 +1,90 @@
+"""掲示板への書き込みを記録するイベントログのモデル.
+
+投稿・スレッド・リアクションへの書き込みは、同じトランザクションで
+BoardEvent を1行追記する（トランザクショナルアウトボックス）。
+集計値やフィードなどの派生データは、このログをコンシューマーが
+自分のオフセット（ConsumerOffset）から順に読み進めて更新する。
+"""
+
+from django.db import models
+from django.utils import timezone
+
+
+class BoardEvent(models.Model):
+    """追記専用のイベントログの1件.
+
+    主キーがログ内の位置で、コンシューマーは主キーの昇順に読む。
+    削除された対象のイベントも残るよう、対象は外部キーではなくIDで持つ。
+
+    Attributes:
+        kind: イベントの種類（例: post.created）
+        object_id: イベントの対象（投稿・スレッド・リアクション）のID
+        thread_id: 対象が属するスレッドのID（並列リプレイの分割キー）
+        payload: 派生データの再構築に必要な対象の値
+        created_at: 記録日時
+    """
+
+    class Kind(models.TextChoices):
+        """イベントの種類."""
+
+        POST_CREATED = "post.created"
+        POST_DELETED = "post.deleted"
+        THREAD_CREATED = "thread.created"
+        THREAD_UPDATED = "thread.updated"
+        THREAD_PINNED = "thread.pinned"
+        THREAD_LOCKED = "thread.locked"
+        THREAD_DELETED = "thread.deleted"
+        REACTION_CREATED = "reaction.created"
+        REACTION_DELETED = "reaction.deleted"
+
+    kind = models.CharField(max_length=32, choices=Kind.choices)
+    object_id = models.BigIntegerField(help_text="ID of the affected row")
+    thread_id = models.BigIntegerField(
+        null=True, blank=True, help_text="Thread the affected row belongs to"
+    )
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "board_event"
+        ordering = ["id"]
+        verbose_name = "Board event"
+        verbose_name_plural = "Board events"
+
+    def __str__(self) -> str:
+        """イベントの文字列表現を返す.
+
+        Returns:
+            ログ内の位置と種類、対象のID
+        """
+        return f"#{self.pk} {self.kind} {self.object_id}"
+
+
+class ConsumerOffset(models.Model):
+    """コンシューマーごとのイベントログの読み取り位置.
+
+    Attributes:
+        name: コンシューマー名（settings.BOARD_EVENTS["CONSUMERS"] のキー）
+        position: 処理済みの最後のイベントの主キー
+        gaps: position より手前で、まだコミットされていなかったイベントの
+            主キーと、その直後のイベントの記録時刻（UNIX時刻）の組のリスト
+        updated_at: 最終更新日時
+    """
+
+    name = models.CharField(max_length=100, primary_key=True)
+    position = models.BigIntegerField(default=0)
+    gaps = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "board_event_offset"
+        verbose_name = "Consumer offset"
+        verbose_name_plural = "Consumer offsets"
+
+    def __str__(self) -> str:
+        """読み取り位置の文字列表現を返す.
+
+        Returns:
+            コンシューマー名と位置
+        """
+        return f"{self.name} @ {self.position}"
@@ -18,6 +18,8 @@ class Category(models.Model):
         slug: URL用のスラッグ（例: programming, chat）
         description: カテゴリの説明文
         display_order: 表示順序（昇順）
+        thread_count: このカテゴリに属するスレッド数
+            （api.signals がスレッドの作成・移動・削除に合わせて更新する）
         created_at: 作成日時
         updated_at: 更新日時
     """
@@ -28,6 +30,9 @@ class Category(models.Model):
     display_order = models.IntegerField(
         default=0, help_text="Display order on the board"
     )
+    thread_count = models.IntegerField(
+        default=0, help_text="Number of threads in this category"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -17,6 +17,8 @@ class Post(models.Model):
         thread: 所属スレッド（削除時はカスケード削除）
         author_session: 投稿者のセッション（削除時はNULLに設定）
         content: 投稿本文
+        content_html: 本文を表示用にレンダリングしたHTML（api.services.rendering）
+        render_version: content_html をレンダリングしたレンダラーのバージョン
         post_number: スレッド内のレス番号（1から始まる連番）
         reply_to: 返信元のレス（アンカー機能用）
         is_op: 最初の投稿（OP）かどうか
@@ -33,6 +35,12 @@ class Post(models.Model):
         related_name="posts",
     )
     content = models.TextField()
+    content_html = models.TextField(
+        blank=True, default="", help_text="Sanitized HTML rendered from content"
+    )
+    render_version = models.PositiveSmallIntegerField(
+        default=0, help_text="Renderer version content_html was produced with"
+    )
     post_number = models.IntegerField(
         help_text="Sequential number within the thread (e.g., >>123)"
     )
@@ -59,6 +67,8 @@ class Post(models.Model):
         indexes = [
             models.Index(fields=["thread", "post_number"]),
             models.Index(fields=["-created_at"]),
+            models.Index(fields=["render_version", "id"], name="board_post_render_idx"),
+            models.Index(fields=["thread", "reply_to"], name="board_post_reply_idx"),
         ]
 
     def __str__(self) -> str:
@@ -16,11 +16,21 @@ class Tag(models.Model):
     Attributes:
         name: タグ名（例: Python, React, 初心者向け）
         slug: URL用のスラッグ（例: python, react, beginner）
+        usage_count: このタグが付けられているスレッド数
+            （api.signals がタグ付けとスレッド削除に合わせて更新する）
+        trend_score: 指数減衰させた最近の活動量の対数
+            （api.services.trending が投稿・タグ付けのたびに加算する）
         created_at: 作成日時
     """
 
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=50, unique=True)
+    usage_count = models.IntegerField(
+        default=0, help_text="Number of threads with this tag"
+    )
+    trend_score = models.FloatField(
+        default=0.0, help_text="Log of exponentially decayed recent activity"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -28,6 +38,10 @@ class Tag(models.Model):
         ordering = ["name"]
         verbose_name = "Tag"
         verbose_name_plural = "Tags"
+        indexes = [
+            models.Index(fields=["-usage_count", "name"]),
+            models.Index(fields=["-trend_score"]),
+        ]
 
     def __str__(self) -> str:
         """タグの文字列表現を返す.
@@ -5,6 +5,7 @@
 """
 
 from django.db import models
+from django.db.models import F
 
 
 class Thread(models.Model):
@@ -16,7 +17,7 @@ class Thread(models.Model):
     Attributes:
         title: スレッドタイトル（最大200文字）
         category: 所属カテゴリ（削除時はカスケード削除）
-        tags: 関連付けられたタグ（多対多）
+        tags: 関連付けられたタグ（多対多、中間モデルはThreadTag）
         author_session: 作成者のセッション（削除時はNULLに設定）
         post_count: レス数（投稿のたびに更新）
         view_count: 閲覧数（詳細画面表示のたびにインクリメント）
@@ -32,7 +33,9 @@ class Thread(models.Model):
     category = models.ForeignKey(
         "Category", on_delete=models.CASCADE, related_name="threads"
     )
-    tags = models.ManyToManyField("Tag", blank=True, related_name="threads")
+    tags = models.ManyToManyField(
+        "Tag", blank=True, related_name="threads", through="ThreadTag"
+    )
     author_session = models.ForeignKey(
         "UserSession",
         on_delete=models.SET_NULL,
@@ -56,10 +59,50 @@ class Thread(models.Model):
         ordering = ["-is_pinned", "-last_post_at"]
         verbose_name = "Thread"
         verbose_name_plural = "Threads"
+        # NOTE: 一覧の並び順（api.v1.threads.filters.THREAD_SORTS）ごとに、
+        # 全体用とカテゴリ絞り込み用の2本を用意し、ソートをインデックス順の
+        # 走査だけで済ませる。レス数順・人気順のインデックスは投稿・閲覧の
+        # UPDATEのたびに書き換わるが、一覧のたびのソートより安いため持つ。
+        # 末尾の -id は同値の並びを固定するためのもの。
+        # タイトル検索用の全文検索インデックスはマイグレーション 0011 で作成する
+        # （SQLite: FTS5 trigram の仮想テーブル、PostgreSQL: pg_trgm のGIN）。
+        # SQLiteでは board_thread を作り直すマイグレーションで同期用の
+        # トリガーが消えるため、その場合は 0011 のトリガーを作り直すこと。
         indexes = [
-            models.Index(fields=["-created_at"]),
-            models.Index(fields=["-momentum"]),
-            models.Index(fields=["category", "-last_post_at"]),
+            models.Index(
+                fields=["-is_pinned", "-last_post_at", "-id"],
+                name="board_thread_active_idx",
+            ),
+            models.Index(
+                fields=["category", "-is_pinned", "-last_post_at", "-id"],
+                name="board_thread_cat_active_idx",
+            ),
+            models.Index(fields=["-momentum", "-id"], name="board_thread_momentum_idx"),
+            models.Index(
+                fields=["category", "-momentum", "-id"],
+                name="board_thread_cat_momentum_idx",
+            ),
+            models.Index(fields=["-created_at", "-id"], name="board_thread_new_idx"),
+            models.Index(
+                fields=["category", "-created_at", "-id"],
+                name="board_thread_cat_new_idx",
+            ),
+            models.Index(fields=["-post_count", "-id"], name="board_thread_posts_idx"),
+            models.Index(
+                fields=["category", "-post_count", "-id"],
+                name="board_thread_cat_posts_idx",
+            ),
+            models.Index(
+                (F("view_count") + F("post_count")).desc(),
+                F("id").desc(),
+                name="board_thread_popular_idx",
+            ),
+            models.Index(
+                F("category"),
+                (F("view_count") + F("post_count")).desc(),
+                F("id").desc(),
+                name="board_thread_cat_popular_idx",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -0,0 +1,61 @@
+"""スレッドとタグの関連モデル.
+
+Thread.tags の中間テーブルで、タグごとのスレッド一覧を
+スレッドテーブルと結合せずに並べ替えられるよう、
+スレッドの並び替えキーの写しを持つ。
+"""
+
+from django.db import models
+from django.utils import timezone
+
+
+class ThreadTag(models.Model):
+    """スレッドへのタグ付けを表すモデル.
+
+    並び替えキーはスレッドの値の写しで、api.services.thread_tags が
+    スレッドの保存・投稿の取り込み・タグ付けに合わせて同期する。
+
+    Attributes:
+        thread: タグ付けされたスレッド（削除時はカスケード削除）
+        tag: 付けられたタグ（削除時はカスケード削除）
+        last_post_at: スレッドの最終投稿日時（投稿がない場合は作成日時）
+        momentum: スレッドの勢いスコア
+        is_pinned: スレッドのピン留めフラグ
+    """
+
+    thread = models.ForeignKey("Thread", on_delete=models.CASCADE)
+    tag = models.ForeignKey("Tag", on_delete=models.CASCADE)
+    last_post_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Copy of the thread's last post time (creation time if none)",
+    )
+    momentum = models.FloatField(
+        default=0.0, help_text="Copy of the thread's momentum score"
+    )
+    is_pinned = models.BooleanField(
+        default=False, help_text="Copy of the thread's pinned flag"
+    )
+
+    class Meta:
+        db_table = "board_thread_tags"
+        verbose_name = "Thread tag"
+        verbose_name_plural = "Thread tags"
+        unique_together = [["thread", "tag"]]
+        indexes = [
+            models.Index(
+                fields=["tag", "-last_post_at", "-thread"],
+                name="board_thread_tags_recent_idx",
+            ),
+            models.Index(
+                fields=["tag", "-momentum", "-thread"],
+                name="board_thread_tags_moment_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        """タグ付けの文字列表現を返す.
+
+        Returns:
+            スレッドIDとタグIDの組み合わせ
+        """
+        return f"Thread #{self.thread_id} tagged #{self.tag_id}"
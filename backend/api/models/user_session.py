@@ -24,6 +24,7 @@ class UserSession(models.Model):
         level: レベル（ポイントから計算）
         created_at: セッション作成日時
         last_activity_at: 最終アクティビティ日時
+        points_updated_at: total_points を最後に更新した日時（ランキング用）
     """
 
     session_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
@@ -36,6 +37,7 @@ class UserSession(models.Model):
     level = models.IntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     last_activity_at = models.DateTimeField(auto_now=True)
+    points_updated_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         db_table = "board_user_session"
@@ -45,6 +47,7 @@ class UserSession(models.Model):
         indexes = [
             models.Index(fields=["session_id"]),
             models.Index(fields=["-total_points"]),
+            models.Index(fields=["points_updated_at"]),
         ]
 
     def __str__(self) -> str:
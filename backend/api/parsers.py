@@ -0,0 +1,67 @@
+"""APIリクエスト用の高速JSONパーサー.
+
+orjsonが利用可能な場合はorjsonでデコードする。
+orjsonと解釈が異なりうる入力（64bitを超える整数など）や不正なJSONは
+DRF標準のJSONParserで解析し直し、結果とエラーメッセージを標準実装と揃える。
+"""
+
+import io
+import re
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from api.renderers import FastJSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# NOTE: orjsonは64bitを超える整数を浮動小数点数として解析するため、
+# 19桁以上の数字の並びを含む入力は標準実装で解析する
+_LONG_DIGITS = re.compile(rb"[0-9]{19}")
+
+
+class FastJSONParser(JSONParser):
+    """orjsonを用いた高速JSONパーサー."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """リクエストボディのJSONを解析する.
+
+        Args:
+            stream: リクエストボディのストリーム
+            media_type: リクエストのContent-Type
+            parser_context: パーサーコンテキスト
+
+        Returns:
+            解析されたデータ
+
+        Raises:
+            ParseError: JSONとして不正な場合
+        """
+        if orjson is None or not self.strict or not self._is_utf8(parser_context):
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        if _LONG_DIGITS.search(body):
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+
+    @staticmethod
+    def _is_utf8(parser_context) -> bool:
+        """リクエストの文字コードがUTF-8かどうかを判定する.
+
+        Args:
+            parser_context: パーサーコンテキスト
+
+        Returns:
+            UTF-8であればTrue
+        """
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        return encoding.lower().replace("_", "-") in ("utf-8", "utf8")
@@ -0,0 +1,198 @@
+"""APIレスポンス用の高速JSONレンダラー.
+
+orjsonが利用可能な場合はorjsonでエンコードし、DRF標準のJSONRendererと
+バイト単位で同一の出力を返す。orjsonが未インストールの場合や、
+インデント指定などorjsonで再現できない出力が要求された場合は
+標準のJSONRendererにフォールバックする。
+
+列指向表現（fields + rows）を要求するクライアント向けに、
+同じ表現をJSONまたはMessagePackで返すレンダラーも提供する。
+"""
+
+import math
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+)
+
+# NOTE: orjsonは1e-5〜1e-9付近の浮動小数点数をPythonのreprと異なる表記で出力する
+# （例: 0.00001, 1e-7）。該当しうる並びを含む出力は標準実装でエンコードし直す。
+_DIGITS = frozenset(b"0123456789")
+
+_default = JSONEncoder().default
+
+
+def _may_differ_from_stdlib(ret: bytes) -> bool:
+    """orjsonの出力が標準実装と異なる数値表記を含みうるかを判定する.
+
+    正規表現よりも高速なバイト列検索のみで判定する。
+    文字列リテラル内の一致も含むため、偽陽性はあるが偽陰性はない。
+
+    Args:
+        ret: orjsonの出力
+
+    Returns:
+        0.0000x または一桁指数（例: 1e-7）の並びを含む場合True
+    """
+    if b"0.0000" in ret:
+        return True
+    index = ret.find(b"e-")
+    while index != -1:
+        if (
+            index > 0
+            and ret[index - 1] in _DIGITS
+            and index + 2 < len(ret)
+            and ret[index + 2] in _DIGITS
+            and (index + 3 == len(ret) or ret[index + 3] not in _DIGITS)
+        ):
+            return True
+        index = ret.find(b"e-", index + 2)
+    return False
+
+
+def _has_non_finite(data) -> bool:
+    """データにNaNまたは無限大の浮動小数点数が含まれるかを判定する.
+
+    Args:
+        data: エンコードするデータ
+
+    Returns:
+        非有限の浮動小数点数を含む場合True
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list | tuple):
+            stack.extend(value)
+    return False
+
+
+def dumps(data) -> bytes:
+    """DRFのJSONRendererと同一のコンパクトなJSONにエンコードする.
+
+    Args:
+        data: エンコードするデータ
+
+    Returns:
+        UTF-8でエンコードされたJSONバイト列
+
+    Raises:
+        ValueError: NaNまたは無限大を含む場合（標準実装と同じ）
+    """
+    if orjson is not None:
+        try:
+            ret = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # NOTE: 64bitを超える整数などorjsonが扱えない値は標準実装に任せる
+            pass
+        else:
+            # NOTE: orjsonはNaNと無限大をnullとして出力するため、nullを含む出力は
+            # 値を確認し、該当する場合は標準実装に任せて例外を送出させる
+            if _may_differ_from_stdlib(ret) or (
+                b"null" in ret and _has_non_finite(data)
+            ):
+                return JSONRenderer().render(data)
+            if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+                ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                    b"\xe2\x80\xa9", b"\\u2029"
+                )
+            return ret
+    return JSONRenderer().render(data)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """orjsonを用いた高速JSONレンダラー.
+
+    出力はDRF標準のJSONRenderer（UNICODE_JSON, COMPACT_JSON有効時）と
+    バイト単位で一致する。日本語はエスケープされず、
+    U+2028/U+2029のみJavaScript互換のためエスケープされる。
+    NaNとInfinityは標準実装と同じく ValueError になる。
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """データをJSONバイト列にレンダリングする.
+
+        Args:
+            data: レンダリングするデータ
+            accepted_media_type: ネゴシエーションで決定したメディアタイプ
+            renderer_context: レンダリングコンテキスト
+
+        Returns:
+            JSONバイト列
+        """
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+            orjson is None
+            or indent is not None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class ColumnarJSONRenderer(FastJSONRenderer):
+    """列指向表現のJSONレンダラー.
+
+    Acceptで指定された場合のみ選択され、ビューは一覧を
+    {"fields": [...], "rows": [[...], ...]} の形式、日時をエポックミリ秒で返す。
+
+    Attributes:
+        columnar: ビューに列指向表現を要求するフラグ
+    """
+
+    media_type = "application/vnd.modern-board.columnar+json"
+    format = "columnar"
+    columnar = True
+
+
+class MessagePackRenderer(BaseRenderer):
+    """列指向表現のMessagePackレンダラー.
+
+    msgpackパッケージがインストールされている場合のみ利用できる。
+
+    Attributes:
+        columnar: ビューに列指向表現を要求するフラグ
+    """
+
+    media_type = "application/vnd.modern-board.columnar+msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+    columnar = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """データをMessagePackバイト列にレンダリングする.
+
+        Args:
+            data: レンダリングするデータ
+            accepted_media_type: ネゴシエーションで決定したメディアタイプ
+            renderer_context: レンダリングコンテキスト
+
+        Returns:
+            MessagePackバイト列
+        """
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_default)
@@ -0,0 +1,347 @@
+"""イベントログ（BoardEvent）への追記と、コンシューマーによる読み取り.
+
+書き込み側は api.signals とグループコミット（api.services.ingestion）が
+対象の保存と同じトランザクションで emit() / emit_many() を呼ぶ。
+書き込みを行うビューはトランザクション内で保存するため、
+イベントだけが残ったり欠けたりすることはない。
+
+読み取り側のコンシューマーは settings.BOARD_EVENTS["CONSUMERS"] に
+名前とクラスのパスで登録し、次の2通りで処理する。
+
+- consume(): ConsumerOffset の位置から未処理のイベントを順に処理し、
+  処理したバッチと同じトランザクションで位置を進める。
+- replay(): コンシューマーの投影を reset() で空にし、ログの先頭から
+  全てのイベントを処理し直す。バッチ内のイベントは partition() の値
+  （既定ではスレッドID）ごとに分け、REPLAY_WORKERS 個のスレッドで並列に処理する。
+  同じ分割キーのイベントの順序は保たれる。
+
+主キーの採番順とコミット順は並行する書き込みの間で一致しないことがある
+（先に採番したトランザクションが後からコミットする）。そのため読み取り位置より
+手前で見つからなかった主キーを「隙間」として ConsumerOffset.gaps に記録し、
+以降の consume() で隙間のイベントがコミットされていれば処理する。
+隙間は後続のイベントの記録から GAP_TIMEOUT_SECONDS 秒経っても埋まらなければ、
+ロールバックなどで欠番になったものとして諦める。このため handle() には、
+遅れてコミットされたイベントが主キーの順序を外れて渡されることがある。
+"""
+
+from collections import defaultdict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from api.models import BoardEvent, ConsumerOffset, Post
+
+DEFAULT_EVENT_SETTINGS = {
+    "CONSUMERS": {
+        "momentum": "api.services.momentum.MomentumConsumer",
+        "trending": "api.services.trending.TrendingConsumer",
+        "points": "api.services.points.PointsConsumer",
+    },
+    "BATCH_SIZE": 500,
+    "REPLAY_WORKERS": 4,
+    "GAP_TIMEOUT_SECONDS": 300,
+}
+
+
+def get_event_settings() -> dict:
+    """デフォルト値をマージしたイベントログ設定を返す.
+
+    Returns:
+        settings.BOARD_EVENTS にデフォルト値を補完した辞書
+    """
+    return {**DEFAULT_EVENT_SETTINGS, **getattr(settings, "BOARD_EVENTS", {})}
+
+
+def build_event(
+    kind: str, object_id: int, thread_id: int | None = None, **payload
+) -> BoardEvent:
+    """保存前のイベントを組み立てる.
+
+    Args:
+        kind: イベントの種類（BoardEvent.Kind）
+        object_id: 対象のID
+        thread_id: 対象が属するスレッドのID
+        **payload: 派生データの再構築に必要な値
+
+    Returns:
+        未保存のBoardEvent
+    """
+    return BoardEvent(
+        kind=kind, object_id=object_id, thread_id=thread_id, payload=payload
+    )
+
+
+def emit(kind: str, object_id: int, thread_id: int | None = None, **payload):
+    """イベントを1件追記する.
+
+    Args:
+        kind: イベントの種類（BoardEvent.Kind）
+        object_id: 対象のID
+        thread_id: 対象が属するスレッドのID
+        **payload: 派生データの再構築に必要な値
+
+    Returns:
+        保存したBoardEvent
+    """
+    event = build_event(kind, object_id, thread_id, **payload)
+    event.save()
+    return event
+
+
+def emit_many(events: Iterable[BoardEvent]) -> list[BoardEvent]:
+    """組み立て済みのイベントを1回のINSERTで追記する.
+
+    Args:
+        events: build_event() で組み立てたイベント
+
+    Returns:
+        保存したイベントのリスト
+    """
+    return BoardEvent.objects.bulk_create(list(events))
+
+
+def post_created(post: Post) -> BoardEvent:
+    """投稿の作成イベントを組み立てる.
+
+    Args:
+        post: 作成された投稿
+
+    Returns:
+        未保存のBoardEvent
+    """
+    return build_event(
+        BoardEvent.Kind.POST_CREATED,
+        post.pk,
+        post.thread_id,
+        post_number=post.post_number,
+        reply_to_id=post.reply_to_id,
+        author_session_id=post.author_session_id,
+    )
+
+
+class EventConsumer:
+    """イベントログのコンシューマーの基底クラス.
+
+    サブクラスで handle() を実装し、必要に応じて kinds で処理する種類を絞る。
+
+    Attributes:
+        kinds: 処理するイベントの種類（Noneの場合は全て）
+    """
+
+    kinds: frozenset[str] | None = None
+
+    def accepts(self, event: BoardEvent) -> bool:
+        """イベントを処理するかを判定する.
+
+        Args:
+            event: イベント
+
+        Returns:
+            kinds に含まれる（または kinds がNone）の場合True
+        """
+        return self.kinds is None or event.kind in self.kinds
+
+    def partition(self, event: BoardEvent):
+        """並列リプレイでイベントを振り分けるキーを返す.
+
+        同じキーのイベントは同じワーカーがログの順に処理する。
+
+        Args:
+            event: イベント
+
+        Returns:
+            分割キー（既定ではスレッドID）
+        """
+        return event.thread_id
+
+    def reset(self) -> None:
+        """リプレイの前に投影を空にする.
+
+        増分を加算するコンシューマーは、加算済みの値を初期値に戻す。
+        """
+
+    def handle(self, events: list[BoardEvent]) -> None:
+        """イベントを処理する.
+
+        Args:
+            events: ログの順に並んだイベント（遅れてコミットされたイベントは
+                主キーの順序を外れて先頭に並ぶことがある）
+        """
+        raise NotImplementedError
+
+
+def get_consumer(name: str) -> EventConsumer:
+    """登録されたコンシューマーを生成する.
+
+    Args:
+        name: コンシューマー名
+
+    Returns:
+        コンシューマーのインスタンス
+
+    Raises:
+        KeyError: 登録されていない名前の場合
+    """
+    return import_string(get_event_settings()["CONSUMERS"][name])()
+
+
+def _open_gaps(
+    gaps: dict[int, float], position: int, events: list[BoardEvent], timeout: float
+) -> int:
+    """読み進めたイベントの間の欠番を隙間に加え、期限切れの隙間を取り除く.
+
+    Args:
+        gaps: 主キーから、その直後のイベントの記録時刻（UNIX時刻）への辞書
+        position: 読み進める前の読み取り位置
+        events: 主キーの昇順に読んだイベント
+        timeout: 隙間が埋まるのを待つ秒数
+
+    Returns:
+        読み進めた後の読み取り位置
+    """
+    for event in events:
+        noticed = event.created_at.timestamp()
+        gaps.update((pk, noticed) for pk in range(position + 1, event.pk))
+        position = event.pk
+    deadline = timezone.now().timestamp() - timeout
+    for pk in [pk for pk, noticed in gaps.items() if noticed < deadline]:
+        del gaps[pk]
+    return position
+
+
+def consume(name: str, batch_size: int | None = None) -> int:
+    """コンシューマーの未処理のイベントを1バッチ処理する.
+
+    隙間に記録した主キーのうち、その後コミットされたイベントを先に処理し、
+    続けて読み取り位置より後のイベントを主キーの順に処理する。
+    読み取り位置の行をロックするため、同じコンシューマーを複数のプロセスで
+    動かしても同じイベントを二重に処理しない。
+
+    Args:
+        name: コンシューマー名
+        batch_size: 1バッチの最大件数（省略時は設定値）
+
+    Returns:
+        処理したイベントの件数（0の場合は未処理のイベントなし）
+    """
+    config = get_event_settings()
+    consumer = get_consumer(name)
+    with transaction.atomic():
+        ConsumerOffset.objects.get_or_create(name=name)
+        offset = ConsumerOffset.objects.select_for_update().get(name=name)
+        gaps = {int(pk): noticed for pk, noticed in offset.gaps}
+        late = (
+            list(BoardEvent.objects.filter(pk__in=list(gaps)).order_by("pk"))
+            if gaps
+            else []
+        )
+        for event in late:
+            del gaps[event.pk]
+        events = list(
+            BoardEvent.objects.filter(pk__gt=offset.position).order_by("pk")[
+                : batch_size or config["BATCH_SIZE"]
+            ]
+        )
+        position = _open_gaps(
+            gaps, offset.position, events, config["GAP_TIMEOUT_SECONDS"]
+        )
+        stored = [[pk, noticed] for pk, noticed in sorted(gaps.items())]
+        if not late and not events and stored == offset.gaps:
+            return 0
+        selected = [event for event in late + events if consumer.accepts(event)]
+        if selected:
+            consumer.handle(selected)
+        offset.position = position
+        offset.gaps = stored
+        offset.save(update_fields=["position", "gaps", "updated_at"])
+    return len(late) + len(events)
+
+
+def consume_all() -> int:
+    """登録された全てのコンシューマーについて、ログの末尾まで処理する.
+
+    バックグラウンドタスク（api.services.tasks）の周期実行から呼び出す。
+
+    Returns:
+        読み進めたイベントの件数の合計
+    """
+    processed = 0
+    for name in get_event_settings()["CONSUMERS"]:
+        while count := consume(name):
+            processed += count
+    return processed
+
+
+def _handle_partition(consumer: EventConsumer, events: list[BoardEvent]) -> None:
+    """ワーカースレッドで1つの分割のイベントを処理する.
+
+    Args:
+        consumer: コンシューマー
+        events: 同じ分割キーのイベント
+    """
+    try:
+        consumer.handle(events)
+    finally:
+        close_old_connections()
+
+
+def replay(name: str, workers: int | None = None, batch_size: int | None = None) -> int:
+    """コンシューマーの投影をイベントログの先頭から作り直す.
+
+    バッチごとに全ての分割の処理が終わるのを待ってから次のバッチに進み、
+    最後に読み取り位置をログの末尾に合わせる。まだ埋まる可能性のある隙間は
+    以降の consume() に引き継ぐ。
+
+    Args:
+        name: コンシューマー名
+        workers: 並列に処理するスレッド数（省略時は設定値）
+        batch_size: 1バッチの最大件数（省略時は設定値）
+
+    Returns:
+        処理したイベントの件数
+    """
+    config = get_event_settings()
+    workers = workers or config["REPLAY_WORKERS"]
+    batch_size = batch_size or config["BATCH_SIZE"]
+    consumer = get_consumer(name)
+    consumer.reset()
+
+    position = replayed = 0
+    gaps: dict[int, float] = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            events = list(
+                BoardEvent.objects.filter(pk__gt=position).order_by("pk")[:batch_size]
+            )
+            if not events:
+                break
+            partitions: dict[int, list[BoardEvent]] = defaultdict(list)
+            for event in events:
+                if consumer.accepts(event):
+                    key = hash(consumer.partition(event)) % workers
+                    partitions[key].append(event)
+            if workers == 1:
+                for selected in partitions.values():
+                    consumer.handle(selected)
+            else:
+                futures = [
+                    executor.submit(_handle_partition, consumer, selected)
+                    for selected in partitions.values()
+                ]
+                for future in futures:
+                    future.result()
+            position = _open_gaps(gaps, position, events, config["GAP_TIMEOUT_SECONDS"])
+            replayed += len(events)
+
+    ConsumerOffset.objects.update_or_create(
+        name=name,
+        defaults={
+            "position": position,
+            "gaps": [[pk, noticed] for pk, noticed in sorted(gaps.items())],
+        },
+    )
+    return replayed
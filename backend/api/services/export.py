@@ -0,0 +1,353 @@
+"""分析用の掲示板データの一括エクスポート.
+
+スレッド・投稿・リアクション・セッションのテーブルを、主キーの範囲
+（キーセットページング）で CHUNK_SIZE 件ずつ読み、NDJSONまたは列指向の
+ファイルに書き出す。
+
+- 各チャンクは自動コミットの短いクエリで読むため、長い読み取り
+  トランザクションやSQLiteのデータベースロックを保持しない。
+- テーブルごとに別のスレッド（別のデータベース接続）で並列に書き出す。
+- 書き出した最後の主キーをマニフェストに記録し、次回は
+  incremental=True でその続きの行だけを追記できる。since を指定すると、
+  その日時以降に更新（更新日時がないテーブルは作成）された行に絞り込む。
+
+形式は次の2つで、どちらも1行が1つのJSONの行指向のファイルのため追記できる。
+
+- ndjson: 1行に1レコードの辞書
+- columnar: 1行に1チャンクの {"fields": [...], "columns": [[...], ...]}
+  （列ごとの値の配列。Parquetのように列単位で読み込める）
+
+セッションの session_id はクッキーで使う識別子のため出力しない。
+"""
+
+import json
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Model
+from django.utils import timezone
+
+from api.models import Post, Reaction, Thread, UserSession
+from api.renderers import dumps
+
+DEFAULT_EXPORT_SETTINGS = {
+    "CHUNK_SIZE": 5000,
+    "WORKERS": 4,
+}
+
+FORMATS = ("ndjson", "columnar")
+
+# NOTE: stream_table() が返す本文の形式ごとのContent-Typeとファイルの拡張子
+STREAM_MEDIA_TYPES = {
+    "ndjson": ("application/x-ndjson", "jsonl"),
+    "columnar": ("application/json", "json"),
+}
+
+MANIFEST_NAME = "manifest.json"
+
+
+def get_export_settings() -> dict:
+    """デフォルト値をマージしたエクスポート設定を返す.
+
+    Returns:
+        settings.BOARD_EXPORT にデフォルト値を補完した辞書
+    """
+    return {**DEFAULT_EXPORT_SETTINGS, **getattr(settings, "BOARD_EXPORT", {})}
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    """エクスポートするテーブル.
+
+    Attributes:
+        model: 対象のモデル
+        fields: 出力する列（values()のルックアップ、先頭は主キー）
+        timestamp: since で絞り込む日時の列
+    """
+
+    model: type[Model]
+    fields: tuple[str, ...]
+    timestamp: str
+
+
+EXPORT_TABLES: dict[str, ExportTable] = {
+    "threads": ExportTable(
+        Thread,
+        (
+            "id",
+            "title",
+            "category_id",
+            "author_session_id",
+            "post_count",
+            "view_count",
+            "momentum",
+            "is_pinned",
+            "is_locked",
+            "created_at",
+            "updated_at",
+            "last_post_at",
+        ),
+        "updated_at",
+    ),
+    "posts": ExportTable(
+        Post,
+        (
+            "id",
+            "thread_id",
+            "post_number",
+            "reply_to_id",
+            "author_session_id",
+            "is_op",
+            "content",
+            "created_at",
+            "updated_at",
+        ),
+        "updated_at",
+    ),
+    "reactions": ExportTable(
+        Reaction,
+        ("id", "post_id", "user_session_id", "reaction_type", "created_at"),
+        "created_at",
+    ),
+    "sessions": ExportTable(
+        UserSession,
+        (
+            "id",
+            "temporary_name",
+            "post_count",
+            "thread_count",
+            "total_points",
+            "level",
+            "created_at",
+            "last_activity_at",
+        ),
+        "last_activity_at",
+    ),
+}
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    """テーブル1つのエクスポート結果.
+
+    Attributes:
+        table: テーブル名（EXPORT_TABLES のキー）
+        rows: 書き出した行数
+        last_id: 書き出した最後の主キー（行がなければ開始時の値）
+        seconds: 所要時間
+    """
+
+    table: str
+    rows: int
+    last_id: int | None
+    seconds: float
+
+
+def iter_chunks(
+    table: str,
+    *,
+    after_id: int | None = None,
+    since: datetime | None = None,
+    chunk_size: int | None = None,
+    using: str | None = None,
+) -> Iterator[list[tuple]]:
+    """テーブルの行を主キー順にチャンクごとに読む.
+
+    Args:
+        table: テーブル名（EXPORT_TABLES のキー）
+        after_id: この主キーより後の行だけを読む
+        since: この日時以降に更新された行だけを読む
+        chunk_size: 1クエリで読む行数（省略時は設定値）
+        using: 読み取るデータベースのエイリアス
+
+    Yields:
+        EXPORT_TABLES の fields の順に並んだ値のタプルのリスト
+    """
+    chunk_size = chunk_size or get_export_settings()["CHUNK_SIZE"]
+    spec = EXPORT_TABLES[table]
+    rows = spec.model.objects.using(using).order_by("pk")
+    if since is not None:
+        rows = rows.filter(**{f"{spec.timestamp}__gte": since})
+    last_id = after_id
+    while True:
+        page = rows if last_id is None else rows.filter(pk__gt=last_id)
+        chunk = list(page.values_list(*spec.fields)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1][0]
+
+
+def encode_chunk(table: str, chunk: list[tuple], fmt: str) -> bytes:
+    """チャンクを指定した形式の行にエンコードする.
+
+    Args:
+        table: テーブル名
+        chunk: iter_chunks() のチャンク
+        fmt: 出力形式（FORMATS のいずれか）
+
+    Returns:
+        改行で終わるUTF-8のバイト列
+    """
+    fields = EXPORT_TABLES[table].fields
+    if fmt == "columnar":
+        columns = [list(column) for column in zip(*chunk, strict=True)]
+        return dumps({"fields": list(fields), "columns": columns}) + b"\n"
+    return b"".join(dumps(dict(zip(fields, row, strict=True))) + b"\n" for row in chunk)
+
+
+def stream_table(table: str, fmt: str = "ndjson", **options) -> Iterator[bytes]:
+    """テーブルをHTTPの本文として逐次生成する.
+
+    ndjson はファイルと同じ1行に1レコードのNDJSONになる。columnar は
+    ファイルの各行のチャンクを要素とする配列で、本文全体が1つのJSON文書になる。
+    Content-Typeと拡張子は STREAM_MEDIA_TYPES を参照する。
+
+    Args:
+        table: テーブル名
+        fmt: 出力形式
+        **options: iter_chunks() のキーワード引数
+
+    Yields:
+        チャンクごとのバイト列
+    """
+    chunks = (
+        encode_chunk(table, chunk, fmt) for chunk in iter_chunks(table, **options)
+    )
+    if fmt != "columnar":
+        yield from chunks
+        return
+    separator = b"["
+    for encoded in chunks:
+        yield separator + encoded.rstrip(b"\n")
+        separator = b","
+    yield b"[]\n" if separator == b"[" else b"]\n"
+
+
+def export_table(
+    table: str,
+    directory: Path,
+    fmt: str = "ndjson",
+    *,
+    after_id: int | None = None,
+    **options,
+) -> ExportResult:
+    """テーブルを出力先のファイルに追記する.
+
+    Args:
+        table: テーブル名
+        directory: 出力先のディレクトリ
+        fmt: 出力形式
+        after_id: この主キーより後の行だけを書き出す
+        **options: iter_chunks() のキーワード引数
+
+    Returns:
+        エクスポート結果
+    """
+    started = time.monotonic()
+    rows = 0
+    last_id = after_id
+    path = directory / f"{table}.{fmt}.jsonl"
+    try:
+        with path.open("ab") as output:
+            for chunk in iter_chunks(table, after_id=after_id, **options):
+                output.write(encode_chunk(table, chunk, fmt))
+                rows += len(chunk)
+                last_id = chunk[-1][0]
+    finally:
+        close_old_connections()
+    return ExportResult(table, rows, last_id, time.monotonic() - started)
+
+
+def read_manifest(directory: Path) -> dict:
+    """出力先のマニフェストを読む.
+
+    Args:
+        directory: 出力先のディレクトリ
+
+    Returns:
+        マニフェストの辞書（なければ空の辞書）
+    """
+    path = directory / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def export_board(
+    directory: Path,
+    fmt: str = "ndjson",
+    *,
+    tables: list[str] | None = None,
+    incremental: bool = False,
+    since: datetime | None = None,
+    workers: int | None = None,
+    chunk_size: int | None = None,
+) -> list[ExportResult]:
+    """テーブルごとに並列にエクスポートし、マニフェストを更新する.
+
+    incremental=False の場合は対象テーブルのファイルを作り直す。
+
+    Args:
+        directory: 出力先のディレクトリ
+        fmt: 出力形式（FORMATS のいずれか）
+        tables: テーブル名（Noneの場合は全て）
+        incremental: マニフェストの最後の主キーより後の行だけを追記する
+        since: この日時以降に更新された行だけを書き出す
+        workers: 並列に書き出すスレッド数（省略時は設定値）
+        chunk_size: 1クエリで読む行数（省略時は設定値）
+
+    Returns:
+        テーブルごとのエクスポート結果
+
+    Raises:
+        ValueError: 形式がマニフェストの形式と異なる状態で追記しようとした場合
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    tables = tables or list(EXPORT_TABLES)
+    manifest = read_manifest(directory)
+    previous = manifest.get("tables", {})
+    if incremental and previous and manifest.get("format") != fmt:
+        raise ValueError(
+            f"Cannot append {fmt} to an export written as {manifest.get('format')}"
+        )
+    if not incremental:
+        if manifest.get("format") != fmt:
+            previous = {}
+        for table in tables:
+            (directory / f"{table}.{fmt}.jsonl").unlink(missing_ok=True)
+            previous.pop(table, None)
+
+    workers = workers or get_export_settings()["WORKERS"]
+    with ThreadPoolExecutor(max_workers=min(workers, len(tables))) as executor:
+        futures = [
+            executor.submit(
+                export_table,
+                table,
+                directory,
+                fmt,
+                after_id=previous.get(table, {}).get("last_id"),
+                since=since,
+                chunk_size=chunk_size,
+            )
+            for table in tables
+        ]
+        results = [future.result() for future in futures]
+
+    exported_at = timezone.now().isoformat()
+    for result in results:
+        entry = previous.get(result.table, {"rows": 0})
+        previous[result.table] = {
+            "last_id": result.last_id,
+            "rows": entry["rows"] + result.rows,
+            "exported_at": exported_at,
+        }
+    manifest = {"format": fmt, "tables": previous}
+    (directory / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    return results
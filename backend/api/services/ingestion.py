@@ -0,0 +1,326 @@
+"""レス投稿のグループコミット処理.
+
+スレッドに書き込みが殺到した際、投稿ごとにトランザクションを開くと
+コミット時のfsyncが処理時間の大半を占める。
+このモジュールはバリデーション済みの投稿をキューに溜め、
+小さなバッチ単位で1トランザクションにまとめてコミットする。
+
+バッチ内の投稿は複数行INSERTで一括作成し、スレッドの統計更新は
+スレッドごとに1回のUPDATEにまとめる。呼び出し元は採番された投稿を
+同期的に受け取る。待ち時間の上限は、コミット開始までが TIMEOUT_SECONDS、
+コミット開始後が COMMIT_TIMEOUT_SECONDS で、合計しても両者の和を超えない。
+コミット中に上限を超えた場合、投稿は後から保存されることがある。
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Max
+
+from api.models import Post, Thread
+from api.services import events, rendering
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INGESTION_SETTINGS = {
+    "ENABLED": False,
+    "MAX_BATCH_SIZE": 64,
+    "MAX_DELAY_MS": 5,
+    "TIMEOUT_SECONDS": 2.0,
+    "COMMIT_TIMEOUT_SECONDS": 5.0,
+}
+
+
+class IngestionTimeout(Exception):
+    """投稿が制限時間内にコミットされなかったことを表す例外.
+
+    Attributes:
+        committing: コミット開始後に制限時間を超えた場合True
+            （投稿が後から保存される可能性がある）
+    """
+
+    def __init__(self, message: str, *, committing: bool = False) -> None:
+        """例外を初期化する.
+
+        Args:
+            message: エラーメッセージ
+            committing: コミット開始後に制限時間を超えた場合True
+        """
+        super().__init__(message)
+        self.committing = committing
+
+
+def get_ingestion_settings() -> dict:
+    """デフォルト値をマージしたグループコミット設定を返す.
+
+    Returns:
+        settings.POST_INGESTION にデフォルト値を補完した辞書
+    """
+    return {**DEFAULT_INGESTION_SETTINGS, **getattr(settings, "POST_INGESTION", {})}
+
+
+def ingestion_enabled() -> bool:
+    """グループコミットモードが有効かどうかを返す.
+
+    Returns:
+        POST_INGESTION["ENABLED"] の値
+    """
+    return bool(get_ingestion_settings()["ENABLED"])
+
+
+@dataclass
+class PendingPost:
+    """コミット待ちの投稿.
+
+    Attributes:
+        thread_id: 投稿先スレッドID
+        content: 投稿本文
+        reply_to_id: 返信元の投稿ID
+        author_session_id: 投稿者のセッションID
+        future: コミット後に作成済みPostを受け取るFuture
+    """
+
+    thread_id: int
+    content: str
+    reply_to_id: int | None = None
+    author_session_id: int | None = None
+    future: Future = field(default_factory=Future)
+
+
+def commit_posts(pending: list[PendingPost]) -> list[Post]:
+    """投稿のバッチを1トランザクションでコミットする.
+
+    スレッドごとに現在の最大レス番号を1クエリで取得して連番を割り当て、
+    bulk_createで一括INSERTした後、スレッドごとに1回だけ統計を更新し、
+    イベントログにまとめて追記する。
+
+    Args:
+        pending: コミットする投稿のリスト
+
+    Returns:
+        pendingと同じ順序の作成済みPostインスタンスのリスト
+    """
+    by_thread: dict[int, list[int]] = defaultdict(list)
+    for index, item in enumerate(pending):
+        by_thread[item.thread_id].append(index)
+
+    with transaction.atomic():
+        # NOTE: スレッド行をロックして並行する採番と競合しないようにする
+        list(
+            Thread.objects.select_for_update()
+            .filter(pk__in=by_thread)
+            .values_list("pk", flat=True)
+        )
+        last_numbers = dict(
+            Post.objects.filter(thread_id__in=by_thread)
+            .values("thread_id")
+            .annotate(last_number=Max("post_number"))
+            .values_list("thread_id", "last_number")
+        )
+
+        posts: list[Post | None] = [None] * len(pending)
+        for thread_id, indexes in by_thread.items():
+            number = last_numbers.get(thread_id) or 0
+            for index in indexes:
+                number += 1
+                item = pending[index]
+                posts[index] = Post(
+                    thread_id=thread_id,
+                    content=item.content,
+                    reply_to_id=item.reply_to_id,
+                    author_session_id=item.author_session_id,
+                    post_number=number,
+                    is_op=(number == 1),
+                    **rendering.render_fields(item.content),
+                )
+        created = Post.objects.bulk_create(posts)
+
+        for thread_id, indexes in by_thread.items():
+            last_post_at = created[indexes[-1]].created_at
+            Thread.objects.filter(pk=thread_id).update(
+                post_count=F("post_count") + len(indexes),
+                last_post_at=last_post_at,
+                updated_at=last_post_at,
+            )
+        # NOTE: bulk_createはpost_saveを送らないため、イベントログへの記録は
+        # ここで行う（タグ付けの並び替えキー、勢い、トレンドスコア、ポイントは
+        # イベントログのコンシューマーが反映する）
+        events.emit_many(events.post_created(post) for post in created)
+
+    return created
+
+
+class PostIngestionQueue:
+    """投稿をバッチにまとめてコミットするキュー.
+
+    バックグラウンドのコミッタースレッドが、最初の投稿を受け取ってから
+    MAX_DELAY_MS経過するかMAX_BATCH_SIZE件に達するまで投稿を集め、
+    commit_posts()でまとめてコミットする。
+
+    Attributes:
+        max_batch_size: 1バッチの最大件数
+        max_delay: バッチを閉じるまでの最大待ち時間（秒）
+    """
+
+    def __init__(self, max_batch_size: int, max_delay: float) -> None:
+        """キューを初期化する.
+
+        Args:
+            max_batch_size: 1バッチの最大件数
+            max_delay: バッチを閉じるまでの最大待ち時間（秒）
+        """
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._queue: queue.Queue[PendingPost] = queue.Queue()
+        self._worker: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        *,
+        thread_id: int,
+        content: str,
+        reply_to_id: int | None = None,
+        author_session_id: int | None = None,
+        timeout: float | None = None,
+        commit_timeout: float | None = None,
+    ) -> Post:
+        """投稿をキューに積み、コミットされるまで待つ.
+
+        Args:
+            thread_id: 投稿先スレッドID
+            content: 投稿本文
+            reply_to_id: 返信元の投稿ID
+            author_session_id: 投稿者のセッションID
+            timeout: コミット開始までの最大待ち時間（秒）。省略時は設定値を使用
+            commit_timeout: コミット開始後の最大待ち時間（秒）。
+                省略時は設定値を使用
+
+        Returns:
+            採番済みの作成されたPostインスタンス
+
+        Raises:
+            IngestionTimeout: コミット開始前、またはコミット中に
+                制限時間を超えた場合
+        """
+        config = get_ingestion_settings()
+        if timeout is None:
+            timeout = config["TIMEOUT_SECONDS"]
+        if commit_timeout is None:
+            commit_timeout = config["COMMIT_TIMEOUT_SECONDS"]
+        self._ensure_worker()
+        item = PendingPost(
+            thread_id=thread_id,
+            content=content,
+            reply_to_id=reply_to_id,
+            author_session_id=author_session_id,
+        )
+        self._queue.put(item)
+        try:
+            return item.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if item.future.cancel():
+                raise IngestionTimeout(
+                    "Post was not committed within the time limit"
+                ) from None
+        # NOTE: コミット処理中の場合は、もう一度だけ上限付きで結果を待つ
+        try:
+            return item.future.result(timeout=commit_timeout)
+        except FutureTimeoutError:
+            raise IngestionTimeout(
+                "Post commit did not finish within the time limit", committing=True
+            ) from None
+
+    def _ensure_worker(self) -> None:
+        """コミッタースレッドが起動していなければ起動する."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="post-ingestion", daemon=True
+                )
+                self._worker.start()
+
+    def _next_batch(self) -> list[PendingPost]:
+        """次にコミットするバッチを集める.
+
+        Returns:
+            キャンセルされていない投稿のリスト
+        """
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return [item for item in batch if item.future.set_running_or_notify_cancel()]
+
+    def _run(self) -> None:
+        """キューからバッチを取り出してコミットし続ける."""
+        while True:
+            batch = self._next_batch()
+            if batch:
+                close_old_connections()
+                self._commit(batch)
+
+    def _commit(self, batch: list[PendingPost]) -> None:
+        """バッチをコミットし、結果を各Futureに設定する.
+
+        バッチ全体が失敗した場合は1件ずつコミットし直し、
+        不正な投稿が同じバッチの他の投稿を巻き込まないようにする。
+
+        Args:
+            batch: コミットする投稿のリスト
+        """
+        try:
+            posts = commit_posts(batch)
+        except Exception as exc:
+            if len(batch) == 1:
+                logger.exception("Failed to commit post")
+                batch[0].future.set_exception(exc)
+                return
+            for item in batch:
+                try:
+                    (post,) = commit_posts([item])
+                except Exception as exc:
+                    item.future.set_exception(exc)
+                else:
+                    item.future.set_result(post)
+            return
+        for item, post in zip(batch, posts, strict=True):
+            item.future.set_result(post)
+
+
+_ingestion_queue: PostIngestionQueue | None = None
+_ingestion_queue_lock = threading.Lock()
+
+
+def get_ingestion_queue() -> PostIngestionQueue:
+    """プロセス共有のグループコミットキューを返す.
+
+    Returns:
+        設定値で初期化されたPostIngestionQueue
+    """
+    global _ingestion_queue
+    if _ingestion_queue is None:
+        with _ingestion_queue_lock:
+            if _ingestion_queue is None:
+                config = get_ingestion_settings()
+                _ingestion_queue = PostIngestionQueue(
+                    max_batch_size=config["MAX_BATCH_SIZE"],
+                    max_delay=config["MAX_DELAY_MS"] / 1000,
+                )
+    return _ingestion_queue
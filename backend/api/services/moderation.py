@@ -0,0 +1,306 @@
+"""スレッド・投稿の一括モデレーション.
+
+スパムの掃除のように多数のスレッド・投稿を操作する場合、1件ずつ
+save()/delete() するとシグナルが行ごとに発火し、カウンターの更新と
+イベントログの追記が行ごとのクエリになる。さらにQuerySet.delete() も
+シグナルの受信者がいる限り全ての行（カスケード先を含む）を読み込んで
+1件ずつシグナルを送る。
+
+ここでは対象の主キーを CHUNK_SIZE 件ずつに分け、チャンクごとに
+テーブルあたり1回のUPDATE/DELETEを発行する。シグナルは経由せず、
+シグナルが行うのと同じ後処理を集合単位で行う。
+
+- 非正規化カウンター（Thread.post_count、Category.thread_count、
+  Tag.usage_count）を、削除・移動した行から集計した増減量で1回ずつ更新する。
+  削除でシグナルが送られないため、二重に加減算されることはない。
+- シグナルと同じ内容のイベントを emit_many() でまとめてイベントログに追記する
+  （勢いの再計算と、削除した投稿・スレッド・リアクションのポイントの減算は
+  イベントログのコンシューマーが行う）。
+- 全てのチャンクを1つのトランザクションで処理する。エンドポイントは ids でも
+  filter でも対象を MAX_IDS 件までに制限する（api.v1.moderation）ため、
+  トランザクションの大きさも上限を超えない。
+"""
+
+from collections import Counter
+from collections.abc import Iterable
+from itertools import batched
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, QuerySet
+
+from api.models import BoardEvent, Post, Reaction, Thread, ThreadTag
+from api.services import events
+from api.services.tag_usage import adjust_usage
+from api.services.thread_counts import adjust_thread_count
+from api.services.thread_tags import sync_thread_tags
+
+DEFAULT_MODERATION_SETTINGS = {
+    "CHUNK_SIZE": 500,
+    "MAX_IDS": 10_000,
+}
+
+THREAD_FLAGS = {
+    "lock": ("is_locked", True),
+    "unlock": ("is_locked", False),
+    "pin": ("is_pinned", True),
+    "unpin": ("is_pinned", False),
+}
+
+THREAD_ACTIONS = (*THREAD_FLAGS, "move", "delete")
+POST_ACTIONS = ("delete",)
+
+
+def get_moderation_settings() -> dict:
+    """デフォルト値をマージした一括モデレーション設定を返す.
+
+    Returns:
+        settings.BULK_MODERATION にデフォルト値を補完した辞書
+    """
+    return {
+        **DEFAULT_MODERATION_SETTINGS,
+        **getattr(settings, "BULK_MODERATION", {}),
+    }
+
+
+def _chunks(queryset: QuerySet) -> Iterable[tuple[int, ...]]:
+    """対象の主キーを確定し、CHUNK_SIZE 件ずつに分ける.
+
+    処理中に条件に一致するようになった行を巻き込まないよう、
+    主キーは最初に1回だけ読む。
+
+    Args:
+        queryset: 対象のクエリセット
+
+    Returns:
+        主キーのタプルのリスト
+    """
+    ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+    return list(batched(ids, get_moderation_settings()["CHUNK_SIZE"], strict=False))
+
+
+def _raw_delete(queryset: QuerySet) -> int:
+    """シグナルとカスケードの収集を経由せずに1回のDELETEで削除する.
+
+    Args:
+        queryset: 削除する行のクエリセット
+
+    Returns:
+        削除した行数
+    """
+    # NOTE: QuerySet.delete() はシグナルの受信者がいると全行を読み込んで
+    # 1件ずつシグナルを送るため、Collector が高速削除に使う経路を直接使う。
+    # 非公開APIのため、挙動は test_raw_delete_is_a_single_delete_without_signals
+    # で固定している（Djangoの更新で変わった場合はそのテストが失敗する）
+    return queryset._raw_delete(queryset.db)
+
+
+def _adjust_post_counts(thread_ids: Iterable[int], delta: int) -> None:
+    """スレッドごとの投稿数を、出現回数だけ加減算する.
+
+    Args:
+        thread_ids: 投稿のスレッドID（1投稿につき1回）
+        delta: 1投稿あたりの増減量
+    """
+    by_count: dict[int, list[int]] = {}
+    for thread_id, times in Counter(thread_ids).items():
+        by_count.setdefault(times, []).append(thread_id)
+    for times, ids in by_count.items():
+        Thread.objects.filter(pk__in=ids).update(
+            post_count=F("post_count") + delta * times
+        )
+
+
+def _delete_posts_and_reactions(posts: QuerySet) -> tuple[list, list]:
+    """投稿とそのリアクションを削除し、削除した行を返す.
+
+    他の投稿からの返信元の参照はNULLにする（Post.reply_to の SET_NULL）。
+
+    Args:
+        posts: 削除する投稿のクエリセット
+
+    Returns:
+        削除した投稿の (id, thread_id, author_session_id) と、
+        リアクションの (id, post_id, thread_id, reaction_type, user_session_id,
+        投稿者のセッションID) のリストの組
+    """
+    post_rows = list(posts.values_list("pk", "thread_id", "author_session_id"))
+    reactions = Reaction.objects.filter(post__in=posts)
+    reaction_rows = list(
+        reactions.values_list(
+            "pk",
+            "post_id",
+            "post__thread_id",
+            "reaction_type",
+            "user_session_id",
+            "post__author_session_id",
+        )
+    )
+    _raw_delete(reactions)
+    Post.objects.filter(reply_to__in=posts).update(reply_to=None)
+    _raw_delete(posts)
+    return post_rows, reaction_rows
+
+
+def _deletion_events(post_rows: list, reaction_rows: list) -> list[BoardEvent]:
+    """削除した投稿とリアクションのイベントを組み立てる.
+
+    Args:
+        post_rows: _delete_posts_and_reactions() の投稿の行
+        reaction_rows: _delete_posts_and_reactions() のリアクションの行
+
+    Returns:
+        シグナルで削除した場合と同じ内容の未保存のイベント
+    """
+    built = [
+        events.build_event(
+            BoardEvent.Kind.REACTION_DELETED,
+            pk,
+            thread_id,
+            post_id=post_id,
+            reaction_type=reaction_type,
+            user_session_id=user_session_id,
+            post_author_session_id=author_id,
+        )
+        for pk, post_id, thread_id, reaction_type, user_session_id, author_id in (
+            reaction_rows
+        )
+    ]
+    built += [
+        events.build_event(
+            BoardEvent.Kind.POST_DELETED,
+            pk,
+            thread_id,
+            author_session_id=author_session_id,
+        )
+        for pk, thread_id, author_session_id in post_rows
+    ]
+    return built
+
+
+def delete_posts(queryset: QuerySet) -> int:
+    """投稿を一括削除し、カウンターとイベントログを更新する.
+
+    Args:
+        queryset: 削除する投稿のクエリセット
+
+    Returns:
+        削除した投稿数
+    """
+    deleted = 0
+    with transaction.atomic():
+        for chunk in _chunks(queryset):
+            post_rows, reaction_rows = _delete_posts_and_reactions(
+                Post.objects.filter(pk__in=chunk)
+            )
+            _adjust_post_counts((row[1] for row in post_rows), -1)
+            events.emit_many(_deletion_events(post_rows, reaction_rows))
+            deleted += len(post_rows)
+    return deleted
+
+
+def delete_threads(queryset: QuerySet) -> int:
+    """スレッドを投稿・リアクション・タグ付けごと一括削除する.
+
+    Args:
+        queryset: 削除するスレッドのクエリセット
+
+    Returns:
+        削除したスレッド数
+    """
+    deleted = 0
+    with transaction.atomic():
+        for chunk in _chunks(queryset):
+            threads = Thread.objects.filter(pk__in=chunk)
+            thread_rows = list(
+                threads.values_list("pk", "category_id", "author_session_id")
+            )
+            post_rows, reaction_rows = _delete_posts_and_reactions(
+                Post.objects.filter(thread__in=threads)
+            )
+            links = ThreadTag.objects.filter(thread__in=threads)
+            adjust_usage(links.values_list("tag_id", flat=True), -1)
+            _raw_delete(links)
+            _raw_delete(threads)
+
+            adjust_thread_count((row[1] for row in thread_rows), -1)
+            built = _deletion_events(post_rows, reaction_rows)
+            built += [
+                events.build_event(
+                    BoardEvent.Kind.THREAD_DELETED,
+                    pk,
+                    pk,
+                    category_id=category_id,
+                    author_session_id=author_session_id,
+                )
+                for pk, category_id, author_session_id in thread_rows
+            ]
+            events.emit_many(built)
+            deleted += len(thread_rows)
+    return deleted
+
+
+def set_thread_flag(queryset: QuerySet, action: str) -> int:
+    """スレッドを一括でロック・ピン留め（またはその解除）する.
+
+    既に指定の状態のスレッドは更新もイベントの記録もしない。
+
+    Args:
+        queryset: 対象のスレッドのクエリセット
+        action: THREAD_FLAGS のキー
+
+    Returns:
+        状態を変更したスレッド数
+    """
+    field, value = THREAD_FLAGS[action]
+    kind = (
+        BoardEvent.Kind.THREAD_LOCKED
+        if field == "is_locked"
+        else BoardEvent.Kind.THREAD_PINNED
+    )
+    changed = 0
+    with transaction.atomic():
+        for chunk in _chunks(queryset.exclude(**{field: value})):
+            Thread.objects.filter(pk__in=chunk).update(**{field: value})
+            if field == "is_pinned":
+                sync_thread_tags(chunk)
+            events.emit_many(
+                events.build_event(kind, pk, pk, **{field: value}) for pk in chunk
+            )
+            changed += len(chunk)
+    return changed
+
+
+def move_threads(queryset: QuerySet, category_id: int) -> int:
+    """スレッドを一括で別のカテゴリへ移動する.
+
+    Args:
+        queryset: 対象のスレッドのクエリセット
+        category_id: 移動先のカテゴリID
+
+    Returns:
+        移動したスレッド数
+    """
+    moved = 0
+    with transaction.atomic():
+        for chunk in _chunks(queryset.exclude(category_id=category_id)):
+            threads = Thread.objects.filter(pk__in=chunk)
+            rows = list(
+                threads.values_list("pk", "category_id", "is_pinned", "is_locked")
+            )
+            threads.update(category_id=category_id)
+            adjust_thread_count((row[1] for row in rows), -1)
+            adjust_thread_count([category_id], len(rows))
+            events.emit_many(
+                events.build_event(
+                    BoardEvent.Kind.THREAD_UPDATED,
+                    pk,
+                    pk,
+                    category_id=category_id,
+                    is_pinned=is_pinned,
+                    is_locked=is_locked,
+                )
+                for pk, _, is_pinned, is_locked in rows
+            )
+            moved += len(rows)
+    return moved
@@ -0,0 +1,86 @@
+"""スレッドの勢いスコア（Thread.momentum）の再計算.
+
+勢いは直近 WINDOW_HOURS 時間の投稿数を時間あたりに換算した値（レス/時）とする。
+投稿のたびにリクエスト内で数え直すのではなく、イベントログ（api.services.events）の
+コンシューマー MomentumConsumer が、投稿の作成・削除のあったスレッドを
+バッチごとにまとめて再計算する。コンシューマーは周期タスクの consume_all() で動く。
+時間の経過による減衰は、周期タスクとして全体の再計算を実行して反映する。
+"""
+
+from collections.abc import Iterable
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from api.models import BoardEvent, Post, Thread
+from api.services.events import EventConsumer
+from api.services.thread_tags import sync_thread_tags
+
+DEFAULT_MOMENTUM_SETTINGS = {
+    "WINDOW_HOURS": 24.0,
+}
+
+
+def get_momentum_settings() -> dict:
+    """デフォルト値をマージした勢いスコア設定を返す.
+
+    Returns:
+        settings.THREAD_MOMENTUM にデフォルト値を補完した辞書
+    """
+    return {**DEFAULT_MOMENTUM_SETTINGS, **getattr(settings, "THREAD_MOMENTUM", {})}
+
+
+def recompute_momentum(thread_ids: Iterable[int] | None = None) -> int:
+    """スレッドの勢いスコアを再計算し、タグ付けの写しへ反映する.
+
+    Args:
+        thread_ids: 対象スレッドのID（Noneの場合は勢いが残っているスレッドと
+            直近に投稿があったスレッドの全て）
+
+    Returns:
+        更新したスレッド数
+    """
+    window = get_momentum_settings()["WINDOW_HOURS"]
+    since = timezone.now() - timedelta(hours=window)
+    if thread_ids is None:
+        targets = Thread.objects.filter(Q(momentum__gt=0) | Q(last_post_at__gte=since))
+    else:
+        targets = Thread.objects.filter(pk__in=list(thread_ids))
+    ids = list(targets.order_by().values_list("pk", flat=True))
+    if not ids:
+        return 0
+
+    recent = (
+        Post.objects.filter(thread_id=OuterRef("pk"), created_at__gte=since)
+        .order_by()
+        .values("thread_id")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    updated = Thread.objects.filter(pk__in=ids).update(
+        momentum=Cast(Coalesce(Subquery(recent), 0), FloatField())
+        / Value(float(window))
+    )
+    sync_thread_tags(ids)
+    return updated
+
+
+class MomentumConsumer(EventConsumer):
+    """投稿の作成・削除があったスレッドの勢いを再計算するコンシューマー.
+
+    再計算は投稿テーブルから数え直すため、同じイベントを何度処理しても、
+    遅れて届いたイベントを処理しても結果は変わらない。
+    """
+
+    kinds = frozenset({BoardEvent.Kind.POST_CREATED, BoardEvent.Kind.POST_DELETED})
+
+    def handle(self, events: list[BoardEvent]) -> None:
+        """イベントのスレッドの勢いを1回の再計算でまとめて更新する.
+
+        Args:
+            events: 投稿の作成・削除のイベント
+        """
+        recompute_momentum({event.thread_id for event in events})
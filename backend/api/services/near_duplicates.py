@@ -0,0 +1,272 @@
+"""SimHashとLSHによるコピペ投稿（ほぼ同一の連投）の検出.
+
+投稿本文から64ビットのSimHash指紋を求め、直近 WINDOW_SECONDS 秒に
+受け付けた投稿の指紋と比較する。指紋のハミング距離が MAX_DISTANCE 以下なら
+ほぼ同一の本文とみなす。
+
+比較対象は全件ではなく、指紋を BANDS 個の帯に分けたLSHインデックスで絞り込む。
+ハミング距離が BANDS 未満の2つの指紋は、鳩の巣原理により少なくとも1つの帯が
+完全に一致するため、同じ帯の値を持つ指紋だけを調べれば取りこぼしはない。
+短い投稿では数文字の改変でも指紋が数ビット変わるため、64ビットを
+8ビットずつ8本の帯に分け、距離7までの改変を検出できるようにしている。
+各帯のバケットは件数の上限を持つため、1投稿あたりの判定は
+投稿数に依存しない定数時間で終わり、board_postの本文は一切参照しない。
+
+指紋は正規化後の先頭 MAX_HASHED_LENGTH 文字から求め、極端に長い本文でも
+判定のCPU時間に上限を設ける。判定（screen）は投稿のバリデーション時に行い、
+指紋の登録（record）は投稿の保存が確定した後に行う。保存に失敗した投稿は
+コピペの件数に数えない。
+
+インデックスはプロセス内のメモリにのみ保持する。
+"""
+
+import hashlib
+import itertools
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+from django.conf import settings
+from rest_framework.exceptions import Throttled, ValidationError
+
+from api.metrics import metrics
+
+DEFAULT_NEAR_DUPLICATE_SETTINGS = {
+    "ENABLED": True,
+    "ACTION": "reject",
+    "WINDOW_SECONDS": 600,
+    "MAX_COPIES": 3,
+    "MAX_DISTANCE": 6,
+    "MIN_LENGTH": 20,
+    "SHINGLE_SIZE": 3,
+    "MAX_HASHED_LENGTH": 4000,
+    "MAX_BUCKET_SIZE": 64,
+    "MAX_BUCKETS": 200_000,
+}
+
+BITS = 64
+BANDS = 8
+BAND_BITS = BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+_ANCHOR = re.compile(r">>\d+(?:-\d+)?")
+_IGNORED = re.compile(r"\s+")
+
+
+def get_near_duplicate_settings() -> dict:
+    """デフォルト値をマージしたコピペ検出設定を返す.
+
+    Returns:
+        settings.NEAR_DUPLICATE_POSTS にデフォルト値を補完した辞書
+    """
+    return {
+        **DEFAULT_NEAR_DUPLICATE_SETTINGS,
+        **getattr(settings, "NEAR_DUPLICATE_POSTS", {}),
+    }
+
+
+def normalize(text: str) -> str:
+    """比較用に本文を正規化する.
+
+    全角・半角の違い、大文字・小文字、空白、アンカー（>>123）を除き、
+    レス番号だけを変えたコピペも同一の文字列になるようにする。
+
+    Args:
+        text: 投稿本文
+
+    Returns:
+        正規化した文字列
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _IGNORED.sub("", _ANCHOR.sub("", text))
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """正規化済みの文字列から64ビットのSimHash指紋を求める.
+
+    単語区切りのない日本語でも扱えるよう、文字単位のnグラムを特徴量とする。
+
+    Args:
+        text: 正規化済みの文字列
+        shingle_size: nグラムの文字数
+
+    Returns:
+        64ビットの指紋
+    """
+    shingles = [
+        text[start : start + shingle_size].encode()
+        for start in range(max(1, len(text) - shingle_size + 1))
+    ]
+    # NOTE: 各ハッシュを64桁の2進文字列にし、zip() で桁ごとに転置して数えると、
+    # 桁ごとの重みの加減算をPythonのループで行うより大幅に速い
+    columns = zip(
+        *(
+            format(
+                int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest()),
+                "064b",
+            )
+            for shingle in shingles
+        ),
+        strict=True,
+    )
+    # NOTE: 1の桁が過半数（重みが正）のビットを立てる。文字列は上位ビットから並ぶ
+    return int(
+        "".join(
+            "1" if column.count("1") * 2 > len(shingles) else "0" for column in columns
+        ),
+        2,
+    )
+
+
+def bands(fingerprint: int) -> list[tuple[int, int]]:
+    """指紋をLSHの帯に分割する.
+
+    Args:
+        fingerprint: 64ビットの指紋
+
+    Returns:
+        (帯の番号, 帯の値) のリスト
+    """
+    return [
+        (band, fingerprint >> (band * BAND_BITS) & BAND_MASK) for band in range(BANDS)
+    ]
+
+
+@dataclass(frozen=True)
+class Verdict:
+    """コピペ判定の結果.
+
+    Attributes:
+        copies: 時間窓内に受け付けたほぼ同一の投稿の数
+        retry_after: 最も古いほぼ同一の投稿が時間窓から外れるまでの秒数
+    """
+
+    copies: int
+    retry_after: float
+
+
+class NearDuplicateIndex:
+    """直近の投稿の指紋を保持するLSHインデックス.
+
+    帯ごとのバケットは (受付時刻, 登録番号, 指紋) の両端キューで、
+    時間窓を過ぎたものは参照時に先頭から取り除く。
+    バケットが MAX_BUCKET_SIZE 件を超えると古いものから捨て、
+    バケット数が MAX_BUCKETS を超えると最も長く使われていないバケットから捨てる。
+    """
+
+    def __init__(self) -> None:
+        """空のインデックスを初期化する."""
+        self._lock = threading.Lock()
+        self._buckets: OrderedDict[tuple[int, int], deque] = OrderedDict()
+        self._sequence = itertools.count()
+
+    def check(self, fingerprint: int, now: float, config: dict) -> Verdict:
+        """時間窓内のほぼ同一の投稿を数える.
+
+        Args:
+            fingerprint: 判定する投稿の指紋
+            now: 現在時刻
+            config: コピペ検出設定
+
+        Returns:
+            判定の結果
+        """
+        cutoff = now - config["WINDOW_SECONDS"]
+        matches: dict[tuple[float, int, int], None] = {}
+        with self._lock:
+            for key in bands(fingerprint):
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    continue
+                while bucket and bucket[0][0] <= cutoff:
+                    bucket.popleft()
+                for entry in bucket:
+                    if (entry[2] ^ fingerprint).bit_count() <= config["MAX_DISTANCE"]:
+                        matches[entry] = None
+        if not matches:
+            return Verdict(copies=0, retry_after=0.0)
+        oldest = min(entry[0] for entry in matches)
+        return Verdict(copies=len(matches), retry_after=oldest - cutoff)
+
+    def add(self, fingerprint: int, now: float, config: dict) -> None:
+        """受け付けた投稿の指紋を登録する.
+
+        Args:
+            fingerprint: 投稿の指紋
+            now: 受付時刻
+            config: コピペ検出設定
+        """
+        with self._lock:
+            entry = (now, next(self._sequence), fingerprint)
+            for key in bands(fingerprint):
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = deque(
+                        maxlen=config["MAX_BUCKET_SIZE"]
+                    )
+                bucket.append(entry)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > config["MAX_BUCKETS"]:
+                self._buckets.popitem(last=False)
+
+    def clear(self) -> None:
+        """全ての指紋を破棄する."""
+        with self._lock:
+            self._buckets.clear()
+
+
+near_duplicate_index = NearDuplicateIndex()
+
+
+def screen(content: str) -> int | None:
+    """投稿本文がコピペ連投でないかを判定し、受け付ける場合は指紋を返す.
+
+    時間窓内にほぼ同一の投稿が MAX_COPIES 件以上ある場合、
+    ACTION が "reject" なら400エラー、"throttle" なら
+    最も古い投稿が時間窓から外れるまで429エラーとする。
+    MIN_LENGTH 文字未満（正規化後）の短い本文は定型の相槌とみなして判定しない。
+    返した指紋は、投稿の保存が確定した後に record() で登録する。
+
+    Args:
+        content: 投稿本文
+
+    Returns:
+        登録する指紋（判定しなかった場合はNone）
+
+    Raises:
+        ValidationError: ACTIONが "reject" でコピペと判定した場合
+        Throttled: ACTIONが "throttle" でコピペと判定した場合
+    """
+    config = get_near_duplicate_settings()
+    if not config["ENABLED"]:
+        return None
+    text = normalize(content)
+    if len(text) < config["MIN_LENGTH"]:
+        return None
+
+    fingerprint = simhash(text[: config["MAX_HASHED_LENGTH"]], config["SHINGLE_SIZE"])
+    verdict = near_duplicate_index.check(fingerprint, time.monotonic(), config)
+    if verdict.copies >= config["MAX_COPIES"]:
+        metrics.increment("near_duplicate_rejected_total", action=config["ACTION"])
+        if config["ACTION"] == "throttle":
+            raise Throttled(wait=verdict.retry_after)
+        raise ValidationError(
+            "A near-identical post was submitted too many times recently."
+        )
+    return fingerprint
+
+
+def record(fingerprint: int | None) -> None:
+    """保存が確定した投稿の指紋をインデックスに登録する.
+
+    Args:
+        fingerprint: screen() が返した指紋（Noneの場合は何もしない）
+    """
+    if fingerprint is None:
+        return
+    near_duplicate_index.add(
+        fingerprint, time.monotonic(), get_near_duplicate_settings()
+    )
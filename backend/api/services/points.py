@@ -0,0 +1,567 @@
+"""匿名ユーザーのポイント・レベルと、ポイントのランキングの維持.
+
+UserSession の post_count / thread_count / total_points / level は
+投稿・スレッド作成・受け取ったリアクションから求める非正規化カウンターで、
+record_events() で加減算する。投稿・スレッド・リアクションの作成と削除は、
+書き込みのリクエストではなくイベントログ（api.services.events）の
+コンシューマー PointsConsumer が加減算し、replay_events でログから作り直せる。
+同じ増減量のセッションは1回のUPDATEにまとめ、level も同じUPDATEの中で
+新しい total_points から計算する。シグナルを経由しない変更で生じたずれは
+recount_user_stats() で一括再集計する。
+
+    total_points = POST * 投稿数 + THREAD * スレッド数
+                   + REACTION_RECEIVED * 受け取ったリアクション数
+    level = 1 + floor(sqrt(total_points / LEVEL_STEP))
+
+ランキングはプロセス内の Leaderboard が保持する。セッションが持つポイントの
+異なる値だけを昇順に並べ、その位置ごとのセッション数をFenwick木
+（Binary Indexed Tree）で数える。木の大きさはポイントの最大値ではなく
+異なる値の数になり、任意のセッションの順位は「自分より多いポイントの
+セッション数 + 1」として O(log D)（D は異なる値の数）で求まるため、
+board_user_session をCOUNTする必要がない。上位 LEADERBOARD_SIZE 件は
+ソート済みのリストとして別に維持する。
+
+全件を読み込むのは初回（と clear() の後）だけで、他のワーカーでの加減算は
+LEADERBOARD_REFRESH_SECONDS ごとに、points_updated_at が前回の読み込み以降の
+セッションだけを読み直して反映する。実行中だったトランザクションが後から
+コミットした更新も拾えるよう、LEADERBOARD_REFRESH_OVERLAP_SECONDS だけ
+遡って読み直す（同じセッションを読み直しても結果は変わらない）。
+"""
+
+import bisect
+import heapq
+import math
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Count,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Cast, Coalesce, Floor, Greatest, Now, Sqrt
+from django.utils import timezone
+
+from api.models import BoardEvent, Post, Reaction, Thread, UserSession
+from api.services.events import EventConsumer
+
+DEFAULT_POINTS_SETTINGS = {
+    "POST": 1,
+    "THREAD": 5,
+    "REACTION_RECEIVED": 2,
+    "LEVEL_STEP": 100,
+    "LEADERBOARD_SIZE": 100,
+    "LEADERBOARD_REFRESH_SECONDS": 10,
+    "LEADERBOARD_REFRESH_OVERLAP_SECONDS": 60,
+}
+
+
+def get_points_settings() -> dict:
+    """デフォルト値をマージしたポイント設定を返す.
+
+    Returns:
+        settings.POINTS にデフォルト値を補完した辞書
+    """
+    return {**DEFAULT_POINTS_SETTINGS, **getattr(settings, "POINTS", {})}
+
+
+def level_for(points: int) -> int:
+    """ポイントに対応するレベルを返す.
+
+    Args:
+        points: 総ポイント
+
+    Returns:
+        1 + floor(sqrt(points / LEVEL_STEP))
+    """
+    return 1 + math.isqrt(max(points, 0) // get_points_settings()["LEVEL_STEP"])
+
+
+def level_expression(points) -> Cast:
+    """level_for() と同じ計算をするSQL式を返す.
+
+    Args:
+        points: 総ポイントを表す式
+
+    Returns:
+        レベルを表す式
+    """
+    step = Value(get_points_settings()["LEVEL_STEP"])
+    # 負の総ポイントでは平方根がNULL（SQLite）やエラー（PostgreSQL）になるため、
+    # level_for() と同様に0で下限を取る
+    points = Greatest(points, Value(0))
+    return Value(1) + Cast(Floor(Sqrt(points / step)), IntegerField())
+
+
+@dataclass(frozen=True)
+class Award:
+    """1セッションあたりのカウンターの増減量.
+
+    Attributes:
+        posts: 投稿数の増減
+        threads: スレッド数の増減
+        points: 総ポイントの増減
+    """
+
+    posts: int = 0
+    threads: int = 0
+    points: int = 0
+
+
+def record_events(
+    *,
+    posts: Iterable[int | None] = (),
+    threads: Iterable[int | None] = (),
+    reactions_received: Iterable[int | None] = (),
+    sign: int = 1,
+) -> None:
+    """投稿・スレッド作成・リアクションをセッションのカウンターに反映する.
+
+    Args:
+        posts: 投稿者のセッションID（1投稿につき1回、重複可、Noneは無視）
+        threads: スレッド作成者のセッションID
+        reactions_received: リアクションを受けた投稿の投稿者のセッションID
+        sign: 作成の場合1、削除の場合-1
+    """
+    config = get_points_settings()
+    post_counts = Counter(pk for pk in posts if pk is not None)
+    thread_counts = Counter(pk for pk in threads if pk is not None)
+    reaction_counts = Counter(pk for pk in reactions_received if pk is not None)
+    awards = {
+        pk: Award(
+            posts=sign * post_counts[pk],
+            threads=sign * thread_counts[pk],
+            points=sign
+            * (
+                config["POST"] * post_counts[pk]
+                + config["THREAD"] * thread_counts[pk]
+                + config["REACTION_RECEIVED"] * reaction_counts[pk]
+            ),
+        )
+        for pk in post_counts | thread_counts | reaction_counts
+    }
+    apply_awards(awards)
+
+
+def apply_awards(awards: Mapping[int, Award]) -> None:
+    """セッションごとの増減量を適用する.
+
+    同じ増減量のセッションは1回のUPDATEにまとめる。
+    ランキングへの反映はトランザクションのコミット後に行い、
+    他のワーカーには points_updated_at を通じて差分読み込みで伝わる。
+
+    Args:
+        awards: セッションIDから増減量への辞書
+    """
+    by_award: dict[Award, list[int]] = {}
+    for pk, award in awards.items():
+        if award != Award():
+            by_award.setdefault(award, []).append(pk)
+    for award, pks in by_award.items():
+        points = F("total_points") + award.points
+        UserSession.objects.filter(pk__in=pks).update(
+            post_count=F("post_count") + award.posts,
+            thread_count=F("thread_count") + award.threads,
+            total_points=points,
+            level=level_expression(points),
+            **({"points_updated_at": Now()} if award.points else {}),
+        )
+    deltas = {pk: award.points for pk, award in awards.items() if award.points}
+    if deltas:
+        transaction.on_commit(lambda: leaderboard.adjust(deltas))
+
+
+class PointsConsumer(EventConsumer):
+    """投稿・スレッド・リアクションの作成と削除をポイントに加減算するコンシューマー.
+
+    投稿者・スレッド作成者・リアクションを受けた投稿の投稿者はイベントの
+    ペイロードから求めるため、対象が削除された後でもログから再生できる。
+    """
+
+    kinds = frozenset(
+        {
+            BoardEvent.Kind.POST_CREATED,
+            BoardEvent.Kind.POST_DELETED,
+            BoardEvent.Kind.THREAD_CREATED,
+            BoardEvent.Kind.THREAD_DELETED,
+            BoardEvent.Kind.REACTION_CREATED,
+            BoardEvent.Kind.REACTION_DELETED,
+        }
+    )
+
+    def reset(self) -> None:
+        """全てのセッションの統計値を初期値に戻し、ランキングを破棄する."""
+        UserSession.objects.update(
+            post_count=0,
+            thread_count=0,
+            total_points=0,
+            level=1,
+            points_updated_at=Now(),
+        )
+        transaction.on_commit(leaderboard.clear)
+
+    def handle(self, events: list[BoardEvent]) -> None:
+        """作成と削除を、それぞれ1回の record_events() にまとめて反映する.
+
+        Args:
+            events: 投稿・スレッド・リアクションの作成と削除のイベント
+        """
+        for sign, post_kind, thread_kind, reaction_kind in (
+            (
+                1,
+                BoardEvent.Kind.POST_CREATED,
+                BoardEvent.Kind.THREAD_CREATED,
+                BoardEvent.Kind.REACTION_CREATED,
+            ),
+            (
+                -1,
+                BoardEvent.Kind.POST_DELETED,
+                BoardEvent.Kind.THREAD_DELETED,
+                BoardEvent.Kind.REACTION_DELETED,
+            ),
+        ):
+            record_events(
+                posts=_payload_values(events, post_kind, "author_session_id"),
+                threads=_payload_values(events, thread_kind, "author_session_id"),
+                reactions_received=_payload_values(
+                    events, reaction_kind, "post_author_session_id"
+                ),
+                sign=sign,
+            )
+
+
+def _payload_values(events: list[BoardEvent], kind: str, key: str) -> list:
+    """指定した種類のイベントのペイロードから値を取り出す.
+
+    Args:
+        events: イベント
+        kind: 取り出すイベントの種類
+        key: ペイロードのキー
+
+    Returns:
+        値のリスト（キーがない場合はNone）
+    """
+    return [event.payload.get(key) for event in events if event.kind == kind]
+
+
+def mark_points_changed(session_ids: Iterable[int]) -> None:
+    """シグナルを経由せずにポイントを書き換えたセッションをランキングに伝える.
+
+    Args:
+        session_ids: total_points を書き換えたセッションのID
+    """
+    UserSession.objects.filter(pk__in=list(session_ids)).update(points_updated_at=Now())
+    transaction.on_commit(leaderboard.clear)
+
+
+def _count(queryset, field: str) -> Coalesce:
+    """セッションごとの件数を返す相関サブクエリを組み立てる.
+
+    Args:
+        queryset: 数える対象のQuerySet
+        field: セッションを参照するフィールドのパス
+
+    Returns:
+        件数を表す式（0件の場合は0）
+    """
+    counts = (
+        queryset.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def actual_user_stats() -> dict:
+    """投稿・スレッド・リアクションのテーブルから求めた値を表す式を返す.
+
+    Returns:
+        post_count, thread_count, total_points, level の式の辞書
+    """
+    config = get_points_settings()
+    posts = _count(Post.objects.all(), "author_session")
+    threads = _count(Thread.objects.all(), "author_session")
+    reactions = _count(Reaction.objects.all(), "post__author_session")
+    points = (
+        posts * config["POST"]
+        + threads * config["THREAD"]
+        + reactions * config["REACTION_RECEIVED"]
+    )
+    return {
+        "post_count": posts,
+        "thread_count": threads,
+        "total_points": points,
+        "level": level_expression(points),
+    }
+
+
+def recount_user_stats(*, dry_run: bool = False) -> int:
+    """全セッションの投稿数・スレッド数・ポイント・レベルを再集計する.
+
+    Args:
+        dry_run: Trueの場合は更新せず、ずれているセッション数のみを返す
+
+    Returns:
+        いずれかの値が実際の値とずれていたセッション数
+    """
+    actual = actual_user_stats()
+    drifted = (
+        UserSession.objects.annotate(
+            **{f"actual_{name}": expression for name, expression in actual.items()}
+        )
+        .filter(
+            ~Q(post_count=F("actual_post_count"))
+            | ~Q(thread_count=F("actual_thread_count"))
+            | ~Q(total_points=F("actual_total_points"))
+            | ~Q(level=F("actual_level"))
+        )
+        .count()
+    )
+    if drifted and not dry_run:
+        UserSession.objects.update(**actual, points_updated_at=Now())
+        leaderboard.clear()
+    return drifted
+
+
+class FenwickTree:
+    """0以上の整数キーごとの件数を保持するFenwick木.
+
+    加算と、キーがある値以下の件数の合計をともに O(log size) で求める。
+    """
+
+    def __init__(self, size: int) -> None:
+        """全て0件の木を初期化する.
+
+        Args:
+            size: キーの個数（キーは0以上 size 未満）
+        """
+        self.size = size
+        self._tree = [0] * (size + 1)
+
+    @classmethod
+    def build(cls, counts: list[int]) -> "FenwickTree":
+        """キーごとの件数から O(size) で木を作る.
+
+        Args:
+            counts: キー 0, 1, ... の件数
+
+        Returns:
+            作成した木
+        """
+        tree = cls(len(counts))
+        tree._tree[1:] = counts
+        for index in range(1, tree.size + 1):
+            parent = index + (index & -index)
+            if parent <= tree.size:
+                tree._tree[parent] += tree._tree[index]
+        return tree
+
+    def add(self, key: int, delta: int) -> None:
+        """キーの件数を加減算する.
+
+        Args:
+            key: 0以上 size 未満のキー
+            delta: 増減量
+        """
+        index = key + 1
+        while index <= self.size:
+            self._tree[index] += delta
+            index += index & -index
+
+    def prefix(self, key: int) -> int:
+        """キーが key 以下の件数の合計を返す.
+
+        Args:
+            key: キー（size以上の場合は全件）
+
+        Returns:
+            件数の合計
+        """
+        index = min(key + 1, self.size)
+        total = 0
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+
+class Leaderboard:
+    """総ポイントのランキング.
+
+    ポイントが1以上のセッションだけを保持する。
+    ポイントが0のセッションの順位は、保持しているセッション数 + 1 になる。
+    初回の参照時に全件を、以降は LEADERBOARD_REFRESH_SECONDS ごとに
+    ポイントが変わったセッションだけをデータベースから読み込む。
+    """
+
+    def __init__(self) -> None:
+        """未読み込みのランキングを初期化する."""
+        self._lock = threading.Lock()
+        self._loaded_at: float | None = None
+        self._synced_at: datetime | None = None
+        self._scores: dict[int, int] = {}
+        self._counts: Counter[int] = Counter()
+        self._values: list[int] = []
+        self._tree = FenwickTree(0)
+        self._top: list[tuple[int, int]] | None = []
+
+    def rank(self, points: int) -> int:
+        """指定したポイントのセッションの順位を返す.
+
+        同点のセッションは同じ順位とする。
+
+        Args:
+            points: 総ポイント
+
+        Returns:
+            自分より多いポイントのセッション数 + 1
+        """
+        with self._lock:
+            self._ensure_loaded()
+            at_most = bisect.bisect_right(self._values, points)
+            return len(self._scores) - self._tree.prefix(at_most - 1) + 1
+
+    def top(self, limit: int) -> list[tuple[int, int]]:
+        """ポイントの多い順にセッションを返す.
+
+        Args:
+            limit: 件数（LEADERBOARD_SIZE まで）
+
+        Returns:
+            (セッションID, 総ポイント) のリスト（同点はID順）
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if self._top is None:
+                self._top = heapq.nsmallest(
+                    get_points_settings()["LEADERBOARD_SIZE"],
+                    ((-points, pk) for pk, points in self._scores.items()),
+                )
+            return [(pk, -negated) for negated, pk in self._top[:limit]]
+
+    def adjust(self, deltas: Mapping[int, int]) -> None:
+        """セッションのポイントを加減算する.
+
+        未読み込みの場合は次の読み込みで反映されるため何もしない。
+
+        Args:
+            deltas: セッションIDからポイントの増減量への辞書
+        """
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            for pk, delta in deltas.items():
+                self._set(pk, max(self._scores.get(pk, 0) + delta, 0))
+
+    def clear(self) -> None:
+        """保持しているランキングを破棄し、次の参照で全件を読み込み直させる."""
+        with self._lock:
+            self._loaded_at = None
+            self._synced_at = None
+            self._scores = {}
+            self._counts = Counter()
+            self._values = []
+            self._tree = FenwickTree(0)
+            self._top = []
+
+    def _ensure_loaded(self) -> None:
+        """未読み込みであれば全件を、再読み込みの時期であれば差分を読み込む."""
+        config = get_points_settings()
+        now = time.monotonic()
+        if (
+            self._loaded_at is not None
+            and now - self._loaded_at < config["LEADERBOARD_REFRESH_SECONDS"]
+        ):
+            return
+        synced_at = timezone.now()
+        if self._synced_at is None:
+            self._scores = dict(
+                UserSession.objects.filter(total_points__gt=0).values_list(
+                    "pk", "total_points"
+                )
+            )
+            self._counts = Counter(self._scores.values())
+            self._rebuild()
+            self._top = None
+        else:
+            since = self._synced_at - timedelta(
+                seconds=config["LEADERBOARD_REFRESH_OVERLAP_SECONDS"]
+            )
+            for pk, points in UserSession.objects.filter(
+                points_updated_at__gte=since
+            ).values_list("pk", "total_points"):
+                self._set(pk, max(points, 0))
+        self._synced_at = synced_at
+        self._loaded_at = now
+
+    def _rebuild(self) -> None:
+        """いずれかのセッションが持つポイントの値だけでFenwick木を作り直す.
+
+        新しい値が現れた場合に呼ばれ、件数0になった値もここで取り除く。
+        """
+        self._values = sorted(self._counts)
+        self._tree = FenwickTree.build([self._counts[v] for v in self._values])
+
+    def _set(self, pk: int, points: int) -> None:
+        """セッションのポイントを更新する.
+
+        Args:
+            pk: セッションID
+            points: 新しい総ポイント
+        """
+        previous = self._scores.pop(pk, 0)
+        if previous:
+            self._counts[previous] -= 1
+            self._tree.add(bisect.bisect_left(self._values, previous), -1)
+            if not self._counts[previous]:
+                # NOTE: 値は次の作り直しまで件数0のまま木に残す
+                del self._counts[previous]
+        if points:
+            self._scores[pk] = points
+            self._counts[points] += 1
+            index = bisect.bisect_left(self._values, points)
+            if index < len(self._values) and self._values[index] == points:
+                self._tree.add(index, 1)
+            else:
+                self._rebuild()
+        self._update_top(pk, previous, points)
+
+    def _update_top(self, pk: int, previous: int, points: int) -> None:
+        """上位のリストを更新する.
+
+        上位にいたセッションのポイントが減った場合は、
+        圏外から繰り上がるセッションが分からないため次の参照で作り直す。
+
+        Args:
+            pk: セッションID
+            previous: 更新前の総ポイント
+            points: 更新後の総ポイント
+        """
+        if self._top is None:
+            return
+        size = get_points_settings()["LEADERBOARD_SIZE"]
+        old_key = (-previous, pk)
+        index = bisect.bisect_left(self._top, old_key)
+        if index < len(self._top) and self._top[index] == old_key:
+            if points < previous and len(self._scores) > size:
+                self._top = None
+                return
+            del self._top[index]
+        if points:
+            bisect.insort(self._top, (-points, pk))
+            del self._top[size:]
+
+
+leaderboard = Leaderboard()
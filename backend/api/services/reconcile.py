@@ -0,0 +1,309 @@
+"""非正規化カウンターのチャンク単位の照合と修正.
+
+カウンター（Thread.post_count、UserSession.post_count など）はシグナルやF()式で
+増分更新されるため、プロセスの異常終了やシグナルを経由しない削除でずれることがある。
+ここでは各カウンターの実際の値を相関サブクエリの式で表し、主キーの範囲
+（キーセットページング）ごとに「ずれている行の抽出」と「その行だけのUPDATE」を
+1トランザクションで行う。
+
+- 1トランザクションで扱う行は CHUNK_SIZE 件までで、チャンクの間に PAUSE_SECONDS 秒
+  待つため、稼働中のデータベースでも行ロックを長く保持しない。
+- PostgreSQLではチャンクごとに lock_timeout を LOCK_TIMEOUT_MS に設定し、
+  アプリケーションのロックを待ち続けない。タイムアウトしたチャンクは
+  RETRIES 回まで再試行する。
+- partition_field を持つカウンター（スレッドのカウンターはカテゴリ）は、
+  分割ごとに別のスレッドで並列に照合できる。
+
+Thread.view_count は閲覧の記録が残らず実際の値を求められないため、対象外とする。
+"""
+
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.db.models import Count, Expression, F, Model, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from api.models import Category, Post, Tag, Thread, UserSession
+from api.services.points import actual_user_stats, mark_points_changed
+from api.services.tag_usage import actual_usage_count
+from api.services.thread_counts import actual_thread_count
+
+DEFAULT_RECONCILE_SETTINGS = {
+    "CHUNK_SIZE": 1000,
+    "PAUSE_SECONDS": 0.05,
+    "LOCK_TIMEOUT_MS": 2000,
+    "RETRIES": 3,
+}
+
+
+def get_reconcile_settings() -> dict:
+    """デフォルト値をマージしたカウンター照合設定を返す.
+
+    Returns:
+        settings.COUNTER_RECONCILIATION にデフォルト値を補完した辞書
+    """
+    return {
+        **DEFAULT_RECONCILE_SETTINGS,
+        **getattr(settings, "COUNTER_RECONCILIATION", {}),
+    }
+
+
+def actual_post_count() -> Coalesce:
+    """投稿テーブルから数えた実際のスレッドの投稿数を表す式を返す.
+
+    Returns:
+        スレッドごとの投稿数を返す相関サブクエリ（0件の場合は0）
+    """
+    counts = (
+        Post.objects.filter(thread_id=OuterRef("pk"))
+        .order_by()
+        .values("thread_id")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+@dataclass(frozen=True)
+class CounterSet:
+    """1つのモデルの非正規化カウンターと、その実際の値の求め方.
+
+    Attributes:
+        model: カウンターを持つモデル
+        actual: フィールド名から実際の値を表す式への辞書を返す関数
+        partition_field: 並列に照合する場合の分割キーのフィールド名
+        after_fix: 修正した行の主キーを受け取り、後処理を行う関数
+    """
+
+    model: type[Model]
+    actual: Callable[[], dict[str, Expression]]
+    partition_field: str | None = None
+    after_fix: Callable[[list[int]], None] | None = None
+
+
+COUNTER_SETS: dict[str, CounterSet] = {
+    "thread.post_count": CounterSet(
+        Thread,
+        lambda: {"post_count": actual_post_count()},
+        partition_field="category_id",
+    ),
+    "user_session.stats": CounterSet(
+        UserSession,
+        actual_user_stats,
+        after_fix=mark_points_changed,
+    ),
+    "category.thread_count": CounterSet(
+        Category, lambda: {"thread_count": actual_thread_count()}
+    ),
+    "tag.usage_count": CounterSet(Tag, lambda: {"usage_count": actual_usage_count()}),
+}
+
+
+@dataclass(frozen=True)
+class Drift:
+    """実際の値とずれていたカウンター1つ.
+
+    Attributes:
+        counter: カウンターの集合の名前（COUNTER_SETS のキー）
+        pk: 行の主キー
+        field: フィールド名
+        stored: 保存されていた値
+        actual: 実際の値
+    """
+
+    counter: str
+    pk: int
+    field: str
+    stored: int
+    actual: int
+
+
+@dataclass
+class ReconcileResult:
+    """カウンターの集合1つの照合結果.
+
+    Attributes:
+        counter: カウンターの集合の名前
+        checked: 照合した行数
+        drifts: ずれていたカウンター
+    """
+
+    counter: str
+    checked: int = 0
+    drifts: list[Drift] = field(default_factory=list)
+
+    def merge(self, other: "ReconcileResult") -> None:
+        """別の分割の結果を加える.
+
+        Args:
+            other: 同じカウンターの集合の結果
+        """
+        self.checked += other.checked
+        self.drifts.extend(other.drifts)
+
+    @property
+    def drifted_rows(self) -> int:
+        """ずれていた行数を返す.
+
+        Returns:
+            いずれかのカウンターがずれていた行数
+        """
+        return len({drift.pk for drift in self.drifts})
+
+
+def _check_chunk(
+    name: str, counter_set: CounterSet, chunk, dry_run: bool, lock_timeout_ms: int
+) -> list[Drift]:
+    """1チャンクのずれを抽出し、dry_runでなければずれた行だけを修正する.
+
+    Args:
+        name: カウンターの集合の名前
+        counter_set: カウンターの集合
+        chunk: チャンクの行のQuerySet
+        dry_run: Trueの場合は更新しない
+        lock_timeout_ms: ロック待ちの上限（PostgreSQLのみ）
+
+    Returns:
+        チャンク内のずれ
+    """
+    actual = counter_set.actual()
+    annotations = {f"actual_{column}": value for column, value in actual.items()}
+    differs = Q()
+    for column in actual:
+        differs |= ~Q(**{column: F(f"actual_{column}")})
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"SET LOCAL lock_timeout = '{int(lock_timeout_ms)}ms'")
+        rows = list(
+            chunk.annotate(**annotations)
+            .filter(differs)
+            .values("pk", *actual, *annotations)
+        )
+        drifts = [
+            Drift(name, row["pk"], column, row[column], row[f"actual_{column}"])
+            for row in rows
+            for column in actual
+            if row[column] != row[f"actual_{column}"]
+        ]
+        if rows and not dry_run:
+            ids = [row["pk"] for row in rows]
+            counter_set.model.objects.filter(pk__in=ids).update(**actual)
+            if counter_set.after_fix is not None:
+                counter_set.after_fix(ids)
+    return drifts
+
+
+def reconcile(
+    name: str,
+    *,
+    dry_run: bool = False,
+    partition=None,
+    chunk_size: int | None = None,
+    pause: float | None = None,
+) -> ReconcileResult:
+    """カウンターの集合を主キーの範囲ごとに照合し、ずれを修正する.
+
+    Args:
+        name: カウンターの集合の名前（COUNTER_SETS のキー）
+        dry_run: Trueの場合は更新せず、ずれだけを返す
+        partition: 照合する分割キーの値（Noneの場合は全ての行）
+        chunk_size: 1トランザクションで照合する行数（省略時は設定値）
+        pause: チャンクの間に待つ秒数（省略時は設定値）
+
+    Returns:
+        照合結果
+    """
+    config = get_reconcile_settings()
+    chunk_size = chunk_size or config["CHUNK_SIZE"]
+    pause = config["PAUSE_SECONDS"] if pause is None else pause
+    counter_set = COUNTER_SETS[name]
+    rows = counter_set.model.objects.order_by()
+    if partition is not None:
+        rows = rows.filter(**{counter_set.partition_field: partition})
+
+    result = ReconcileResult(name)
+    last_pk = None
+    while True:
+        page = rows if last_pk is None else rows.filter(pk__gt=last_pk)
+        ids = list(page.order_by("pk").values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            return result
+        chunk = rows.filter(pk__gte=ids[0], pk__lte=ids[-1])
+        for attempt in range(config["RETRIES"] + 1):
+            try:
+                drifts = _check_chunk(
+                    name, counter_set, chunk, dry_run, config["LOCK_TIMEOUT_MS"]
+                )
+                break
+            except OperationalError:
+                # NOTE: ロック待ちのタイムアウトは少し待ってから同じチャンクをやり直す
+                if attempt == config["RETRIES"]:
+                    raise
+                time.sleep(max(pause, 0.1) * (attempt + 1))
+        result.checked += len(ids)
+        result.drifts.extend(drifts)
+        last_pk = ids[-1]
+        if pause:
+            time.sleep(pause)
+
+
+def _reconcile_partition(name: str, partition, **options) -> ReconcileResult:
+    """ワーカースレッドで1つの分割を照合し、終了後に接続を片付ける.
+
+    Args:
+        name: カウンターの集合の名前
+        partition: 分割キーの値
+        **options: reconcile() のキーワード引数
+
+    Returns:
+        分割の照合結果
+    """
+    try:
+        return reconcile(name, partition=partition, **options)
+    finally:
+        close_old_connections()
+
+
+def reconcile_counters(
+    names: Iterable[str] | None = None, *, jobs: int = 1, **options
+) -> list[ReconcileResult]:
+    """カウンターの集合を順に照合する.
+
+    jobs が2以上の場合、分割キーを持つカウンターの集合は分割ごとに
+    jobs 個のスレッドで並列に照合する。
+
+    Args:
+        names: カウンターの集合の名前（Noneの場合は全て）
+        jobs: 並列に照合するスレッド数
+        **options: reconcile() のキーワード引数
+
+    Returns:
+        カウンターの集合ごとの照合結果
+    """
+    results = []
+    for name in names or COUNTER_SETS:
+        counter_set = COUNTER_SETS[name]
+        if jobs <= 1 or counter_set.partition_field is None:
+            results.append(reconcile(name, **options))
+            continue
+        partitions = (
+            counter_set.model.objects.order_by(counter_set.partition_field)
+            .values_list(counter_set.partition_field, flat=True)
+            .distinct()
+        )
+        result = ReconcileResult(name)
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(_reconcile_partition, name, partition, **options)
+                for partition in partitions
+            ]
+            for future in futures:
+                result.merge(future.result())
+        result.drifts.sort(key=lambda drift: (drift.pk, drift.field))
+        results.append(result)
+    return results
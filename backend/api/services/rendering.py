@@ -0,0 +1,152 @@
+"""投稿本文の表示用HTMLへのレンダリング.
+
+本文の改行・アンカー（>>123、>>3-5）・URLを表示用のHTMLに変換する。
+読み取りのたびに変換するのではなく、投稿の保存時に一度だけ変換して
+Post.content_html に保存し、APIはその値をそのまま返す。
+
+- 本文中の文字列は全てエスケープし、このモジュールが生成するタグ
+  （<a> と <br>）以外はHTMLとして解釈されない。
+- URLは http / https のみをリンクにする。
+- 変換の規則を変えた場合は RENDERER_VERSION を上げる。古いバージョンの投稿は
+  読み取り時にメモリ上で変換し直し（current_html()）、保存済みのHTMLは
+  バックグラウンドタスクの rerender_stale() が少しずつ更新する。
+"""
+
+import re
+
+from django.db.models import Case, IntegerField, Value, When
+from django.utils.html import escape
+
+from api.models import Post
+
+RENDERER_VERSION = 1
+
+TOKEN_PATTERN = re.compile(
+    r"(?P<anchor>(?:>>|＞＞)(?P<start>\d{1,6})(?:-(?P<end>\d{1,6}))?)"
+    r"|(?P<url>https?://[A-Za-z0-9\-._~:/?#\[\]@!$&'()*+,;=%]+)"
+    r"|(?P<newline>\r\n|\r|\n)"
+)
+
+# NOTE: 文末の句読点や閉じ括弧はURLに含めない
+URL_TRAILING = ".,;:!?)'"
+
+RERENDER_BATCH_SIZE = 500
+
+
+def _anchor(start: str, end: str | None, text: str) -> str:
+    """アンカーのリンクを組み立てる.
+
+    Args:
+        start: 参照先のレス番号
+        end: 範囲指定の終わりのレス番号
+        text: 本文中のアンカーの文字列
+
+    Returns:
+        レス番号をdata属性に持つ<a>タグ
+    """
+    start = str(int(start))
+    attributes = f'class="anchor" href="#post-{start}" data-post-number="{start}"'
+    if end is not None:
+        attributes += f' data-post-number-end="{int(end)}"'
+    return f"<a {attributes}>{escape(text)}</a>"
+
+
+def _link(url: str) -> str:
+    """外部リンクを組み立てる.
+
+    Args:
+        url: URL
+
+    Returns:
+        新しいタブで開く<a>タグ
+    """
+    url = escape(url)
+    return (
+        f'<a href="{url}" rel="nofollow noopener noreferrer ugc" '
+        f'target="_blank">{url}</a>'
+    )
+
+
+def render_content(content: str) -> str:
+    """投稿本文を表示用のHTMLに変換する.
+
+    Args:
+        content: 投稿本文
+
+    Returns:
+        エスケープ済みの本文に、アンカー・リンク・改行のタグを加えたHTML
+    """
+    parts = []
+    position = 0
+    for match in TOKEN_PATTERN.finditer(content):
+        parts.append(escape(content[position : match.start()]))
+        position = match.end()
+        if match["anchor"] is not None:
+            parts.append(_anchor(match["start"], match["end"], match["anchor"]))
+        elif match["url"] is not None:
+            url = match["url"].rstrip(URL_TRAILING)
+            parts.append(_link(url))
+            position = match.start() + len(url)
+        else:
+            parts.append("<br>")
+    parts.append(escape(content[position:]))
+    return "".join(parts)
+
+
+def render_fields(content: str) -> dict:
+    """投稿の保存時に設定するレンダリング結果のフィールドを返す.
+
+    Args:
+        content: 投稿本文
+
+    Returns:
+        content_html と render_version の辞書
+    """
+    return {"content_html": render_content(content), "render_version": RENDERER_VERSION}
+
+
+def current_html(content_html: str, render_version: int, content: str) -> str:
+    """現在のレンダラーによるHTMLを返す.
+
+    保存済みのHTMLが古いバージョンの場合は、その場で変換し直す
+    （保存はしない）。
+
+    Args:
+        content_html: 保存済みのHTML
+        render_version: 保存済みのHTMLのバージョン
+        content: 投稿本文
+
+    Returns:
+        表示用のHTML
+    """
+    if render_version == RENDERER_VERSION:
+        return content_html
+    return render_content(content)
+
+
+def rerender_stale(batch_size: int = RERENDER_BATCH_SIZE) -> int:
+    """古いバージョンでレンダリングされた投稿のHTMLを更新する.
+
+    (render_version, id) のインデックス順に batch_size 件ずつ読み、
+    バッチごとに1回のUPDATEで書き戻す。
+
+    Args:
+        batch_size: 1回のUPDATEで更新する件数
+
+    Returns:
+        更新した投稿の件数
+    """
+    updated = 0
+    while rows := list(
+        Post.objects.filter(render_version__lt=RENDERER_VERSION)
+        .order_by("render_version", "id")
+        .values_list("id", "content")[:batch_size]
+    ):
+        Post.objects.filter(pk__in=[pk for pk, _ in rows]).update(
+            content_html=Case(
+                *(When(pk=pk, then=Value(render_content(text))) for pk, text in rows),
+            ),
+            render_version=Value(RENDERER_VERSION, output_field=IntegerField()),
+        )
+        updated += len(rows)
+    return updated
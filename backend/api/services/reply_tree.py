@@ -0,0 +1,88 @@
+"""返信（Post.reply_to）がつくる会話ツリーの取得.
+
+ある投稿から返信元をたどった祖先と、返信をたどった子孫を
+1つの再帰CTE（WITH RECURSIVE）で求める。子孫の探索は
+(thread_id, reply_to_id) のインデックスを使い、同じスレッドの投稿だけを
+たどる。
+
+祖先は1段に1件のため depth 件で止まるが、子孫は1段ごとに返信の数だけ
+広がるため、段数だけでは行数を抑えられない。そこで子孫は limit 件で
+打ち切る。再帰CTEは外側のクエリが読んだ分だけ評価される
+（PostgreSQL・SQLiteとも）ため、limit 件に達した時点で探索も止まる。
+探索は段ごとに進むので、打ち切られるのは起点から遠い返信になる。
+"""
+
+from django.db.models import QuerySet
+from django.db.models.expressions import RawSQL
+
+from api.models import Post
+
+REPLY_TREE_SQL = """
+WITH RECURSIVE
+    ancestors (id, thread_id, reply_to_id, depth) AS (
+        SELECT id, thread_id, reply_to_id, 0 FROM board_post WHERE id = %s
+        UNION
+        SELECT parent.id, parent.thread_id, parent.reply_to_id, child.depth + 1
+        FROM board_post parent
+        JOIN ancestors child
+            ON parent.id = child.reply_to_id AND parent.thread_id = child.thread_id
+        WHERE child.depth < %s
+    ),
+    descendants (id, thread_id, depth) AS (
+        SELECT id, thread_id, 0 FROM board_post WHERE id = %s
+        UNION
+        SELECT reply.id, reply.thread_id, parent.depth + 1
+        FROM board_post reply
+        JOIN descendants parent
+            ON reply.thread_id = parent.thread_id AND reply.reply_to_id = parent.id
+        WHERE parent.depth < %s
+    ),
+    limited_descendants (id) AS (
+        SELECT id FROM descendants LIMIT %s
+    )
+SELECT id FROM ancestors
+UNION
+SELECT id FROM limited_descendants
+"""
+
+
+def reply_tree(post_id: int, depth: int, limit: int) -> QuerySet:
+    """投稿と、その祖先・子孫を depth 段まで含むクエリセットを返す.
+
+    Args:
+        post_id: 起点の投稿ID
+        depth: 祖先・子孫それぞれをたどる最大の段数
+        limit: 子孫の最大件数（起点に近い段から数える）
+
+    Returns:
+        会話ツリーの投稿のクエリセット（レス番号順、起点が存在しなければ空）
+    """
+    # NOTE: 子孫の探索結果の先頭は起点の投稿自身のため、1件多く読む
+    tree = RawSQL(REPLY_TREE_SQL, (post_id, depth, post_id, depth, limit + 1))
+    return Post.objects.filter(pk__in=tree).order_by("post_number")
+
+
+def split_tree(rows: list[dict], post_id: int) -> tuple[list, dict | None, list]:
+    """会話ツリーの行を祖先・起点・子孫に分ける.
+
+    Args:
+        rows: reply_tree() の行（id と reply_to_id を含む辞書、レス番号順）
+        post_id: 起点の投稿ID
+
+    Returns:
+        古い順の祖先、起点（行がなければNone）、レス番号順の子孫の組
+    """
+    by_id = {row["id"]: row for row in rows}
+    root = by_id.get(post_id)
+    if root is None:
+        return [], None, []
+    ancestor_ids = set()
+    parent_id = root["reply_to_id"]
+    while parent_id in by_id and parent_id not in ancestor_ids:
+        ancestor_ids.add(parent_id)
+        parent_id = by_id[parent_id]["reply_to_id"]
+    ancestors = [row for row in rows if row["id"] in ancestor_ids]
+    descendants = [
+        row for row in rows if row["id"] != post_id and row["id"] not in ancestor_ids
+    ]
+    return ancestors, root, descendants
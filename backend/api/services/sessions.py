@@ -0,0 +1,310 @@
+"""匿名ユーザーセッションの解決と最終アクティビティの記録.
+
+署名付きCookieに入ったsession_id（UUID）から UserSession を解決する。
+解決結果はプロセス内のLRUとDjangoキャッシュの2段に保持し、
+どちらかにあればデータベースにはアクセスしない。
+キャッシュに載せるのは主キーと表示名だけで、投稿数やポイントのような
+統計値は含めない（必要な場合は呼び出し側でデータベースから取得する）。
+
+last_activity_at はリクエストごとに書き込まず、プロセス内にsession_idごとの
+最終アクティビティ時刻を溜めておき、ACTIVITY_FLUSH_INTERVAL 秒ごと
+（または ACTIVITY_MAX_PENDING 件溜まった時点）に1回のUPDATEでまとめて反映する。
+プロセスが異常終了した場合、未反映のアクティビティ時刻は失われる。
+
+投稿などの記録を持たないまま放置されたセッションは、バックグラウンドタスク
+（api.services.tasks）の周期実行で collect_idle_sessions() が削除する。
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Case, DateTimeField, Exists, OuterRef, Value, When
+from django.utils import timezone
+
+from api.models import Post, Reaction, Thread, UserSession
+
+DEFAULT_ANONYMOUS_SESSION_SETTINGS = {
+    "COOKIE_NAME": "mb_session",
+    "COOKIE_SALT": "api.anonymous-session",
+    "COOKIE_AGE": 365 * 24 * 3600,
+    "CACHE_ALIAS": "default",
+    "CACHE_TIMEOUT": 24 * 3600,
+    "MAX_LOCAL_ENTRIES": 50_000,
+    "ACTIVITY_FLUSH_INTERVAL": 60,
+    "ACTIVITY_MAX_PENDING": 1000,
+    "IDLE_SESSION_DAYS": 30,
+    "IDLE_SESSION_BATCH_SIZE": 1000,
+}
+
+
+def get_anonymous_session_settings() -> dict:
+    """デフォルト値をマージした匿名セッション設定を返す.
+
+    Returns:
+        settings.ANONYMOUS_SESSIONS にデフォルト値を補完した辞書
+    """
+    return {
+        **DEFAULT_ANONYMOUS_SESSION_SETTINGS,
+        **getattr(settings, "ANONYMOUS_SESSIONS", {}),
+    }
+
+
+def _cache_key(session_key: str) -> str:
+    """Djangoキャッシュ上のキーを返す.
+
+    Args:
+        session_key: session_idの文字列表現
+
+    Returns:
+        キャッシュキー
+    """
+    return f"user-session:{session_key}"
+
+
+def _build(session_key: str, pk: int, temporary_name: str) -> UserSession:
+    """キャッシュの内容からデータベース由来のUserSessionを組み立てる.
+
+    外部キーへの代入と表示名の参照に必要な項目だけを持つ。
+
+    Args:
+        session_key: session_idの文字列表現
+        pk: 主キー
+        temporary_name: 表示名
+
+    Returns:
+        保存済みとして扱われるUserSessionインスタンス
+    """
+    session = UserSession(
+        pk=pk, session_id=uuid.UUID(session_key), temporary_name=temporary_name
+    )
+    session._state.adding = False
+    session._state.db = "default"
+    return session
+
+
+class SessionDirectory:
+    """session_idからUserSessionを引くための2段キャッシュ.
+
+    プロセス内のLRU（MAX_LOCAL_ENTRIES件）を先に、次にDjangoキャッシュを参照し、
+    どちらにもない場合だけデータベースに問い合わせる。
+    LRUのエントリもキャッシュと同じ CACHE_TIMEOUT 秒で期限切れとし、
+    collect_idle_sessions() が削除したセッションを使い続けないようにする。
+    """
+
+    def __init__(self) -> None:
+        """空のディレクトリを初期化する."""
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[tuple[int, str], float]] = OrderedDict()
+
+    def get(self, session_key: str) -> UserSession | None:
+        """session_idに対応するセッションを返す.
+
+        Args:
+            session_key: session_idの文字列表現
+
+        Returns:
+            セッション（存在しない場合None）
+        """
+        entry = None
+        with self._lock:
+            local = self._entries.get(session_key)
+            if local is not None and local[1] > time.monotonic():
+                entry = local[0]
+                self._entries.move_to_end(session_key)
+        if entry is None:
+            config = get_anonymous_session_settings()
+            entry = caches[config["CACHE_ALIAS"]].get(_cache_key(session_key))
+            if entry is None:
+                entry = (
+                    UserSession.objects.filter(session_id=session_key)
+                    .values_list("pk", "temporary_name")
+                    .first()
+                )
+                if entry is None:
+                    return None
+                self._share(session_key, entry, config)
+            self._remember(session_key, entry, config)
+        return _build(session_key, *entry)
+
+    def create(self, session_key: str | None = None) -> UserSession:
+        """新しいセッションを作成して登録する.
+
+        Args:
+            session_key: 発行済みのsession_id（省略時は新しく採番する）
+
+        Returns:
+            作成されたセッション
+        """
+        config = get_anonymous_session_settings()
+        session_id = uuid.UUID(session_key) if session_key else uuid.uuid4()
+        session, _ = UserSession.objects.get_or_create(
+            session_id=session_id,
+            defaults={"temporary_name": f"ID:{session_id.hex[:8]}"},
+        )
+        entry = (session.pk, session.temporary_name)
+        self._share(str(session_id), entry, config)
+        self._remember(str(session_id), entry, config)
+        return session
+
+    def forget(self, session_key: str) -> None:
+        """セッションをキャッシュから取り除く.
+
+        Args:
+            session_key: session_idの文字列表現
+        """
+        config = get_anonymous_session_settings()
+        with self._lock:
+            self._entries.pop(session_key, None)
+        caches[config["CACHE_ALIAS"]].delete(_cache_key(session_key))
+
+    def clear(self) -> None:
+        """プロセス内のエントリを全て破棄する."""
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, session_key: str, entry: tuple[int, str], config) -> None:
+        """プロセス内のLRUに登録する.
+
+        Args:
+            session_key: session_idの文字列表現
+            entry: (主キー, 表示名)
+            config: 匿名セッション設定
+        """
+        with self._lock:
+            self._entries[session_key] = (
+                entry,
+                time.monotonic() + config["CACHE_TIMEOUT"],
+            )
+            self._entries.move_to_end(session_key)
+            while len(self._entries) > config["MAX_LOCAL_ENTRIES"]:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _share(session_key: str, entry: tuple[int, str], config) -> None:
+        """Djangoキャッシュに登録する.
+
+        Args:
+            session_key: session_idの文字列表現
+            entry: (主キー, 表示名)
+            config: 匿名セッション設定
+        """
+        caches[config["CACHE_ALIAS"]].set(
+            _cache_key(session_key), entry, config["CACHE_TIMEOUT"]
+        )
+
+
+class ActivityBuffer:
+    """last_activity_at の更新をまとめて反映するバッファ.
+
+    同じセッションのアクティビティは最新の時刻だけを保持する。
+    """
+
+    def __init__(self) -> None:
+        """空のバッファを初期化する."""
+        self._lock = threading.Lock()
+        self._pending: dict[str, datetime] = {}
+        self._flushed_at = time.monotonic()
+
+    def touch(self, session_key: str, at: datetime | None = None) -> None:
+        """セッションのアクティビティを記録し、反映の時期であればフラッシュする.
+
+        Args:
+            session_key: session_idの文字列表現
+            at: アクティビティ時刻（省略時は現在時刻）
+        """
+        config = get_anonymous_session_settings()
+        with self._lock:
+            self._pending[session_key] = at or timezone.now()
+            due = (
+                len(self._pending) >= config["ACTIVITY_MAX_PENDING"]
+                or time.monotonic() - self._flushed_at
+                >= config["ACTIVITY_FLUSH_INTERVAL"]
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """溜まったアクティビティ時刻を1回のUPDATEで反映する.
+
+        Returns:
+            更新したセッションの件数
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return 0
+        return UserSession.objects.filter(session_id__in=list(pending)).update(
+            last_activity_at=Case(
+                *(
+                    When(session_id=session_key, then=Value(at))
+                    for session_key, at in pending.items()
+                ),
+                output_field=DateTimeField(),
+            )
+        )
+
+    def pending(self) -> int:
+        """未反映のセッション数を返す.
+
+        Returns:
+            未反映のセッション数
+        """
+        with self._lock:
+            return len(self._pending)
+
+    def clear(self) -> None:
+        """未反映のアクティビティを破棄する."""
+        with self._lock:
+            self._pending.clear()
+            self._flushed_at = time.monotonic()
+
+
+session_directory = SessionDirectory()
+activity_buffer = ActivityBuffer()
+
+
+def flush_activity() -> int:
+    """このプロセスで未反映のアクティビティ時刻をデータベースに反映する.
+
+    Returns:
+        更新したセッションの件数
+    """
+    return activity_buffer.flush()
+
+
+def collect_idle_sessions() -> int:
+    """投稿・スレッド・リアクションのないまま放置されたセッションを削除する.
+
+    最終アクティビティから IDLE_SESSION_DAYS 日以上経ったセッションが対象で、
+    IDLE_SESSION_BATCH_SIZE 件ずつ削除する。削除したセッションは
+    このプロセスのLRUとDjangoキャッシュからも取り除く。
+
+    Returns:
+        削除したセッションの件数
+    """
+    config = get_anonymous_session_settings()
+    idle = UserSession.objects.filter(
+        last_activity_at__lt=timezone.now()
+        - timedelta(days=config["IDLE_SESSION_DAYS"])
+    ).exclude(
+        Exists(Post.objects.filter(author_session_id=OuterRef("pk")))
+        | Exists(Thread.objects.filter(author_session_id=OuterRef("pk")))
+        | Exists(Reaction.objects.filter(user_session_id=OuterRef("pk")))
+    )
+    deleted = 0
+    while batch := list(
+        idle.order_by().values_list("pk", "session_id")[
+            : config["IDLE_SESSION_BATCH_SIZE"]
+        ]
+    ):
+        idle.filter(pk__in=[pk for pk, _ in batch]).delete()
+        for _, session_id in batch:
+            session_directory.forget(str(session_id))
+        deleted += len(batch)
+    return deleted
@@ -0,0 +1,67 @@
+"""タグの使用回数（Tag.usage_count）の維持と再集計.
+
+usage_count はタグが付けられているスレッド数の非正規化カウンターで、
+タグ一覧やタグクラウドでスレッドごとのCOUNTを発行せずに並べ替えるために使う。
+通常の更新は api.signals がタグ付けの変更とスレッド削除に合わせて
+F()式で加減算する。シグナルを経由しない変更（中間テーブルへの直接書き込みなど）で
+生じたずれは recount_tag_usage() で一括再集計する。
+"""
+
+from collections import Counter
+from collections.abc import Iterable
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from api.models import Tag, ThreadTag
+
+
+def adjust_usage(tag_ids: Iterable[int], delta: int) -> None:
+    """指定したタグのusage_countを同じ量だけ加減算する.
+
+    Args:
+        tag_ids: 対象タグのID（重複するIDはその回数分加算する）
+        delta: 1件あたりの増減量
+    """
+    by_count: dict[int, list[int]] = {}
+    for tag_id, times in Counter(tag_ids).items():
+        by_count.setdefault(times, []).append(tag_id)
+    for times, ids in by_count.items():
+        Tag.objects.filter(pk__in=ids).update(
+            usage_count=F("usage_count") + delta * times
+        )
+
+
+def actual_usage_count() -> Coalesce:
+    """中間テーブルから数えた実際の使用回数を表す式を返す.
+
+    Returns:
+        タグごとのスレッド数を返す相関サブクエリ（0件の場合は0）
+    """
+    counts = (
+        ThreadTag.objects.filter(tag_id=OuterRef("pk"))
+        .order_by()
+        .values("tag_id")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def recount_tag_usage(*, dry_run: bool = False) -> int:
+    """全タグのusage_countを中間テーブルから再集計する.
+
+    Args:
+        dry_run: Trueの場合は更新せず、ずれているタグ数のみを返す
+
+    Returns:
+        usage_countが実際の値とずれていたタグ数
+    """
+    drifted = (
+        Tag.objects.annotate(actual=actual_usage_count())
+        .filter(~Q(usage_count=F("actual")))
+        .count()
+    )
+    if drifted and not dry_run:
+        Tag.objects.update(usage_count=actual_usage_count())
+    return drifted
@@ -0,0 +1,399 @@
+"""データベースのテーブル（BackgroundTask）をキューとするバックグラウンドタスク.
+
+リクエストの処理では enqueue_on_commit() でタスクを予約するだけにして、
+実際の処理は manage.py run_tasks のワーカーが行う。
+
+- タスクは関数のドットパスとキーワード引数（JSON）で表す。
+- key を指定すると、同じキーの待機中のタスクは1件にまとまる
+  （INSERT ... ON CONFLICT DO NOTHING）。
+- ワーカーは待機中のタスクを条件付きUPDATEで取り出すため、
+  複数のスレッド・プロセス・ホストで同時に動かしても同じタスクを二重に実行しない。
+- 失敗したタスクは RETRY_DELAY 秒から倍々に間隔を空けて max_attempts 回まで再試行する。
+- 取り出したまま LEASE_SECONDS 秒以上終わらないタスクは、ワーカーが
+  異常終了したものとみなして待機中に戻す。
+- SCHEDULE に登録した関数は、終了のたびに次の実行を間隔の秒数後に予約する。
+
+実行時間と待ち時間は api.metrics の task_duration_seconds /
+task_queue_delay_seconds ヒストグラムに、結果は task_runs_total に記録する。
+"""
+
+import functools
+import logging
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (
+    DatabaseError,
+    IntegrityError,
+    close_old_connections,
+    connection,
+    transaction,
+)
+from django.db.models import Case, Exists, F, OuterRef, Q, TextField, Value, When
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from api.metrics import metrics
+from api.models import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TASK_SETTINGS = {
+    "WORKERS": 4,
+    "POLL_INTERVAL": 1.0,
+    "MAX_ATTEMPTS": 3,
+    "RETRY_DELAY": 10.0,
+    "LEASE_SECONDS": 300,
+    "KEEP_FINISHED_SECONDS": 7 * 24 * 3600,
+    "SCHEDULE": {},
+}
+
+Status = BackgroundTask.Status
+
+
+def get_task_settings() -> dict:
+    """デフォルト値をマージしたバックグラウンドタスク設定を返す.
+
+    Returns:
+        settings.BACKGROUND_TASKS にデフォルト値を補完した辞書
+    """
+    return {**DEFAULT_TASK_SETTINGS, **getattr(settings, "BACKGROUND_TASKS", {})}
+
+
+def enqueue(
+    name: str,
+    kwargs: dict | None = None,
+    *,
+    key: str | None = None,
+    delay: float = 0.0,
+    max_attempts: int | None = None,
+) -> None:
+    """タスクを1回のINSERTでキューに追加する.
+
+    Args:
+        name: 実行する関数のドットパス
+        kwargs: 関数に渡すキーワード引数（JSONに変換できる値）
+        key: 重複排除のキー（同じキーの待機中のタスクがあれば追加しない）
+        delay: 実行可能になるまでの秒数
+        max_attempts: 再試行を含む実行回数の上限（省略時は設定値）
+    """
+    BackgroundTask.objects.bulk_create(
+        [
+            BackgroundTask(
+                name=name,
+                kwargs=kwargs or {},
+                key=key,
+                run_at=timezone.now() + timedelta(seconds=delay),
+                max_attempts=max_attempts or get_task_settings()["MAX_ATTEMPTS"],
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def enqueue_on_commit(name: str, kwargs: dict | None = None, **options) -> None:
+    """現在のトランザクションのコミット後にタスクを追加する.
+
+    ロールバックされた書き込みのタスクは追加されない。
+    重複排除のキーの一意制約による待ち合わせも、書き込みのトランザクションの
+    外で行われる。
+
+    Args:
+        name: 実行する関数のドットパス
+        kwargs: 関数に渡すキーワード引数
+        **options: enqueue() のキーワード引数
+    """
+    transaction.on_commit(functools.partial(enqueue, name, kwargs, **options))
+
+
+def schedule_periodic() -> None:
+    """SCHEDULE に登録された周期タスクの最初の実行を予約する.
+
+    予約済み（待機中）の周期タスクは重複排除のキーにより追加されない。
+    """
+    for name in get_task_settings()["SCHEDULE"]:
+        enqueue(name, key=_periodic_key(name))
+
+
+def _periodic_key(name: str) -> str:
+    """周期タスクの重複排除のキーを返す.
+
+    Args:
+        name: 関数のドットパス
+
+    Returns:
+        重複排除のキー
+    """
+    return f"periodic:{name}"
+
+
+def release_expired() -> int:
+    """期限を過ぎた実行中のタスクを1回のUPDATEで待機中に戻す.
+
+    同じキーの期限切れのタスクは最も新しい1件だけを待機中に戻し、
+    待機中のタスクのキーの一意制約に反しないようにする。
+    実行回数が上限に達したタスク、同じキーのタスクが既に待機中のタスク、
+    同じキーのより新しい期限切れのタスクがあるタスクは失敗とする。
+
+    Returns:
+        期限切れとして処理したタスクの件数
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=get_task_settings()["LEASE_SECONDS"])
+    superseded = (
+        Q(attempts__gte=F("max_attempts"))
+        | Exists(
+            BackgroundTask.objects.filter(key=OuterRef("key"), status=Status.PENDING)
+        )
+        | Exists(
+            BackgroundTask.objects.filter(
+                key=OuterRef("key"),
+                status=Status.RUNNING,
+                claimed_at__lt=cutoff,
+                pk__gt=OuterRef("pk"),
+            )
+        )
+    )
+    return BackgroundTask.objects.filter(
+        status=Status.RUNNING, claimed_at__lt=cutoff
+    ).update(
+        status=Case(
+            When(superseded, then=Value(Status.FAILED)), default=Value(Status.PENDING)
+        ),
+        finished_at=Case(When(superseded, then=Value(now)), default=None),
+        last_error=Case(
+            When(superseded, then=Value("lease expired", TextField())),
+            default=F("last_error"),
+        ),
+        claimed_by="",
+    )
+
+
+def claim(limit: int) -> list[BackgroundTask]:
+    """実行可能なタスクを取り出して実行中にする.
+
+    候補を選んだ後、待機中のままの行だけを条件付きUPDATEで自分の識別子に
+    書き換えるため、同時に取り出したワーカーの間で重複しない。
+    行ロックの読み飛ばしに対応するDB（PostgreSQLなど）では候補の選択も
+    SELECT ... FOR UPDATE SKIP LOCKED で分け合う。
+
+    Args:
+        limit: 取り出す最大件数
+
+    Returns:
+        取り出したタスク（実行可能になった順）
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        candidates = BackgroundTask.objects.filter(
+            status=Status.PENDING, run_at__lte=now
+        ).order_by("run_at", "pk")
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list("pk", flat=True)[:limit])
+        if not ids:
+            return []
+        BackgroundTask.objects.filter(pk__in=ids, status=Status.PENDING).update(
+            status=Status.RUNNING,
+            claimed_by=token,
+            claimed_at=now,
+            attempts=F("attempts") + 1,
+        )
+    return list(
+        BackgroundTask.objects.filter(
+            pk__in=ids, status=Status.RUNNING, claimed_by=token
+        ).order_by("run_at", "pk")
+    )
+
+
+def execute(task: BackgroundTask) -> bool:
+    """取り出したタスクを実行し、結果を記録する.
+
+    Args:
+        task: claim() で取り出したタスク
+
+    Returns:
+        成功した場合True
+    """
+    started = timezone.now()
+    metrics.observe(
+        "task_queue_delay_seconds",
+        max((started - task.run_at).total_seconds(), 0.0),
+        task=task.name,
+    )
+    clock = time.monotonic()
+    try:
+        import_string(task.name)(**task.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Background task %s failed", task)
+        succeeded = False
+    else:
+        error = ""
+        succeeded = True
+    metrics.observe("task_duration_seconds", time.monotonic() - clock, task=task.name)
+
+    done = BackgroundTask.objects.filter(pk=task.pk, claimed_by=task.claimed_by)
+    if succeeded:
+        outcome = Status.SUCCEEDED
+        done.update(status=outcome, finished_at=timezone.now(), last_error="")
+    elif task.attempts < task.max_attempts:
+        outcome = "retried"
+        delay = get_task_settings()["RETRY_DELAY"] * 2 ** (task.attempts - 1)
+        try:
+            with transaction.atomic():
+                done.update(
+                    status=Status.PENDING,
+                    run_at=timezone.now() + timedelta(seconds=delay),
+                    claimed_by="",
+                    last_error=error,
+                )
+        except IntegrityError:
+            # NOTE: 同じキーのタスクが既に待機中であれば、そちらに処理を任せる
+            outcome = Status.FAILED
+    else:
+        outcome = Status.FAILED
+    if outcome == Status.FAILED:
+        done.update(status=outcome, finished_at=timezone.now(), last_error=error)
+    metrics.increment("task_runs_total", task=task.name, status=str(outcome))
+
+    schedule = get_task_settings()["SCHEDULE"]
+    if (
+        outcome != "retried"
+        and task.name in schedule
+        and task.key == _periodic_key(task.name)
+    ):
+        enqueue(task.name, key=task.key, delay=schedule[task.name])
+    return succeeded
+
+
+def run_pending(limit: int | None = None) -> int:
+    """実行可能なタスクが無くなるまで現在のスレッドで実行する.
+
+    Args:
+        limit: 実行する最大件数（Noneの場合は無制限）
+
+    Returns:
+        実行したタスクの件数
+    """
+    release_expired()
+    executed = 0
+    while limit is None or executed < limit:
+        tasks = claim(1)
+        if not tasks:
+            break
+        execute(tasks[0])
+        executed += 1
+    return executed
+
+
+def purge_finished() -> int:
+    """保持期間を過ぎた成功・失敗済みのタスクを削除する.
+
+    Returns:
+        削除した件数
+    """
+    before = timezone.now() - timedelta(
+        seconds=get_task_settings()["KEEP_FINISHED_SECONDS"]
+    )
+    deleted, _ = BackgroundTask.objects.filter(
+        status__in=[Status.SUCCEEDED, Status.FAILED], finished_at__lt=before
+    ).delete()
+    return deleted
+
+
+def _execute_in_thread(task: BackgroundTask) -> bool:
+    """ワーカースレッドでタスクを実行し、終了後に接続を片付ける.
+
+    Args:
+        task: 取り出したタスク
+
+    Returns:
+        成功した場合True
+    """
+    try:
+        return execute(task)
+    except DatabaseError:
+        # NOTE: 結果を記録できなかったタスクは LEASE_SECONDS 後に再実行される
+        logger.exception("Could not record the result of background task %s", task)
+        return False
+    finally:
+        close_old_connections()
+
+
+class TaskWorker:
+    """スレッドプールでタスクを実行するワーカー.
+
+    空いているスレッドの数だけタスクを取り出して実行し、
+    実行可能なタスクが無い間は POLL_INTERVAL 秒ごとにキューを確認する。
+
+    Attributes:
+        workers: 同時に実行するスレッド数
+        poll_interval: キューが空の場合の確認間隔（秒）
+    """
+
+    def __init__(
+        self, workers: int | None = None, poll_interval: float | None = None
+    ) -> None:
+        """ワーカーを初期化する.
+
+        Args:
+            workers: 同時に実行するスレッド数（省略時は設定値）
+            poll_interval: キューが空の場合の確認間隔（省略時は設定値）
+        """
+        config = get_task_settings()
+        self.workers = workers or config["WORKERS"]
+        self.poll_interval = poll_interval or config["POLL_INTERVAL"]
+        self.stopping = threading.Event()
+
+    def run(self, drain: bool = False) -> None:
+        """stop() が呼ばれるまでタスクを取り出して実行する.
+
+        実行中のタスクは停止時にも最後まで実行する。
+
+        Args:
+            drain: Trueの場合、実行可能なタスクが無くなった時点で終了する
+        """
+        schedule_periodic()
+        running: set[Future] = set()
+        lease_checked = 0.0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while not self.stopping.is_set():
+                if time.monotonic() - lease_checked >= self.poll_interval:
+                    lease_checked = time.monotonic()
+                    try:
+                        release_expired()
+                    except DatabaseError:
+                        # NOTE: 期限切れのタスクを戻せなくても、取り出しは続ける
+                        logger.exception("Could not release expired background tasks")
+                        close_old_connections()
+                try:
+                    free = self.workers - len(running)
+                    for task in claim(free) if free else []:
+                        running.add(executor.submit(_execute_in_thread, task))
+                except DatabaseError:
+                    # NOTE: データベースの一時的な障害ではワーカーを止めずに待つ
+                    logger.exception("Could not claim background tasks")
+                    close_old_connections()
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                if not running:
+                    if drain:
+                        break
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                # NOTE: 空きが出るか確認間隔が過ぎるまで待つ
+                _, running = wait(
+                    running, timeout=self.poll_interval, return_when=FIRST_COMPLETED
+                )
+        close_old_connections()
+
+    def stop(self) -> None:
+        """新しいタスクの取り出しを止める."""
+        self.stopping.set()
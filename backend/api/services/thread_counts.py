@@ -0,0 +1,67 @@
+"""カテゴリのスレッド数（Category.thread_count）の維持と再集計.
+
+thread_count はカテゴリに属するスレッド数の非正規化カウンターで、
+カテゴリ一覧・詳細でカテゴリごとのCOUNTを発行せずに返すために使う。
+通常の更新は api.signals がスレッドの作成・カテゴリ移動・削除に合わせて
+F()式で加減算する。シグナルを経由しない変更（bulk_createやQuerySet.update()など）で
+生じたずれは recount_thread_counts() で一括再集計する。
+"""
+
+from collections import Counter
+from collections.abc import Iterable
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from api.models import Category, Thread
+
+
+def adjust_thread_count(category_ids: Iterable[int], delta: int) -> None:
+    """指定したカテゴリのthread_countを同じ量だけ加減算する.
+
+    Args:
+        category_ids: 対象カテゴリのID（重複するIDはその回数分加算する）
+        delta: 1件あたりの増減量
+    """
+    by_count: dict[int, list[int]] = {}
+    for category_id, times in Counter(category_ids).items():
+        by_count.setdefault(times, []).append(category_id)
+    for times, ids in by_count.items():
+        Category.objects.filter(pk__in=ids).update(
+            thread_count=F("thread_count") + delta * times
+        )
+
+
+def actual_thread_count() -> Coalesce:
+    """スレッドテーブルから数えた実際のスレッド数を表す式を返す.
+
+    Returns:
+        カテゴリごとのスレッド数を返す相関サブクエリ（0件の場合は0）
+    """
+    counts = (
+        Thread.objects.filter(category_id=OuterRef("pk"))
+        .order_by()
+        .values("category_id")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def recount_thread_counts(*, dry_run: bool = False) -> int:
+    """全カテゴリのthread_countをスレッドテーブルから再集計する.
+
+    Args:
+        dry_run: Trueの場合は更新せず、ずれているカテゴリ数のみを返す
+
+    Returns:
+        thread_countが実際の値とずれていたカテゴリ数
+    """
+    drifted = (
+        Category.objects.annotate(actual=actual_thread_count())
+        .filter(~Q(thread_count=F("actual")))
+        .count()
+    )
+    if drifted and not dry_run:
+        Category.objects.update(thread_count=actual_thread_count())
+    return drifted
@@ -0,0 +1,52 @@
+"""タグ付け（ThreadTag）に写したスレッドの並び替えキーの同期.
+
+タグごとのスレッド一覧は board_thread_tags だけを (tag, 並び替えキー) の
+インデックス順に読んで1ページ分のスレッドIDを決める。
+そのため、スレッドの last_post_at・momentum・is_pinned が変わるたびに
+そのスレッドのタグ付けの行へ同じ値を写す必要がある。
+
+モデルの保存とタグ付けの変更は api.signals が同期する。
+QuerySet.update() でスレッドを更新する処理（投稿の取り込み、勢いの再計算など）は
+更新後に sync_thread_tags() を呼び出す。
+"""
+
+from collections.abc import Iterable
+
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from api.models import Thread, ThreadTag
+
+SORT_KEY_FIELDS = frozenset({"last_post_at", "momentum", "is_pinned"})
+
+
+def sync_thread_tags(thread_ids: Iterable[int]) -> None:
+    """指定したスレッドのタグ付けへ現在の並び替えキーを1回のUPDATEで写す.
+
+    Args:
+        thread_ids: 対象スレッドのID
+    """
+    thread_ids = list(thread_ids)
+    if not thread_ids:
+        return
+    threads = Thread.objects.filter(pk=OuterRef("thread_id"))
+    ThreadTag.objects.filter(thread_id__in=thread_ids).update(
+        last_post_at=Subquery(
+            threads.values(activity=Coalesce("last_post_at", "created_at"))
+        ),
+        momentum=Subquery(threads.values("momentum")),
+        is_pinned=Subquery(threads.values("is_pinned")),
+    )
+
+
+def sync_thread(thread: Thread) -> None:
+    """保存済みのスレッドインスタンスの値をそのタグ付けへ写す.
+
+    Args:
+        thread: 対象スレッド
+    """
+    ThreadTag.objects.filter(thread_id=thread.pk).update(
+        last_post_at=thread.last_post_at or thread.created_at,
+        momentum=thread.momentum,
+        is_pinned=thread.is_pinned,
+    )
@@ -0,0 +1,220 @@
+"""トレンドタグのスコアを増分更新するサービス.
+
+タグのトレンドスコアは、タグが付いたスレッドへの投稿やタグ付けといった活動を
+半減期 HALF_LIFE_HOURS で指数減衰させた合計とする。
+
+    score(t) = Σ weight_i * exp(-λ (t - t_i))
+
+全てのタグが同じ割合で減衰するため、固定の基準時刻 EPOCH を使って
+S = Σ weight_i * exp(λ (t_i - EPOCH)) を保持すれば順位は時間によって変わらず、
+活動のたびに S に1項を足すだけで済む。S は時間とともに指数的に大きくなるため
+対数 ln S を Tag.trend_score に保存し、加算は logaddexp で行う。
+
+    ln(e^a + e^b) = max(a, b) + ln(1 + e^-|a - b|)
+
+これにより、トレンドの算出時にboard_postとboard_thread_tagsを
+時間窓で結合する必要がなくなる。
+
+投稿による加算は、投稿のリクエストではなくイベントログ（api.services.events）の
+コンシューマー TrendingConsumer がバッチごとにまとめて行い、replay_events で
+ログから作り直せる。タグ付けによる加算は api.signals が行う。
+"""
+
+import datetime
+import math
+from collections import Counter
+from collections.abc import Iterable, Mapping
+
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+from api.models import BoardEvent, Tag, ThreadTag
+from api.services.events import EventConsumer
+
+# NOTE: 保存済みのスコアはこの時刻を基準にしているため、変更してはならない
+EPOCH = datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC)
+
+# NOTE: exp()のアンダーフローでエラーとなるDB（PostgreSQL）のため、
+# 指数の下限を設ける（e^-700 は倍精度で表現できる最小付近の値）
+MIN_EXPONENT = -700.0
+
+DEFAULT_TRENDING_SETTINGS = {
+    "HALF_LIFE_HOURS": 6.0,
+    "POST_WEIGHT": 1.0,
+    "THREAD_WEIGHT": 5.0,
+    "MIN_SCORE": 0.05,
+}
+
+
+def get_trending_settings() -> dict:
+    """デフォルト値をマージしたトレンドタグ設定を返す.
+
+    Returns:
+        settings.TRENDING_TAGS にデフォルト値を補完した辞書
+    """
+    return {**DEFAULT_TRENDING_SETTINGS, **getattr(settings, "TRENDING_TAGS", {})}
+
+
+def decay_rate() -> float:
+    """1秒あたりの減衰率λを返す.
+
+    Returns:
+        ln 2 / 半減期（秒）
+    """
+    return math.log(2) / (get_trending_settings()["HALF_LIFE_HOURS"] * 3600)
+
+
+def log_offset(at: datetime.datetime) -> float:
+    """指定時刻における λ (t - EPOCH) を返す.
+
+    Args:
+        at: 時刻
+
+    Returns:
+        重み1の活動が時刻 at に発生した場合の ln S への寄与
+    """
+    return decay_rate() * (at - EPOCH).total_seconds()
+
+
+def record_activity(
+    weights: Mapping[int, float], at: datetime.datetime | None = None
+) -> None:
+    """タグごとの活動量をトレンドスコアに加算する.
+
+    同じ重みのタグは1回のUPDATEにまとめる。
+
+    Args:
+        weights: タグIDから活動の重みへの辞書
+        at: 活動の発生時刻（省略時は現在時刻）
+    """
+    offset = log_offset(at or timezone.now())
+    by_weight: dict[float, list[int]] = {}
+    for tag_id, weight in weights.items():
+        if weight > 0:
+            by_weight.setdefault(weight, []).append(tag_id)
+    for weight, tag_ids in by_weight.items():
+        term = Value(offset + math.log(weight))
+        Tag.objects.filter(pk__in=tag_ids).update(
+            trend_score=Greatest(F("trend_score"), term)
+            + Ln(
+                Value(1.0)
+                + Exp(Greatest(-Abs(F("trend_score") - term), Value(MIN_EXPONENT)))
+            )
+        )
+
+
+def record_posts(thread_ids: Iterable[int], at: datetime.datetime | None = None):
+    """投稿をその投稿先スレッドのタグの活動として記録する.
+
+    Args:
+        thread_ids: 投稿先スレッドのID（1投稿につき1回、重複可）
+        at: 投稿日時（省略時は現在時刻）
+    """
+    record_thread_activity(Counter(thread_ids), at)
+
+
+def record_thread_activity(
+    posts_per_thread: Mapping[int, float], at: datetime.datetime | None = None
+) -> None:
+    """スレッドごとの投稿量を、そのスレッドのタグの活動として記録する.
+
+    Args:
+        posts_per_thread: スレッドIDから時刻 at 時点の投稿量への辞書
+        at: 投稿量の基準時刻（省略時は現在時刻）
+    """
+    if not posts_per_thread:
+        return
+    post_weight = get_trending_settings()["POST_WEIGHT"]
+    weights: Counter[int] = Counter()
+    for thread_id, tag_id in ThreadTag.objects.filter(
+        thread_id__in=posts_per_thread
+    ).values_list("thread_id", "tag_id"):
+        weights[tag_id] += post_weight * posts_per_thread[thread_id]
+    if weights:
+        record_activity(weights, at)
+
+
+def record_tagging(tag_ids: Iterable[int], at: datetime.datetime | None = None):
+    """スレッドへのタグ付けをタグの活動として記録する.
+
+    Args:
+        tag_ids: タグ付けされたタグのID（1スレッドにつき1回、重複可）
+        at: タグ付けの日時（省略時は現在時刻）
+    """
+    thread_weight = get_trending_settings()["THREAD_WEIGHT"]
+    weights = {
+        tag_id: thread_weight * count for tag_id, count in Counter(tag_ids).items()
+    }
+    if weights:
+        record_activity(weights, at)
+
+
+def trending_tags(now: datetime.datetime | None = None):
+    """現在のトレンドスコア順にタグを返すクエリセットを作成する.
+
+    現在のスコア exp(trend_score - λ (now - EPOCH)) が MIN_SCORE 未満のタグは除外する。
+    除外と並べ替えはどちらも trend_score のインデックスで処理できる。
+
+    Args:
+        now: 基準時刻（省略時は現在時刻）
+
+    Returns:
+        現在のスコアを score として付与した、スコア降順のタグのクエリセット
+    """
+    offset = log_offset(now or timezone.now())
+    threshold = offset + math.log(get_trending_settings()["MIN_SCORE"])
+    return (
+        Tag.objects.filter(trend_score__gt=threshold)
+        .annotate(score=Exp(F("trend_score") - Value(offset)))
+        .order_by("-trend_score")
+    )
+
+
+class TrendingConsumer(EventConsumer):
+    """投稿をタグのトレンドスコアに加算するコンシューマー.
+
+    バッチ内の投稿は、それぞれの記録時刻からバッチの最後の時刻までの減衰を
+    掛けた量に換算し、タグごとに1回の加算にまとめる。logaddexp による加算は
+    順序によらないため、ログを先頭から再生しても同じスコアになる。
+    """
+
+    kinds = frozenset({BoardEvent.Kind.POST_CREATED})
+
+    def reset(self) -> None:
+        """トレンドスコアを初期値に戻し、タグ付けの分だけを加算し直す.
+
+        タグ付けはイベントログに記録されないため、現在のタグ付けを
+        スレッドの作成日時に行われたものとして加算する。
+        """
+        initial = Tag._meta.get_field("trend_score").default
+        weight = math.log(get_trending_settings()["THREAD_WEIGHT"])
+        scores: dict[int, float] = {}
+        for tag_id, created_at in ThreadTag.objects.values_list(
+            "tag_id", "thread__created_at"
+        ).iterator():
+            term = log_offset(created_at) + weight
+            score = scores.get(tag_id, initial)
+            scores[tag_id] = max(score, term) + math.log1p(
+                math.exp(max(-abs(score - term), MIN_EXPONENT))
+            )
+        Tag.objects.update(trend_score=initial)
+        Tag.objects.bulk_update(
+            [Tag(pk=pk, trend_score=score) for pk, score in scores.items()],
+            ["trend_score"],
+        )
+
+    def handle(self, events: list[BoardEvent]) -> None:
+        """投稿のイベントをタグのトレンドスコアにまとめて加算する.
+
+        Args:
+            events: 投稿の作成のイベント
+        """
+        at = max(event.created_at for event in events)
+        rate = decay_rate()
+        posts_per_thread: Counter[int] = Counter()
+        for event in events:
+            elapsed = (at - event.created_at).total_seconds()
+            posts_per_thread[event.thread_id] += math.exp(-rate * elapsed)
+        record_thread_activity(posts_per_thread, at)
@@ -0,0 +1,388 @@
+"""APIアプリケーションのシグナルハンドラー.
+
+ApiConfig.ready() で読み込まれ、非正規化カウンターやトレンドスコアを
+モデルの変更に合わせて更新する。投稿の作成・削除に伴うトレンドスコアと勢い、
+投稿・スレッド・リアクションに伴うポイントの更新は、ここではなく
+イベントログのコンシューマーが行う。
+"""
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from api.models import BoardEvent, Post, Reaction, Thread, ThreadTag
+from api.services import events, rendering, trending
+from api.services.tag_usage import adjust_usage
+from api.services.thread_counts import adjust_thread_count
+from api.services.thread_tags import SORT_KEY_FIELDS, sync_thread, sync_thread_tags
+
+
+@receiver(m2m_changed, sender=ThreadTag)
+def update_tag_usage_on_tagging(sender, instance, action, reverse, pk_set, **kwargs):
+    """スレッドのタグ付けの変更に合わせてTag.usage_countを更新する.
+
+    追加時は実際に追加された関連（pk_set）だけを加算する。
+    削除時は存在しない関連が指定されうるため、削除前に実在する関連を数えて減算する。
+
+    Args:
+        sender: 中間テーブルのモデル
+        instance: 変更されたスレッド（reverse=Trueの場合はタグ）
+        action: m2m_changedのアクション名
+        reverse: タグ側から変更された場合True
+        pk_set: 追加・削除されたオブジェクトの主キー
+        **kwargs: その他のシグナル引数
+    """
+    if action == "post_add" and pk_set:
+        if reverse:
+            adjust_usage([instance.pk] * len(pk_set), 1)
+        else:
+            adjust_usage(pk_set, 1)
+    elif action in ("pre_remove", "pre_clear"):
+        links = ThreadTag.objects.filter(
+            **{"tag_id" if reverse else "thread_id": instance.pk}
+        )
+        if action == "pre_remove":
+            links = links.filter(
+                **{"thread_id__in" if reverse else "tag_id__in": pk_set}
+            )
+        adjust_usage(links.values_list("tag_id", flat=True), -1)
+
+
+@receiver(pre_delete, sender=Thread)
+def update_tag_usage_on_thread_delete(sender, instance, **kwargs):
+    """スレッド削除時に付けられていたタグのusage_countを減算する.
+
+    中間テーブルの行はカスケード削除されm2m_changedが送られないため、
+    削除前にここで減算する。
+
+    Args:
+        sender: Threadモデル
+        instance: 削除されるスレッド
+        **kwargs: その他のシグナル引数
+    """
+    tag_ids = ThreadTag.objects.filter(thread_id=instance.pk).values_list(
+        "tag_id", flat=True
+    )
+    adjust_usage(tag_ids, -1)
+
+
+@receiver(pre_save, sender=Thread)
+def remember_previous_category(sender, instance, update_fields=None, **kwargs):
+    """カテゴリ移動を検出するため、保存前のカテゴリIDを記録する.
+
+    新規作成時と、update_fieldsにcategoryを含まない保存では
+    カテゴリが変わらないため、データベースを参照しない。
+
+    Args:
+        sender: Threadモデル
+        instance: 保存されるスレッド
+        update_fields: 保存対象のフィールド名（全フィールドの場合None）
+        **kwargs: その他のシグナル引数
+    """
+    instance._previous_category_id = None
+    if instance._state.adding or (
+        update_fields is not None and "category" not in update_fields
+    ):
+        return
+    instance._previous_category_id = (
+        Thread.objects.filter(pk=instance.pk)
+        .values_list("category_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Thread)
+def update_thread_count_on_save(sender, instance, created, raw=False, **kwargs):
+    """スレッドの作成・カテゴリ移動に合わせてCategory.thread_countを更新する.
+
+    Args:
+        sender: Threadモデル
+        instance: 保存されたスレッド
+        created: 新規作成の場合True
+        raw: フィクスチャの読み込みの場合True
+        **kwargs: その他のシグナル引数
+    """
+    if raw:
+        return
+    if created:
+        adjust_thread_count([instance.category_id], 1)
+        return
+    previous = getattr(instance, "_previous_category_id", None)
+    if previous is not None and previous != instance.category_id:
+        adjust_thread_count([previous], -1)
+        adjust_thread_count([instance.category_id], 1)
+
+
+@receiver(post_delete, sender=Thread)
+def update_thread_count_on_delete(sender, instance, **kwargs):
+    """スレッド削除時に所属カテゴリのthread_countを減算する.
+
+    カテゴリごと削除される場合も、削除済みのカテゴリ行への更新は
+    0件のUPDATEになるだけで問題ない。
+
+    Args:
+        sender: Threadモデル
+        instance: 削除されたスレッド
+        **kwargs: その他のシグナル引数
+    """
+    adjust_thread_count([instance.category_id], -1)
+
+
+@receiver(post_save, sender=Thread)
+def sync_sort_keys_on_save(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    """スレッドの並び替えキーの変更をタグ付けの写しへ反映する.
+
+    新規作成時はまだタグ付けがなく、update_fieldsに並び替えキーを
+    含まない保存では値が変わらないため、更新しない。
+
+    Args:
+        sender: Threadモデル
+        instance: 保存されたスレッド
+        created: 新規作成の場合True
+        raw: フィクスチャの読み込みの場合True
+        update_fields: 保存対象のフィールド名（全フィールドの場合None）
+        **kwargs: その他のシグナル引数
+    """
+    if created or raw:
+        return
+    if update_fields is not None and not SORT_KEY_FIELDS & set(update_fields):
+        return
+    sync_thread(instance)
+
+
+@receiver(m2m_changed, sender=ThreadTag)
+def sync_sort_keys_on_tagging(sender, instance, action, reverse, pk_set, **kwargs):
+    """追加されたタグ付けにスレッドの並び替えキーを写す.
+
+    add()/set()が作成する行は並び替えキーがデフォルト値のため、
+    追加直後にスレッドの現在の値で上書きする。
+
+    Args:
+        sender: 中間テーブルのモデル
+        instance: 変更されたスレッド（reverse=Trueの場合はタグ）
+        action: m2m_changedのアクション名
+        reverse: タグ側から変更された場合True
+        pk_set: 追加されたオブジェクトの主キー
+        **kwargs: その他のシグナル引数
+    """
+    if action != "post_add" or not pk_set:
+        return
+    sync_thread_tags(pk_set if reverse else [instance.pk])
+
+
+@receiver(m2m_changed, sender=ThreadTag)
+def record_tagging_trend(sender, instance, action, reverse, pk_set, **kwargs):
+    """スレッドへのタグ付けをトレンドスコアに加算する.
+
+    Args:
+        sender: 中間テーブルのモデル
+        instance: 変更されたスレッド（reverse=Trueの場合はタグ）
+        action: m2m_changedのアクション名
+        reverse: タグ側から変更された場合True
+        pk_set: 追加されたオブジェクトの主キー
+        **kwargs: その他のシグナル引数
+    """
+    if action != "post_add" or not pk_set:
+        return
+    trending.record_tagging([instance.pk] * len(pk_set) if reverse else pk_set)
+
+
+@receiver(pre_save, sender=Post)
+def render_post_content(sender, instance, raw=False, update_fields=None, **kwargs):
+    """保存前に本文を表示用HTMLにレンダリングする.
+
+    update_fieldsを指定した保存では、content_htmlを含む場合だけレンダリングする
+    （本文を更新する場合は content_html と render_version も指定する）。bulk_createでは
+    シグナルが送られないため、グループコミット（api.services.ingestion）は
+    rendering.render_fields() の結果を直接設定する。
+
+    Args:
+        sender: Postモデル
+        instance: 保存される投稿
+        raw: フィクスチャの読み込みの場合True
+        update_fields: 更新対象のフィールド名
+        **kwargs: その他のシグナル引数
+    """
+    if raw or (update_fields is not None and "content_html" not in update_fields):
+        return
+    for name, value in rendering.render_fields(instance.content).items():
+        setattr(instance, name, value)
+
+
+def _reacted_post(reaction: Reaction) -> tuple[int | None, int | None]:
+    """リアクションが付いた投稿のスレッドIDと投稿者のセッションIDを返す.
+
+    投稿が読み込み済みであればデータベースを参照せず、
+    参照した場合も結果をリアクションに保持して同じシグナル内で再利用する。
+
+    Args:
+        reaction: リアクション
+
+    Returns:
+        (スレッドID, 投稿者のセッションID)
+    """
+    if Reaction.post.is_cached(reaction):
+        return reaction.post.thread_id, reaction.post.author_session_id
+    if not hasattr(reaction, "_reacted_post"):
+        reaction._reacted_post = Post.objects.filter(pk=reaction.post_id).values_list(
+            "thread_id", "author_session_id"
+        ).first() or (None, None)
+    return reaction._reacted_post
+
+
+@receiver(post_save, sender=Post)
+def log_post_saved(sender, instance, created, raw=False, **kwargs):
+    """投稿の作成をイベントログに記録する.
+
+    bulk_createではシグナルが送られないため、グループコミット
+    （api.services.ingestion）は events.emit_many() を直接呼び出す。
+
+    Args:
+        sender: Postモデル
+        instance: 保存された投稿
+        created: 新規作成の場合True
+        raw: フィクスチャの読み込みの場合True
+        **kwargs: その他のシグナル引数
+    """
+    if created and not raw:
+        events.emit_many([events.post_created(instance)])
+
+
+@receiver(post_delete, sender=Post)
+def log_post_deleted(sender, instance, **kwargs):
+    """投稿の削除をイベントログに記録する.
+
+    Args:
+        sender: Postモデル
+        instance: 削除された投稿
+        **kwargs: その他のシグナル引数
+    """
+    events.emit(
+        BoardEvent.Kind.POST_DELETED,
+        instance.pk,
+        instance.thread_id,
+        author_session_id=instance.author_session_id,
+    )
+
+
+@receiver(post_save, sender=Thread)
+def log_thread_saved(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    """スレッドの作成・編集・ピン留め・ロックをイベントログに記録する.
+
+    投稿数や最終投稿日時のような派生値だけの保存は記録しない。
+
+    Args:
+        sender: Threadモデル
+        instance: 保存されたスレッド
+        created: 新規作成の場合True
+        raw: フィクスチャの読み込みの場合True
+        update_fields: 保存対象のフィールド名（全フィールドの場合None）
+        **kwargs: その他のシグナル引数
+    """
+    if raw:
+        return
+    if created:
+        events.emit(
+            BoardEvent.Kind.THREAD_CREATED,
+            instance.pk,
+            instance.pk,
+            category_id=instance.category_id,
+            author_session_id=instance.author_session_id,
+        )
+    elif update_fields is None:
+        events.emit(
+            BoardEvent.Kind.THREAD_UPDATED,
+            instance.pk,
+            instance.pk,
+            category_id=instance.category_id,
+            is_pinned=instance.is_pinned,
+            is_locked=instance.is_locked,
+        )
+    else:
+        if "is_pinned" in update_fields:
+            events.emit(
+                BoardEvent.Kind.THREAD_PINNED,
+                instance.pk,
+                instance.pk,
+                is_pinned=instance.is_pinned,
+            )
+        if "is_locked" in update_fields:
+            events.emit(
+                BoardEvent.Kind.THREAD_LOCKED,
+                instance.pk,
+                instance.pk,
+                is_locked=instance.is_locked,
+            )
+
+
+@receiver(post_delete, sender=Thread)
+def log_thread_deleted(sender, instance, **kwargs):
+    """スレッドの削除をイベントログに記録する.
+
+    Args:
+        sender: Threadモデル
+        instance: 削除されたスレッド
+        **kwargs: その他のシグナル引数
+    """
+    events.emit(
+        BoardEvent.Kind.THREAD_DELETED,
+        instance.pk,
+        instance.pk,
+        category_id=instance.category_id,
+        author_session_id=instance.author_session_id,
+    )
+
+
+@receiver(post_save, sender=Reaction)
+def log_reaction_saved(sender, instance, created, raw=False, **kwargs):
+    """リアクションの作成をイベントログに記録する.
+
+    Args:
+        sender: Reactionモデル
+        instance: 保存されたリアクション
+        created: 新規作成の場合True
+        raw: フィクスチャの読み込みの場合True
+        **kwargs: その他のシグナル引数
+    """
+    if created and not raw:
+        _log_reaction(BoardEvent.Kind.REACTION_CREATED, instance)
+
+
+@receiver(post_delete, sender=Reaction)
+def log_reaction_deleted(sender, instance, **kwargs):
+    """リアクションの削除をイベントログに記録する.
+
+    Args:
+        sender: Reactionモデル
+        instance: 削除されたリアクション
+        **kwargs: その他のシグナル引数
+    """
+    _log_reaction(BoardEvent.Kind.REACTION_DELETED, instance)
+
+
+def _log_reaction(kind: str, reaction: Reaction) -> None:
+    """リアクションのイベントを記録する.
+
+    Args:
+        kind: イベントの種類
+        reaction: 対象のリアクション
+    """
+    thread_id, author_session_id = _reacted_post(reaction)
+    events.emit(
+        kind,
+        reaction.pk,
+        thread_id,
+        post_id=reaction.post_id,
+        reaction_type=reaction.reaction_type,
+        user_session_id=reaction.user_session_id,
+        post_author_session_id=author_session_id,
+    )
@@ -1,10 +1,66 @@
 """pytest configuration and global fixtures."""
 
+import copy
+
 import pytest
 from rest_framework.test import APIClient
 
 
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    """Add a second local database that plays the read replica in tests.
+
+    The replica is a separate (empty) database rather than a test mirror, so
+    tests can tell from the data which database served a query. Its schema is
+    created straight from the models so data migrations only run on default.
+    """
+    from django.conf import settings
+
+    replica = copy.deepcopy(settings.DATABASES["default"])
+    replica["TEST"] = {**replica.get("TEST", {}), "MIGRATE": False}
+    settings.DATABASES["replica"] = replica
+
+
+@pytest.fixture(autouse=True)
+def _reset_rate_limits():
+    """Start every test with full rate-limit buckets and empty metrics."""
+    from api.metrics import metrics
+    from api.services.near_duplicates import near_duplicate_index
+    from api.services.points import leaderboard
+    from api.services.sessions import activity_buffer, session_directory
+    from api.throttling import local_buckets
+
+    local_buckets.clear()
+    near_duplicate_index.clear()
+    session_directory.clear()
+    activity_buffer.clear()
+    leaderboard.clear()
+    metrics.clear()
+    yield
+
+
 @pytest.fixture
 def api_client():
     """DRF API client fixture."""
     return APIClient()
+
+
+@pytest.fixture
+def session_client():
+    """API client holding a freshly issued anonymous session cookie.
+
+    The session row itself is created on the first request that uses it,
+    as it would be for a browser returning the cookie it was issued.
+    """
+    import uuid
+
+    from django.core.signing import get_cookie_signer
+
+    from api.services.sessions import get_anonymous_session_settings
+
+    config = get_anonymous_session_settings()
+    client = APIClient()
+    client.cookies[config["COOKIE_NAME"]] = get_cookie_signer(
+        salt=config["COOKIE_NAME"] + config["COOKIE_SALT"]
+    ).sign(str(uuid.uuid4()))
+    return client
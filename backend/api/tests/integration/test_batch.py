@@ -0,0 +1,208 @@
+"""バッチリクエストエンドポイントの統合テスト.
+
+複数の読み取りサブリクエストを1回のリクエストで実行し、
+個別に呼び出した場合と同じ結果が返ることを検証する。
+"""
+
+import json
+
+import pytest
+
+from api.models import Category, Post, Thread
+
+URL = "/api/v1/batch/"
+
+
+@pytest.fixture
+def category():
+    """スレッドを1件含むカテゴリを作成する."""
+    category = Category.objects.create(name="雑談", slug="chat")
+    Thread.objects.create(title="初スレ", category=category, momentum=2.0)
+    return category
+
+
+@pytest.mark.django_db
+class TestBatchEndpoint:
+    """POST /api/v1/batch/ のテスト."""
+
+    def test_home_page_fan_out_in_one_request(self, api_client, category):
+        """【正常系】ホーム画面のサブリクエストをまとめて実行する.
+
+        【テストの意図】
+        ホーム画面が必要とする複数のエンドポイントを1往復で取得できることを
+        保証します。
+
+        【何を保証するか】
+        - サブリクエストと同じ順序でレスポンスが返ること
+        - クライアント指定のidがレスポンスに含まれること
+        - 各ボディが個別に呼び出した場合と一致すること
+        - api/v1 からの相対パスと絶対パスの両方を受け付けること
+
+        【テスト手順】
+        1. 4件のサブリクエストを含むバッチを送信
+        2. 同じエンドポイントを個別に呼び出して比較
+
+        【期待する結果】
+        全てのサブレスポンスが200で、個別呼び出しと同じボディになる
+        """
+        # Arrange
+        paths = ["threads/?page=1", "threads/trending/", "/api/v1/stats/board/"]
+        payload = {
+            "requests": [{"id": str(n), "path": path} for n, path in enumerate(paths)]
+            + [{"path": "categories/"}]
+        }
+
+        # Act
+        response = api_client.post(URL, payload, format="json")
+
+        # Assert
+        assert response.status_code == 200
+        responses = response.json()["responses"]
+        assert [item.get("id") for item in responses] == ["0", "1", "2", None]
+        assert [item["status"] for item in responses] == [200] * 4
+        for path, item in zip([*paths, "categories/"], responses, strict=True):
+            url = path if path.startswith("/") else f"/api/v1/{path}"
+            assert item["body"] == api_client.get(url).json()
+
+    def test_long_thread_is_not_streamed(self, api_client, category, settings):
+        """【正常系】ストリーミングの対象になる長いスレッドもボディを返す.
+
+        【テストの意図】
+        単独の呼び出しではストリーミングで返すスレッドでも、バッチでは
+        ボディが空にならないことを保証します。
+
+        【何を保証するか】
+        - 投稿数が MIN_ITEMS 以上のスレッドのサブレスポンスにボディが入ること
+        - 投稿がストリーミングで返した場合と一致すること
+
+        【テスト手順】
+        1. MIN_ITEMS を3にし、投稿3件のスレッドを作成
+        2. スレッド詳細をバッチで取得し、個別の呼び出しと比較
+
+        【期待する結果】
+        サブレスポンスは200で、3件の投稿を含むボディになる
+        """
+        # Arrange
+        settings.STREAMING_RESPONSES = {"MIN_ITEMS": 3}
+        thread = Thread.objects.get()
+        for number in (1, 2, 3):
+            Post.objects.create(thread=thread, content=str(number), post_number=number)
+        Thread.objects.filter(pk=thread.pk).update(post_count=3)
+        path = f"threads/{thread.pk}/"
+        single = api_client.get(f"/api/v1/{path}")
+
+        # Act
+        response = api_client.post(URL, {"requests": [{"path": path}]}, format="json")
+
+        # Assert
+        (item,) = response.json()["responses"]
+        assert single.streaming
+        assert item["status"] == 200
+        streamed = json.loads(b"".join(single.streaming_content))
+        assert len(item["body"]["posts"]) == 3
+        assert item["body"]["posts"] == streamed["posts"]
+
+    def test_session_is_shared_with_sub_requests(
+        self, api_client, session_client, category
+    ):
+        """【正常系】サブリクエストは親リクエストの匿名セッションを引き継ぐ.
+
+        【テストの意図】
+        匿名セッションを参照するエンドポイントをバッチに含めても、
+        バッチ全体がエラーにならないことを保証します。
+
+        【何を保証するか】
+        - セッションのあるクライアントは自分のポイントを受け取ること
+        - セッションのないクライアントは個別に呼び出した場合と同じ404になること
+
+        【テスト手順】
+        1. セッションのあるクライアントで投稿する
+        2. 両方のクライアントで stats/top-users/me/ をバッチで取得
+
+        【期待する結果】
+        バッチはどちらも200で、サブレスポンスは200と404になる
+        """
+        # Arrange
+        thread = Thread.objects.get()
+        session_client.post(
+            "/api/v1/posts/", {"thread": thread.pk, "content": "1"}, format="json"
+        )
+        payload = {"requests": [{"path": "stats/top-users/me/"}]}
+
+        # Act
+        mine = session_client.post(URL, payload, format="json")
+        anonymous = api_client.post(URL, payload, format="json")
+
+        # Assert
+        assert mine.status_code == anonymous.status_code == 200
+        (item,) = mine.json()["responses"]
+        assert item["status"] == 200
+        assert item["body"]["rank"] == 1
+        assert anonymous.json()["responses"][0]["status"] == 404
+
+    def test_sub_request_errors_are_reported_per_item(self, api_client, category):
+        """【異常系】サブリクエストのエラーは個別のステータスで返す.
+
+        【テストの意図】
+        一部のサブリクエストが失敗してもバッチ全体は成功することを保証します。
+
+        【何を保証するか】
+        - 存在しないパスは404になること
+        - バッチのネストは400になること
+        - ビューが返すエラーステータスがそのまま返ること
+
+        【テスト手順】
+        1. 不正なサブリクエストを含むバッチを送信
+
+        【期待する結果】
+        バッチは200で、各サブレスポンスにエラーステータスが入る
+        """
+        # Arrange
+        payload = {
+            "requests": [
+                {"path": "nowhere/"},
+                {"path": "batch/"},
+                {"path": "threads/999999/"},
+                {"path": "threads/?fields=password"},
+            ]
+        }
+
+        # Act
+        response = api_client.post(URL, payload, format="json")
+
+        # Assert
+        assert response.status_code == 200
+        statuses = [item["status"] for item in response.json()["responses"]]
+        assert statuses == [404, 400, 404, 400]
+
+    @pytest.mark.parametrize(
+        "payload",
+        [
+            {"requests": []},
+            {"requests": [{"method": "POST", "path": "threads/"}]},
+            {"requests": [{"path": "threads/"}] * 11},
+        ],
+    )
+    def test_invalid_batch_returns_400(self, api_client, payload):
+        """【異常系】不正なバッチは実行せずに400を返す.
+
+        【テストの意図】
+        書き込みや過大なバッチが実行されないことを保証します。
+
+        【何を保証するか】
+        - 空のバッチが拒否されること
+        - GET以外のメソッドが拒否されること
+        - 上限を超える件数が拒否されること
+
+        【テスト手順】
+        1. 不正なバッチを送信
+
+        【期待する結果】
+        400エラーが返る
+        """
+        # Act
+        response = api_client.post(URL, payload, format="json")
+
+        # Assert
+        assert response.status_code == 400
+        assert "requests" in response.json()
@@ -0,0 +1,251 @@
+"""プライマリ/レプリカルーティングの統合テスト.
+
+テスト用に用意した2つのローカルデータベース（default, replica）を使い、
+読み取りの振り分けとread-your-writesの動作を検証する。
+"""
+
+from unittest import mock
+
+import pytest
+from django.db.utils import OperationalError
+from django.http import HttpResponse
+
+from api.db.routers import replica_health, replica_reads
+from api.middleware.replica import ReplicaPinningMiddleware
+from api.models import Category, Post, Thread
+
+REPLICATION = {
+    "REPLICAS": ["replica"],
+    "PIN_SECONDS": 5,
+    "PIN_COOKIE_NAME": "mb_primary_pin",
+    "MAX_LAG_SECONDS": 2.0,
+    "LAG_CHECK_INTERVAL": 0,
+}
+
+
+@pytest.fixture(autouse=True)
+def _replication(settings):
+    """replicaエイリアスをレプリカとして有効化し、遅延計測結果をリセットする."""
+    settings.DATABASE_REPLICATION = REPLICATION
+    replica_health.reset()
+    yield
+    replica_health.reset()
+
+
+@pytest.mark.django_db(databases=["default", "replica"])
+class TestPrimaryReplicaRouting:
+    """PrimaryReplicaRouterとReplicaPinningMiddlewareのテスト."""
+
+    def test_safe_reads_go_to_replica(self):
+        """【正常系】許可されたコンテキストの読み取りはレプリカへ送られる.
+
+        【テストの意図】
+        書き込みはプライマリ、読み取りはレプリカへ振り分けられることを保証します。
+
+        【何を保証するか】
+        - 作成したカテゴリがプライマリにのみ存在すること
+        - replica_reads()内の読み取りがレプリカ（空）から返ること
+        - replica_reads()外の読み取りはプライマリから返ること
+
+        【テスト手順】
+        1. カテゴリを作成
+        2. replica_reads()内で件数を取得
+        3. コンテキスト外で件数を取得
+
+        【期待する結果】
+        レプリカ経由では0件、プライマリ経由では1件となる
+        """
+        # Arrange
+        Category.objects.create(name="雑談", slug="chat")
+
+        # Act
+        with replica_reads():
+            replica_count = Category.objects.count()
+        primary_count = Category.objects.count()
+
+        # Assert
+        assert replica_count == 0
+        assert primary_count == 1
+
+    def test_writer_reads_own_writes(self, api_client):
+        """【正常系】投稿直後のクライアントはプライマリから読み取る.
+
+        【テストの意図】
+        read-your-writesが成立し、投稿者が自分のスレッドを必ず見られることを
+        保証します。
+
+        【何を保証するか】
+        - POST成功時にプライマリ固定Cookieが付与されること
+        - Cookieを持つクライアントの一覧取得がプライマリから返ること
+        - Cookieを持たない別クライアントの一覧取得はレプリカから返ること
+
+        【テスト手順】
+        1. APIでスレッドを作成
+        2. 同じクライアントでスレッド一覧を取得
+        3. 別のクライアントでスレッド一覧を取得
+
+        【期待する結果】
+        投稿者には1件、別クライアントには0件が返る
+        """
+        # Arrange
+        category = Category.objects.create(name="雑談", slug="chat")
+
+        # Act
+        created = api_client.post(
+            "/api/v1/threads/",
+            {
+                "title": "テストスレ",
+                "category": category.id,
+                "initial_post_content": "1げと",
+            },
+            format="json",
+        )
+        own_list = api_client.get("/api/v1/threads/")
+        api_client.cookies.clear()
+        other_list = api_client.get("/api/v1/threads/")
+
+        # Assert
+        assert created.status_code == 201
+        assert "mb_primary_pin" in created.cookies
+        assert own_list.json()["count"] == 1
+        assert other_list.json()["count"] == 0
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        """【異常系】遅延が許容値を超えたレプリカは使用されない.
+
+        【テストの意図】
+        レプリカの遅延が大きい場合にプライマリへフォールバックすることを
+        保証します。
+
+        【何を保証するか】
+        - 遅延がMAX_LAG_SECONDSを超えるとプライマリから読み取ること
+        - 接続エラーのレプリカも同様にフォールバックすること
+
+        【テスト手順】
+        1. カテゴリを作成
+        2. 遅延計測が大きな値を返すようにして件数を取得
+        3. 遅延計測が例外を送出するようにして件数を取得
+
+        【期待する結果】
+        どちらの場合もプライマリの1件が返る
+        """
+        # Arrange
+        Category.objects.create(name="雑談", slug="chat")
+
+        # Act
+        with mock.patch("api.db.routers.measure_replica_lag", return_value=30.0):
+            with replica_reads():
+                lagging_count = Category.objects.count()
+        with mock.patch(
+            "api.db.routers.measure_replica_lag", side_effect=OperationalError
+        ):
+            with replica_reads():
+                unavailable_count = Category.objects.count()
+
+        # Assert
+        assert lagging_count == 1
+        assert unavailable_count == 1
+
+    def test_batch_reads_go_to_replica_without_pinning(self, api_client):
+        """【正常系】読み取り専用のバッチはPOSTでもレプリカから読み取る.
+
+        【テストの意図】
+        replica_safeなビューが書き込みとして扱われないことを保証します。
+
+        【何を保証するか】
+        - バッチ内の読み取りがレプリカ（空）から返ること
+        - プライマリ固定Cookieが付与されないこと
+
+        【テスト手順】
+        1. プライマリにカテゴリを作成
+        2. バッチでカテゴリ一覧を取得
+
+        【期待する結果】
+        レプリカの0件が返り、Cookieは付与されない
+        """
+        # Arrange
+        Category.objects.create(name="雑談", slug="chat")
+
+        # Act
+        response = api_client.post(
+            "/api/v1/batch/", {"requests": [{"path": "categories/"}]}, format="json"
+        )
+
+        # Assert
+        assert response.json()["responses"][0]["body"]["count"] == 0
+        assert "mb_primary_pin" not in response.cookies
+
+    def test_thread_detail_reads_replica_after_view_count(self, api_client):
+        """【正常系】閲覧数の更新があってもスレッド詳細はレプリカから読む.
+
+        【テストの意図】
+        レプリカの効果が最も大きいスレッド詳細で、閲覧数のUPDATEが
+        リクエスト全体をプライマリに固定しないことを保証します。
+
+        【何を保証するか】
+        - スレッドと投稿がレプリカから返ること
+        - 閲覧数はプライマリで加算されること
+        - プライマリ固定Cookieが付与されないこと
+
+        【テスト手順】
+        1. 同じ主キーのスレッドをプライマリとレプリカに作成（投稿はレプリカのみ）
+        2. スレッド詳細を取得
+
+        【期待する結果】
+        レプリカのタイトルと投稿が返り、プライマリの閲覧数が1になる
+        """
+        # Arrange
+        category = Category.objects.create(name="雑談", slug="chat")
+        thread = Thread.objects.create(title="プライマリ", category=category)
+        Category.objects.using("replica").create(
+            pk=category.pk, name="雑談", slug="chat"
+        )
+        replica_thread = Thread.objects.using("replica").create(
+            pk=thread.pk, title="レプリカ", category_id=category.pk
+        )
+        Post.objects.using("replica").create(
+            thread=replica_thread, content="レプリカの投稿", post_number=1
+        )
+
+        # Act
+        response = api_client.get(f"/api/v1/threads/{thread.pk}/")
+
+        # Assert
+        body = response.json()
+        assert body["title"] == "レプリカ"
+        assert [post["content"] for post in body["posts"]] == ["レプリカの投稿"]
+        thread.refresh_from_db()
+        assert thread.view_count == 1
+        assert "mb_primary_pin" not in response.cookies
+
+    def test_admin_pages_read_primary(self, rf):
+        """【正常系】API以外のページの読み取りはプライマリに残る.
+
+        【テストの意図】
+        管理画面やWagtailのページが遅延のあるレプリカを読まないことを
+        保証します。
+
+        【何を保証するか】
+        - PATH_PREFIXES 外のGETの読み取りがプライマリから返ること
+        - PATH_PREFIXES 内のGETの読み取りはレプリカから返ること
+
+        【テスト手順】
+        1. プライマリにカテゴリを作成
+        2. /admin/ と /api/ のGETで件数を数えるビューを呼び出す
+
+        【期待する結果】
+        /admin/ では1件、/api/ では0件
+        """
+        # Arrange
+        Category.objects.create(name="雑談", slug="chat")
+        middleware = ReplicaPinningMiddleware(
+            lambda request: HttpResponse(str(Category.objects.count()))
+        )
+
+        # Act
+        admin = middleware(rf.get("/admin/pages/"))
+        api = middleware(rf.get("/api/v1/categories/"))
+
+        # Assert
+        assert admin.content == b"1"
+        assert api.content == b"0"
@@ -0,0 +1,212 @@
+"""レスポンス圧縮ミドルウェアのユニットテスト."""
+
+import gzip
+import json
+
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from api.middleware.compression import (
+    CompressionMiddleware,
+    available_codecs,
+    negotiate_encoding,
+)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    """Content-Encodingに応じて展開する.
+
+    Args:
+        data: 圧縮済みのボディ
+        encoding: Content-Encodingの値
+
+    Returns:
+        展開したボディ
+    """
+    if encoding == "br":
+        return brotli.decompress(data)
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+
+BODY = json.dumps(
+    [{"id": n, "content": f"{n}ゲット。それな", "is_op": False} for n in range(200)],
+    ensure_ascii=False,
+).encode()
+
+
+def call(body: bytes = BODY, content_type="application/json", **headers):
+    """ミドルウェアを通してレスポンスを取得する.
+
+    Args:
+        body: ビューが返すレスポンスボディ
+        content_type: レスポンスのContent-Type
+        **headers: リクエストヘッダー（WSGI形式）
+
+    Returns:
+        ミドルウェア適用後のレスポンス
+    """
+    middleware = CompressionMiddleware(
+        lambda request: HttpResponse(body, content_type=content_type)
+    )
+    return middleware(RequestFactory().get("/api/v1/threads/", **headers))
+
+
+class TestNegotiateEncoding:
+    """Accept-Encodingのネゴシエーションのテスト."""
+
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [
+            ("gzip, deflate, br, zstd", "zstd"),
+            ("gzip;q=1.0, br;q=0.5", "gzip"),
+            ("br;q=0.8, gzip;q=0.8", "br"),
+            ("*;q=0.5, zstd;q=0", "br"),
+            ("identity", None),
+            ("gzip;q=0", None),
+            ("", None),
+        ],
+    )
+    def test_highest_quality_wins(self, header, expected):
+        """【正常系】q値が最も高く、同値ならサーバー優先度が高いものを選ぶ.
+
+        【テストの意図】
+        RFC 9110のq値とワイルドカードに従ってエンコーディングを選ぶことを
+        保証します。
+
+        【何を保証するか】
+        - q値が最も高いエンコーディングが選ばれること
+        - 同じq値の場合はサーバー側の優先順位で決まること
+        - q=0のエンコーディングは選ばれないこと
+
+        【テスト手順】
+        1. Accept-Encodingヘッダーを与えてネゴシエーション
+
+        【期待する結果】
+        期待したエンコーディング（またはNone）が返る
+        """
+        # Act & Assert
+        assert negotiate_encoding(header, ["zstd", "br", "gzip"]) == expected
+
+
+class TestCompressionMiddleware:
+    """CompressionMiddlewareのテスト."""
+
+    def test_gzip_response(self):
+        """【正常系】gzipを受け付けるクライアントには圧縮して返す.
+
+        【テストの意図】
+        大きなJSONレスポンスが圧縮され、元のボディに復元できることを
+        保証します。
+
+        【何を保証するか】
+        - Content-EncodingとContent-Lengthが設定されること
+        - Vary: Accept-Encodingが付与されること
+        - 展開すると元のボディと一致すること
+
+        【テスト手順】
+        1. Accept-Encoding: gzip でレスポンスを取得
+        2. ボディを展開
+
+        【期待する結果】
+        圧縮されたボディが元のJSONに展開できる
+        """
+        # Act
+        response = call(HTTP_ACCEPT_ENCODING="gzip")
+
+        # Assert
+        assert response["Content-Encoding"] == "gzip"
+        assert response["Content-Length"] == str(len(response.content))
+        assert "Accept-Encoding" in response["Vary"]
+        assert gzip.decompress(response.content) == BODY
+
+    @pytest.mark.parametrize(
+        ("body", "content_type", "headers"),
+        [
+            (BODY, "application/json", {}),
+            (b'{"id": 1}', "application/json", {"HTTP_ACCEPT_ENCODING": "gzip"}),
+            (BODY, "image/png", {"HTTP_ACCEPT_ENCODING": "gzip"}),
+            (BODY, "text/html; charset=utf-8", {"HTTP_ACCEPT_ENCODING": "gzip"}),
+        ],
+    )
+    def test_response_left_uncompressed(self, body, content_type, headers):
+        """【正常系】対象外のレスポンスは圧縮しない.
+
+        【テストの意図】
+        圧縮の効果がない、またはクライアントが対応していない場合に
+        レスポンスを変更しないことを保証します。
+
+        【何を保証するか】
+        - Accept-Encodingがない場合は圧縮しないこと
+        - MIN_SIZE未満のボディは圧縮しないこと
+        - 圧縮対象外のContent-Typeは圧縮しないこと
+        - CSRFトークンを含みうるHTMLは圧縮しないこと（BREACH対策）
+
+        【テスト手順】
+        1. 条件を満たさないレスポンスをミドルウェアに通す
+
+        【期待する結果】
+        Content-Encodingが付与されず、ボディがそのまま返る
+        """
+        # Act
+        response = call(body, content_type, **headers)
+
+        # Assert
+        assert not response.has_header("Content-Encoding")
+        assert response.content == body
+
+    @pytest.mark.parametrize("encoding", sorted(available_codecs()))
+    def test_streaming_response_is_compressed_incrementally(self, encoding):
+        """【正常系】ストリーミングレスポンスもチャンクごとに圧縮して返す.
+
+        【テストの意図】
+        長いスレッドのように大きく、ストリーミングで返すレスポンスが
+        圧縮されずに送られないことを保証します。
+
+        【何を保証するか】
+        - Content-Encodingが設定され、Content-Lengthが付かないこと
+        - 元のチャンクごとに展開可能なデータが送り出されること
+        - 全体を展開すると元のボディと一致すること
+
+        【テスト手順】
+        1. 3チャンクのストリーミングレスポンスをミドルウェアに通す
+        2. 圧縮済みのチャンクを連結して展開
+
+        【期待する結果】
+        元のボディに展開でき、圧縮後のサイズは元より小さい
+        """
+        # Arrange
+        chunks = [BODY[:1000], BODY[1000:5000], BODY[5000:]]
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(
+                iter(chunks), content_type="application/json"
+            )
+        )
+        request = RequestFactory().get(
+            "/api/v1/threads/1/", HTTP_ACCEPT_ENCODING=encoding
+        )
+
+        # Act
+        response = middleware(request)
+        compressed = list(response.streaming_content)
+
+        # Assert
+        assert response["Content-Encoding"] == encoding
+        assert not response.has_header("Content-Length")
+        assert "Accept-Encoding" in response["Vary"]
+        assert len(compressed) >= len(chunks)
+        body = b"".join(compressed)
+        assert decompress(body, encoding) == BODY
+        assert len(body) < len(BODY)
@@ -0,0 +1,516 @@
+"""イベントログ（トランザクショナルアウトボックス）のユニットテスト."""
+
+from collections import Counter
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError
+
+from api.models import (
+    BackgroundTask,
+    BoardEvent,
+    Category,
+    ConsumerOffset,
+    Post,
+    Reaction,
+    Tag,
+    Thread,
+    ThreadTag,
+    UserSession,
+)
+from api.services.events import EventConsumer, consume, consume_all, replay
+
+THREADS_URL = "/api/v1/threads/"
+POSTS_URL = "/api/v1/posts/"
+
+
+class PostCountConsumer(EventConsumer):
+    """スレッドごとの投稿数を数えるテスト用のコンシューマー.
+
+    Attributes:
+        counts: スレッドIDから投稿数への投影
+        order: 処理した投稿のスレッドIDとIDの記録
+    """
+
+    kinds = frozenset({BoardEvent.Kind.POST_CREATED, BoardEvent.Kind.POST_DELETED})
+    counts: Counter = Counter()
+    order: list[tuple[int, int]] = []
+
+    def reset(self):
+        """投影を空にする."""
+        PostCountConsumer.counts = Counter()
+        PostCountConsumer.order = []
+
+    def handle(self, events):
+        """投稿の作成・削除を投影に反映する.
+
+        Args:
+            events: ログの順に並んだイベント
+        """
+        for event in events:
+            delta = 1 if event.kind == BoardEvent.Kind.POST_CREATED else -1
+            self.counts[event.thread_id] += delta
+            self.order.append((event.thread_id, event.object_id))
+
+
+@pytest.fixture(autouse=True)
+def event_settings(settings):
+    """テスト用のコンシューマーを登録し、レート制限を無効にする."""
+    settings.BOARD_EVENTS = {
+        "CONSUMERS": {"post_counts": f"{__name__}.PostCountConsumer"},
+    }
+    settings.RATE_LIMITS = {"ENABLED": False}
+    PostCountConsumer().reset()
+
+
+@pytest.fixture
+def category():
+    """テスト用のカテゴリを作成する."""
+    return Category.objects.create(name="雑談", slug="chat")
+
+
+def make_posts(category, layout: dict[str, int]) -> dict[str, Thread]:
+    """スレッドと投稿を作成する.
+
+    Args:
+        category: カテゴリ
+        layout: スレッドのタイトルから投稿数への辞書
+
+    Returns:
+        タイトルからスレッドへの辞書
+    """
+    threads = {}
+    for title, count in layout.items():
+        thread = threads[title] = Thread.objects.create(title=title, category=category)
+        for number in range(1, count + 1):
+            Post.objects.create(thread=thread, content=str(number), post_number=number)
+    return threads
+
+
+@pytest.mark.django_db
+class TestEventEmission:
+    """書き込みに合わせたイベントの記録のテスト."""
+
+    def test_api_writes_are_logged(self, api_client, category):
+        """【正常系】APIからの書き込みが種類ごとにイベントとして記録される.
+
+        【テストの意図】
+        派生データの更新に必要な全ての書き込みが、個別のフックなしに
+        ログへ記録されることを保証します。
+
+        【何を保証するか】
+        - スレッド作成・投稿・リアクション・ピン留め・ロックがログの順に記録されること
+        - 投稿数のような派生値だけの保存は記録されないこと
+
+        【テスト手順】
+        1. スレッドを作成し、投稿、リアクション、ピン留め、ロックを行う
+
+        【期待する結果】
+        6件のイベントが書き込み順に記録される
+        """
+        # Act
+        api_client.post(
+            THREADS_URL,
+            {"title": "スレ", "category": category.pk, "initial_post_content": "1"},
+            format="json",
+        )
+        thread_id = Thread.objects.get().pk
+        post_id = api_client.post(
+            POSTS_URL, {"thread": thread_id, "content": "2"}, format="json"
+        ).json()["id"]
+        api_client.post(
+            f"{POSTS_URL}{post_id}/react/", {"reaction_type": "like"}, format="json"
+        )
+        api_client.post(f"{THREADS_URL}{thread_id}/pin/")
+        api_client.post(f"{THREADS_URL}{thread_id}/lock/")
+
+        # Assert
+        logged = list(BoardEvent.objects.values_list("kind", "thread_id", "payload"))
+        assert [(kind, thread) for kind, thread, _ in logged] == [
+            ("thread.created", thread_id),
+            ("post.created", thread_id),
+            ("post.created", thread_id),
+            ("reaction.created", thread_id),
+            ("thread.pinned", thread_id),
+            ("thread.locked", thread_id),
+        ]
+        assert logged[2][2]["post_number"] == 2
+        assert logged[4][2] == {"is_pinned": True}
+
+    def test_failed_write_leaves_no_event(self, category, monkeypatch):
+        """【異常系】書き込みが失敗した場合はイベントも残らない.
+
+        【テストの意図】
+        イベントが対象の保存と同じトランザクションで記録されることを保証します。
+
+        【何を保証するか】
+        - スレッド作成の途中で失敗すると、スレッドとイベントの両方が残らないこと
+
+        【テスト手順】
+        1. 最初の投稿の作成が失敗するようにする
+        2. スレッド作成APIを呼び出す
+
+        【期待する結果】
+        スレッドもイベントも0件
+        """
+        # Arrange
+        from api.v1.threads.serializers import ThreadCreateSerializer
+
+        def fail(*args, **kwargs):
+            raise IntegrityError("simulated failure")
+
+        monkeypatch.setattr(Post.objects, "create", fail)
+        serializer = ThreadCreateSerializer(
+            data={"title": "スレ", "category": category.pk, "initial_post_content": "1"}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        # Act
+        with pytest.raises(IntegrityError):
+            serializer.save()
+
+        # Assert
+        assert Thread.objects.count() == 0
+        assert BoardEvent.objects.count() == 0
+
+    def test_failed_reaction_leaves_no_row(self, api_client, category, monkeypatch):
+        """【異常系】イベントの記録が失敗した場合はリアクションも残らない.
+
+        【テストの意図】
+        リアクションがイベントと同じトランザクションで保存されることを保証します。
+
+        【何を保証するか】
+        - イベントの記録で失敗すると、リアクションが保存されないこと
+
+        【テスト手順】
+        1. イベントの記録が失敗するようにする
+        2. リアクションAPIを呼び出す
+
+        【期待する結果】
+        リアクションもイベントも0件
+        """
+        # Arrange
+        from api.services import events
+
+        post = make_posts(category, {"a": 1})["a"].posts.get()
+        BoardEvent.objects.all().delete()
+
+        def fail(*args, **kwargs):
+            raise IntegrityError("simulated failure")
+
+        monkeypatch.setattr(events, "emit", fail)
+
+        # Act
+        with pytest.raises(IntegrityError):
+            api_client.post(
+                f"{POSTS_URL}{post.pk}/react/", {"reaction_type": "like"}, format="json"
+            )
+
+        # Assert
+        assert Reaction.objects.count() == 0
+        assert BoardEvent.objects.count() == 0
+
+
+@pytest.mark.django_db
+class TestConsumers:
+    """コンシューマーの処理とリプレイのテスト."""
+
+    def test_consume_advances_offset(self, category):
+        """【正常系】consumeは未処理のイベントだけを処理して位置を進める.
+
+        【テストの意図】
+        コンシューマーが自分のオフセットを持ち、同じイベントを
+        二重に処理しないことを保証します。
+
+        【何を保証するか】
+        - 処理したイベントの最後の位置が保存されること
+        - 2回目は新しいイベントだけが処理されること
+        - 新しいイベントがなければ何も処理しないこと
+
+        【テスト手順】
+        1. 投稿を作成して consume
+        2. 投稿を追加して consume
+        3. 投稿を追加せずに consume
+
+        【期待する結果】
+        投影の投稿数が実際の投稿数と一致し、位置が最後のイベントになる
+        """
+        # Arrange
+        threads = make_posts(category, {"a": 2})
+
+        # Act
+        first = consume("post_counts")
+        Post.objects.create(thread=threads["a"], content="3", post_number=3)
+        second = consume("post_counts")
+        third = consume("post_counts")
+
+        # Assert
+        assert (first, second, third) == (3, 1, 0)
+        assert PostCountConsumer.counts[threads["a"].pk] == 3
+        assert ConsumerOffset.objects.get(name="post_counts").position == (
+            BoardEvent.objects.order_by("-pk").first().pk
+        )
+
+    def test_late_commit_is_processed_from_gap(self, category):
+        """【正常系】後続のイベントより遅れてコミットされたイベントも処理する.
+
+        【テストの意図】
+        先に採番したトランザクションが後からコミットした場合に、
+        読み取り位置を越えたイベントが読み飛ばされないことを保証します。
+
+        【何を保証するか】
+        - 読み取り位置より手前の欠番が隙間として記録されること
+        - 隙間のイベントが後からコミットされると次の consume で処理されること
+        - 処理した隙間は記録から取り除かれること
+
+        【テスト手順】
+        1. 3件の投稿を作成し、2件目のイベントを一時的に取り除いて consume
+        2. 2件目のイベントを同じ主キーで戻して consume
+
+        【期待する結果】
+        1回目は2件を処理して2件目の主キーが隙間に残り、
+        2回目に2件目が処理されて投影の投稿数が3になる
+        """
+        # Arrange
+        threads = make_posts(category, {"a": 3})
+        late = BoardEvent.objects.order_by("pk")[2]
+        BoardEvent.objects.filter(pk=late.pk).delete()
+
+        # Act
+        first = consume("post_counts")
+        gaps = ConsumerOffset.objects.get(name="post_counts").gaps
+        late.save(force_insert=True)
+        second = consume("post_counts")
+
+        # Assert
+        assert (first, second) == (3, 1)
+        assert [pk for pk, _ in gaps] == [late.pk]
+        assert PostCountConsumer.counts[threads["a"].pk] == 3
+        assert PostCountConsumer.order[-1] == (threads["a"].pk, late.object_id)
+        assert ConsumerOffset.objects.get(name="post_counts").gaps == []
+
+    def test_gap_is_dropped_after_timeout(self, category, settings):
+        """【異常系】GAP_TIMEOUT_SECONDS を過ぎても埋まらない隙間は諦める.
+
+        【テストの意図】
+        ロールバックで欠番になった主キーを、いつまでも照会し続けないことを
+        保証します。
+
+        【何を保証するか】
+        - 後続のイベントの記録から期限を過ぎた隙間は記録されないこと
+
+        【テスト手順】
+        1. GAP_TIMEOUT_SECONDS を0にする
+        2. 3件の投稿を作成し、2件目のイベントを削除して consume
+
+        【期待する結果】
+        隙間は記録されず、残りのイベントは処理される
+        """
+        # Arrange
+        settings.BOARD_EVENTS = {**settings.BOARD_EVENTS, "GAP_TIMEOUT_SECONDS": 0}
+        make_posts(category, {"a": 3})
+        BoardEvent.objects.filter(pk=BoardEvent.objects.order_by("pk")[2].pk).delete()
+
+        # Act
+        processed = consume("post_counts")
+
+        # Assert
+        assert processed == 3
+        assert ConsumerOffset.objects.get(name="post_counts").gaps == []
+
+    def test_parallel_replay_rebuilds_projection(self, category):
+        """【正常系】並列のリプレイで投影を同じ結果に作り直せる.
+
+        【テストの意図】
+        投影が壊れても、ログを先頭から並列に処理し直すことで
+        決定的に復元できることを保証します。
+
+        【何を保証するか】
+        - 壊れた投影がリプレイで実際の投稿数に戻ること
+        - 同じスレッドのイベントはログの順に処理されること
+        - 削除のイベントも反映されること
+        - 読み取り位置がログの末尾に合わせられること
+
+        【テスト手順】
+        1. 3スレッドに投稿し、1件を削除
+        2. 投影を壊してから3ワーカー・バッチ4件でリプレイ
+
+        【期待する結果】
+        スレッドごとの投稿数が一致し、各スレッドの処理順が投稿順になる
+        """
+        # Arrange
+        threads = make_posts(category, {"a": 5, "b": 3, "c": 4})
+        Post.objects.filter(thread=threads["b"]).first().delete()
+        PostCountConsumer.counts = Counter({threads["a"].pk: 99})
+
+        # Act
+        replayed = replay("post_counts", workers=3, batch_size=4)
+
+        # Assert
+        assert replayed == BoardEvent.objects.count()
+        assert PostCountConsumer.counts == Counter(
+            {threads["a"].pk: 5, threads["b"].pk: 2, threads["c"].pk: 4}
+        )
+        logged = BoardEvent.objects.filter(kind__in=PostCountConsumer.kinds)
+        for thread in threads.values():
+            expected = [e.object_id for e in logged if e.thread_id == thread.pk]
+            handled = [
+                post_id
+                for thread_id, post_id in PostCountConsumer.order
+                if thread_id == thread.pk
+            ]
+            assert handled == expected
+        assert (
+            ConsumerOffset.objects.get(name="post_counts").position
+            == BoardEvent.objects.order_by("-pk").first().pk
+        )
+
+    def test_commands(self, category):
+        """【正常系】管理コマンドから処理とリプレイを実行できる.
+
+        【テストの意図】
+        運用時にコマンドでコンシューマーを動かせることを保証します。
+
+        【何を保証するか】
+        - consume_events がログの末尾まで処理すること
+        - replay_events が全件を再生すること
+        - 未登録のコンシューマー名はエラーになること
+
+        【テスト手順】
+        1. 投稿を作成し、各コマンドを実行
+
+        【期待する結果】
+        処理件数が出力され、未登録の名前はCommandErrorになる
+        """
+        # Arrange
+        from io import StringIO
+
+        make_posts(category, {"a": 3})
+        consumed, replayed = StringIO(), StringIO()
+
+        # Act
+        call_command("consume_events", batch_size=2, stdout=consumed)
+        call_command("replay_events", "post_counts", workers=2, stdout=replayed)
+
+        # Assert
+        assert "post_counts: processed 4 event(s)" in consumed.getvalue()
+        assert "post_counts: replayed 4 event(s)" in replayed.getvalue()
+        with pytest.raises(CommandError):
+            call_command("replay_events", "missing")
+
+
+@pytest.mark.django_db
+class TestBuiltinConsumers:
+    """既定で登録するコンシューマーのテスト."""
+
+    def test_posts_update_momentum_off_request(self, api_client, category, settings):
+        """【正常系】投稿の勢いはリクエストではなくコンシューマーが再計算する.
+
+        【テストの意図】
+        投稿のリクエストでは勢いを数え直さず、イベントログの処理で
+        まとめて反映することを保証します。
+
+        【何を保証するか】
+        - 投稿のリクエストでは勢いが変わらず、タスクも追加されないこと
+        - consume_all() の後にスレッドとタグ付けの勢いが更新されること
+
+        【テスト手順】
+        1. 既定のコンシューマーを登録し、タグ付きのスレッドに2件投稿する
+        2. consume_all() を実行する
+
+        【期待する結果】
+        投稿直後の勢いは0で、処理後は 2件 / 24時間
+        """
+        # Arrange
+        settings.BOARD_EVENTS = {
+            "CONSUMERS": {"momentum": "api.services.momentum.MomentumConsumer"}
+        }
+        thread = Thread.objects.create(title="スレ", category=category)
+        thread.tags.add(Tag.objects.create(name="python", slug="python"))
+        for content in ("1", "2"):
+            api_client.post(
+                POSTS_URL, {"thread": thread.pk, "content": content}, format="json"
+            )
+        thread.refresh_from_db()
+        before = thread.momentum
+
+        # Act
+        consume_all()
+
+        # Assert
+        assert before == 0
+        assert BackgroundTask.objects.count() == 0
+        thread.refresh_from_db()
+        assert thread.momentum == pytest.approx(2 / 24)
+        assert ThreadTag.objects.get(thread=thread).momentum == pytest.approx(2 / 24)
+
+    def test_incremental_consumers_rebuild_on_replay(self, category, settings):
+        """【正常系】トレンドスコアとポイントをログから作り直せる.
+
+        【テストの意図】
+        増分を加算するコンシューマーも、壊れた投影をリプレイで
+        二重に加算せずに復元できることを保証します。
+
+        【何を保証するか】
+        - リプレイ後のポイントが consume_all() で加算した値と一致すること
+        - 削除された投稿・リアクションの分が戻されたままであること
+        - リプレイ後のトレンドスコアが consume_all() で加算した値と一致すること
+
+        【テスト手順】
+        1. 既定のコンシューマーを登録し、タグ付きスレッドに投稿・リアクションする
+        2. 投稿1件を削除して consume_all() を実行し、結果を記録する
+        3. ポイントとトレンドスコアを壊してから両方をリプレイする
+
+        【期待する結果】
+        ポイントとトレンドスコアが記録した値に戻る
+        """
+        # Arrange
+        settings.BOARD_EVENTS = {}
+        author, reactor = (
+            UserSession.objects.create(temporary_name=name)
+            for name in ("ID:author", "ID:reactor")
+        )
+        thread = Thread.objects.create(
+            title="スレ", category=category, author_session=author
+        )
+        thread.tags.add(Tag.objects.create(name="python", slug="python"))
+        posts = [
+            Post.objects.create(
+                thread=thread,
+                content=str(number),
+                post_number=number,
+                author_session=session,
+            )
+            for number, session in enumerate([author, author, reactor], start=1)
+        ]
+        for post in posts:
+            Reaction.objects.create(
+                post=post, user_session=reactor, reaction_type="like"
+            )
+        posts[1].delete()
+        consume_all()
+        expected_points = list(
+            UserSession.objects.order_by("pk").values_list(
+                "post_count", "thread_count", "total_points", "level"
+            )
+        )
+        expected_score = Tag.objects.get().trend_score
+        UserSession.objects.update(post_count=9, total_points=99, level=7)
+        Tag.objects.update(trend_score=99.0)
+
+        # Act
+        for name in ("points", "trending"):
+            call_command("replay_events", name, "--workers", "1")
+
+        # Assert
+        assert expected_points[0][:3] == (1, 1, 8)
+        assert expected_points[1][:3] == (1, 0, 3)
+        assert (
+            list(
+                UserSession.objects.order_by("pk").values_list(
+                    "post_count", "thread_count", "total_points", "level"
+                )
+            )
+            == expected_points
+        )
+        assert Tag.objects.get().trend_score == pytest.approx(expected_score)
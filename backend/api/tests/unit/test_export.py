@@ -0,0 +1,270 @@
+"""分析用エクスポートのユニットテスト."""
+
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Category, Post, Reaction, Thread, UserSession
+from api.services.export import export_board, iter_chunks
+
+EXPORT_URL = "/api/v1/stats/export/"
+
+
+@pytest.fixture
+def board():
+    """スレッド2件、投稿3件、リアクション1件を作成する."""
+    category = Category.objects.create(name="雑談", slug="chat")
+    session = UserSession.objects.create(temporary_name="ID:abc")
+    threads = [
+        Thread.objects.create(title=f"スレ{number}", category=category)
+        for number in (1, 2)
+    ]
+    posts = [
+        Post.objects.create(
+            thread=threads[number % 2],
+            content=f"本文{number}",
+            post_number=number,
+            author_session=session,
+        )
+        for number in (1, 2, 3)
+    ]
+    Reaction.objects.create(post=posts[0], reaction_type="like")
+    return posts
+
+
+def read_lines(path) -> list[dict]:
+    """JSON Linesのファイルを読む.
+
+    Args:
+        path: ファイルのパス
+
+    Returns:
+        各行のJSON
+    """
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.mark.django_db
+def test_iter_chunks_reads_by_keyset(board):
+    """【性能】行は主キーの範囲ごとの短いクエリで読まれる.
+
+    【テストの意図】
+    大きなテーブルでもOFFSETや1本の長いクエリを使わず、
+    チャンクごとに独立したクエリで読むことを保証します。
+
+    【何を保証するか】
+    - チャンクの数だけクエリが発行され、2つ目以降は前の最後の主キーより後を読むこと
+
+    【テスト手順】
+    1. 投稿3件をチャンク2件で読む
+
+    【期待する結果】
+    2件と1件のチャンクで、3回目のクエリで終了する
+    """
+    # Act
+    with CaptureQueriesContext(connection) as queries:
+        chunks = list(iter_chunks("posts", chunk_size=2))
+
+    # Assert
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert len(queries) == 3
+    assert "OFFSET" not in queries[1]["sql"]
+    assert f'"id" > {chunks[0][-1][0]}' in queries[1]["sql"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_is_incremental(board, tmp_path):
+    """【正常系】2回目の増分エクスポートは新しい行だけを追記する.
+
+    【テストの意図】
+    分析用の定期的なエクスポートで、全件を読み直さずに差分だけを
+    取り込めることを保証します。
+
+    【何を保証するか】
+    - 全テーブルが並列にNDJSONで書き出されること
+    - マニフェストに最後の主キーと累計の行数が記録されること
+    - セッションのクッキー識別子が出力されないこと
+    - 増分エクスポートで新しい行だけが追記されること
+
+    【テスト手順】
+    1. 全テーブルをエクスポート
+    2. 投稿を1件追加し、増分エクスポート
+
+    【期待する結果】
+    投稿のファイルが4行になり、他のテーブルは変わらない
+    """
+    # Act
+    export_board(tmp_path, workers=4, chunk_size=2)
+    added = Post.objects.create(thread=board[0].thread, content="追加", post_number=10)
+    results = export_board(tmp_path, incremental=True, chunk_size=2)
+
+    # Assert
+    posts = read_lines(tmp_path / "posts.ndjson.jsonl")
+    assert [post["id"] for post in posts] == [*(post.pk for post in board), added.pk]
+    assert posts[0]["content"] == "本文1"
+    sessions = read_lines(tmp_path / "sessions.ndjson.jsonl")
+    assert "session_id" not in sessions[0]
+    assert {result.table: result.rows for result in results} == {
+        "threads": 0,
+        "posts": 1,
+        "reactions": 0,
+        "sessions": 0,
+    }
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert manifest["tables"]["posts"]["last_id"] == added.pk
+    assert manifest["tables"]["posts"]["rows"] == 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command_writes_columnar_chunks(board, tmp_path):
+    """【正常系】コマンドは列指向形式でチャンクごとに列の配列を書き出す.
+
+    【テストの意図】
+    分析ツールが列単位で読み込める形式で出力できることを保証します。
+
+    【何を保証するか】
+    - 1行が1チャンクで、列名と列ごとの値の配列を持つこと
+    - 形式の異なる既存のエクスポートには追記できないこと
+
+    【テスト手順】
+    1. 投稿をチャンク2件の列指向形式でエクスポート
+    2. 同じ出力先にNDJSONで増分エクスポート
+
+    【期待する結果】
+    2行のファイルが書き出され、2回目はエラーになる
+    """
+    # Arrange
+    output = StringIO()
+
+    # Act
+    call_command(
+        "export_board",
+        str(tmp_path),
+        "posts",
+        format="columnar",
+        chunk_size=2,
+        stdout=output,
+    )
+
+    # Assert
+    chunks = read_lines(tmp_path / "posts.columnar.jsonl")
+    assert len(chunks) == 2
+    assert chunks[0]["fields"][:3] == ["id", "thread_id", "post_number"]
+    assert chunks[0]["columns"][2] == [1, 2]
+    assert chunks[1]["columns"][0] == [board[2].pk]
+    assert "posts: 3 row(s)" in output.getvalue()
+    with pytest.raises(CommandError, match="Cannot append ndjson"):
+        call_command("export_board", str(tmp_path), "posts", incremental=True)
+
+
+@pytest.mark.django_db
+class TestExportEndpoint:
+    """エクスポートエンドポイントのテスト."""
+
+    def test_admin_only(self, board, api_client):
+        """【異常系】管理者以外はエクスポートできない.
+
+        【テストの意図】
+        投稿の本文やセッションの統計を一般の利用者が一括取得できないことを
+        保証します。
+
+        【何を保証するか】
+        - 未認証のリクエストが拒否されること
+
+        【テスト手順】
+        1. 認証せずにエクスポートを要求
+
+        【期待する結果】
+        403
+        """
+        # Act
+        response = api_client.get(f"{EXPORT_URL}posts/")
+
+        # Assert
+        assert response.status_code == 403
+
+    def test_streams_rows_after_id(self, board, api_client):
+        """【正常系】管理者は after_id 以降の行をNDJSONで受け取る.
+
+        【テストの意図】
+        HTTP経由でも、受け取った最後の主キーから続きを取得できることを
+        保証します。
+
+        【何を保証するか】
+        - ストリーミングレスポンスのNDJSONで返ること
+        - after_id より後の行だけが含まれること
+        - 不正なテーブル名が404になること
+
+        【テスト手順】
+        1. 管理者として最初の投稿より後の投稿をエクスポート
+
+        【期待する結果】
+        2行のNDJSONが返る
+        """
+        # Arrange
+        admin = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        api_client.force_authenticate(admin)
+
+        # Act
+        response = api_client.get(f"{EXPORT_URL}posts/?after_id={board[0].pk}")
+        missing = api_client.get(f"{EXPORT_URL}users/")
+
+        # Assert
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert response["Content-Disposition"].endswith('filename="posts.jsonl"')
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [
+            board[1].pk,
+            board[2].pk,
+        ]
+        assert missing.status_code == 404
+
+    def test_columnar_is_one_json_document(self, board, api_client, settings):
+        """【正常系】列指向形式は全チャンクを1つのJSON文書として返す.
+
+        【テストの意図】
+        Content-Typeと拡張子が本文の形式と一致し、application/json として
+        そのまま読み込めることを保証します。
+
+        【何を保証するか】
+        - columnar は application/json と .json のファイル名で返ること
+        - 本文がチャンクの配列からなる1つのJSONであること
+        - 行がない場合も空の配列になること
+
+        【テスト手順】
+        1. CHUNK_SIZE を2にして、管理者として投稿を列指向形式でエクスポート
+        2. 最後の投稿より後の投稿を列指向形式でエクスポート
+
+        【期待する結果】
+        1回目は2チャンクの配列、2回目は空の配列
+        """
+        # Arrange
+        settings.BOARD_EXPORT = {"CHUNK_SIZE": 2}
+        admin = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        api_client.force_authenticate(admin)
+
+        # Act
+        response = api_client.get(f"{EXPORT_URL}posts/?output=columnar")
+        empty = api_client.get(
+            f"{EXPORT_URL}posts/?output=columnar&after_id={board[-1].pk}"
+        )
+
+        # Assert
+        assert response["Content-Type"] == "application/json"
+        assert response["Content-Disposition"] == 'attachment; filename="posts.json"'
+        chunks = json.loads(b"".join(response.streaming_content))
+        assert [chunk["columns"][0] for chunk in chunks] == [
+            [board[0].pk, board[1].pk],
+            [board[2].pk],
+        ]
+        assert json.loads(b"".join(empty.streaming_content)) == []
@@ -0,0 +1,555 @@
+"""高速読み取りパスのユニットテスト.
+
+シリアライザーを経由しないリーダーの出力が、
+既存のシリアライザーの出力と完全に一致することを検証する。
+"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Category, Post, Reaction, Tag, Thread, UserSession
+from api.v1.categories.readers import CATEGORY_DETAIL_READER, CATEGORY_LIST_READER
+from api.v1.categories.serializers import CategoryListSerializer, CategorySerializer
+from api.v1.posts.readers import POST_READER
+from api.v1.posts.serializers import PostSerializer
+from api.v1.tags.readers import TAG_DETAIL_READER, TAG_LIST_READER
+from api.v1.tags.serializers import TagListSerializer, TagSerializer
+from api.v1.threads.readers import THREAD_DETAIL_READER, THREAD_LIST_READER
+from api.v1.threads.serializers import ThreadDetailSerializer, ThreadListSerializer
+from api.v1.threads.views import ThreadViewSet
+
+
+def render(data) -> bytes:
+    """比較用にJSONバイト列へレンダリングする."""
+    return JSONRenderer().render(data)
+
+
+@pytest.fixture
+def board():
+    """タグ・作成者・返信・リアクションを含む掲示板データを作成する."""
+    category = Category.objects.create(name="プログラミング", slug="programming")
+    python = Tag.objects.create(name="Python", slug="python")
+    django = Tag.objects.create(name="Django", slug="django")
+    Tag.objects.create(name="未使用", slug="unused")
+    session = UserSession.objects.create(temporary_name="ID:abc123")
+
+    tagged = Thread.objects.create(
+        title="Django質問スレ", category=category, author_session=session, momentum=1.5
+    )
+    tagged.tags.set([python, django])
+    Thread.objects.create(title="雑談スレ", category=category, is_pinned=True)
+
+    op = Post.objects.create(
+        thread=tagged, content="1", post_number=1, is_op=True, author_session=session
+    )
+    reply = Post.objects.create(
+        thread=tagged, content=">>1\nそれな", post_number=2, reply_to=op
+    )
+    Post.objects.create(thread=tagged, content=">>1", post_number=3, reply_to=op)
+    Reaction.objects.create(post=op, reaction_type="like", user_session=session)
+    Reaction.objects.create(post=op, reaction_type="funny")
+    Reaction.objects.create(post=op, reaction_type="like")
+    Reaction.objects.create(post=reply, reaction_type="agree")
+    return tagged
+
+
+@pytest.mark.django_db
+class TestFastReaders:
+    """FastReaderとシリアライザーの出力一致テスト."""
+
+    def test_thread_list_matches_serializer(self, board):
+        """【互換性】スレッド一覧の出力がThreadListSerializerと一致する.
+
+        【テストの意図】
+        一覧エンドポイントを高速パスに切り替えても出力が変わらないことを
+        保証します。
+
+        【何を保証するか】
+        - タグ（name順）、カテゴリ名、作成者名、日時表現が一致すること
+        - タグや作成者がないスレッドでも一致すること
+        - 並び順（ピン留め優先）が維持されること
+
+        【テスト手順】
+        1. ViewSetと同じクエリセットでシリアライザーの出力を取得
+        2. 同じクエリセットからリーダーの出力を取得
+        3. JSONとして比較
+
+        【期待する結果】
+        両者のJSONがバイト単位で一致する
+        """
+        # Arrange
+        queryset = ThreadViewSet.queryset.all()
+
+        # Act
+        expected = ThreadListSerializer(queryset, many=True).data
+        actual = THREAD_LIST_READER.build(THREAD_LIST_READER.values(queryset))
+
+        # Assert
+        assert render(actual) == render(expected)
+
+    def test_thread_detail_matches_serializer(self, board):
+        """【互換性】スレッド詳細の出力がThreadDetailSerializerと一致する.
+
+        【テストの意図】
+        全レスを含むスレッド詳細が高速パスでも同一であることを保証します。
+
+        【何を保証するか】
+        - レスのリアクション集計（タイプ順）と返信数が一致すること
+        - 返信元・作成者の有無にかかわらず一致すること
+
+        【テスト手順】
+        1. スレッド詳細をシリアライザーで出力
+        2. 同じスレッドをリーダーで出力
+        3. JSONとして比較
+
+        【期待する結果】
+        両者のJSONがバイト単位で一致する
+        """
+        # Arrange
+        queryset = Thread.objects.filter(pk=board.pk)
+
+        # Act
+        expected = ThreadDetailSerializer(queryset.get()).data
+        actual = THREAD_DETAIL_READER.build(THREAD_DETAIL_READER.values(queryset))[0]
+
+        # Assert
+        assert render(actual) == render(expected)
+        assert len(actual["posts"]) == 3
+
+    def test_post_and_tag_lists_match_serializers(self, board):
+        """【互換性】投稿一覧とタグ一覧の出力がシリアライザーと一致する.
+
+        【テストの意図】
+        PostSerializerとTagListSerializerの高速パスが同一出力であることを
+        保証します。
+
+        【何を保証するか】
+        - 投稿一覧の出力がPostSerializerと一致すること
+        - タグ一覧の出力がTagListSerializerと一致すること
+
+        【テスト手順】
+        1. 全投稿・全タグをシリアライザーで出力
+        2. 同じクエリセットをリーダーで出力
+        3. JSONとして比較
+
+        【期待する結果】
+        両者のJSONがバイト単位で一致する
+        """
+        # Arrange
+        posts = Post.objects.all()
+        tags = Tag.objects.all()
+
+        # Act & Assert
+        assert render(POST_READER.build(POST_READER.values(posts))) == render(
+            PostSerializer(posts, many=True).data
+        )
+        assert render(TAG_LIST_READER.build(TAG_LIST_READER.values(tags))) == render(
+            TagListSerializer(tags, many=True).data
+        )
+
+    def test_category_and_tag_readers_match_serializers(self, board):
+        """【互換性】カテゴリとタグのリーダー出力がシリアライザーと一致する.
+
+        【テストの意図】
+        スレッド数を一括集計するリーダーが、リレーションのcount()を使う
+        シリアライザーと同一の出力になることを保証します。
+
+        【何を保証するか】
+        - カテゴリ一覧・詳細の出力が一致すること
+        - タグ詳細の出力が一致し、スレッドがないタグのスレッド数が0になること
+
+        【テスト手順】
+        1. 全カテゴリ・全タグをシリアライザーで出力
+        2. 同じクエリセットをリーダーで出力
+        3. JSONとして比較
+
+        【期待する結果】
+        両者のJSONがバイト単位で一致する
+        """
+        # Arrange
+        Category.objects.create(name="雑談", slug="chat")
+        categories = Category.objects.all()
+        tags = Tag.objects.all()
+
+        # Act & Assert
+        for reader, serializer, queryset in (
+            (CATEGORY_LIST_READER, CategoryListSerializer, categories),
+            (CATEGORY_DETAIL_READER, CategorySerializer, categories),
+            (TAG_DETAIL_READER, TagSerializer, tags),
+        ):
+            assert render(reader.build(reader.values(queryset))) == render(
+                serializer(queryset, many=True).data
+            )
+
+    def test_thread_detail_query_count_is_constant(
+        self, board, api_client, django_assert_num_queries
+    ):
+        """【性能】スレッド詳細のクエリ数がレス数に依存しない.
+
+        【テストの意図】
+        レスごとのリアクション集計・返信数クエリ（N+1）が発生しないことを
+        保証します。
+
+        【何を保証するか】
+        - レス数を増やしてもクエリ数が一定であること
+        - 閲覧数がインクリメントされること
+
+        【テスト手順】
+        1. スレッドにレスを50件追加
+        2. クエリ数を計測しながらスレッド詳細を取得
+
+        【期待する結果】
+        固定数のクエリで応答し、閲覧数が1増える
+        """
+        # Arrange
+        Post.objects.bulk_create(
+            Post(thread=board, content=str(n), post_number=n) for n in range(4, 54)
+        )
+
+        # Act
+        with django_assert_num_queries(6):
+            response = api_client.get(f"/api/v1/threads/{board.pk}/")
+
+        # Assert
+        assert response.status_code == 200
+        assert len(response.json()["posts"]) == 53
+        assert response.json()["view_count"] == 1
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    """?fields= / ?omit= による出力フィールド絞り込みのテスト."""
+
+    def test_fields_prunes_payload_and_queries(self, board, api_client):
+        """【正常系】fields指定で出力とSQLの両方が絞り込まれる.
+
+        【テストの意図】
+        モバイルの一覧表示のように一部のフィールドだけが必要な場合に、
+        不要なJOINや関連データの取得が発生しないことを保証します。
+
+        【何を保証するか】
+        - 指定したフィールドだけが出力されること
+        - カテゴリ・作成者へのJOINが発行されないこと
+        - タグの一括取得クエリが発行されないこと
+
+        【テスト手順】
+        1. ?fields=id,title,momentum でスレッド一覧を取得
+        2. 発行されたSQLを確認
+
+        【期待する結果】
+        出力キーが3つだけになり、SQLにJOINやタグの参照が含まれない
+        """
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get("/api/v1/threads/?fields=id,title,momentum")
+
+        # Assert
+        assert response.status_code == 200
+        assert [list(row) for row in response.json()["results"]] == [
+            ["id", "title", "momentum"]
+        ] * 2
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        assert "JOIN" not in sql
+        assert "board_tag" not in sql
+
+    def test_omit_skips_count_aggregation(self, board, api_client):
+        """【正常系】omit指定で除外したフィールドの集計が行われない.
+
+        【テストの意図】
+        スレッド数などの集計クエリが、出力しない場合には発行されないことを
+        保証します。
+
+        【何を保証するか】
+        - 除外したフィールドが出力されないこと
+        - 残りのフィールドは通常どおり出力されること
+        - スレッド数の集計クエリが発行されないこと
+
+        【テスト手順】
+        1. ?omit=thread_count でカテゴリ一覧を取得
+
+        【期待する結果】
+        thread_countが出力されず、スレッドテーブルが参照されない
+        """
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get("/api/v1/categories/?omit=thread_count")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["results"] == [
+            {"id": board.category_id, "name": "プログラミング", "slug": "programming"}
+        ]
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        assert "board_thread" not in sql
+
+    def test_thread_detail_without_view_count_still_counts_view(
+        self, board, api_client
+    ):
+        """【正常系】view_countを出力しなくても閲覧数は加算される.
+
+        【テストの意図】
+        フィールドの絞り込みがスレッド詳細の副作用に影響しないことを
+        保証します。
+
+        【何を保証するか】
+        - 指定したフィールドだけが出力されること
+        - 閲覧数がインクリメントされること
+
+        【テスト手順】
+        1. ?fields=title でスレッド詳細を取得
+        2. DBの閲覧数を確認
+
+        【期待する結果】
+        titleだけが出力され、閲覧数が1になる
+        """
+        # Act
+        response = api_client.get(f"/api/v1/threads/{board.pk}/?fields=title")
+
+        # Assert
+        assert response.json() == {"title": "Django質問スレ"}
+        board.refresh_from_db()
+        assert board.view_count == 1
+
+    @pytest.mark.parametrize("param", ["fields", "omit"])
+    def test_unknown_field_returns_400(self, board, api_client, param):
+        """【異常系】存在しないフィールドの指定は400エラーとなる.
+
+        【テストの意図】
+        フィールド名の誤りが黙って無視されないことを保証します。
+
+        【何を保証するか】
+        - ステータスコード400が返ること
+        - エラーメッセージに不明なフィールド名が含まれること
+
+        【テスト手順】
+        1. 存在しないフィールドを指定して投稿一覧を取得
+
+        【期待する結果】
+        400エラーが返り、パラメーター名をキーとしたエラーが含まれる
+        """
+        # Act
+        response = api_client.get(f"/api/v1/posts/?{param}=id,password")
+
+        # Assert
+        assert response.status_code == 400
+        assert response.json() == {param: ["Unknown field(s): password"]}
+
+
+@pytest.mark.django_db
+class TestColumnarRepresentation:
+    """Acceptで選択する列指向表現のテスト."""
+
+    def test_post_list_as_columnar_json(self, board, api_client):
+        """【正常系】列指向JSONを要求すると投稿一覧を列ヘッダーと配列で返す.
+
+        【テストの意図】
+        モバイルクライアントが長いスレッドを少ないバイト数で取得できることを
+        保証します。
+
+        【何を保証するか】
+        - fieldsが通常表現のキーと同じ順序で並ぶこと
+        - 各行の値がfieldsの順序に対応すること
+        - 日時がエポックミリ秒で表されること
+
+        【テスト手順】
+        1. 列指向JSONのメディアタイプをAcceptに指定して投稿一覧を取得
+        2. 通常表現の投稿一覧と比較
+
+        【期待する結果】
+        各行をfieldsと組み合わせると通常表現と同じ値になる（日時を除く）
+        """
+        # Arrange
+        expected = api_client.get("/api/v1/posts/").json()["results"]
+
+        # Act
+        response = api_client.get(
+            "/api/v1/posts/", HTTP_ACCEPT="application/vnd.modern-board.columnar+json"
+        )
+
+        # Assert
+        assert response["Content-Type"].startswith(
+            "application/vnd.modern-board.columnar+json"
+        )
+        columns = response.json()["results"]
+        assert columns["fields"] == list(expected[0])
+        first = dict(zip(columns["fields"], columns["rows"][0], strict=True))
+        post = Post.objects.get(pk=first["id"])
+        assert first["created_at"] == int(post.created_at.timestamp() * 1000)
+        for key in ("id", "content", "reaction_counts", "reply_count"):
+            assert first[key] == expected[0][key]
+
+    def test_thread_detail_as_msgpack(self, board, api_client):
+        """【正常系】MessagePackを要求するとスレッド詳細のレスを列指向で返す.
+
+        【テストの意図】
+        スレッド詳細の大部分を占めるレス一覧が、キー名を繰り返さない形式で
+        返ることを保証します。
+
+        【何を保証するか】
+        - MessagePackとしてデコードできること
+        - レス一覧がfieldsとrowsの形式になること
+        - 通常のJSON表現より小さいこと
+
+        【テスト手順】
+        1. MessagePackのメディアタイプをAcceptに指定してスレッド詳細を取得
+        2. レスポンスをデコード
+
+        【期待する結果】
+        postsが3行の列指向表現になり、JSONより小さい
+        """
+        # Arrange
+        msgpack = pytest.importorskip("msgpack")
+        url = f"/api/v1/threads/{board.pk}/"
+
+        # Act
+        response = api_client.get(
+            url, HTTP_ACCEPT="application/vnd.modern-board.columnar+msgpack"
+        )
+
+        # Assert
+        data = msgpack.unpackb(response.content)
+        assert data["title"] == "Django質問スレ"
+        assert data["posts"]["fields"][:3] == ["id", "thread", "content"]
+        assert [row[3] for row in data["posts"]["rows"]] == [1, 2, 3]
+        assert len(response.content) < len(api_client.get(url).content)
+
+    def test_columnar_not_offered_for_writes(self, board, api_client):
+        """【異常系】書き込みアクションでは列指向表現を選択できない.
+
+        【テストの意図】
+        列指向表現を組み立てないアクションが、通常の辞書を列指向の
+        メディアタイプで返さないことを保証します。
+
+        【何を保証するか】
+        - 列指向のメディアタイプのみを受け付ける作成リクエストが406になること
+
+        【テスト手順】
+        1. 列指向JSONのみをAcceptに指定してスレッドを作成
+
+        【期待する結果】
+        406 Not Acceptableが返り、スレッドは作成されない
+        """
+        # Act
+        response = api_client.post(
+            "/api/v1/threads/",
+            {"title": "新スレ", "category": board.category_id, "content": "1"},
+            format="json",
+            HTTP_ACCEPT="application/vnd.modern-board.columnar+json",
+        )
+
+        # Assert
+        assert response.status_code == 406
+        assert Thread.objects.count() == 2
+
+
+@pytest.mark.django_db
+class TestStreamingResponse:
+    """長いスレッドのストリーミングレスポンスのテスト."""
+
+    @pytest.fixture(autouse=True)
+    def streaming_settings(self, settings):
+        """少ない投稿数でストリーミングするように設定する."""
+        settings.STREAMING_RESPONSES = {"MIN_ITEMS": 3, "CHUNK_SIZE": 2}
+
+    @pytest.mark.parametrize("query", ["", "?omit=updated_at,last_post_at"])
+    def test_streamed_body_matches_buffered(self, board, api_client, settings, query):
+        """【正常系】ストリーミングした本文はバッファリングした本文と一致する.
+
+        【テストの意図】
+        投稿をチャンクごとにエンコードしても、クライアントが受け取るJSONが
+        変わらないことを保証します。
+
+        【何を保証するか】
+        - 投稿数がMIN_ITEMS以上の場合にストリーミングレスポンスになること
+        - 本文が無効化した場合のレスポンスとバイト単位で一致すること
+        - postsの後のキーを省いた場合も正しいJSONになること
+
+        【テスト手順】
+        1. 投稿数3のスレッドをストリーミングで取得
+        2. ストリーミングを無効にして同じスレッドを取得
+
+        【期待する結果】
+        1回目はストリーミング、本文は閲覧数を除いて一致する
+        """
+        # Arrange
+        Thread.objects.filter(pk=board.pk).update(post_count=3)
+        url = f"/api/v1/threads/{board.pk}/{query}"
+
+        # Act
+        streamed = api_client.get(url)
+        body = b"".join(streamed.streaming_content)
+        settings.STREAMING_RESPONSES = {"ENABLED": False}
+        buffered = api_client.get(url)
+
+        # Assert
+        assert streamed.streaming
+        assert streamed["Content-Type"] == "application/json"
+        assert not buffered.streaming
+        assert body.replace(b'"view_count":1', b'"view_count":2') == buffered.content
+
+    def test_posts_are_read_in_chunks(self, board, api_client):
+        """【性能】投稿はチャンクごとに読み取り、関連データもチャンク単位で取得する.
+
+        【テストの意図】
+        スレッドの長さに関わらず、一度にメモリに載る投稿が
+        CHUNK_SIZE件に限られることを保証します。
+
+        【何を保証するか】
+        - 最初の断片（スレッドの列）は投稿を読む前に送られること
+        - リアクション集計がチャンクごとに取得されること
+
+        【テスト手順】
+        1. 投稿数3のスレッドを取得し、断片を1つずつ読む
+
+        【期待する結果】
+        最初の断片はpostsの直前で終わり、リアクション集計は2チャンク分2回
+        """
+        # Arrange
+        Thread.objects.filter(pk=board.pk).update(post_count=3)
+        response = api_client.get(f"/api/v1/threads/{board.pk}/")
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            chunks = list(response.streaming_content)
+
+        # Assert
+        assert chunks[0].endswith(b'"posts":[')
+        assert len(chunks) == 4
+        reaction_queries = [
+            query
+            for query in queries.captured_queries
+            if 'FROM "board_reaction"' in query["sql"]
+        ]
+        assert len(reaction_queries) == 2
+
+    def test_short_threads_are_buffered(self, board, api_client):
+        """【正常系】投稿数がMIN_ITEMS未満のスレッドは通常のレスポンスで返る.
+
+        【テストの意図】
+        短いスレッドでは圧縮などの通常の処理が適用されることを保証します。
+
+        【何を保証するか】
+        - 投稿数が閾値未満ならストリーミングしないこと
+        - postsを出力しない場合もストリーミングしないこと
+
+        【テスト手順】
+        1. 投稿数2のスレッドを取得
+        2. 投稿数3にして ?omit=posts で取得
+
+        【期待する結果】
+        どちらも通常のレスポンス
+        """
+        # Arrange
+        Thread.objects.filter(pk=board.pk).update(post_count=2)
+        url = f"/api/v1/threads/{board.pk}/"
+
+        # Act
+        short = api_client.get(url)
+        Thread.objects.filter(pk=board.pk).update(post_count=3)
+        omitted = api_client.get(f"{url}?omit=posts")
+
+        # Assert
+        assert not short.streaming
+        assert not omitted.streaming
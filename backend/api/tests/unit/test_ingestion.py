@@ -0,0 +1,179 @@
+"""グループコミット処理のユニットテスト."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+from django.db import connections
+
+from api.models import Category, Post, Thread
+from api.services.ingestion import (
+    IngestionTimeout,
+    PendingPost,
+    PostIngestionQueue,
+    commit_posts,
+)
+
+
+@pytest.fixture
+def thread():
+    """投稿先のスレッドを作成する."""
+    category = Category.objects.create(name="雑談", slug="chat")
+    return Thread.objects.create(title="実況スレ", category=category)
+
+
+@pytest.mark.django_db
+class TestCommitPosts:
+    """commit_posts()のテスト."""
+
+    def test_assigns_sequential_numbers_per_thread(self, thread):
+        """【正常系】バッチ内の投稿にスレッドごとの連番が振られる.
+
+        【テストの意図】
+        複数スレッドの投稿が混在するバッチでも採番が正しいことを保証します。
+
+        【何を保証するか】
+        - 既存の最大レス番号の続きから採番されること
+        - 戻り値が入力と同じ順序であること
+        - スレッドのpost_count・last_post_at・updated_atがまとめて更新されること
+
+        【テスト手順】
+        1. 既存投稿を1件持つスレッドと空のスレッドを用意
+        2. 2スレッド分の投稿を交互に含むバッチをコミット
+        3. 採番結果とスレッド統計を確認
+
+        【期待する結果】
+        各スレッドで連番が振られ、統計が投稿件数分だけ増える
+        """
+        # Arrange
+        Post.objects.create(thread=thread, content="1", post_number=1, is_op=True)
+        Thread.objects.filter(pk=thread.pk).update(post_count=1)
+        other = Thread.objects.create(title="別スレ", category=thread.category)
+        pending = [
+            PendingPost(thread_id=thread.pk, content="a"),
+            PendingPost(thread_id=other.pk, content="b"),
+            PendingPost(thread_id=thread.pk, content="c"),
+        ]
+
+        # Act
+        posts = commit_posts(pending)
+
+        # Assert
+        assert [p.post_number for p in posts] == [2, 1, 3]
+        assert [p.is_op for p in posts] == [False, True, False]
+        thread.refresh_from_db()
+        other.refresh_from_db()
+        assert thread.post_count == 3
+        assert thread.last_post_at == thread.updated_at == posts[2].created_at
+        assert other.post_count == 1
+        assert other.updated_at == posts[1].created_at
+
+    def test_single_counter_update_per_thread(self, thread, django_assert_num_queries):
+        """【性能】バッチの件数に関わらずクエリ数が一定である.
+
+        【テストの意図】
+        グループコミットが1件ずつのINSERTやUPDATEに退化しないことを保証します。
+
+        【何を保証するか】
+        - 50件の投稿が固定数のクエリでコミットされること
+
+        【テスト手順】
+        1. 同一スレッドへの投稿50件のバッチを用意
+        2. クエリ数を計測しながらコミット
+
+        【期待する結果】
+        SAVEPOINT/ロック/採番/INSERT/UPDATE/イベントログのINSERTの
+        固定数のクエリで完了する
+        """
+        # Arrange
+        pending = [PendingPost(thread_id=thread.pk, content=str(i)) for i in range(50)]
+
+        # Act & Assert
+        with django_assert_num_queries(7):
+            commit_posts(pending)
+        assert Post.objects.filter(thread=thread).count() == 50
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPostIngestionQueue:
+    """PostIngestionQueueのテスト."""
+
+    def test_concurrent_submissions_are_numbered_uniquely(self, thread):
+        """【正常系】並行して投稿しても番号が重複しない.
+
+        【テストの意図】
+        複数のクライアントから同時に投稿された場合に、
+        全員が一意のレス番号を同期的に受け取れることを保証します。
+
+        【何を保証するか】
+        - 全ての呼び出し元が作成済みPostを受け取ること
+        - レス番号が1から連続して重複なく割り当てられること
+
+        【テスト手順】
+        1. 8スレッドから40件の投稿を同時に送信
+        2. 受け取ったレス番号を集計
+
+        【期待する結果】
+        レス番号が1〜40の重複のない集合になる
+        """
+        # Arrange
+        ingestion_queue = PostIngestionQueue(max_batch_size=16, max_delay=0.01)
+
+        def submit(index):
+            try:
+                return ingestion_queue.submit(
+                    thread_id=thread.pk, content=f"post {index}", timeout=10
+                )
+            finally:
+                connections.close_all()
+
+        # Act
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            posts = list(executor.map(submit, range(40)))
+
+        # Assert
+        assert sorted(p.post_number for p in posts) == list(range(1, 41))
+        thread.refresh_from_db()
+        assert thread.post_count == 40
+
+
+def test_slow_commit_is_bounded():
+    """【異常系】コミットが終わらない場合も上限時間で応答を返す.
+
+    【テストの意図】
+    データベースのロック待ちなどでコミットが長引いても、リクエストの
+    スレッドが無制限に待たされないことを保証します。
+
+    【何を保証するか】
+    - コミット開始後も commit_timeout で IngestionTimeout になること
+    - 例外がコミット中だったことを示すこと
+
+    【テスト手順】
+    1. コミットが終わらないようにして投稿を送信
+
+    【期待する結果】
+    committing=True の IngestionTimeout が送出される
+    """
+    # Arrange
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_commit(batch):
+        started.set()
+        release.wait(5)
+        return [None] * len(batch)
+
+    ingestion_queue = PostIngestionQueue(max_batch_size=1, max_delay=0)
+
+    # Act
+    with mock.patch("api.services.ingestion.commit_posts", side_effect=slow_commit):
+        with pytest.raises(IngestionTimeout) as raised:
+            ingestion_queue.submit(
+                thread_id=1, content="post", timeout=1, commit_timeout=0.05
+            )
+        release.set()
+
+    # Assert
+    assert started.is_set()
+    assert raised.value.committing
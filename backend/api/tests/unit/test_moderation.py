@@ -0,0 +1,469 @@
+"""一括モデレーション（/threads/bulk/・/posts/bulk/）のユニットテスト."""
+
+import inspect
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, pre_delete
+from django.test.utils import CaptureQueriesContext
+
+from api.models import (
+    BoardEvent,
+    Category,
+    Post,
+    Reaction,
+    Tag,
+    Thread,
+    ThreadTag,
+    UserSession,
+)
+from api.services import moderation
+
+THREADS_BULK_URL = "/api/v1/threads/bulk/"
+POSTS_BULK_URL = "/api/v1/posts/bulk/"
+
+
+@pytest.fixture
+def admin_client(api_client):
+    """管理者として認証したAPIクライアント."""
+    admin = get_user_model().objects.create_superuser(
+        "admin", "admin@example.com", "password"
+    )
+    api_client.force_authenticate(admin)
+    return api_client
+
+
+@pytest.fixture
+def session():
+    """スパム投稿者のセッションを作成する."""
+    return UserSession.objects.create(temporary_name="ID:spam")
+
+
+@pytest.fixture
+def categories():
+    """カテゴリを2件作成する."""
+    return [
+        Category.objects.create(name="雑談", slug="chat"),
+        Category.objects.create(name="ゴミ箱", slug="trash"),
+    ]
+
+
+def add_posts(thread, session, count, start=1) -> list[Post]:
+    """スレッドに投稿を追加し、投稿数を合わせる.
+
+    Args:
+        thread: 対象スレッド
+        session: 投稿者のセッション
+        count: 追加する投稿数
+        start: 最初の投稿番号
+
+    Returns:
+        作成した投稿
+    """
+    posts = [
+        Post.objects.create(
+            thread=thread,
+            content=f"スパム{number}",
+            post_number=number,
+            author_session=session,
+        )
+        for number in range(start, start + count)
+    ]
+    Thread.objects.filter(pk=thread.pk).update(post_count=start + count - 1)
+    return posts
+
+
+def kinds(kind) -> list[int]:
+    """指定した種類のイベントの object_id を返す.
+
+    Args:
+        kind: イベントの種類
+
+    Returns:
+        object_id の昇順のリスト
+    """
+    return sorted(
+        BoardEvent.objects.filter(kind=kind).values_list("object_id", flat=True)
+    )
+
+
+@pytest.mark.django_db
+class TestBulkPosts:
+    """投稿の一括削除のテスト."""
+
+    def test_admin_only(self, api_client):
+        """【異常系】管理者以外は一括操作できない.
+
+        【テストの意図】
+        大量の投稿を一度に消せる操作を一般の利用者が使えないことを保証します。
+
+        【何を保証するか】
+        - 未認証のリクエストが拒否されること
+
+        【テスト手順】
+        1. 認証せずに投稿とスレッドの一括操作を要求
+
+        【期待する結果】
+        どちらも403
+        """
+        # Act
+        posts = api_client.post(
+            POSTS_BULK_URL, {"action": "delete", "ids": [1]}, format="json"
+        )
+        threads = api_client.post(
+            THREADS_BULK_URL, {"action": "lock", "ids": [1]}, format="json"
+        )
+
+        # Assert
+        assert posts.status_code == 403
+        assert threads.status_code == 403
+
+    def test_delete_adjusts_counters_and_events(
+        self, admin_client, categories, session
+    ):
+        """【正常系】一括削除でカウンターとイベントログが1回ずつ更新される.
+
+        【テストの意図】
+        シグナルを経由しない削除でも、1件ずつ削除した場合と同じ
+        非正規化カウンターとイベントが残ることを保証します。
+
+        【何を保証するか】
+        - 削除した投稿の分だけスレッドの投稿数が減ること
+        - 投稿者の投稿数とポイントが二重に減算されないこと
+        - 投稿とリアクションの削除イベントが記録されること
+        - 削除した投稿への返信の参照がNULLになること
+
+        【テスト手順】
+        1. スパム投稿3件と、それへの返信・リアクションを作成
+        2. スパム投稿者の投稿をフィルターで一括削除
+
+        【期待する結果】
+        スパム投稿だけが消え、カウンターが作成前の値に戻る
+        """
+        # Arrange
+        thread = Thread.objects.create(title="スレ", category=categories[0])
+        spam = add_posts(thread, session, 3)
+        reply = Post.objects.create(
+            thread=thread, content="返信", post_number=4, reply_to=spam[0]
+        )
+        Thread.objects.filter(pk=thread.pk).update(post_count=4)
+        reaction = Reaction.objects.create(post=spam[1], reaction_type="like")
+
+        # Act
+        response = admin_client.post(
+            POSTS_BULK_URL,
+            {"action": "delete", "filter": {"author_name": "ID:spam"}},
+            format="json",
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {"action": "delete", "affected": 3}
+        assert list(Post.objects.values_list("pk", flat=True)) == [reply.pk]
+        assert not Reaction.objects.exists()
+        reply.refresh_from_db()
+        assert reply.reply_to_id is None
+        thread.refresh_from_db()
+        assert thread.post_count == 1
+        session.refresh_from_db()
+        assert (session.post_count, session.total_points) == (0, 0)
+        assert kinds(BoardEvent.Kind.POST_DELETED) == [post.pk for post in spam]
+        assert kinds(BoardEvent.Kind.REACTION_DELETED) == [reaction.pk]
+
+    def test_queries_do_not_scale_with_rows(
+        self, admin_client, categories, session, settings
+    ):
+        """【性能】1チャンクに収まる件数ではクエリ数が件数によらない.
+
+        【テストの意図】
+        スパムの掃除で行ごとのシグナルやクエリが発生しないことを保証します。
+
+        【何を保証するか】
+        - 2件と8件の削除で発行されるクエリ数が同じであること
+        - チャンクが増えた場合だけクエリが増えること
+
+        【テスト手順】
+        1. 2件、8件、8件（チャンク4件）の投稿をそれぞれ一括削除
+
+        【期待する結果】
+        前の2回のクエリ数が等しく、3回目はそれより多い
+        """
+        # Arrange
+        thread = Thread.objects.create(title="スレ", category=categories[0])
+        small = add_posts(thread, session, 2)
+        large = add_posts(thread, session, 8, start=3)
+        chunked = add_posts(thread, session, 8, start=11)
+
+        # Act
+        counts = []
+        for posts, chunk_size in ((small, 500), (large, 500), (chunked, 4)):
+            settings.BULK_MODERATION = {"CHUNK_SIZE": chunk_size}
+            with CaptureQueriesContext(connection) as queries:
+                affected = moderation.delete_posts(
+                    Post.objects.filter(pk__in=[post.pk for post in posts])
+                )
+            assert affected == len(posts)
+            counts.append(len(queries))
+
+        # Assert
+        assert counts[0] == counts[1]
+        assert counts[2] > counts[1]
+        assert not Post.objects.exists()
+        thread.refresh_from_db()
+        assert thread.post_count == 0
+
+    def test_validation(self, admin_client, settings):
+        """【異常系】対象の指定が不正な要求は400になる.
+
+        【テストの意図】
+        条件の書き忘れで全件を削除してしまう事故を防ぐことを保証します。
+
+        【何を保証するか】
+        - 空のフィルターが拒否されること
+        - ids とフィルターの両方、またはどちらもない要求が拒否されること
+        - MAX_IDS を超える ids が拒否されること
+        - MAX_IDS を超える行に一致するフィルターが拒否され、何も削除されないこと
+
+        【テスト手順】
+        1. 不正な要求をそれぞれ送信
+
+        【期待する結果】
+        全て400で、投稿が残っている
+        """
+        # Arrange
+        settings.BULK_MODERATION = {"MAX_IDS": 2}
+        category = Category.objects.create(name="雑談", slug="chat")
+        thread = Thread.objects.create(title="スレ", category=category)
+        add_posts(thread, None, 3)
+        payloads = [
+            {"action": "delete", "filter": {"q": "スパム"}},
+            {"action": "delete", "filter": {}},
+            {"action": "delete", "ids": [1], "filter": {"q": "spam"}},
+            {"action": "delete"},
+            {"action": "delete", "ids": [1, 2, 3]},
+            {"action": "lock", "ids": [1]},
+        ]
+
+        # Act
+        statuses = [
+            admin_client.post(POSTS_BULK_URL, payload, format="json").status_code
+            for payload in payloads
+        ]
+
+        # Assert
+        assert statuses == [400] * len(payloads)
+        assert Post.objects.count() == 3
+
+
+@pytest.mark.django_db
+class TestBulkThreads:
+    """スレッドの一括操作のテスト."""
+
+    def test_delete_adjusts_categories_and_tags(
+        self, admin_client, categories, session
+    ):
+        """【正常系】スレッドの一括削除で関連するカウンターが更新される.
+
+        【テストの意図】
+        スレッドを投稿・リアクション・タグ付けごと削除しても、カテゴリの
+        スレッド数とタグの使用回数が実際の件数と一致することを保証します。
+
+        【何を保証するか】
+        - カテゴリのスレッド数とタグの使用回数が減ること
+        - 作成者のスレッド数・投稿数・ポイントが作成前に戻ること
+        - スレッドの削除イベントが記録されること
+        - 対象外のスレッドは残ること
+
+        【テスト手順】
+        1. タグ付きのスレッド2件（1件はスパム投稿者が作成）を作成
+        2. スパム投稿者のスレッドを ids で一括削除
+
+        【期待する結果】
+        残ったスレッドだけがカウンターに数えられる
+        """
+        # Arrange
+        tag = Tag.objects.create(name="Python", slug="python")
+        spam = Thread.objects.create(
+            title="スパム", category=categories[0], author_session=session
+        )
+        keep = Thread.objects.create(title="残す", category=categories[0])
+        for thread in (spam, keep):
+            thread.tags.add(tag)
+        posts = add_posts(spam, session, 2)
+        Reaction.objects.create(post=posts[0], reaction_type="like")
+
+        # Act
+        response = admin_client.post(
+            THREADS_BULK_URL, {"action": "delete", "ids": [spam.pk]}, format="json"
+        )
+
+        # Assert
+        assert response.json() == {"action": "delete", "affected": 1}
+        assert list(Thread.objects.values_list("pk", flat=True)) == [keep.pk]
+        assert not Post.objects.exists()
+        assert list(ThreadTag.objects.values_list("thread_id", flat=True)) == [keep.pk]
+        categories[0].refresh_from_db()
+        assert categories[0].thread_count == 1
+        tag.refresh_from_db()
+        assert tag.usage_count == 1
+        session.refresh_from_db()
+        assert (session.thread_count, session.post_count) == (0, 0)
+        assert session.total_points == 0
+        assert kinds(BoardEvent.Kind.THREAD_DELETED) == [spam.pk]
+        assert kinds(BoardEvent.Kind.POST_DELETED) == [post.pk for post in posts]
+
+    def test_move(self, admin_client, categories):
+        """【正常系】一括移動で移動元と移動先のスレッド数が更新される.
+
+        【テストの意図】
+        カテゴリをまとめて整理しても、カテゴリのスレッド数がずれないことを
+        保証します。
+
+        【何を保証するか】
+        - 既に移動先にあるスレッドは数えられないこと
+        - 移動元と移動先のスレッド数が増減すること
+        - 移動したスレッドの更新イベントが記録されること
+        - move に移動先がない要求が400になること
+
+        【テスト手順】
+        1. 雑談に2件、ゴミ箱に1件のスレッドを作成
+        2. タイトル検索で3件全てをゴミ箱へ移動
+
+        【期待する結果】
+        2件が移動し、雑談が0件、ゴミ箱が3件になる
+        """
+        # Arrange
+        moved = [
+            Thread.objects.create(title=f"宣伝{number}", category=categories[0])
+            for number in (1, 2)
+        ]
+        Thread.objects.create(title="宣伝3", category=categories[1])
+
+        # Act
+        response = admin_client.post(
+            THREADS_BULK_URL,
+            {
+                "action": "move",
+                "filter": {"q": "宣伝"},
+                "category": categories[1].pk,
+            },
+            format="json",
+        )
+        missing = admin_client.post(
+            THREADS_BULK_URL, {"action": "move", "ids": [moved[0].pk]}, format="json"
+        )
+
+        # Assert
+        assert response.json() == {"action": "move", "affected": 2}
+        assert missing.status_code == 400
+        for category in categories:
+            category.refresh_from_db()
+        assert [category.thread_count for category in categories] == [0, 3]
+        updated = BoardEvent.objects.filter(kind=BoardEvent.Kind.THREAD_UPDATED)
+        assert sorted(event.object_id for event in updated) == [
+            thread.pk for thread in moved
+        ]
+        assert updated[0].payload["category_id"] == categories[1].pk
+
+    def test_lock_and_pin(self, admin_client, categories):
+        """【正常系】一括ロック・ピン留めは状態が変わるスレッドだけを更新する.
+
+        【テストの意図】
+        同じ操作を繰り返しても余分なイベントが記録されず、ピン留めが
+        タグ付けの並び替えキーにも反映されることを保証します。
+
+        【何を保証するか】
+        - 既にロック済みのスレッドは affected に含まれないこと
+        - ロックとピン留めのイベントが変更したスレッドの分だけ記録されること
+        - ピン留めがタグ付けの is_pinned に写されること
+
+        【テスト手順】
+        1. 1件がロック済みのタグ付きスレッド2件を作成
+        2. 2件をロックし、続けてピン留め
+
+        【期待する結果】
+        ロックは1件、ピン留めは2件が更新される
+        """
+        # Arrange
+        tag = Tag.objects.create(name="Python", slug="python")
+        threads = [
+            Thread.objects.create(title=f"スレ{number}", category=categories[0])
+            for number in (1, 2)
+        ]
+        for thread in threads:
+            thread.tags.add(tag)
+        Thread.objects.filter(pk=threads[0].pk).update(is_locked=True)
+        ids = [thread.pk for thread in threads]
+
+        # Act
+        locked = admin_client.post(
+            THREADS_BULK_URL, {"action": "lock", "ids": ids}, format="json"
+        )
+        pinned = admin_client.post(
+            THREADS_BULK_URL, {"action": "pin", "ids": ids}, format="json"
+        )
+
+        # Assert
+        assert locked.json()["affected"] == 1
+        assert pinned.json()["affected"] == 2
+        assert list(Thread.objects.values_list("is_locked", "is_pinned")) == [
+            (True, True),
+            (True, True),
+        ]
+        assert kinds(BoardEvent.Kind.THREAD_LOCKED) == [threads[1].pk]
+        assert kinds(BoardEvent.Kind.THREAD_PINNED) == ids
+        assert all(ThreadTag.objects.values_list("is_pinned", flat=True))
+
+
+@pytest.mark.django_db
+def test_raw_delete_is_a_single_delete_without_signals(categories, session):
+    """【互換性】Djangoの非公開API QuerySet._raw_delete() の挙動を固定する.
+
+    【テストの意図】
+    一括削除は Collector が高速削除に使う非公開の QuerySet._raw_delete() に
+    依存しているため、Djangoの更新で名前・引数・挙動が変わった場合に
+    このテストで検出できることを保証します。
+
+    【何を保証するか】
+    - QuerySet._raw_delete(using) が存在すること
+    - 1回のDELETEだけを発行し、行を読み込まないこと
+    - pre_delete/post_delete シグナルを送らないこと
+    - 削除した行数を返すこと
+
+    【テスト手順】
+    1. 投稿2件に削除シグナルの受信者を接続する
+    2. moderation._raw_delete() で投稿を削除する
+
+    【期待する結果】
+    クエリはDELETEの1回だけで、シグナルは0回、戻り値は2
+    """
+    # Arrange
+    thread = Thread.objects.create(title="スレ", category=categories[0])
+    add_posts(thread, session, 2)
+    received = []
+
+    def receiver(sender, **kwargs):
+        received.append(sender)
+
+    pre_delete.connect(receiver, sender=Post)
+    post_delete.connect(receiver, sender=Post)
+
+    # Act
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            deleted = moderation._raw_delete(Post.objects.filter(thread=thread))
+    finally:
+        pre_delete.disconnect(receiver, sender=Post)
+        post_delete.disconnect(receiver, sender=Post)
+
+    # Assert
+    assert list(inspect.signature(QuerySet._raw_delete).parameters) == [
+        "self",
+        "using",
+    ]
+    assert deleted == 2
+    assert [query["sql"].split()[0] for query in queries.captured_queries] == ["DELETE"]
+    assert received == []
+    assert not Post.objects.exists()
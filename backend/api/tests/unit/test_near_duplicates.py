@@ -0,0 +1,326 @@
+"""SimHashによるコピペ連投検出のユニットテスト."""
+
+import pytest
+from django.db import IntegrityError
+
+from api.metrics import metrics
+from api.models import Category, Post, Thread
+from api.services import near_duplicates
+from api.services.near_duplicates import normalize, screen, simhash
+
+POSTS_URL = "/api/v1/posts/"
+
+SPAM = (
+    "このスレは完全に終了しました。みんなで隣の板に移動しましょう！詳しくは外部サイトで"
+)
+
+
+@pytest.fixture
+def thread():
+    """投稿先のスレッドを作成する."""
+    category = Category.objects.create(name="雑談", slug="chat")
+    return Thread.objects.create(title="雑談スレ", category=category)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """インデックスが参照する時刻を固定する.
+
+    Returns:
+        現在時刻を保持するリスト（[0]を書き換えて時間を進める）
+    """
+    now = [1000.0]
+    monkeypatch.setattr(near_duplicates.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture(autouse=True)
+def relaxed_rate_limits(settings):
+    """レート制限に先に掛からないよう、テストではレート制限を無効にする."""
+    settings.RATE_LIMITS = {"ENABLED": False}
+
+
+def post(api_client, thread, content):
+    """投稿APIを呼び出す.
+
+    Args:
+        api_client: APIクライアント
+        thread: 投稿先スレッド
+        content: 投稿本文
+
+    Returns:
+        レスポンス
+    """
+    return api_client.post(
+        POSTS_URL, {"thread": thread.pk, "content": content}, format="json"
+    )
+
+
+class TestFingerprint:
+    """normalize() と simhash() のテスト."""
+
+    def test_small_edits_stay_within_distance(self):
+        """【正常系】小さな改変を加えたコピペの指紋は近い.
+
+        【テストの意図】
+        アンカーや空白、全角・半角、1文字の追加で検出を逃れられないことを
+        保証します。
+
+        【何を保証するか】
+        - アンカーと空白、全角・半角の違いは正規化で消えること
+        - 末尾に1文字を加えた本文の指紋が6ビット以内の差に収まること
+
+        【テスト手順】
+        1. 元の本文と改変した本文の指紋を求める
+
+        【期待する結果】
+        正規化後は同一、末尾の追加はハミング距離6以下になる
+        """
+        # Arrange
+        original = simhash(normalize(SPAM))
+
+        # Act
+        decorated = simhash(normalize(f">>12 {SPAM.replace('！', '!')}  "))
+        appended = simhash(normalize(SPAM + "w"))
+
+        # Assert
+        assert decorated == original
+        assert (appended ^ original).bit_count() <= 6
+
+    def test_distinct_texts_are_far_apart(self):
+        """【正常系】無関係な本文の指紋は大きく異なる.
+
+        【テストの意図】
+        通常の書き込みがコピペと誤判定されないことを保証します。
+
+        【何を保証するか】
+        - 内容の異なる本文の指紋のハミング距離が閾値を大きく超えること
+
+        【テスト手順】
+        1. 無関係な2つの本文の指紋を求める
+
+        【期待する結果】
+        ハミング距離が10を超える
+        """
+        # Arrange
+        other = "昨日の試合は延長戦までもつれたけど、最後は守備の差が出た感じだったね"
+
+        # Act
+        distance = (simhash(normalize(SPAM)) ^ simhash(normalize(other))).bit_count()
+
+        # Assert
+        assert distance > 10
+
+    def test_long_text_is_hashed_up_to_limit(self, settings):
+        """【性能】指紋は正規化後の先頭 MAX_HASHED_LENGTH 文字から求める.
+
+        【テストの意図】
+        極端に長い本文を投稿されても、指紋の計算時間が本文の長さに
+        比例して伸びないことを保証します。
+
+        【何を保証するか】
+        - 先頭 MAX_HASHED_LENGTH 文字が同じ本文は同じ指紋になること
+
+        【テスト手順】
+        1. MAX_HASHED_LENGTH を SPAM の長さに設定
+        2. SPAM に異なる長い本文を続けた2つの本文を照合
+
+        【期待する結果】
+        2つの指紋が一致し、SPAM 単体の指紋とも一致する
+        """
+        # Arrange
+        settings.NEAR_DUPLICATE_POSTS = {"MAX_HASHED_LENGTH": len(normalize(SPAM))}
+
+        # Act
+        first = screen(SPAM + "あ" * 100_000)
+        second = screen(SPAM + "い" * 200_000)
+
+        # Assert
+        assert first == second == simhash(normalize(SPAM))
+
+
+@pytest.mark.django_db
+class TestNearDuplicateScreening:
+    """投稿作成時のコピペ連投検出のテスト."""
+
+    def test_rejects_copies_over_limit(self, api_client, thread, settings, clock):
+        """【正常系】時間窓内のコピペが上限に達すると400で拒否する.
+
+        【テストの意図】
+        少しずつ改変したコピペの大量投稿が、上限を超えた時点で
+        DBに書き込まれず止まることを保証します。
+
+        【何を保証するか】
+        - 上限件数までは受け付けること
+        - 上限を超えた改変コピペは400になり、投稿が作成されないこと
+        - 拒否がメトリクスに記録されること
+
+        【テスト手順】
+        1. MAX_COPIES を2に設定
+        2. アンカーだけを変えたコピペを3回投稿
+
+        【期待する結果】
+        201, 201, 400 になり、投稿は2件だけ作成される
+        """
+        # Arrange
+        settings.NEAR_DUPLICATE_POSTS = {"MAX_COPIES": 2}
+
+        # Act
+        statuses = [
+            post(api_client, thread, f">>{n} {SPAM}").status_code for n in (1, 2, 3)
+        ]
+
+        # Assert
+        assert statuses == [201, 201, 400]
+        assert Post.objects.count() == 2
+        assert metrics.value("near_duplicate_rejected_total", action="reject") == 1
+
+    def test_throttle_action_until_window_expires(
+        self, api_client, thread, settings, clock
+    ):
+        """【正常系】ACTIONが "throttle" の場合は時間窓が空くまで429にする.
+
+        【テストの意図】
+        コピペを完全に拒否せず、一定時間あたりの件数に抑える運用が
+        できることを保証します。
+
+        【何を保証するか】
+        - 上限を超えると429とRetry-Afterを返すこと
+        - 最も古いコピペが時間窓から外れると再び受け付けること
+
+        【テスト手順】
+        1. ACTIONを "throttle"、時間窓を60秒、MAX_COPIESを1に設定
+        2. コピペを投稿し、10秒後にもう一度投稿
+        3. 最初の投稿から60秒後に投稿
+
+        【期待する結果】
+        2回目は Retry-After 50 の429、3回目は201になる
+        """
+        # Arrange
+        settings.NEAR_DUPLICATE_POSTS = {
+            "ACTION": "throttle",
+            "WINDOW_SECONDS": 60,
+            "MAX_COPIES": 1,
+        }
+        assert post(api_client, thread, SPAM).status_code == 201
+
+        # Act
+        clock[0] += 10
+        throttled = post(api_client, thread, SPAM)
+        clock[0] += 50
+        accepted = post(api_client, thread, SPAM)
+
+        # Assert
+        assert throttled.status_code == 429
+        assert throttled["Retry-After"] == "50"
+        assert accepted.status_code == 201
+
+    def test_short_and_distinct_posts_pass(self, api_client, thread, settings, clock):
+        """【正常系】短い相槌や無関係な書き込みは制限しない.
+
+        【テストの意図】
+        「それな」のような定型の短文や、通常の会話が
+        コピペとして扱われないことを保証します。
+
+        【何を保証するか】
+        - MIN_LENGTH未満の本文は何度でも投稿できること
+        - 上限に達したコピペがあっても、別の本文は投稿できること
+
+        【テスト手順】
+        1. MAX_COPIESを1に設定
+        2. 短い本文を3回、コピペを1回、別の本文を1回投稿
+
+        【期待する結果】
+        全て201になる
+        """
+        # Arrange
+        settings.NEAR_DUPLICATE_POSTS = {"MAX_COPIES": 1}
+
+        # Act
+        statuses = [post(api_client, thread, "それな").status_code for _ in range(3)]
+        statuses.append(post(api_client, thread, SPAM).status_code)
+        statuses.append(
+            post(
+                api_client,
+                thread,
+                "昨日の試合は延長戦までもつれたけど、最後は守備の差が出た感じ",
+            ).status_code
+        )
+
+        # Assert
+        assert statuses == [201] * 5
+
+    def test_thread_creation_is_screened(self, api_client, thread, settings, clock):
+        """【正常系】スレッド作成時の最初の投稿も照合する.
+
+        【テストの意図】
+        同じ本文のスレッドを乱立させる荒らしも検出できることを保証します。
+
+        【何を保証するか】
+        - 最初の投稿がコピペの上限を超えたスレッド作成は400になること
+
+        【テスト手順】
+        1. MAX_COPIESを1に設定
+        2. コピペを投稿し、同じ本文でスレッドを作成
+
+        【期待する結果】
+        スレッド作成が400になり、スレッドは増えない
+        """
+        # Arrange
+        settings.NEAR_DUPLICATE_POSTS = {"MAX_COPIES": 1}
+        post(api_client, thread, SPAM)
+
+        # Act
+        response = api_client.post(
+            "/api/v1/threads/",
+            {
+                "title": "移転のお知らせ",
+                "category": thread.category_id,
+                "initial_post_content": SPAM,
+            },
+            format="json",
+        )
+
+        # Assert
+        assert response.status_code == 400
+        assert Thread.objects.count() == 1
+
+    def test_failed_insert_is_not_counted(
+        self, api_client, thread, settings, clock, monkeypatch
+    ):
+        """【異常系】保存に失敗した投稿はコピペの件数に数えない.
+
+        【テストの意図】
+        バリデーションを通過した後にDBへの書き込みが失敗した投稿が、
+        次の正当な投稿を拒否する原因にならないことを保証します。
+
+        【何を保証するか】
+        - 照合の時点では指紋が登録されないこと
+        - 保存に成功した投稿だけが件数に数えられること
+
+        【テスト手順】
+        1. MAX_COPIES を1に設定
+        2. 投稿の作成が失敗する状態でコピペを投稿
+        3. 作成できる状態に戻して同じ本文を2回投稿
+
+        【期待する結果】
+        失敗した投稿の後も1回目は201、2回目は400になる
+        """
+        # Arrange
+        settings.NEAR_DUPLICATE_POSTS = {"MAX_COPIES": 1}
+        api_client.raise_request_exception = True
+
+        def fail(**kwargs):
+            raise IntegrityError("post insert failed")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(Post.objects, "create", fail)
+            with pytest.raises(IntegrityError):
+                post(api_client, thread, SPAM)
+
+        # Act
+        statuses = [post(api_client, thread, SPAM).status_code for _ in range(2)]
+
+        # Assert
+        assert statuses == [201, 400]
+        assert Post.objects.count() == 1
@@ -0,0 +1,513 @@
+"""ポイント・レベルの維持とランキングのユニットテスト."""
+
+import random
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Category, Post, Reaction, Thread, UserSession
+from api.services.events import consume_all
+from api.services.points import (
+    Award,
+    FenwickTree,
+    apply_awards,
+    get_points_settings,
+    leaderboard,
+    level_for,
+    record_events,
+    recount_user_stats,
+)
+
+POSTS_URL = "/api/v1/posts/"
+
+
+@pytest.fixture(autouse=True)
+def points_settings(settings):
+    """テスト用の小さなレベル間隔を設定し、レート制限を無効にする."""
+    settings.POINTS = {"POST": 1, "THREAD": 5, "REACTION_RECEIVED": 2, "LEVEL_STEP": 4}
+    settings.RATE_LIMITS = {"ENABLED": False}
+
+
+@pytest.fixture
+def category():
+    """テスト用のカテゴリを作成する."""
+    return Category.objects.create(name="雑談", slug="chat")
+
+
+def make_session(name: str, total_points: int = 0) -> UserSession:
+    """セッションを作成する.
+
+    Args:
+        name: 表示名
+        total_points: 総ポイント
+
+    Returns:
+        作成したセッション
+    """
+    return UserSession.objects.create(temporary_name=name, total_points=total_points)
+
+
+def stats(session: UserSession) -> tuple[int, int, int, int]:
+    """DBから最新のカウンターを取得する.
+
+    Args:
+        session: 対象のセッション
+
+    Returns:
+        (post_count, thread_count, total_points, level)
+    """
+    session.refresh_from_db()
+    return (
+        session.post_count,
+        session.thread_count,
+        session.total_points,
+        session.level,
+    )
+
+
+@pytest.mark.django_db
+class TestPointSignals:
+    """投稿・スレッド・リアクションに合わせたカウンター更新のテスト."""
+
+    def test_activity_updates_counters_and_level(
+        self, api_client, session_client, category
+    ):
+        """【正常系】スレッド作成・投稿・リアクションでポイントとレベルが上がる.
+
+        【テストの意図】
+        UserSessionの統計値がAPI経由の操作に合わせて維持されることを保証します。
+
+        【何を保証するか】
+        - 統計値はリクエストではなくイベントログのコンシューマーが加算すること
+        - スレッド作成で thread_count が増えること
+        - 投稿が受けたリアクションが投稿者のポイントに加算されること
+        - レベルが新しいポイントから計算されること
+
+        【テスト手順】
+        1. クライアントAでスレッドを作成
+        2. クライアントBでAの最初の投稿にリアクション
+        3. イベントログのコンシューマーを実行
+
+        【期待する結果】
+        コンシューマーの実行前は初期値のままで、
+        実行後はAは投稿1、スレッド1、ポイント 1 + 5 + 2 = 8、
+        レベル 1 + isqrt(8 // 4) = 2
+        """
+        # Arrange
+        author, reactor = session_client, api_client
+
+        # Act
+        author.post(
+            "/api/v1/threads/",
+            {
+                "title": "はじめてのスレ",
+                "category": category.pk,
+                "initial_post_content": "よろしく",
+            },
+            format="json",
+        )
+        op = Post.objects.get()
+        reactor.post(
+            f"{POSTS_URL}{op.pk}/react/", {"reaction_type": "like"}, format="json"
+        )
+        before_consume = stats(op.author_session)
+        consume_all()
+
+        # Assert
+        assert before_consume == (0, 0, 0, 1)
+        assert stats(op.author_session) == (1, 1, 8, 2)
+        assert level_for(8) == 2
+
+    def test_deletion_revokes_points(self, category):
+        """【正常系】投稿の削除で投稿とリアクションの分のポイントを戻す.
+
+        【テストの意図】
+        削除された投稿のポイントが残り続けないことを保証します。
+
+        【何を保証するか】
+        - 投稿とそのリアクションのカスケード削除で、加算した分がすべて戻ること
+
+        【テスト手順】
+        1. セッションの投稿にリアクションを2件付ける
+        2. 投稿を削除
+
+        【期待する結果】
+        カウンターが全て初期値に戻る
+        """
+        # Arrange
+        author, reactor = make_session("ID:author"), make_session("ID:reactor")
+        thread = Thread.objects.create(title="スレ", category=category)
+        post = Post.objects.create(
+            thread=thread, content="1", post_number=1, author_session=author
+        )
+        for reaction_type in ("like", "funny"):
+            Reaction.objects.create(
+                post=post, user_session=reactor, reaction_type=reaction_type
+            )
+        consume_all()
+        assert stats(author) == (1, 0, 5, 2)
+
+        # Act
+        post.delete()
+        consume_all()
+
+        # Assert
+        assert stats(author) == (0, 0, 0, 1)
+
+    def test_negative_total_keeps_minimum_level(self):
+        """【異常系】総ポイントが負になってもレベルは1のまま更新できる.
+
+        【テストの意図】
+        取り消しが加算を上回った場合に、レベルの計算で更新が失敗しないことを
+        保証します。
+
+        【何を保証するか】
+        - 負の総ポイントがそのまま保存されること
+        - レベルが level_for() と同じ1になること
+
+        【テスト手順】
+        1. ポイントのないセッションから投稿150件分を取り消す
+
+        【期待する結果】
+        総ポイントは-150、レベルは1になる
+        """
+        # Arrange
+        session = make_session("ID:negative")
+
+        # Act
+        record_events(posts=[session.pk] * 150, sign=-1)
+
+        # Assert
+        assert stats(session) == (-150, 0, -150, 1)
+        assert level_for(-150) == 1
+
+    def test_recount_fixes_drift(self, category):
+        """【正常系】recount_user_statsはずれた統計値を再集計する.
+
+        【テストの意図】
+        シグナルを経由しない変更で生じたずれを修正できることを保証します。
+
+        【何を保証するか】
+        - dry_runではずれたセッション数を返すだけで更新しないこと
+        - 通常の実行で全ての統計値が実際の値に戻ること
+
+        【テスト手順】
+        1. 投稿を作成した後、統計値をQuerySet.update()で壊す
+        2. dry_run、通常の順に再集計
+
+        【期待する結果】
+        どちらも1を返し、通常の実行後は正しい値に戻る
+        """
+        # Arrange
+        author = make_session("ID:author")
+        thread = Thread.objects.create(
+            title="スレ", category=category, author_session=author
+        )
+        Post.objects.create(
+            thread=thread, content="1", post_number=1, author_session=author
+        )
+        UserSession.objects.update(post_count=9, total_points=99, level=7)
+
+        # Act
+        dry_run = recount_user_stats(dry_run=True)
+        untouched = stats(author)
+        fixed = recount_user_stats()
+
+        # Assert
+        assert (dry_run, fixed) == (1, 1)
+        assert untouched == (9, 0, 99, 7)
+        assert stats(author) == (1, 1, 6, 2)
+        assert recount_user_stats(dry_run=True) == 0
+
+
+class TestFenwickTree:
+    """FenwickTree のテスト."""
+
+    def test_prefix_matches_brute_force(self):
+        """【正常系】prefix()は単純な合計と一致する.
+
+        【テストの意図】
+        順位の計算の基礎となる累積件数が正しいことを保証します。
+
+        【何を保証するか】
+        - ランダムな加減算の後、全てのキーで累積件数が一致すること
+
+        【テスト手順】
+        1. ランダムなキーに加減算
+        2. 全てのキーで prefix() と単純な合計を比較
+
+        【期待する結果】
+        全て一致する
+        """
+        # Arrange
+        rng = random.Random(42)
+        tree, counts = FenwickTree(64), [0] * 64
+
+        # Act
+        for _ in range(500):
+            key, delta = rng.randrange(64), rng.choice((1, 1, -1))
+            tree.add(key, delta)
+            counts[key] += delta
+
+        # Assert
+        assert [tree.prefix(key) for key in range(64)] == [
+            sum(counts[: key + 1]) for key in range(64)
+        ]
+
+    def test_build_matches_incremental_adds(self):
+        """【正常系】件数の列から作った木は1件ずつ加算した木と一致する.
+
+        【テストの意図】
+        ランキングの作り直しに使う O(size) の構築が正しいことを保証します。
+
+        【何を保証するか】
+        - build() と add() の繰り返しで全てのキーの累積件数が一致すること
+
+        【テスト手順】
+        1. ランダムな件数の列から build() と add() でそれぞれ木を作る
+
+        【期待する結果】
+        全てのキーで prefix() が一致する
+        """
+        # Arrange
+        rng = random.Random(7)
+        counts = [rng.randrange(5) for _ in range(37)]
+        incremental = FenwickTree(len(counts))
+        for key, count in enumerate(counts):
+            incremental.add(key, count)
+
+        # Act
+        built = FenwickTree.build(counts)
+
+        # Assert
+        assert [built.prefix(key) for key in range(37)] == [
+            incremental.prefix(key) for key in range(37)
+        ]
+
+
+@pytest.mark.django_db
+class TestLeaderboard:
+    """ランキングとトップユーザーAPIのテスト."""
+
+    def test_rank_and_top_follow_updates(
+        self, category, django_capture_on_commit_callbacks
+    ):
+        """【正常系】順位と上位リストがポイントの変化に追従する.
+
+        【テストの意図】
+        読み込み後の加減算がデータベースを再読み込みせずに
+        ランキングへ反映されることを保証します。
+
+        【何を保証するか】
+        - 同点のセッションは同じ順位になること
+        - ポイントのないセッションの順位は最下位の次になること
+        - 投稿で増えたポイントがコミット後に順位へ反映されること
+
+        【テスト手順】
+        1. 30, 20, 20 ポイントのセッションとポイントのないセッションを作成
+        2. 順位を確認した後、ポイントのないセッションが2件投稿
+
+        【期待する結果】
+        順位は 1, 2, 2, 4 で、投稿後に下位のセッションが2ポイントで4位のまま、
+        上位リストの末尾に加わる
+        """
+        # Arrange
+        first, second, third = (
+            make_session(f"ID:{n}", points) for n, points in enumerate((30, 20, 20))
+        )
+        newcomer = make_session("ID:new")
+        thread = Thread.objects.create(title="スレ", category=category)
+
+        # Act
+        ranks = [leaderboard.rank(points) for points in (30, 20, 20, 0)]
+        with django_capture_on_commit_callbacks(execute=True):
+            for number in (1, 2):
+                Post.objects.create(
+                    thread=thread,
+                    content=str(number),
+                    post_number=number,
+                    author_session=newcomer,
+                )
+            consume_all()
+
+        # Assert
+        assert ranks == [1, 2, 2, 4]
+        assert leaderboard.rank(2) == 4
+        assert leaderboard.top(10) == [
+            (first.pk, 30),
+            (second.pk, 20),
+            (third.pk, 20),
+            (newcomer.pk, 2),
+        ]
+
+    def test_demoted_top_entry_is_replaced(self, settings):
+        """【正常系】上位から落ちたセッションは圏外のセッションと入れ替わる.
+
+        【テストの意図】
+        上位リストの件数を超えるセッションがあっても、
+        ポイントの減少後に正しい上位が返ることを保証します。
+
+        【何を保証するか】
+        - 上位のセッションのポイントが減ると、圏外だったセッションが繰り上がること
+
+        【テスト手順】
+        1. LEADERBOARD_SIZEを2にして、10, 8, 5 ポイントのセッションを作成
+        2. 10ポイントのセッションを1ポイントに減らす
+
+        【期待する結果】
+        上位は 8, 5 ポイントのセッションになる
+        """
+        # Arrange
+        settings.POINTS = {**settings.POINTS, "LEADERBOARD_SIZE": 2}
+        top, middle, low = (
+            make_session(f"ID:{points}", points) for points in (10, 8, 5)
+        )
+        assert leaderboard.top(2) == [(top.pk, 10), (middle.pk, 8)]
+
+        # Act
+        leaderboard.adjust({top.pk: -9})
+
+        # Assert
+        assert leaderboard.top(2) == [(middle.pk, 8), (low.pk, 5)]
+        assert leaderboard.rank(1) == 3
+
+    def test_tree_is_sized_by_distinct_points(self):
+        """【性能】Fenwick木の大きさはポイントの最大値ではなく異なる値の数になる.
+
+        【テストの意図】
+        極端に大きなポイントのセッションがいても、ランキングのメモリが
+        ポイントの値に比例して増えないことを保証します。
+
+        【何を保証するか】
+        - 木の大きさが保持しているポイントの異なる値の数と一致すること
+        - 大きなポイントでも順位が正しいこと
+
+        【テスト手順】
+        1. 10億, 10億, 3 ポイントのセッションを作成
+        2. 順位を求める
+
+        【期待する結果】
+        木の大きさは2で、順位は 1, 3, 4 になる
+        """
+        # Arrange
+        for n, total in enumerate((10**9, 10**9, 3)):
+            make_session(f"ID:{n}", total)
+
+        # Act
+        ranks = [leaderboard.rank(total) for total in (10**9, 3, 0)]
+
+        # Assert
+        assert leaderboard._tree.size == 2
+        assert ranks == [1, 3, 4]
+
+    def test_refresh_reads_only_changed_sessions(self, monkeypatch):
+        """【正常系】再読み込みではポイントが変わったセッションだけを読む.
+
+        【テストの意図】
+        他のワーカーでの加減算を、全セッションを読み直さずに
+        ランキングへ反映できることを保証します。
+
+        【何を保証するか】
+        - 再読み込みのクエリが points_updated_at で絞り込まれること
+        - 他のワーカーでの加算が順位と上位リストに反映されること
+
+        【テスト手順】
+        1. 30, 20, 10 ポイントのセッションでランキングを読み込む
+        2. コミット後の処理を実行せずに（他のワーカーとして）10ポイントのセッションに
+           25ポイント加算
+        3. 再読み込みの間隔だけ時間を進めて上位リストを取得
+
+        【期待する結果】
+        再読み込みは points_updated_at で絞り込んだ1クエリで、
+        35ポイントのセッションが1位になる
+        """
+        # Arrange
+        now = [1000.0]
+        monkeypatch.setattr("api.services.points.time.monotonic", lambda: now[0])
+        first, second, third = (
+            make_session(f"ID:{n}", total) for n, total in enumerate((30, 20, 10))
+        )
+        assert leaderboard.rank(10) == 3
+        apply_awards({third.pk: Award(points=25)})
+
+        # Act
+        now[0] += get_points_settings()["LEADERBOARD_REFRESH_SECONDS"]
+        with CaptureQueriesContext(connection) as queries:
+            top = leaderboard.top(3)
+
+        # Assert
+        assert len(queries.captured_queries) == 1
+        assert "points_updated_at" in queries.captured_queries[0]["sql"]
+        assert top == [(third.pk, 35), (first.pk, 30), (second.pk, 20)]
+        assert leaderboard.rank(35) == 1
+
+    def test_top_users_endpoint_does_not_sort_sessions(self, api_client):
+        """【正常系】トップユーザーAPIはセッション表の並び替えを行わない.
+
+        【テストの意図】
+        トップユーザーの取得がランキングの読み込み後は
+        主キーによる取得だけで済むことを保証します。
+
+        【何を保証するか】
+        - ポイント順に順位付きで返すこと
+        - 2回目以降のリクエストでtotal_pointsによるORDER BYを発行しないこと
+
+        【テスト手順】
+        1. ポイントの異なるセッションを3件作成
+        2. トップユーザーAPIを2回呼び出す
+
+        【期待する結果】
+        ポイント順の表示名と順位が返り、2回目のクエリにORDER BYがない
+        """
+        # Arrange
+        for name, points in (("ID:b", 5), ("ID:a", 9), ("ID:c", 1)):
+            make_session(name, points)
+        api_client.get("/api/v1/stats/top-users/")
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get("/api/v1/stats/top-users/")
+
+        # Assert
+        assert [(u["temporary_name"], u["rank"]) for u in response.json()] == [
+            ("ID:a", 1),
+            ("ID:b", 2),
+            ("ID:c", 3),
+        ]
+        assert len(queries.captured_queries) == 1
+        assert "ORDER BY" not in queries.captured_queries[0]["sql"]
+
+    def test_my_rank(self, api_client, session_client, category):
+        """【正常系】自分のセッションのポイントと順位を取得できる.
+
+        【テストの意図】
+        任意のセッションの順位をCOUNTなしで返せることを保証します。
+
+        【何を保証するか】
+        - セッションが確立していないクライアントは404になること
+        - 投稿したクライアントは自分のポイントと順位を受け取ること
+
+        【テスト手順】
+        1. セッションなしで取得
+        2. 他のセッションより少ないポイントになるよう投稿して取得
+
+        【期待する結果】
+        1回目は404、2回目は1ポイントで2位
+        """
+        # Arrange
+        make_session("ID:leader", 50)
+        thread = Thread.objects.create(title="スレ", category=category)
+        anonymous = api_client.get("/api/v1/stats/top-users/me/")
+        session_client.post(
+            POSTS_URL, {"thread": thread.pk, "content": "はじめまして"}, format="json"
+        )
+        consume_all()
+
+        # Act
+        response = session_client.get("/api/v1/stats/top-users/me/")
+
+        # Assert
+        assert anonymous.status_code == 404
+        assert response.json()["total_points"] == 1
+        assert response.json()["rank"] == 2
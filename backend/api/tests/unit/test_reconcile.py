@@ -0,0 +1,235 @@
+"""非正規化カウンターの照合のユニットテスト."""
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Category, Post, Thread, UserSession
+from api.services.reconcile import reconcile, reconcile_counters
+
+
+@pytest.fixture
+def categories():
+    """テスト用のカテゴリを3つ作成する."""
+    return [
+        Category.objects.create(name=f"カテゴリ{number}", slug=f"c{number}")
+        for number in range(3)
+    ]
+
+
+def make_threads(categories, per_category: int = 2) -> list[Thread]:
+    """カテゴリごとにスレッドを作成し、作成順の番号と同じ数だけ投稿する.
+
+    投稿数（post_count）は実際の投稿数と一致させておく。
+
+    Args:
+        categories: カテゴリ
+        per_category: カテゴリごとのスレッド数
+
+    Returns:
+        作成順のスレッド
+    """
+    threads = []
+    for category in categories:
+        for _ in range(per_category):
+            count = len(threads) + 1
+            thread = Thread.objects.create(
+                title="スレ", category=category, post_count=count
+            )
+            for number in range(1, count + 1):
+                Post.objects.create(thread=thread, content="x", post_number=number)
+            threads.append(thread)
+    return threads
+
+
+@pytest.mark.django_db
+class TestReconcile:
+    """カウンターの照合と修正のテスト."""
+
+    def test_dry_run_reports_drift_without_updating(self, categories):
+        """【正常系】dry_runはずれを返すだけで更新しない.
+
+        【テストの意図】
+        本番で修正する前に、どの値がどれだけずれているかを確認できることを
+        保証します。
+
+        【何を保証するか】
+        - ずれていた行だけが保存値と実際の値の組で返ること
+        - 全ての行が照合されること
+        - データベースの値が変わらないこと
+
+        【テスト手順】
+        1. 6スレッドを作成し、2スレッドの投稿数をQuerySet.update()で壊す
+        2. チャンク2件でdry_runを実行
+
+        【期待する結果】
+        2件のずれが返り、保存値は壊したまま
+        """
+        # Arrange
+        threads = make_threads(categories)
+        Thread.objects.filter(pk__in=[threads[1].pk, threads[4].pk]).update(
+            post_count=99
+        )
+
+        # Act
+        result = reconcile("thread.post_count", dry_run=True, chunk_size=2, pause=0)
+
+        # Assert
+        assert result.checked == 6
+        assert [(d.pk, d.field, d.stored, d.actual) for d in result.drifts] == [
+            (threads[1].pk, "post_count", 99, 2),
+            (threads[4].pk, "post_count", 99, 5),
+        ]
+        assert Thread.objects.filter(post_count=99).count() == 2
+
+    def test_fix_updates_only_drifted_rows_in_short_transactions(self, categories):
+        """【正常系】修正はチャンクごとのトランザクションでずれた行だけを更新する.
+
+        【テストの意図】
+        稼働中のデータベースで実行しても、1回に保持するロックが
+        チャンク内のずれた行に限られることを保証します。
+
+        【何を保証するか】
+        - チャンクごとに別のトランザクション（テストではセーブポイント）になること
+        - UPDATEがずれた行の主キーだけを対象にすること
+        - 修正後にずれが残らないこと
+
+        【テスト手順】
+        1. 6スレッドを作成し、1スレッドの投稿数を壊す
+        2. チャンク2件で修正を実行
+
+        【期待する結果】
+        3つのトランザクションで1件だけを更新し、再照合でずれが0件
+        """
+        # Arrange
+        threads = make_threads(categories)
+        Thread.objects.filter(pk=threads[3].pk).update(post_count=0)
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            result = reconcile("thread.post_count", chunk_size=2, pause=0)
+
+        # Assert
+        sql = [query["sql"] for query in queries.captured_queries]
+        updates = [statement for statement in sql if statement.startswith("UPDATE")]
+        assert result.drifted_rows == 1
+        assert sum(statement.startswith("SAVEPOINT") for statement in sql) == 3
+        assert len(updates) == 1
+        assert f"IN ({threads[3].pk})" in updates[0]
+        threads[3].refresh_from_db()
+        assert threads[3].post_count == 4
+        assert reconcile("thread.post_count", dry_run=True, pause=0).drifts == []
+
+    def test_all_counter_sets(self, categories):
+        """【正常系】全てのカウンターの集合を照合して修正する.
+
+        【テストの意図】
+        スレッド以外の非正規化カウンターも同じ仕組みで修正できることを保証します。
+
+        【何を保証するか】
+        - セッションの統計値とカテゴリのスレッド数のずれが修正されること
+
+        【テスト手順】
+        1. セッションの投稿を作成し、統計値とカテゴリのスレッド数を壊す
+        2. 全てのカウンターの集合を修正
+
+        【期待する結果】
+        各集合で1行ずつ修正され、値が実際の値に戻る
+        """
+        # Arrange
+        author = UserSession.objects.create(temporary_name="ID:author")
+        thread = Thread.objects.create(
+            title="スレ", category=categories[0], post_count=1
+        )
+        Post.objects.create(
+            thread=thread, content="x", post_number=1, author_session=author
+        )
+        UserSession.objects.update(post_count=5, total_points=50)
+        Category.objects.filter(pk=categories[0].pk).update(thread_count=7)
+
+        # Act
+        results = {
+            result.counter: result.drifted_rows
+            for result in reconcile_counters(pause=0)
+        }
+
+        # Assert
+        assert results == {
+            "thread.post_count": 0,
+            "user_session.stats": 1,
+            "category.thread_count": 1,
+            "tag.usage_count": 0,
+        }
+        author.refresh_from_db()
+        assert (author.post_count, author.total_points) == (1, 1)
+        assert Category.objects.get(pk=categories[0].pk).thread_count == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_dry_run_per_category(categories):
+    """【正常系】カテゴリごとの並列照合は逐次の照合と同じ結果を返す.
+
+    【テストの意図】
+    大きなテーブルをカテゴリ単位で並列に照合しても
+    結果が欠けたり重複したりしないことを保証します。
+
+    【何を保証するか】
+    - 全ての行が1回ずつ照合されること
+    - ずれが主キー順にまとめられること
+
+    【テスト手順】
+    1. 3カテゴリに2スレッドずつ作成し、各カテゴリの1スレッドを壊す
+    2. 3スレッドでdry_runを実行
+
+    【期待する結果】
+    6行を照合し、3件のずれが主キー順に返る
+    """
+    # Arrange
+    threads = make_threads(categories)
+    broken = [threads[0].pk, threads[3].pk, threads[5].pk]
+    Thread.objects.filter(pk__in=broken).update(post_count=0)
+
+    # Act
+    (result,) = reconcile_counters(
+        ["thread.post_count"], jobs=3, dry_run=True, chunk_size=1, pause=0
+    )
+
+    # Assert
+    assert result.checked == 6
+    assert [drift.pk for drift in result.drifts] == broken
+
+
+@pytest.mark.django_db
+def test_command_prints_diff(categories):
+    """【正常系】コマンドのdry-runはずれの差分を出力する.
+
+    【テストの意図】
+    運用者が修正前に差分を確認できることを保証します。
+
+    【何を保証するか】
+    - 「保存値 -> 実際の値」の行と集計行が出力されること
+
+    【テスト手順】
+    1. スレッドの投稿数を壊し、--dry-run で実行
+
+    【期待する結果】
+    差分と集計が出力される
+    """
+    # Arrange
+    (thread,) = make_threads(categories[:1], per_category=1)
+    Thread.objects.update(post_count=3)
+    output = StringIO()
+
+    # Act
+    call_command(
+        "reconcile_counters", "thread.post_count", dry_run=True, pause=0, stdout=output
+    )
+
+    # Assert
+    assert output.getvalue().splitlines() == [
+        f"thread.post_count #{thread.pk} post_count: 3 -> 1",
+        "thread.post_count: 1 of 1 row(s) drifted",
+    ]
@@ -0,0 +1,170 @@
+"""高速JSONレンダラー/パーサーのユニットテスト."""
+
+import datetime
+import decimal
+import io
+import uuid
+from zoneinfo import ZoneInfo
+
+import pytest
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+PAYLOAD = {
+    "title": "【速報】Python 3.13リリース",
+    "content": '改行\nタブ\t引用"バックスラッシュ\\制御\x1f区切り 段落 ',
+    "created_at": datetime.datetime(
+        2025, 1, 15, 14, 30, 0, 123456, tzinfo=ZoneInfo("Asia/Tokyo")
+    ),
+    "updated_at": datetime.datetime(2025, 1, 15, 5, 30, tzinfo=datetime.UTC),
+    "date": datetime.date(2025, 1, 15),
+    "elapsed": datetime.timedelta(minutes=5),
+    "score": decimal.Decimal("12.50"),
+    "session_id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "momentum": [0.0, 0.1, 1e-05, 2.5e-07, 1e16, 123.456, -0.0],
+    "big": 2**70,
+    "tags": ("Python", "初心者向け"),
+    1: None,
+}
+
+
+class TestFastJSONRenderer:
+    """FastJSONRendererのテスト."""
+
+    def test_output_matches_stdlib_renderer(self):
+        """【互換性】標準のJSONRendererとバイト単位で一致する.
+
+        【テストの意図】
+        レンダラーの差し替えによってAPIの出力が変化しないことを保証します。
+
+        【何を保証するか】
+        - 日本語がエスケープされずに出力されること
+        - 日時・Decimal・UUID・timedeltaの表現が標準実装と一致すること
+        - 小さな浮動小数点数や64bitを超える整数も同一の表記になること
+        - U+2028/U+2029がエスケープされること
+
+        【テスト手順】
+        1. 様々な型を含むペイロードを用意
+        2. 両方のレンダラーでレンダリング
+        3. 出力を比較
+
+        【期待する結果】
+        両者の出力が完全に一致する
+        """
+        # Arrange
+        expected = JSONRenderer().render(PAYLOAD)
+
+        # Act
+        actual = FastJSONRenderer().render(PAYLOAD)
+
+        # Assert
+        assert actual == expected
+        assert "【速報】".encode() in actual
+        assert b"\\u2028" in actual
+
+    @pytest.mark.parametrize("value", [float("nan"), float("inf"), -float("inf")])
+    def test_non_finite_float_raises(self, value):
+        """【互換性】NaNと無限大は標準実装と同じく例外になる.
+
+        【テストの意図】
+        orjsonが非有限の値を黙ってnullに置き換え、レスポンスの内容を
+        変えてしまわないことを保証します。
+
+        【何を保証するか】
+        - ネストした位置のNaN・無限大で ValueError が送出されること
+        - 通常のnullは影響を受けないこと
+
+        【テスト手順】
+        1. nullと非有限の値を含むペイロードをレンダリング
+
+        【期待する結果】
+        標準のJSONRendererと同じく ValueError になる
+        """
+        # Arrange
+        payload = {"reply_to": None, "scores": [{"momentum": value}]}
+
+        # Act / Assert
+        with pytest.raises(ValueError):
+            JSONRenderer().render(payload)
+        with pytest.raises(ValueError):
+            FastJSONRenderer().render(payload)
+        assert FastJSONRenderer().render({"reply_to": None}) == b'{"reply_to":null}'
+
+    def test_indent_request_falls_back_to_stdlib(self):
+        """【互換性】インデント指定時も標準実装と同じ出力になる.
+
+        【テストの意図】
+        Acceptヘッダーのindentパラメーターが引き続き機能することを保証します。
+
+        【何を保証するか】
+        - indent付きのメディアタイプで整形済みJSONが返ること
+
+        【テスト手順】
+        1. indent=2のメディアタイプでレンダリング
+        2. 標準実装の出力と比較
+
+        【期待する結果】
+        両者の出力が一致する
+        """
+        # Arrange
+        media_type = "application/json; indent=2"
+
+        # Act
+        actual = FastJSONRenderer().render({"a": [1, 2]}, media_type)
+
+        # Assert
+        assert actual == JSONRenderer().render({"a": [1, 2]}, media_type)
+
+
+class TestFastJSONParser:
+    """FastJSONParserのテスト."""
+
+    def test_parse_matches_stdlib_parser(self):
+        """【互換性】標準のJSONParserと同じ結果を返す.
+
+        【テストの意図】
+        パーサーの差し替えによってリクエストの解釈が変化しないことを保証します。
+
+        【何を保証するか】
+        - 日本語や64bitを超える整数を含むJSONを同じ値に解析すること
+
+        【テスト手順】
+        1. JSONバイト列を両方のパーサーで解析
+        2. 結果を比較
+
+        【期待する結果】
+        両者の結果が一致する
+        """
+        # Arrange
+        body = '{"content": "こんにちは", "n": 123456789012345678901234}'.encode()
+        context = {"encoding": "utf-8"}
+
+        # Act
+        actual = FastJSONParser().parse(io.BytesIO(body), parser_context=context)
+
+        # Assert
+        assert actual == JSONParser().parse(io.BytesIO(body), parser_context=context)
+
+    @pytest.mark.parametrize("body", [b"{invalid", b'{"a": NaN}'])
+    def test_invalid_json_raises_parse_error(self, body):
+        """【異常系】不正なJSONはParseErrorとなる.
+
+        【テストの意図】
+        不正な入力に対して標準実装と同じエラーが返ることを保証します。
+
+        【何を保証するか】
+        - 構文エラーやNaNを含む入力でParseErrorが送出されること
+
+        【テスト手順】
+        1. 不正なJSONを解析
+
+        【期待する結果】
+        ParseErrorが発生する
+        """
+        # Act & Assert
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(body), parser_context={})
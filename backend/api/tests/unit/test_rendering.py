@@ -0,0 +1,210 @@
+"""投稿本文の書き込み時レンダリングのユニットテスト."""
+
+import pytest
+
+from api.models import Category, Post, Thread
+from api.services.rendering import RENDERER_VERSION, render_content, rerender_stale
+from api.v1.posts.readers import POST_READER
+from api.v1.posts.serializers import PostSerializer
+
+POSTS_URL = "/api/v1/posts/"
+
+
+@pytest.fixture(autouse=True)
+def disable_rate_limits(settings):
+    """レート制限を無効にする."""
+    settings.RATE_LIMITS = {"ENABLED": False}
+
+
+@pytest.fixture
+def thread():
+    """テスト用のスレッドを作成する."""
+    category = Category.objects.create(name="雑談", slug="chat")
+    return Thread.objects.create(title="スレ", category=category)
+
+
+class TestRenderContent:
+    """本文からHTMLへの変換のテスト."""
+
+    def test_escapes_markup(self):
+        """【異常系】本文中のHTMLはエスケープされる.
+
+        【テストの意図】
+        保存したHTMLをクライアントがそのまま挿入しても、
+        投稿者がスクリプトや属性を注入できないことを保証します。
+
+        【何を保証するか】
+        - タグ・引用符・アンパサンドが全てエスケープされること
+        - URLに含まれる引用符で属性を抜け出せないこと
+
+        【テスト手順】
+        1. scriptタグと、引用符を含むURLを含む本文を変換
+
+        【期待する結果】
+        生成したタグ以外の < と " が残らない
+        """
+        # Act
+        html = render_content(
+            "<script>alert(\"x\")</script> & http://a.example/'onmouseover='x"
+        )
+
+        # Assert
+        assert html.startswith(
+            "&lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; &amp; "
+        )
+        assert "<script" not in html
+        assert "'onmouseover" not in html
+        assert html.count("<a ") == 1
+
+    def test_anchors_links_and_newlines(self):
+        """【正常系】アンカー・URL・改行がタグに変換される.
+
+        【テストの意図】
+        クライアントが本文を解析しなくても表示できる形で返ることを保証します。
+
+        【何を保証するか】
+        - >>N と全角の＞＞N、範囲指定 >>N-M がレス番号付きのリンクになること
+        - URLの末尾の句読点はリンクに含まれないこと
+        - 改行（CRLFを含む）が <br> になること
+
+        【テスト手順】
+        1. アンカー・URL・改行を含む本文を変換
+
+        【期待する結果】
+        期待どおりのHTMLが返る
+        """
+        # Act
+        html = render_content(">>1\r\n＞＞02-3 見て https://example.com/a?b=1&c=2.")
+
+        # Assert
+        assert html == (
+            '<a class="anchor" href="#post-1" data-post-number="1">&gt;&gt;1</a>'
+            "<br>"
+            '<a class="anchor" href="#post-2" data-post-number="2"'
+            ' data-post-number-end="3">＞＞02-3</a> 見て '
+            '<a href="https://example.com/a?b=1&amp;c=2"'
+            ' rel="nofollow noopener noreferrer ugc" target="_blank">'
+            "https://example.com/a?b=1&amp;c=2</a>."
+        )
+
+
+@pytest.mark.django_db
+class TestWriteTimeRendering:
+    """書き込み時のレンダリングと読み取り時の利用のテスト."""
+
+    def test_api_stores_rendered_html(self, api_client, thread):
+        """【正常系】APIで投稿するとレンダリング済みのHTMLが保存される.
+
+        【テストの意図】
+        変換が書き込み時に1回だけ行われ、読み取りでは保存値が返ることを保証します。
+
+        【何を保証するか】
+        - 投稿の作成時に content_html と render_version が保存されること
+        - 本文の更新時にレンダリングし直されること
+        - 作成・詳細のレスポンスに content_html が含まれること
+
+        【テスト手順】
+        1. APIで投稿を作成し、本文を更新して詳細を取得
+
+        【期待する結果】
+        保存値とレスポンスの content_html が更新後の本文のHTMLになる
+        """
+        # Act
+        created = api_client.post(
+            POSTS_URL, {"thread": thread.pk, "content": "a\nb"}, format="json"
+        ).json()
+        post = Post.objects.get(pk=created["id"])
+        post.content = ">>1"
+        post.save()
+        detail = api_client.get(f"{POSTS_URL}{post.pk}/").json()
+
+        # Assert
+        assert created["content_html"] == "a<br>b"
+        post.refresh_from_db()
+        assert post.render_version == RENDERER_VERSION
+        assert post.content_html == render_content(">>1")
+        assert detail["content_html"] == post.content_html
+
+    def test_stale_rows_render_on_read_and_rerender_in_background(
+        self, thread, django_assert_num_queries
+    ):
+        """【正常系】古いバージョンの投稿は読み取り時に変換され、後で書き戻される.
+
+        【テストの意図】
+        レンダラーを更新しても、読み取りで書き込みを発生させずに新しいHTMLを返し、
+        保存済みのHTMLはバックグラウンドタスクで更新されることを保証します。
+
+        【何を保証するか】
+        - 読み取りでは現在のレンダラーで変換したHTMLが返り、保存値は変わらないこと
+        - rerender_stale() がバッチごとに古い行だけを更新すること
+
+        【テスト手順】
+        1. 投稿を3件作成し、2件を古いバージョンに戻す
+        2. 高速パスで読み取る
+        3. バッチ1件で rerender_stale() を実行
+
+        【期待する結果】
+        読み取りは新しいHTMLを返し、rerender_stale() が2件を更新する
+        """
+        # Arrange
+        posts = [
+            Post.objects.create(
+                thread=thread, content=f">>{number}", post_number=number
+            )
+            for number in (1, 2, 3)
+        ]
+        Post.objects.filter(pk__in=[posts[0].pk, posts[2].pk]).update(
+            content_html="old", render_version=0
+        )
+
+        # Act
+        rows = POST_READER.select(["id", "content_html"]).values(
+            Post.objects.order_by("pk")
+        )
+        with django_assert_num_queries(1):
+            output = POST_READER.select(["id", "content_html"]).build(rows)
+        stored = dict(Post.objects.values_list("pk", "content_html"))
+        with django_assert_num_queries(5):
+            updated = rerender_stale(batch_size=1)
+
+        # Assert
+        assert [row["content_html"] for row in output] == [
+            render_content(f">>{number}") for number in (1, 2, 3)
+        ]
+        assert stored[posts[0].pk] == "old"
+        assert updated == 2
+        assert set(Post.objects.values_list("content_html", "render_version")) == {
+            (render_content(f">>{number}"), RENDERER_VERSION) for number in (1, 2, 3)
+        }
+
+    def test_fast_path_matches_serializer(self, thread):
+        """【正常系】高速パスとシリアライザーの content_html が一致する.
+
+        【テストの意図】
+        同じ投稿がどちらの経路でも同じHTMLで返ることを保証します。
+
+        【何を保証するか】
+        - 最新・古いバージョンのどちらの行でも出力が一致すること
+
+        【テスト手順】
+        1. 投稿を2件作成し、1件を古いバージョンに戻す
+        2. 高速パスとシリアライザーで出力
+
+        【期待する結果】
+        出力が完全に一致する
+        """
+        # Arrange
+        for number in (1, 2):
+            Post.objects.create(
+                thread=thread, content=f">>{number} https://x.test", post_number=number
+            )
+        Post.objects.filter(post_number=2).update(render_version=0, content_html="")
+        posts = Post.objects.order_by("pk")
+
+        # Act
+        fast = POST_READER.build(POST_READER.values(posts))
+        serialized = PostSerializer(posts, many=True).data
+
+        # Assert
+        assert fast == [dict(row) for row in serialized]
+        assert fast[1]["content_html"] == render_content(">>2 https://x.test")
@@ -0,0 +1,207 @@
+"""投稿の会話ツリーエンドポイントのユニットテスト."""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Category, Post, Thread
+
+POSTS_URL = "/api/v1/posts/"
+
+
+@pytest.fixture
+def thread():
+    """テスト用のスレッドを作成する."""
+    category = Category.objects.create(name="雑談", slug="chat")
+    return Thread.objects.create(title="スレ", category=category)
+
+
+def make_posts(thread, replies: dict[int, int | None]) -> dict[int, Post]:
+    """レス番号から返信元のレス番号への辞書どおりに投稿を作成する.
+
+    Args:
+        thread: 投稿先のスレッド
+        replies: レス番号から返信元のレス番号（なければNone）への辞書
+
+    Returns:
+        レス番号から投稿への辞書
+    """
+    posts: dict[int, Post] = {}
+    for number, parent in replies.items():
+        posts[number] = Post.objects.create(
+            thread=thread,
+            content=f"{number}",
+            post_number=number,
+            reply_to=posts[parent] if parent else None,
+        )
+    return posts
+
+
+def numbers(items: list[dict]) -> list[int]:
+    """レスポンスの投稿のレス番号を返す.
+
+    Args:
+        items: レスポンスの投稿のリスト
+
+    Returns:
+        レス番号のリスト
+    """
+    return [item["post_number"] for item in items]
+
+
+@pytest.mark.django_db
+class TestReplyTree:
+    """会話ツリーの取得のテスト."""
+
+    # NOTE: 1 <- 2 <- 3 <- {4, 5}、4 <- 6 <- 7、8は無関係の投稿
+    REPLIES = {1: None, 2: 1, 3: 2, 4: 3, 5: 3, 6: 4, 7: 6, 8: None}
+
+    def test_returns_ancestors_and_descendants(self, api_client, thread):
+        """【正常系】祖先と子孫が1回の再帰クエリで返る.
+
+        【テストの意図】
+        クライアントが返信を1件ずつたどらなくても、
+        会話全体を1リクエストで表示できることを保証します。
+
+        【何を保証するか】
+        - 祖先が古い順、子孫がレス番号順に返ること
+        - 会話に含まれない投稿（兄弟の枝や無関係の投稿）は含まれないこと
+        - 投稿の取得が再帰CTEの1クエリで行われること
+
+        【テスト手順】
+        1. 分岐を含む返信の連鎖を作成
+        2. 3番のツリーを取得
+
+        【期待する結果】
+        祖先は1, 2、子孫は4, 5, 6, 7
+        """
+        # Arrange
+        posts = make_posts(thread, self.REPLIES)
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(f"{POSTS_URL}{posts[3].pk}/tree/")
+
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        assert numbers(data["ancestors"]) == [1, 2]
+        assert data["post"]["post_number"] == 3
+        assert numbers(data["descendants"]) == [4, 5, 6, 7]
+        assert data["descendants"][0]["reply_to"] == posts[3].pk
+        assert data["descendants_truncated"] is False
+        recursive = [
+            query for query in queries.captured_queries if "RECURSIVE" in query["sql"]
+        ]
+        assert len(recursive) == 1
+
+    def test_depth_limits_both_directions(self, api_client, thread):
+        """【正常系】?depth= で祖先・子孫をたどる段数を制限する.
+
+        【テストの意図】
+        長い返信の連鎖でも、取得する行数を呼び出し側が制限できることを保証します。
+
+        【何を保証するか】
+        - 祖先・子孫とも指定した段数までしか含まれないこと
+        - ?fields= で出力フィールドを絞り込めること
+
+        【テスト手順】
+        1. 4番のツリーを depth=1 で取得
+
+        【期待する結果】
+        祖先は3、子孫は6だけ
+        """
+        # Arrange
+        posts = make_posts(thread, self.REPLIES)
+
+        # Act
+        data = api_client.get(
+            f"{POSTS_URL}{posts[4].pk}/tree/?depth=1&fields=id,post_number"
+        ).json()
+
+        # Assert
+        assert numbers(data["ancestors"]) == [3]
+        assert numbers(data["descendants"]) == [6]
+        assert set(data["post"]) == {"id", "post_number"}
+
+    def test_wide_replies_are_truncated_nearest_first(
+        self, api_client, thread, monkeypatch
+    ):
+        """【性能】返信が多い場合、子孫は起点に近い段から上限件数で打ち切る.
+
+        【テストの意図】
+        1件に大量の返信が付いても、1回のツリー取得で読む行数が
+        段数ではなく件数の上限で抑えられることを保証します。
+
+        【何を保証するか】
+        - 子孫が TREE_MAX_DESCENDANTS 件に制限されること
+        - 打ち切った場合は descendants_truncated が真になること
+        - 起点から遠い段の返信から打ち切られること
+
+        【テスト手順】
+        1. TREE_MAX_DESCENDANTS を3に設定
+        2. 1番への直接の返信を4件と、2番への返信を1件作成
+        3. 1番のツリーを取得
+
+        【期待する結果】
+        子孫は直接の返信のうち3件（2, 3, 4）で、descendants_truncated が真
+        """
+        # Arrange
+        monkeypatch.setattr("api.v1.posts.views.TREE_MAX_DESCENDANTS", 3)
+        posts = make_posts(thread, {1: None, 2: 1, 3: 1, 4: 1, 5: 1, 6: 2})
+
+        # Act
+        data = api_client.get(f"{POSTS_URL}{posts[1].pk}/tree/").json()
+
+        # Assert
+        assert numbers(data["descendants"]) == [2, 3, 4]
+        assert data["descendants_truncated"] is True
+
+    @pytest.mark.parametrize("query", ["?depth=0", "?depth=51", "?depth=x"])
+    def test_invalid_depth(self, api_client, thread, query):
+        """【異常系】範囲外の depth は400になる.
+
+        【テストの意図】
+        1回の再帰クエリでたどる段数に上限があることを保証します。
+
+        【何を保証するか】
+        - 1未満・上限超え・整数でない値がエラーになること
+
+        【テスト手順】
+        1. 不正な depth を指定して取得
+
+        【期待する結果】
+        400で depth のエラーが返る
+        """
+        # Arrange
+        post = make_posts(thread, {1: None})[1]
+
+        # Act
+        response = api_client.get(f"{POSTS_URL}{post.pk}/tree/{query}")
+
+        # Assert
+        assert response.status_code == 400
+        assert "depth" in response.json()
+
+    def test_missing_post(self, api_client):
+        """【異常系】存在しない投稿のツリーは404になる.
+
+        【テストの意図】
+        起点の投稿がない場合に空のツリーではなく404を返すことを保証します。
+
+        【何を保証するか】
+        - 存在しないIDと数値でないIDが404になること
+
+        【テスト手順】
+        1. 存在しないIDと数値でないIDでツリーを取得
+
+        【期待する結果】
+        どちらも404
+        """
+        # Act
+        missing = api_client.get(f"{POSTS_URL}999/tree/")
+        invalid = api_client.get(f"{POSTS_URL}abc/tree/")
+
+        # Assert
+        assert missing.status_code == 404
+        assert invalid.status_code == 404
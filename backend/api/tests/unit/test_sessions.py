@@ -0,0 +1,372 @@
+"""匿名セッションミドルウェアのユニットテスト."""
+
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import Category, Post, Reaction, Thread, UserSession
+from api.services import sessions
+from api.services.sessions import activity_buffer, session_directory
+
+POSTS_URL = "/api/v1/posts/"
+COOKIE_NAME = "mb_session"
+
+
+@pytest.fixture(autouse=True)
+def relaxed_rate_limits(settings):
+    """レート制限に先に掛からないよう、テストではレート制限を無効にする."""
+    settings.RATE_LIMITS = {"ENABLED": False}
+
+
+@pytest.fixture
+def thread():
+    """投稿先のスレッドを作成する."""
+    category = Category.objects.create(name="雑談", slug="chat")
+    return Thread.objects.create(title="雑談スレ", category=category)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """アクティビティのフラッシュ判定が参照する時刻を固定する.
+
+    Returns:
+        現在時刻を保持するリスト（[0]を書き換えて時間を進める）
+    """
+    now = [1000.0]
+    monkeypatch.setattr(sessions.time, "monotonic", lambda: now[0])
+    activity_buffer.clear()
+    return now
+
+
+def post(api_client, thread, content="それな"):
+    """投稿APIを呼び出す.
+
+    Args:
+        api_client: APIクライアント
+        thread: 投稿先スレッド
+        content: 投稿本文
+
+    Returns:
+        レスポンス
+    """
+    return api_client.post(
+        POSTS_URL, {"thread": thread.pk, "content": content}, format="json"
+    )
+
+
+def session_queries(queries) -> list[str]:
+    """board_user_session を読み込んだクエリを抽出する.
+
+    Args:
+        queries: CaptureQueriesContextが記録したクエリ
+
+    Returns:
+        該当するSQLのリスト
+    """
+    return [
+        q["sql"]
+        for q in queries
+        if q["sql"].startswith("SELECT") and "board_user_session" in q["sql"]
+    ]
+
+
+def activity_updates(queries) -> list[str]:
+    """board_user_session を更新したクエリを抽出する.
+
+    Args:
+        queries: CaptureQueriesContextが記録したクエリ
+
+    Returns:
+        該当するSQLのリスト
+    """
+    return [
+        q["sql"] for q in queries if q["sql"].startswith('UPDATE "board_user_session"')
+    ]
+
+
+@pytest.mark.django_db
+class TestAnonymousSessionMiddleware:
+    """AnonymousSessionMiddleware のテスト."""
+
+    def test_reads_do_not_create_sessions(self, api_client, thread):
+        """【正常系】閲覧だけのリクエストではセッションを作らない.
+
+        【テストの意図】
+        クローラーや閲覧のみの訪問でセッションの行が増え続けないことを
+        保証します。
+
+        【何を保証するか】
+        - GETリクエストでUserSessionが作成されないこと
+        - セッションCookieが発行されないこと
+
+        【テスト手順】
+        1. スレッド一覧を取得
+
+        【期待する結果】
+        UserSessionは0件で、Cookieは発行されない
+        """
+        # Act
+        response = api_client.get("/api/v1/threads/")
+
+        # Assert
+        assert response.status_code == 200
+        assert UserSession.objects.count() == 0
+        assert COOKIE_NAME not in response.cookies
+
+    def test_session_is_persisted_when_issued_cookie_returns(self, api_client, thread):
+        """【正常系】Cookieを発行した後、送り返された時点でセッションを作る.
+
+        【テストの意図】
+        Cookieを持たない書き込みではセッションの行を作らず、発行したCookieを
+        送り返してきたクライアントだけにセッションを作ることを保証します。
+
+        【何を保証するか】
+        - 最初の書き込みでは署名付きCookieだけを発行し、行を作らないこと
+        - Cookieを送り返した書き込みで、発行したsession_idのセッションが作られること
+        - 3回目の投稿は同じセッションに紐付き、board_user_sessionを読み込まないこと
+
+        【テスト手順】
+        1. Cookieなしで投稿
+        2. 発行されたCookieで2回投稿（2回目はクエリを記録）
+
+        【期待する結果】
+        1件目は作成者なし、2件目と3件目は発行したsession_idのセッションの投稿で、
+        3件目ではセッションのクエリが0件
+        """
+        # Arrange
+        first = post(api_client, thread)
+        issued = UserSession.objects.count()
+        second = post(api_client, thread)
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            third = post(api_client, thread)
+
+        # Assert
+        session = UserSession.objects.get()
+        assert issued == 0
+        assert COOKIE_NAME in first.cookies
+        assert COOKIE_NAME not in second.cookies
+        assert str(session.session_id) in first.cookies[COOKIE_NAME].value
+        assert third.json()["author_name"] == session.temporary_name
+        assert list(
+            Post.objects.order_by("post_number").values_list(
+                "author_session", flat=True
+            )
+        ) == [None, session.pk, session.pk]
+        assert session_queries(queries) == []
+
+    def test_cookieless_writes_do_not_create_sessions(self, api_client, thread):
+        """【正常系】Cookieを保持しないクライアントの書き込みではセッションを作らない.
+
+        【テストの意図】
+        Cookieを捨てて書き込みを繰り返すクライアントが、
+        書き込みのたびにセッションの行を増やせないことを保証します。
+
+        【何を保証するか】
+        - Cookieなしの書き込みは何度でもセッションを作らないこと
+        - 投稿自体は作成者なしで受け付けること
+
+        【テスト手順】
+        1. Cookieを消しながら3回投稿
+
+        【期待する結果】
+        全て201で、UserSessionは0件
+        """
+        # Act
+        statuses = []
+        for _ in range(3):
+            api_client.cookies.clear()
+            statuses.append(post(api_client, thread).status_code)
+
+        # Assert
+        assert statuses == [201] * 3
+        assert UserSession.objects.count() == 0
+        assert Post.objects.filter(author_session__isnull=True).count() == 3
+
+    def test_cookieless_writes_use_session_rate_per_ip(
+        self, api_client, thread, settings
+    ):
+        """【異常系】Cookieを持たない書き込みはセッション単位のレートをIP単位で適用する.
+
+        【テストの意図】
+        Cookieを捨てるだけでセッション単位のレート制限を逃れられないことを
+        保証します。
+
+        【何を保証するか】
+        - Cookieなしの書き込みが同じIPアドレスのセッション単位のバケットを
+          共有すること
+
+        【テスト手順】
+        1. セッション単位のレートを2/min、IP単位を100/minに設定
+        2. Cookieを消しながら3回投稿
+
+        【期待する結果】
+        201, 201, 429 になる
+        """
+        # Arrange
+        settings.RATE_LIMITS = {
+            "RATES": {"post": {"session": "2/min", "ip": "100/min"}},
+        }
+
+        # Act
+        statuses = []
+        for _ in range(3):
+            api_client.cookies.clear()
+            statuses.append(post(api_client, thread).status_code)
+
+        # Assert
+        assert statuses == [201, 201, 429]
+
+    def test_falls_back_to_shared_cache_then_database(self, session_client, thread):
+        """【正常系】プロセス内にない場合は共有キャッシュ、次にDBを参照する.
+
+        【テストの意図】
+        別のワーカーで作られたセッションも、共有キャッシュに載っていれば
+        クエリなしで解決できることを保証します。
+
+        【何を保証するか】
+        - プロセス内のLRUが空でも共有キャッシュにあればクエリを発行しないこと
+        - どちらにもない場合はDBから1回だけ引き、同じセッションに紐付けること
+
+        【テスト手順】
+        1. 投稿してセッションを作成
+        2. LRUを空にして投稿
+        3. LRUと共有キャッシュを空にして投稿
+
+        【期待する結果】
+        2回目はセッションのクエリ0件、3回目は1件で、全て同じセッションになる
+        """
+        # Arrange
+        post(session_client, thread)
+
+        # Act
+        session_directory.clear()
+        with CaptureQueriesContext(connection) as from_cache:
+            post(session_client, thread)
+        session_directory.clear()
+        cache.clear()
+        with CaptureQueriesContext(connection) as from_database:
+            post(session_client, thread)
+
+        # Assert
+        assert session_queries(from_cache) == []
+        assert len(session_queries(from_database)) == 1
+        assert UserSession.objects.count() == 1
+        assert Post.objects.filter(author_session__isnull=True).count() == 0
+
+    def test_tampered_cookie_is_ignored(self, api_client, session_client, thread):
+        """【異常系】署名が不正なCookieはCookieなしとして扱う.
+
+        【テストの意図】
+        他人のsession_idを書き込んだCookieでなりすましできないことを保証します。
+
+        【何を保証するか】
+        - 署名のないsession_idは受け付けないこと
+        - 不正なCookieの書き込みでセッションが作られないこと
+
+        【テスト手順】
+        1. 投稿してセッションを作成
+        2. 別のクライアントで署名なしのsession_idをCookieに設定して投稿
+
+        【期待する結果】
+        2件目は作成者なしの投稿になり、新しいCookieが発行される
+        """
+        # Arrange
+        post(session_client, thread)
+        victim = UserSession.objects.get()
+        api_client.cookies[COOKIE_NAME] = str(victim.session_id)
+
+        # Act
+        response = post(api_client, thread)
+
+        # Assert
+        assert response.status_code == 201
+        assert COOKIE_NAME in response.cookies
+        assert UserSession.objects.count() == 1
+        assert Post.objects.filter(author_session=victim).count() == 1
+
+    def test_reaction_is_recorded_once_per_session(
+        self, api_client, session_client, thread
+    ):
+        """【正常系】同じセッションからの同じリアクションは1件だけ記録する.
+
+        【テストの意図】
+        リアクションがセッションに紐付き、連打で水増しされないことを保証します。
+
+        【何を保証するか】
+        - 最初のリアクションは201で作成されること
+        - 同じ種類の2回目は200で既存のリアクションを返すこと
+        - セッションのないクライアントのリアクションは毎回作成されること
+
+        【テスト手順】
+        1. セッションのあるクライアントで同じリアクションを2回送信
+        2. セッションのないクライアントで同じリアクションを送信
+
+        【期待する結果】
+        201, 200, 201 の順に返り、セッションのリアクションは1件だけ
+        """
+        # Arrange
+        target = Post.objects.create(thread=thread, content="1", post_number=1)
+        url = f"{POSTS_URL}{target.pk}/react/"
+
+        # Act
+        statuses = [
+            client.post(url, {"reaction_type": "like"}, format="json").status_code
+            for client in (session_client, session_client, api_client)
+        ]
+
+        # Assert
+        assert statuses == [201, 200, 201]
+        session = UserSession.objects.get()
+        assert Reaction.objects.filter(user_session=session).count() == 1
+        assert Reaction.objects.filter(user_session=None).count() == 1
+
+
+@pytest.mark.django_db
+class TestActivityBuffer:
+    """last_activity_at の集約書き込みのテスト."""
+
+    def test_activity_is_flushed_in_one_update(self, api_client, thread, clock):
+        """【正常系】アクティビティは間隔ごとに1回のUPDATEでまとめて反映する.
+
+        【テストの意図】
+        リクエストのたびにセッションの行を書き換えないことを保証します。
+
+        【何を保証するか】
+        - フラッシュ間隔内のリクエストではUPDATEが発行されないこと
+        - 間隔が過ぎると溜まった全セッションが1回のUPDATEで反映されること
+
+        【テスト手順】
+        1. 2つのクライアントでCookieを発行させ、セッションを作成
+        2. 両方で数回閲覧
+        3. 時間を進めてもう一度閲覧
+
+        【期待する結果】
+        間隔内のUPDATEは0件、間隔後は1件で、両セッションの時刻が更新される
+        """
+        # Arrange
+        other_client = type(api_client)()
+        for client in (api_client, other_client):
+            post(client, thread)
+            post(client, thread)
+        stale = timezone.now() - timedelta(days=1)
+        UserSession.objects.update(last_activity_at=stale)
+
+        # Act
+        with CaptureQueriesContext(connection) as within_interval:
+            for client in (api_client, other_client, api_client):
+                client.get("/api/v1/threads/")
+        clock[0] += 60
+        with CaptureQueriesContext(connection) as after_interval:
+            api_client.get("/api/v1/threads/")
+
+        # Assert
+        assert activity_updates(within_interval) == []
+        assert len(activity_updates(after_interval)) == 1
+        assert activity_buffer.pending() == 0
+        assert not UserSession.objects.filter(last_activity_at=stale).exists()
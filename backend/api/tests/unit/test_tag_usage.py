@@ -0,0 +1,196 @@
+"""タグ使用回数（Tag.usage_count）のユニットテスト.
+
+シグナルによるカウンターの維持と、再集計コマンドを検証する。
+"""
+
+import pytest
+from django.core.management import call_command
+
+from api.models import Category, Tag, Thread
+
+
+@pytest.fixture
+def category():
+    """テスト用のカテゴリを作成する."""
+    return Category.objects.create(name="プログラミング", slug="programming")
+
+
+@pytest.fixture
+def tags():
+    """テスト用のタグを3件作成する."""
+    return [
+        Tag.objects.create(name=name, slug=name.lower())
+        for name in ("Python", "Django", "React")
+    ]
+
+
+def usage(tags) -> list[int]:
+    """DBから最新のusage_countを取得する.
+
+    Args:
+        tags: 対象タグのリスト
+
+    Returns:
+        タグと同じ順序のusage_countのリスト
+    """
+    counts = dict(Tag.objects.values_list("pk", "usage_count"))
+    return [counts[tag.pk] for tag in tags]
+
+
+@pytest.mark.django_db
+class TestTagUsageSignals:
+    """タグ付けの変更に合わせたusage_count更新のテスト."""
+
+    def test_add_remove_set_and_clear(self, category, tags):
+        """【正常系】スレッド側からのタグ付け変更でカウンターが増減する.
+
+        【テストの意図】
+        add/remove/set/clearの全操作でusage_countが実際の件数と一致することを
+        保証します。
+
+        【何を保証するか】
+        - 追加済みのタグを再度追加しても二重に加算されないこと
+        - 付いていないタグを削除しても減算されないこと
+        - set()とclear()で差分だけが増減すること
+
+        【テスト手順】
+        1. 2つのスレッドにタグを付け外しする
+        2. 各操作の後にusage_countを確認
+
+        【期待する結果】
+        usage_countが常に実際のタグ付け件数と一致する
+        """
+        # Arrange
+        python, django, react = tags
+        first = Thread.objects.create(title="スレ1", category=category)
+        second = Thread.objects.create(title="スレ2", category=category)
+
+        # Act & Assert
+        first.tags.add(python, django)
+        second.tags.add(python)
+        first.tags.add(python)
+        assert usage(tags) == [2, 1, 0]
+
+        first.tags.remove(django, react)
+        assert usage(tags) == [2, 0, 0]
+
+        first.tags.set([django, react])
+        assert usage(tags) == [1, 1, 1]
+
+        first.tags.clear()
+        assert usage(tags) == [1, 0, 0]
+
+    def test_reverse_changes_and_thread_delete(self, category, tags):
+        """【正常系】タグ側からの変更とスレッド削除でカウンターが増減する.
+
+        【テストの意図】
+        タグ側のリレーション操作やスレッド・カテゴリの削除でも
+        カウンターがずれないことを保証します。
+
+        【何を保証するか】
+        - tag.threads.add()/clear()で件数分増減すること
+        - スレッド削除で付いていたタグが減算されること
+        - カテゴリのカスケード削除でも減算されること
+
+        【テスト手順】
+        1. タグ側から複数スレッドを追加
+        2. スレッドとカテゴリを削除
+
+        【期待する結果】
+        usage_countが常に実際のタグ付け件数と一致する
+        """
+        # Arrange
+        python, django, _ = tags
+        threads = [
+            Thread.objects.create(title=f"スレ{n}", category=category) for n in range(3)
+        ]
+
+        # Act & Assert
+        python.threads.add(*threads)
+        django.threads.add(threads[0])
+        assert usage(tags) == [3, 1, 0]
+
+        threads[0].delete()
+        assert usage(tags) == [2, 0, 0]
+
+        django.threads.add(threads[1])
+        python.threads.clear()
+        assert usage(tags) == [0, 1, 0]
+
+        category.delete()
+        assert usage(tags) == [0, 0, 0]
+
+
+@pytest.mark.django_db
+class TestPopularTags:
+    """人気タグとカウンターの再集計のテスト."""
+
+    def test_popular_tags_in_one_query(
+        self, api_client, category, tags, django_assert_num_queries
+    ):
+        """【性能】人気タグを使用回数順に1クエリで返す.
+
+        【テストの意図】
+        タグクラウドがタグごとのCOUNTを発行せずに描画できることを保証します。
+
+        【何を保証するか】
+        - usage_count降順、同数ならname順に並ぶこと
+        - limitで件数を絞れること
+        - 1クエリで応答すること
+
+        【テスト手順】
+        1. タグの使用回数に差をつける
+        2. /tags/popular/?limit=2 を取得
+
+        【期待する結果】
+        使用回数の多い2件が返る
+        """
+        # Arrange
+        python, django, react = tags
+        thread = Thread.objects.create(title="スレ", category=category)
+        thread.tags.add(python, react)
+        Thread.objects.create(title="スレ2", category=category).tags.add(react)
+
+        # Act
+        with django_assert_num_queries(1):
+            response = api_client.get("/api/v1/tags/popular/?limit=2")
+
+        # Assert
+        assert response.status_code == 200
+        assert [(tag["name"], tag["thread_count"]) for tag in response.json()] == [
+            ("React", 2),
+            ("Python", 1),
+        ]
+
+    def test_recount_fixes_drift(self, category, tags):
+        """【正常系】再集計コマンドがずれたカウンターを修正する.
+
+        【テストの意図】
+        シグナルを経由しない変更でずれたusage_countを一括で修正できることを
+        保証します。
+
+        【何を保証するか】
+        - --dry-runでは更新せずにずれた件数を報告すること
+        - 実行すると実際の件数に修正されること
+
+        【テスト手順】
+        1. 中間テーブルに直接書き込んでカウンターをずらす
+        2. --dry-run付きと付けずにコマンドを実行
+
+        【期待する結果】
+        dry-run後はずれたまま、実行後は実際の件数になる
+        """
+        # Arrange
+        python, django, _ = tags
+        thread = Thread.objects.create(title="スレ", category=category)
+        Thread.tags.through.objects.create(thread=thread, tag=python)
+        Tag.objects.filter(pk=django.pk).update(usage_count=5)
+
+        # Act
+        call_command("recount_tag_usage", "--dry-run")
+        after_dry_run = usage(tags)
+        call_command("recount_tag_usage")
+
+        # Assert
+        assert after_dry_run == [0, 5, 0]
+        assert usage(tags) == [1, 0, 0]
@@ -0,0 +1,445 @@
+"""バックグラウンドタスクと周期ジョブのユニットテスト."""
+
+import threading
+from datetime import timedelta
+
+import pytest
+from django.db import DatabaseError
+from django.utils import timezone
+
+from api.metrics import metrics
+from api.models import (
+    BackgroundTask,
+    Category,
+    Post,
+    Thread,
+    UserSession,
+)
+from api.services import tasks
+from api.services.momentum import recompute_momentum
+from api.services.sessions import collect_idle_sessions, session_directory
+
+POSTS_URL = "/api/v1/posts/"
+
+calls: list[tuple[str, str]] = []
+
+
+def record(label: str) -> None:
+    """呼び出しを記録するテスト用のタスク.
+
+    Args:
+        label: 記録する値
+    """
+    calls.append((label, threading.current_thread().name))
+
+
+def flaky(failures: int) -> None:
+    """指定した回数だけ失敗するテスト用のタスク.
+
+    Args:
+        failures: 失敗する回数
+
+    Raises:
+        RuntimeError: 呼び出し回数が failures 以下の場合
+    """
+    calls.append(("flaky", threading.current_thread().name))
+    if len(calls) <= failures:
+        raise RuntimeError("temporary failure")
+
+
+@pytest.fixture(autouse=True)
+def task_settings(settings):
+    """テスト用のタスク設定にし、レート制限を無効にする."""
+    settings.BACKGROUND_TASKS = {"RETRY_DELAY": 30, "SCHEDULE": {}}
+    settings.RATE_LIMITS = {"ENABLED": False}
+    calls.clear()
+
+
+@pytest.fixture
+def category():
+    """テスト用のカテゴリを作成する."""
+    return Category.objects.create(name="雑談", slug="chat")
+
+
+def statuses() -> list[tuple[str, str, int]]:
+    """全タスクの関数名・状態・実行回数を返す.
+
+    Returns:
+        (name, status, attempts) のリスト
+    """
+    return list(BackgroundTask.objects.values_list("name", "status", "attempts"))
+
+
+@pytest.mark.django_db
+class TestQueue:
+    """キューへの追加と実行のテスト."""
+
+    def test_enqueue_on_commit_waits_for_commit(
+        self, django_capture_on_commit_callbacks
+    ):
+        """【正常系】コミット後に予約したタスクは同じキーで1件にまとまる.
+
+        【テストの意図】
+        ロールバックされうる書き込みの途中でタスクが追加されず、
+        同じキーの予約が重複しないことを保証します。
+
+        【何を保証するか】
+        - コミット前にはタスクが追加されないこと
+        - 同じキーの待機中のタスクは1件にまとまること
+        - ワーカーが予約したタスクを実行すること
+
+        【テスト手順】
+        1. 同じキーでタスクを2回予約する
+        2. コミット後の処理を実行し、待機中のタスクを実行する
+
+        【期待する結果】
+        コミット前は0件、コミット後は1件で、1回だけ実行される
+        """
+        # Act
+        with django_capture_on_commit_callbacks() as callbacks:
+            for _ in range(2):
+                tasks.enqueue_on_commit(
+                    f"{__name__}.record", {"label": "once"}, key="record:once"
+                )
+        before_commit = BackgroundTask.objects.count()
+        for callback in callbacks:
+            callback()
+        queued = statuses()
+        executed = tasks.run_pending()
+
+        # Assert
+        assert before_commit == 0
+        assert queued == [(f"{__name__}.record", "pending", 0)]
+        assert executed == 1
+        assert [label for label, _ in calls] == ["once"]
+
+    def test_failed_task_is_retried_with_backoff(self):
+        """【正常系】失敗したタスクは間隔を空けて再試行される.
+
+        【テストの意図】
+        一時的な失敗でタスクが失われず、失敗が続けば打ち切られることを保証します。
+
+        【何を保証するか】
+        - 失敗後は RETRY_DELAY 秒後に待機中へ戻り、すぐには再実行されないこと
+        - 再試行の間隔が倍になること
+        - max_attempts 回失敗したタスクは失敗として残ること
+        - 結果と実行時間がメトリクスに記録されること
+
+        【テスト手順】
+        1. 3回失敗するタスクを max_attempts=3 で追加
+        2. 実行可能にしながら3回実行する
+
+        【期待する結果】
+        1回目・2回目の後は30秒・60秒後に再試行、3回目で失敗となる
+        """
+        # Arrange
+        name = f"{__name__}.flaky"
+        tasks.enqueue(name, {"failures": 3}, max_attempts=3)
+        task = BackgroundTask.objects.get()
+
+        # Act
+        delays = []
+        for _ in range(3):
+            BackgroundTask.objects.filter(pk=task.pk).update(run_at=timezone.now())
+            tasks.run_pending()
+            task.refresh_from_db()
+            delays.append(round((task.run_at - timezone.now()).total_seconds()))
+        again = tasks.run_pending()
+
+        # Assert
+        assert delays[:2] == [30, 60]
+        assert (task.status, task.attempts, again) == ("failed", 3, 0)
+        assert "temporary failure" in task.last_error
+        assert metrics.value("task_runs_total", task=name, status="retried") == 2
+        assert metrics.value("task_runs_total", task=name, status="failed") == 1
+        assert metrics.value("task_duration_seconds_count", task=name) == 3
+
+    def test_periodic_task_reschedules_itself(self, settings):
+        """【正常系】周期タスクは終了後に次の実行を予約する.
+
+        【テストの意図】
+        cronなしで周期ジョブが動き続けることを保証します。
+
+        【何を保証するか】
+        - 複数のワーカーが起動しても待機中の周期タスクは1件であること
+        - 実行後、間隔の秒数後に次の実行が予約されること
+
+        【テスト手順】
+        1. 60秒間隔の周期タスクを登録し、schedule_periodic を2回呼ぶ
+        2. 実行する
+
+        【期待する結果】
+        成功した1件と、60秒後に実行する待機中の1件が残る
+        """
+        # Arrange
+        name = f"{__name__}.record"
+        settings.BACKGROUND_TASKS = {"SCHEDULE": {name: 60}}
+        tasks.schedule_periodic()
+        tasks.schedule_periodic()
+
+        # Act
+        BackgroundTask.objects.update(kwargs={"label": "tick"})
+        executed = tasks.run_pending()
+
+        # Assert
+        assert executed == 1
+        assert [label for label, _ in calls] == ["tick"]
+        assert statuses() == [(name, "succeeded", 1), (name, "pending", 0)]
+        upcoming = BackgroundTask.objects.get(status="pending")
+        assert upcoming.run_at - timezone.now() > timedelta(seconds=55)
+
+    def test_expired_lease_is_released(self):
+        """【異常系】終わらないまま期限を過ぎたタスクは待機中に戻る.
+
+        【テストの意図】
+        ワーカーが実行中に異常終了してもタスクが失われないことを保証します。
+
+        【何を保証するか】
+        - LEASE_SECONDS を過ぎた実行中のタスクが待機中に戻り、再実行されること
+
+        【テスト手順】
+        1. タスクを取り出した後、取り出し日時を10分前にする
+        2. 待機中のタスクを実行する
+
+        【期待する結果】
+        タスクが2回目の実行で成功する
+        """
+        # Arrange
+        tasks.enqueue(f"{__name__}.record", {"label": "lost"})
+        (claimed,) = tasks.claim(10)
+        BackgroundTask.objects.update(claimed_at=timezone.now() - timedelta(minutes=10))
+
+        # Act
+        executed = tasks.run_pending()
+
+        # Assert
+        assert claimed.attempts == 1
+        assert executed == 1
+        assert statuses() == [(f"{__name__}.record", "succeeded", 2)]
+
+    def test_expired_tasks_with_same_key_keep_newest(self):
+        """【異常系】同じキーの期限切れのタスクは最も新しい1件だけが待機中に戻る.
+
+        【テストの意図】
+        待機中のタスクのキーの一意制約に反してUPDATEが失敗し、
+        期限切れのタスクが戻らなくなることがないことを保証します。
+
+        【何を保証するか】
+        - 同じキーの期限切れのタスクのうち最も新しいものが待機中に戻ること
+        - 残りのタスクは失敗となること
+        - キーのないタスクはそれぞれ待機中に戻ること
+
+        【テスト手順】
+        1. 同じキーのタスク2件とキーのないタスク1件を順に追加して取り出す
+        2. 取り出し日時を10分前にし、期限切れのタスクを戻す
+
+        【期待する結果】
+        3件とも処理され、同じキーの古い方だけが失敗になる
+        """
+        # Arrange
+        name = f"{__name__}.record"
+        for label in ("old", "new"):
+            tasks.enqueue(name, {"label": label}, key="record:same")
+            tasks.claim(10)
+        tasks.enqueue(name, {"label": "plain"})
+        tasks.claim(10)
+        BackgroundTask.objects.update(claimed_at=timezone.now() - timedelta(minutes=10))
+
+        # Act
+        released = tasks.release_expired()
+
+        # Assert
+        assert released == 3
+        rows = BackgroundTask.objects.order_by("pk")
+        assert [(t.kwargs["label"], t.status) for t in rows] == [
+            ("old", "failed"),
+            ("new", "pending"),
+            ("plain", "pending"),
+        ]
+        assert rows[0].last_error == "lease expired"
+        assert rows[0].finished_at is not None
+        assert rows[1].finished_at is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_drains_queue_in_pool_threads():
+    """【正常系】ワーカーはキューのタスクをスレッドプールで1回ずつ実行する.
+
+    【テストの意図】
+    manage.py run_tasks のワーカーがキューを処理し切ることを保証します。
+
+    【何を保証するか】
+    - 全てのタスクがちょうど1回実行されること
+    - タスクがメインスレッドではなくプールのスレッドで実行されること
+    - 実行待ちの時間がメトリクスに記録されること
+
+    【テスト手順】
+    1. タスクを5件追加
+    2. ワーカーを drain=True で実行
+
+    【期待する結果】
+    5件全てが1回ずつ成功している
+
+    Note:
+        テスト用のSQLite（共有キャッシュのインメモリDB）は別スレッドからの
+        同時書き込みを待ち合わせないため、スレッド数1で実行する。
+    """
+    # Arrange
+    name = f"{__name__}.record"
+    for number in range(5):
+        tasks.enqueue(name, {"label": str(number)})
+
+    # Act
+    tasks.TaskWorker(workers=1, poll_interval=0.01).run(drain=True)
+
+    # Assert
+    assert [label for label, _ in calls] == ["0", "1", "2", "3", "4"]
+    assert threading.main_thread().name not in {thread for _, thread in calls}
+    assert set(BackgroundTask.objects.values_list("status", "attempts")) == {
+        ("succeeded", 1)
+    }
+    assert metrics.value("task_queue_delay_seconds_count", task=name) == 5
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_claims_when_release_fails(monkeypatch):
+    """【異常系】期限切れのタスクを戻せなくてもワーカーはタスクを取り出す.
+
+    【テストの意図】
+    期限切れのタスクの処理が失敗し続けても、新しいタスクの実行が
+    止まらないことを保証します。
+
+    【何を保証するか】
+    - release_expired() のDBエラーの後もタスクが実行されること
+
+    【テスト手順】
+    1. release_expired() が常にDBエラーになるようにする
+    2. タスクを追加し、ワーカーを drain=True で実行
+
+    【期待する結果】
+    タスクが1回実行されて成功している
+    """
+
+    # Arrange
+    def fail():
+        raise DatabaseError("release failed")
+
+    monkeypatch.setattr(tasks, "release_expired", fail)
+    tasks.enqueue(f"{__name__}.record", {"label": "fresh"})
+
+    # Act
+    tasks.TaskWorker(workers=1, poll_interval=0.01).run(drain=True)
+
+    # Assert
+    assert [label for label, _ in calls] == ["fresh"]
+    assert statuses() == [(f"{__name__}.record", "succeeded", 1)]
+
+
+@pytest.mark.django_db
+def test_claimed_tasks_are_not_claimed_again():
+    """【正常系】取り出し済みのタスクは他のワーカーに取り出されない.
+
+    【テストの意図】
+    複数のワーカーが同時にキューを読んでも同じタスクを二重に実行しないことを
+    保証します。
+
+    【何を保証するか】
+    - 続けて取り出したタスクが重ならないこと
+    - 実行可能な日時になっていないタスクは取り出されないこと
+
+    【テスト手順】
+    1. すぐに実行できるタスク3件と1時間後のタスク1件を追加
+    2. 2件・10件の順に取り出す
+
+    【期待する結果】
+    2件と1件が重ならずに取り出され、1時間後のタスクは残る
+    """
+    # Arrange
+    for number in range(3):
+        tasks.enqueue(f"{__name__}.record", {"label": str(number)})
+    tasks.enqueue(f"{__name__}.record", {"label": "later"}, delay=3600)
+
+    # Act
+    first, second = tasks.claim(2), tasks.claim(10)
+
+    # Assert
+    assert [t.kwargs["label"] for t in first] == ["0", "1"]
+    assert [t.kwargs["label"] for t in second] == ["2"]
+    assert BackgroundTask.objects.filter(status="pending").count() == 1
+
+
+@pytest.mark.django_db
+class TestPeriodicJobs:
+    """周期ジョブとして実行する処理のテスト."""
+
+    def test_momentum_decays_without_posts(self, category):
+        """【正常系】全体の再計算で投稿が途絶えたスレッドの勢いが下がる.
+
+        【テストの意図】
+        投稿がないスレッドの勢いが残り続けないことを保証します。
+
+        【何を保証するか】
+        - 時間窓から外れた投稿は数えられないこと
+        - 勢いが残っていたスレッドも対象になること
+
+        【テスト手順】
+        1. 勢い 5.0 のスレッドに2日前の投稿を作成
+        2. 全体を再計算する
+
+        【期待する結果】
+        勢いが 0 になる
+        """
+        # Arrange
+        thread = Thread.objects.create(title="スレ", category=category, momentum=5.0)
+        post = Post.objects.create(thread=thread, content="1", post_number=1)
+        Post.objects.filter(pk=post.pk).update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+
+        # Act
+        updated = recompute_momentum()
+
+        # Assert
+        thread.refresh_from_db()
+        assert (updated, thread.momentum) == (1, 0.0)
+
+    def test_idle_sessions_are_collected(self, category):
+        """【正常系】記録を持たない放置されたセッションだけが削除される.
+
+        【テストの意図】
+        一度も書き込みをしないまま放置されたセッションが
+        テーブルに溜まり続けないことを保証します。
+
+        【何を保証するか】
+        - IDLE_SESSION_DAYS を過ぎた記録のないセッションが削除されること
+        - 投稿のあるセッションと最近のセッションは残ること
+        - 削除したセッションがディレクトリから引けなくなること
+
+        【テスト手順】
+        1. 放置・投稿あり・最近の3つのセッションを作成
+        2. collect_idle_sessions() を実行
+
+        【期待する結果】
+        放置されたセッションだけが削除される
+        """
+        # Arrange
+        idle, author = session_directory.create(), session_directory.create()
+        recent = session_directory.create()
+        thread = Thread.objects.create(title="スレ", category=category)
+        Post.objects.create(
+            thread=thread, content="1", post_number=1, author_session=author
+        )
+        UserSession.objects.filter(pk__in=[idle.pk, author.pk]).update(
+            last_activity_at=timezone.now() - timedelta(days=31)
+        )
+
+        # Act
+        deleted = collect_idle_sessions()
+
+        # Assert
+        assert deleted == 1
+        assert set(UserSession.objects.values_list("pk", flat=True)) == {
+            author.pk,
+            recent.pk,
+        }
+        assert session_directory.get(str(idle.session_id)) is None
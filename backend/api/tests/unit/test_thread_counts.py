@@ -0,0 +1,209 @@
+"""カテゴリのスレッド数とスレッド一覧のページネーションのユニットテスト.
+
+シグナルによるCategory.thread_countの維持と、
+カテゴリ・タグのスレッド一覧のキーセットページネーションを検証する。
+"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Category, Tag, Thread
+from api.services.thread_counts import recount_thread_counts
+
+
+@pytest.fixture
+def categories():
+    """テスト用のカテゴリを2件作成する."""
+    return [
+        Category.objects.create(name="プログラミング", slug="programming"),
+        Category.objects.create(name="雑談", slug="chat"),
+    ]
+
+
+def thread_counts(categories) -> list[int]:
+    """DBから最新のthread_countを取得する.
+
+    Args:
+        categories: 対象カテゴリのリスト
+
+    Returns:
+        カテゴリと同じ順序のthread_countのリスト
+    """
+    counts = dict(Category.objects.values_list("pk", "thread_count"))
+    return [counts[category.pk] for category in categories]
+
+
+def fetch_all_pages(api_client, url: str) -> tuple[list[str], list[int]]:
+    """nextリンクをたどって全ページのスレッドを取得する.
+
+    Args:
+        api_client: APIクライアント
+        url: 最初のページのURL
+
+    Returns:
+        取得したスレッドのタイトルと、各ページのクエリ数
+    """
+    titles, query_counts = [], []
+    while url:
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url)
+        assert response.status_code == 200
+        titles += [thread["title"] for thread in response.json()["results"]]
+        query_counts.append(len(queries.captured_queries))
+        url = response.json()["next"]
+    return titles, query_counts
+
+
+@pytest.mark.django_db
+class TestThreadCountSignals:
+    """スレッドの変更に合わせたthread_count更新のテスト."""
+
+    def test_create_move_and_delete(self, categories):
+        """【正常系】スレッドの作成・移動・削除でカウンターが増減する.
+
+        【テストの意図】
+        スレッド数をCOUNTせずに返すカウンターが、
+        スレッドの変更に合わせて実際の件数と一致し続けることを保証します。
+
+        【何を保証するか】
+        - 作成で所属カテゴリが加算されること
+        - カテゴリを変えて保存すると移動元が減算、移動先が加算されること
+        - カテゴリを含まないupdate_fieldsの保存では変化しないこと
+        - 削除で所属カテゴリが減算されること
+
+        【テスト手順】
+        1. スレッドを作成、移動、ピン留め、削除する
+        2. 各操作の後にthread_countを確認
+
+        【期待する結果】
+        thread_countが常に実際のスレッド数と一致する
+        """
+        # Arrange
+        programming, chat = categories
+
+        # Act & Assert
+        first = Thread.objects.create(title="スレ1", category=programming)
+        Thread.objects.create(title="スレ2", category=programming)
+        assert thread_counts(categories) == [2, 0]
+
+        first.category = chat
+        first.save()
+        assert thread_counts(categories) == [1, 1]
+
+        first.is_pinned = True
+        first.save(update_fields=["is_pinned"])
+        assert thread_counts(categories) == [1, 1]
+
+        first.delete()
+        assert thread_counts(categories) == [1, 0]
+
+    def test_recount_corrects_drift(self, categories):
+        """【正常系】シグナルを経由しない変更によるずれを再集計で修正する.
+
+        【テストの意図】
+        bulk_createなどで生じたカウンターのずれを一括で直せることを
+        保証します。
+
+        【何を保証するか】
+        - dry_runではずれの件数を返すだけで更新しないこと
+        - 再集計後は実際のスレッド数と一致すること
+
+        【テスト手順】
+        1. bulk_createでスレッドを作成してカウンターをずらす
+        2. dry_run、通常の順に再集計
+
+        【期待する結果】
+        ずれていた1カテゴリが修正される
+        """
+        # Arrange
+        programming, _ = categories
+        Thread.objects.bulk_create(
+            Thread(title=f"スレ{n}", category=programming) for n in range(3)
+        )
+
+        # Act & Assert
+        assert recount_thread_counts(dry_run=True) == 1
+        assert thread_counts(categories) == [0, 0]
+        assert recount_thread_counts() == 1
+        assert thread_counts(categories) == [3, 0]
+
+
+@pytest.mark.django_db
+class TestThreadListPagination:
+    """カテゴリ・タグのスレッド一覧のキーセットページネーションのテスト."""
+
+    @pytest.mark.parametrize("owner", ["categories", "tags"])
+    def test_pages_cover_all_threads_at_constant_cost(
+        self, owner, categories, api_client
+    ):
+        """【性能】全ページを重複なく取得でき、ページごとのクエリ数が一定.
+
+        【テストの意図】
+        スレッド数の多いカテゴリやタグでも、1ページのコストが
+        スレッド数に依存しないことを保証します。
+
+        【何を保証するか】
+        - 作成日時の新しい順に、重複も欠落もなく全件を取得できること
+        - page_sizeで1ページの件数を指定できること
+        - どのページもクエリ数が同じで、COUNT(*)を発行しないこと
+
+        【テスト手順】
+        1. タグ付きのスレッドを7件作成
+        2. page_size=3 でnextリンクをたどって全ページを取得
+
+        【期待する結果】
+        3ページで7件を新しい順に取得し、各ページのクエリ数が等しい
+        """
+        # Arrange
+        category = categories[0]
+        tag = Tag.objects.create(name="Python", slug="python")
+        for n in range(7):
+            thread = Thread.objects.create(title=f"スレ{n}", category=category)
+            thread.tags.add(tag)
+        pk = category.pk if owner == "categories" else tag.pk
+
+        # Act
+        with CaptureQueriesContext(connection) as queries:
+            titles, query_counts = fetch_all_pages(
+                api_client, f"/api/v1/{owner}/{pk}/threads/?page_size=3"
+            )
+
+        # Assert
+        assert titles == [f"スレ{n}" for n in reversed(range(7))]
+        assert len(query_counts) == 3
+        assert len(set(query_counts)) == 1
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        assert "COUNT(" not in sql.upper()
+
+    def test_omitted_ordering_field_is_not_rendered(self, categories, api_client):
+        """【正常系】並び順のフィールドを除外してもページングできる.
+
+        【テストの意図】
+        カーソルの計算に使う作成日時が、?fields= で指定しなかった場合に
+        出力へ漏れないことを保証します。
+
+        【何を保証するか】
+        - 指定したフィールドだけが出力されること
+        - nextリンクが生成されること
+
+        【テスト手順】
+        1. スレッドを2件作成
+        2. ?fields=id&page_size=1 で取得
+
+        【期待する結果】
+        idだけを含む1件と、次ページのURLが返る
+        """
+        # Arrange
+        category = categories[0]
+        Thread.objects.create(title="スレ1", category=category)
+        latest = Thread.objects.create(title="スレ2", category=category)
+
+        # Act
+        response = api_client.get(
+            f"/api/v1/categories/{category.pk}/threads/?fields=id&page_size=1"
+        )
+
+        # Assert
+        assert response.json()["results"] == [{"id": latest.pk}]
+        assert response.json()["next"] is not None
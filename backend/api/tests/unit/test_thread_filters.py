@@ -0,0 +1,275 @@
+"""スレッド一覧の絞り込み・並び替えのユニットテスト.
+
+ThreadViewSet.list のクエリパラメーターの解釈と、
+並び順ごとの一覧とタイトル検索の実行計画を
+EXPLAIN で検証する。
+"""
+
+import itertools
+
+import pytest
+from django.db import connection
+from django.http import QueryDict
+
+from api.models import Category, Tag, Thread
+from api.v1.threads.filters import THREAD_SORTS, ThreadFilter
+from api.v1.threads.readers import THREAD_LIST_READER
+
+URL = "/api/v1/threads/"
+
+FILTERS = [
+    "",
+    "category=1",
+    "tags=python",
+    "tags=python,django",
+    "tags=python,django&match=any",
+    "q=質問",
+    "category=1&tags=python,django&q=質問",
+]
+
+
+@pytest.fixture
+def board():
+    """カテゴリとタグの異なるスレッドを作成する.
+
+    Returns:
+        タイトルからスレッドへの辞書
+    """
+    programming = Category.objects.create(name="プログラミング", slug="programming")
+    chat = Category.objects.create(name="雑談", slug="chat")
+    python = Tag.objects.create(name="Python", slug="python")
+    django = Tag.objects.create(name="Django", slug="django")
+    threads = {
+        "Django質問スレ": Thread.objects.create(
+            title="Django質問スレ",
+            category=programming,
+            momentum=3.0,
+            post_count=10,
+            view_count=5,
+        ),
+        "Python雑談": Thread.objects.create(
+            title="Python雑談",
+            category=chat,
+            momentum=9.0,
+            post_count=2,
+            view_count=40,
+        ),
+        "初心者質問スレ": Thread.objects.create(
+            title="初心者質問スレ",
+            category=programming,
+            momentum=1.0,
+            post_count=30,
+            view_count=1,
+            is_pinned=True,
+        ),
+    }
+    threads["Django質問スレ"].tags.set([python, django])
+    threads["Python雑談"].tags.set([python])
+    return threads
+
+
+def titles(response) -> list[str]:
+    """一覧レスポンスからタイトルを取り出す.
+
+    Args:
+        response: 一覧のレスポンス
+
+    Returns:
+        レスポンス順のタイトルのリスト
+    """
+    assert response.status_code == 200
+    return [thread["title"] for thread in response.json()["results"]]
+
+
+def query_plan(params: str) -> str:
+    """一覧ビューが発行するクエリの実行計画を取得する.
+
+    Args:
+        params: 一覧のクエリ文字列
+
+    Returns:
+        EXPLAIN QUERY PLAN の出力
+    """
+    filterset = ThreadFilter(QueryDict(params), queryset=Thread.objects.all())
+    assert filterset.is_valid(), filterset.errors
+    return THREAD_LIST_READER.values(filterset.qs)[:20].explain()
+
+
+@pytest.mark.django_db
+class TestThreadFilter:
+    """一覧の絞り込み・並び替えのテスト."""
+
+    @pytest.mark.parametrize(
+        ("params", "expected"),
+        [
+            ("", ["初心者質問スレ", "Python雑談", "Django質問スレ"]),
+            ("sort=momentum", ["Python雑談", "Django質問スレ", "初心者質問スレ"]),
+            ("sort=new", ["初心者質問スレ", "Python雑談", "Django質問スレ"]),
+            ("sort=posts", ["初心者質問スレ", "Django質問スレ", "Python雑談"]),
+            ("sort=popular", ["Python雑談", "初心者質問スレ", "Django質問スレ"]),
+        ],
+    )
+    def test_sort(self, board, api_client, params, expected):
+        """【正常系】?sort= で指定した順に並ぶ.
+
+        【テストの意図】
+        設計書の各並び順（勢い・新着・レス数・人気）で一覧を取得できることを
+        保証します。
+
+        【何を保証するか】
+        - 省略時はピン留め優先の最終投稿順になること
+        - 人気順は閲覧数 + レス数の降順になること
+
+        【テスト手順】
+        1. 並び順を指定して一覧を取得
+
+        【期待する結果】
+        指定した並び順でスレッドが返る
+        """
+        # Act
+        response = api_client.get(f"{URL}?{params}")
+
+        # Assert
+        assert titles(response) == expected
+
+    @pytest.mark.parametrize(
+        ("params", "expected"),
+        [
+            ("category={programming}", {"Django質問スレ", "初心者質問スレ"}),
+            ("tags=python", {"Django質問スレ", "Python雑談"}),
+            ("tags=python,django", {"Django質問スレ"}),
+            ("tags=python,django&match=any", {"Django質問スレ", "Python雑談"}),
+            ("q=質問", {"Django質問スレ", "初心者質問スレ"}),
+            ("category={programming}&tags=python&q=django", {"Django質問スレ"}),
+        ],
+    )
+    def test_filter(self, board, api_client, params, expected):
+        """【正常系】カテゴリ・タグ・検索語で絞り込める.
+
+        【テストの意図】
+        絞り込み条件が単独でも組み合わせても正しく適用されることを
+        保証します。
+
+        【何を保証するか】
+        - 複数タグは既定で全てを含むスレッドに絞り込むこと
+        - match=any でいずれかのタグを含むスレッドを重複なく返すこと
+        - 検索語はタイトルの部分一致（大文字小文字を区別しない）であること
+
+        【テスト手順】
+        1. 絞り込み条件を指定して一覧を取得
+
+        【期待する結果】
+        条件に一致するスレッドだけが返る
+        """
+        # Arrange
+        programming = board["Django質問スレ"].category_id
+
+        # Act
+        response = api_client.get(f"{URL}?{params.format(programming=programming)}")
+
+        # Assert
+        result = titles(response)
+        assert len(result) == len(set(result))
+        assert set(result) == expected
+
+    @pytest.mark.parametrize("params", ["sort=random", "match=some", "category=x"])
+    def test_invalid_parameter(self, api_client, params):
+        """【異常系】不正なパラメーターは400エラーになる.
+
+        【テストの意図】
+        対応していない並び順や値を黙って無視しないことを保証します。
+
+        【何を保証するか】
+        - 不正な値のパラメーター名がエラーに含まれること
+
+        【テスト手順】
+        1. 不正な値を指定して一覧を取得
+
+        【期待する結果】
+        400エラーとパラメーター名をキーにしたエラーが返る
+        """
+        # Act
+        response = api_client.get(f"{URL}?{params}")
+
+        # Assert
+        assert response.status_code == 400
+        assert params.split("=")[0] in response.json()
+
+
+@pytest.mark.django_db
+class TestThreadListIndexes:
+    """一覧クエリの実行計画のテスト."""
+
+    @pytest.mark.skipif(
+        connection.vendor != "sqlite", reason="EXPLAIN QUERY PLAN is SQLite specific"
+    )
+    @pytest.mark.parametrize(
+        ("sort", "filters"),
+        list(itertools.product(THREAD_SORTS, FILTERS)),
+    )
+    def test_sorts_are_index_scans(self, sort, filters):
+        """【性能】全ての並び順はインデックス順に走査される.
+
+        【テストの意図】
+        スレッド数が増えても、どの並び順・絞り込みの一覧の1ページ目も
+        ソートや全件走査なしで返せることを保証します。
+
+        【何を保証するか】
+        - スレッドテーブルを並び順のインデックスで走査すること
+        - 結果を一時B-Treeでソートしないこと
+        - カテゴリ指定時はカテゴリの範囲だけを走査すること
+
+        【テスト手順】
+        1. 一覧ビューと同じクエリを組み立ててEXPLAINを取得
+
+        【期待する結果】
+        並び順に対応するインデックスが使われ、TEMP B-TREEが現れない
+        """
+        # Arrange
+        params = f"sort={sort}&{filters}"
+        index = f"board_thread_{'cat_' if 'category' in filters else ''}{sort}_idx"
+
+        # Act
+        plan = query_plan(params)
+
+        # Assert
+        assert "TEMP B-TREE" not in plan
+        assert f"board_thread USING INDEX {index}" in plan
+        if "category" in filters:
+            assert f"SEARCH board_thread USING INDEX {index} (category_id=?)" in plan
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="FTS5 is SQLite specific")
+    def test_title_search_uses_full_text_index(self, board, api_client):
+        """【性能】3文字以上の検索語は全文検索インデックスで絞り込む.
+
+        【テストの意図】
+        タイトル検索がスレッドテーブル全体の部分一致の走査にならず、
+        タイトルの変更も検索結果に反映されることを保証します。
+
+        【何を保証するか】
+        - FTS5 trigram の仮想テーブルのインデックスが使われること
+        - タイトルの更新・スレッドの削除がトリガーで反映されること
+        - 二重引用符を含む検索語でもエラーにならないこと
+
+        【テスト手順】
+        1. 検索語のクエリのEXPLAINを取得
+        2. タイトルを変更し、スレッドを削除してから検索
+
+        【期待する結果】
+        仮想テーブルのインデックスが使われ、変更後のタイトルで一致する
+        """
+        # Arrange
+        renamed = board["Python雑談"]
+        renamed.title = "Python質問スレ"
+        renamed.save(update_fields=["title"])
+        board["初心者質問スレ"].delete()
+
+        # Act
+        plan = query_plan("q=質問スレ")
+        response = api_client.get(f"{URL}?q=質問スレ")
+        quoted = api_client.get(f'{URL}?q="質問"')
+
+        # Assert
+        assert "board_thread_title_fts VIRTUAL TABLE INDEX" in plan
+        assert set(titles(response)) == {"Django質問スレ", "Python質問スレ"}
+        assert titles(quoted) == []
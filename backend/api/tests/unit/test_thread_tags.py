@@ -0,0 +1,261 @@
+"""タグ付けに写したスレッドの並び替えキーのユニットテスト.
+
+スレッドの変更に合わせた ThreadTag の並び替えキーの同期と、
+それを使ったタグごとのスレッド一覧を検証する。
+"""
+
+import datetime
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from api.models import Category, Tag, Thread, ThreadTag
+from api.services.events import consume_all
+from api.services.ingestion import PendingPost, commit_posts
+from api.services.thread_tags import sync_thread_tags
+
+
+@pytest.fixture
+def category():
+    """テスト用のカテゴリを作成する."""
+    return Category.objects.create(name="プログラミング", slug="programming")
+
+
+@pytest.fixture
+def python():
+    """テスト用のタグを作成する."""
+    return Tag.objects.create(name="Python", slug="python")
+
+
+def sort_keys(thread: Thread) -> set[tuple]:
+    """スレッドのタグ付けに写された並び替えキーを取得する.
+
+    Args:
+        thread: 対象スレッド
+
+    Returns:
+        (last_post_at, momentum, is_pinned) の集合
+    """
+    return set(
+        ThreadTag.objects.filter(thread=thread).values_list(
+            "last_post_at", "momentum", "is_pinned"
+        )
+    )
+
+
+@pytest.mark.django_db
+class TestSortKeySync:
+    """並び替えキーの同期のテスト."""
+
+    def test_copied_on_tagging_and_save(self, category, python):
+        """【正常系】タグ付けとスレッドの保存で並び替えキーが写される.
+
+        【テストの意図】
+        タグごとの一覧がスレッドテーブルを参照せずに並べ替えられるよう、
+        写しが常にスレッドの値と一致することを保証します。
+
+        【何を保証するか】
+        - 投稿のないスレッドは作成日時が写されること
+        - スレッド側・タグ側のどちらからタグ付けしても写されること
+        - update_fieldsで並び替えキーを保存した場合に写されること
+
+        【テスト手順】
+        1. スレッド側とタグ側からタグ付けする
+        2. 最終投稿日時・勢い・ピン留めを変更して保存
+
+        【期待する結果】
+        全てのタグ付けの写しがスレッドの最新の値と一致する
+        """
+        # Arrange
+        django = Tag.objects.create(name="Django", slug="django")
+        thread = Thread.objects.create(title="Django質問スレ", category=category)
+
+        # Act & Assert
+        thread.tags.add(python)
+        django.threads.add(thread)
+        assert sort_keys(thread) == {(thread.created_at, 0.0, False)}
+
+        thread.last_post_at = thread.created_at + datetime.timedelta(minutes=5)
+        thread.momentum = 12.0
+        thread.save(update_fields=["last_post_at", "momentum"])
+        thread.is_pinned = True
+        thread.save(update_fields=["is_pinned"])
+        assert sort_keys(thread) == {(thread.last_post_at, 12.0, True)}
+
+    def test_copied_on_post_ingestion(self, category, python):
+        """【正常系】グループコミットの投稿で最終投稿日時が写される.
+
+        【テストの意図】
+        QuerySet.update()でスレッドを更新する取り込み処理でも、
+        イベントログのコンシューマーの処理後に写しが古いまま残らないことを
+        保証します。
+
+        【何を保証するか】
+        - 最終投稿日時がコミットした投稿の日時になること
+        - 勢いが再計算された値になること
+
+        【テスト手順】
+        1. タグ付きのスレッドに投稿をコミット
+        2. イベントログのコンシューマーを実行
+
+        【期待する結果】
+        タグ付けの last_post_at が最後の投稿の日時と一致する
+        """
+        # Arrange
+        thread = Thread.objects.create(title="Python雑談", category=category)
+        thread.tags.add(python)
+
+        # Act
+        posts = commit_posts([PendingPost(thread_id=thread.pk, content="1")])
+        consume_all()
+
+        # Assert
+        assert sort_keys(thread) == {(posts[0].created_at, 1 / 24, False)}
+
+    def test_sync_repairs_stale_copies(self, category, python):
+        """【正常系】シグナルを経由しない変更の写しを一括で修正する.
+
+        【テストの意図】
+        QuerySet.update()で並び替えキーを変更した後に
+        sync_thread_tags()で写しを揃えられることを保証します。
+
+        【何を保証するか】
+        - 指定したスレッドのタグ付けが1回の呼び出しで更新されること
+
+        【テスト手順】
+        1. QuerySet.update()で勢いとピン留めを変更
+        2. sync_thread_tags()を呼び出す
+
+        【期待する結果】
+        写しがスレッドの値と一致する
+        """
+        # Arrange
+        thread = Thread.objects.create(title="Python雑談", category=category)
+        thread.tags.add(python)
+        Thread.objects.filter(pk=thread.pk).update(momentum=3.5, is_pinned=True)
+
+        # Act
+        sync_thread_tags([thread.pk])
+
+        # Assert
+        assert sort_keys(thread) == {(thread.created_at, 3.5, True)}
+
+
+@pytest.mark.django_db
+class TestTaggedThreadList:
+    """タグごとのスレッド一覧のテスト."""
+
+    @pytest.mark.parametrize(
+        ("sort", "expected"),
+        [
+            ("", ["最近書き込み", "勢いあり", "過疎"]),
+            ("?sort=momentum", ["勢いあり", "過疎", "最近書き込み"]),
+        ],
+    )
+    def test_sorted_by_copied_keys(self, category, python, api_client, sort, expected):
+        """【正常系】写した並び替えキーの順にスレッドが並ぶ.
+
+        【テストの意図】
+        タグページが最終投稿日時順・勢い順で並ぶことを保証します。
+
+        【何を保証するか】
+        - 既定では最終投稿日時の新しい順に並ぶこと
+        - sort=momentum で勢いの高い順に並ぶこと
+
+        【テスト手順】
+        1. 最終投稿日時と勢いの異なるタグ付きスレッドを作成
+        2. 並び順を指定してタグのスレッド一覧を取得
+
+        【期待する結果】
+        指定した並び順でスレッドが返る
+        """
+        # Arrange
+        now = timezone.now()
+        for title, minutes_ago, momentum in [
+            ("過疎", 60, 2.0),
+            ("勢いあり", 30, 48.0),
+            ("最近書き込み", 1, 0.5),
+        ]:
+            thread = Thread.objects.create(
+                title=title,
+                category=category,
+                momentum=momentum,
+                last_post_at=now - datetime.timedelta(minutes=minutes_ago),
+            )
+            thread.tags.add(python)
+
+        # Act
+        response = api_client.get(f"/api/v1/tags/{python.pk}/threads/{sort}")
+
+        # Assert
+        assert response.status_code == 200
+        assert [t["title"] for t in response.json()["results"]] == expected
+
+    def test_invalid_sort(self, python, api_client):
+        """【異常系】対応していない並び順は400エラーになる.
+
+        【テストの意図】
+        インデックスのない並び順を受け付けないことを保証します。
+
+        【何を保証するか】
+        - sortをキーにしたエラーが返ること
+
+        【テスト手順】
+        1. sort=popular でタグのスレッド一覧を取得
+
+        【期待する結果】
+        400エラーが返る
+        """
+        # Act
+        response = api_client.get(f"/api/v1/tags/{python.pk}/threads/?sort=popular")
+
+        # Assert
+        assert response.status_code == 400
+        assert "sort" in response.json()
+
+    @pytest.mark.skipif(
+        connection.vendor != "sqlite", reason="EXPLAIN QUERY PLAN is SQLite specific"
+    )
+    @pytest.mark.parametrize(
+        ("ordering", "index"),
+        [
+            (("-last_post_at", "-thread_id"), "board_thread_tags_recent_idx"),
+            (("-momentum", "-thread_id"), "board_thread_tags_moment_idx"),
+        ],
+    )
+    def test_page_is_an_index_range_read(self, python, ordering, index):
+        """【性能】タグページのスレッドIDがインデックスの範囲読み取りで決まる.
+
+        【テストの意図】
+        人気のタグでも、スレッドテーブルとの結合やソートなしで
+        1ページ分のスレッドIDを取得できることを保証します。
+
+        【何を保証するか】
+        - (tag, 並び替えキー) のインデックスをtag_idで範囲検索すること
+        - インデックスだけで完結し、タグ付けのテーブル本体も読まないこと
+        - スレッドテーブルを参照しないこと
+        - 一時B-Treeでソートしないこと
+
+        【テスト手順】
+        1. ビューと同じタグ付けのクエリを組み立ててEXPLAINを取得
+
+        【期待する結果】
+        対応するインデックスの範囲検索だけで完了する
+        """
+        # Arrange
+        links = (
+            ThreadTag.objects.filter(tag=python)
+            .order_by(*ordering)
+            .values("thread_id", ordering[0].lstrip("-"))[:21]
+        )
+
+        # Act
+        plan = links.explain()
+
+        # Assert
+        assert (
+            f"SEARCH board_thread_tags USING COVERING INDEX {index} (tag_id=?)" in plan
+        )
+        assert "board_thread " not in plan
+        assert "TEMP B-TREE" not in plan
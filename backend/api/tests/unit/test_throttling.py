@@ -0,0 +1,342 @@
+"""トークンバケットによるレート制限のユニットテスト."""
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+
+from api import throttling
+from api.metrics import metrics
+from api.models import Category, Post, Thread
+
+POSTS_URL = "/api/v1/posts/"
+
+
+@pytest.fixture
+def threads():
+    """投稿先のスレッドを2件作成する."""
+    category = Category.objects.create(name="雑談", slug="chat")
+    return [
+        Thread.objects.create(title=f"雑談スレ{n}", category=category) for n in (1, 2)
+    ]
+
+
+@pytest.fixture
+def rates(settings):
+    """テスト用の小さなレートを設定する.
+
+    Returns:
+        RATE_LIMITSのRATESを書き換える関数
+    """
+
+    def configure(**rates):
+        settings.RATE_LIMITS = {"RATES": rates}
+
+    return configure
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """プロセス内バケットが参照する時刻を固定する.
+
+    Returns:
+        現在時刻を保持するリスト（[0]を書き換えて時間を進める）
+    """
+    now = [1000.0]
+    monkeypatch.setattr(throttling.time, "monotonic", lambda: now[0])
+    return now
+
+
+def post(api_client, thread, content="それな"):
+    """投稿APIを呼び出す.
+
+    Args:
+        api_client: APIクライアント
+        thread: 投稿先スレッド
+        content: 投稿本文
+
+    Returns:
+        レスポンス
+    """
+    return api_client.post(
+        POSTS_URL, {"thread": thread.pk, "content": content}, format="json"
+    )
+
+
+@pytest.mark.django_db
+class TestTokenBucketThrottle:
+    """投稿・リアクションのレート制限のテスト."""
+
+    def test_burst_then_reject_without_touching_db(
+        self, api_client, threads, rates, clock, django_assert_num_queries
+    ):
+        """【正常系】容量分のバーストを許可し、超過分はDBに触れず拒否する.
+
+        【テストの意図】
+        連投がデータベースのトランザクションに到達する前に
+        止められることを保証します。
+
+        【何を保証するか】
+        - 容量までのリクエストは許可されること
+        - 超過したリクエストは429とRetry-Afterで拒否されること
+        - 拒否の判定でクエリが発行されないこと
+        - 拒否がメトリクスに記録されること
+
+        【テスト手順】
+        1. IP単位のレートを "2/min" に設定
+        2. 同じスレッドへ3回投稿
+
+        【期待する結果】
+        2件が作成され、3件目はクエリ0件で429になる
+        """
+        # Arrange
+        rates(post={"ip": "2/min"})
+
+        # Act
+        first = post(api_client, threads[0])
+        second = post(api_client, threads[0])
+        with django_assert_num_queries(0):
+            rejected = post(api_client, threads[0])
+
+        # Assert
+        assert (first.status_code, second.status_code) == (201, 201)
+        assert rejected.status_code == 429
+        assert rejected["Retry-After"] == "30"
+        assert Post.objects.count() == 2
+        rejections = metrics.value(
+            "rate_limit_rejected_total", scope="post", bucket="ip"
+        )
+        assert rejections == 1
+
+    def test_tokens_refill_over_time(self, api_client, threads, rates, clock):
+        """【正常系】時間の経過でトークンが補充される.
+
+        【テストの意図】
+        一度制限されたクライアントも、補充期間が過ぎれば再び投稿できることを
+        保証します。
+
+        【何を保証するか】
+        - 補充に必要な時間が経つ前は拒否されること
+        - 1トークン分の時間が経つと1件だけ許可されること
+
+        【テスト手順】
+        1. レート "1/min" で1件投稿
+        2. 59秒後、60秒後に投稿
+
+        【期待する結果】
+        59秒後は429、60秒後は201になる
+        """
+        # Arrange
+        rates(post={"ip": "1/min"})
+        assert post(api_client, threads[0]).status_code == 201
+
+        # Act & Assert
+        clock[0] += 59
+        assert post(api_client, threads[0]).status_code == 429
+        clock[0] += 1
+        assert post(api_client, threads[0]).status_code == 201
+
+    def test_spoofed_forwarded_for_shares_ip_bucket(
+        self, api_client, threads, rates, clock
+    ):
+        """【異常系】X-Forwarded-Forを偽装しても新しいバケットにならない.
+
+        【テストの意図】
+        信頼するプロキシがない構成で、クライアントが書き換えられるヘッダーで
+        IP単位の制限を回避できないことを保証します。
+
+        【何を保証するか】
+        - NUM_PROXIES の既定値が0であること
+        - 異なるX-Forwarded-Forを付けても接続元のIPのバケットを消費すること
+
+        【テスト手順】
+        1. IP単位のレートを "1/min" に設定
+        2. X-Forwarded-For を毎回変えて2回投稿
+
+        【期待する結果】
+        2件目は429になる
+        """
+        # Arrange
+        rates(post={"ip": "1/min"})
+
+        # Act
+        statuses = [
+            api_client.post(
+                POSTS_URL,
+                {"thread": threads[0].pk, "content": "それな"},
+                format="json",
+                HTTP_X_FORWARDED_FOR=address,
+            ).status_code
+            for address in ("203.0.113.1", "203.0.113.2")
+        ]
+
+        # Assert
+        assert api_settings.NUM_PROXIES == 0
+        assert statuses == [201, 429]
+
+    def test_thread_bucket_is_per_thread(self, api_client, threads, rates, clock):
+        """【正常系】スレッド単位のバケットはスレッドごとに独立している.
+
+        【テストの意図】
+        特定のスレッドへの集中投稿を抑えつつ、他のスレッドへの投稿は
+        妨げないことを保証します。
+
+        【何を保証するか】
+        - 空になったスレッドのバケットは他のスレッドに影響しないこと
+        - 拒否は空になったバケットの単位でメトリクスに記録されること
+
+        【テスト手順】
+        1. スレッド単位のレートを "1/min" に設定
+        2. スレッド1に2回、スレッド2に1回投稿
+
+        【期待する結果】
+        スレッド1への2件目だけが429になる
+        """
+        # Arrange
+        rates(post={"ip": "10/min", "thread": "1/min"})
+
+        # Act
+        statuses = [
+            post(api_client, threads[0]).status_code,
+            post(api_client, threads[0]).status_code,
+            post(api_client, threads[1]).status_code,
+        ]
+
+        # Assert
+        assert statuses == [201, 429, 201]
+        rejections = metrics.value(
+            "rate_limit_rejected_total", scope="post", bucket="thread"
+        )
+        assert rejections == 1
+
+    def test_rejection_does_not_consume_other_buckets(
+        self, api_client, threads, rates, clock
+    ):
+        """【正常系】拒否されたリクエストは他のバケットのトークンを消費しない.
+
+        【テストの意図】
+        あるバケットで拒否された連投が、同じクライアントの
+        他のスレッドへの投稿枠を削らないことを保証します。
+
+        【何を保証するか】
+        - 拒否されたリクエストの後もIP単位の残量が減っていないこと
+
+        【テスト手順】
+        1. IP単位 "2/min"、スレッド単位 "1/min" に設定
+        2. スレッド1に3回投稿（2回目以降は拒否）
+        3. スレッド2に投稿
+
+        【期待する結果】
+        スレッド2への投稿は許可される
+        """
+        # Arrange
+        rates(post={"ip": "2/min", "thread": "1/min"})
+        for _ in range(3):
+            post(api_client, threads[0])
+
+        # Act
+        response = post(api_client, threads[1])
+
+        # Assert
+        assert response.status_code == 201
+
+    def test_reaction_scope(self, api_client, threads, rates, clock):
+        """【正常系】リアクションは投稿とは別のバケットで制限される.
+
+        【テストの意図】
+        リアクションの連打が投稿の枠を消費せず、独自のレートで
+        制限されることを保証します。
+
+        【何を保証するか】
+        - リアクションのレートを超えると429になること
+        - その後も投稿は許可されること
+
+        【テスト手順】
+        1. リアクションのレートを "1/min" に設定
+        2. リアクションを2回、投稿を1回送信
+
+        【期待する結果】
+        2回目のリアクションだけが429になる
+        """
+        # Arrange
+        rates(post={"ip": "10/min"}, reaction={"ip": "1/min"})
+        target = Post.objects.create(thread=threads[0], content="1", post_number=1)
+        url = f"{POSTS_URL}{target.pk}/react/"
+
+        # Act
+        statuses = [
+            api_client.post(url, {"reaction_type": "like"}, format="json").status_code,
+            api_client.post(url, {"reaction_type": "like"}, format="json").status_code,
+            post(api_client, threads[0]).status_code,
+        ]
+
+        # Assert
+        assert statuses == [201, 429, 201]
+
+    def test_cache_backend(self, api_client, threads, settings):
+        """【正常系】キャッシュバックエンドでも同じように制限される.
+
+        【テストの意図】
+        複数ワーカーでバケットを共有する構成でも
+        レート制限が機能することを保証します。
+
+        【何を保証するか】
+        - Djangoキャッシュに保存したバケットで容量を超えると拒否されること
+
+        【テスト手順】
+        1. BACKENDを "cache" にしてレートを "1/hour" に設定
+        2. 2回投稿
+
+        【期待する結果】
+        2回目が429になる
+        """
+        # Arrange
+        settings.RATE_LIMITS = {"BACKEND": "cache", "RATES": {"post": {"ip": "1/hour"}}}
+        cache.clear()
+
+        # Act
+        statuses = [post(api_client, threads[0]).status_code for _ in range(2)]
+
+        # Assert
+        assert statuses == [201, 429]
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    """GET /api/v1/stats/metrics/ のテスト."""
+
+    def test_admin_only(self, api_client):
+        """【正常系】メトリクスは管理者だけが取得できる.
+
+        【テストの意図】
+        運用情報が一般の利用者に公開されないことを保証します。
+
+        【何を保証するか】
+        - 未認証のリクエストは拒否されること
+        - 管理者は記録されたカウンターを取得できること
+
+        【テスト手順】
+        1. カウンターを記録
+        2. 未認証、管理者の順にメトリクスを取得
+
+        【期待する結果】
+        未認証は403、管理者はカウンターの値を受け取る
+        """
+        # Arrange
+        metrics.increment("rate_limit_rejected_total", scope="post", bucket="ip")
+        admin = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+
+        # Act
+        anonymous = api_client.get("/api/v1/stats/metrics/")
+        api_client.force_authenticate(admin)
+        response = api_client.get("/api/v1/stats/metrics/")
+
+        # Assert
+        assert anonymous.status_code == 403
+        assert response.json() == {
+            "rate_limit_rejected_total": [
+                {"labels": {"bucket": "ip", "scope": "post"}, "value": 1}
+            ]
+        }
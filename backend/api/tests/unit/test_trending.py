@@ -0,0 +1,188 @@
+"""トレンドタグのユニットテスト.
+
+指数減衰スコアの増分更新と、トレンドタグエンドポイントを検証する。
+"""
+
+import datetime
+import math
+
+import pytest
+from django.utils import timezone
+
+from api.models import BoardEvent, Category, Post, Tag, Thread
+from api.services import trending
+from api.services.events import consume_all
+from api.services.ingestion import PendingPost, commit_posts
+
+
+@pytest.fixture
+def category():
+    """テスト用のカテゴリを作成する."""
+    return Category.objects.create(name="プログラミング", slug="programming")
+
+
+@pytest.fixture
+def tags():
+    """テスト用のタグを3件作成する."""
+    return [
+        Tag.objects.create(name=name, slug=name.lower())
+        for name in ("Python", "Django", "React")
+    ]
+
+
+def current_scores(now=None) -> dict[str, float]:
+    """トレンドに含まれるタグの現在のスコアを取得する.
+
+    Args:
+        now: 基準時刻
+
+    Returns:
+        タグ名から現在のスコアへの辞書
+    """
+    return dict(trending.trending_tags(now).values_list("name", "score"))
+
+
+@pytest.mark.django_db
+class TestTrendScore:
+    """トレンドスコアの増分更新のテスト."""
+
+    def test_scores_decay_with_half_life(self, tags):
+        """【正常系】スコアが活動の重みの指数減衰和になる.
+
+        【テストの意図】
+        対数空間での増分更新が、定義どおりの減衰和と一致することを保証します。
+
+        【何を保証するか】
+        - 発生直後のスコアが重みの合計になること
+        - 半減期の経過でスコアが半分になること
+        - MIN_SCOREを下回ったタグがトレンドから外れること
+
+        【テスト手順】
+        1. 異なる時刻の活動を記録
+        2. 基準時刻を変えてスコアを取得
+
+        【期待する結果】
+        スコアが weight * 2^(-経過時間/半減期) の和になる
+        """
+        # Arrange
+        python, django, _ = tags
+        now = timezone.now()
+        half_life = datetime.timedelta(hours=6)
+
+        # Act
+        trending.record_activity({python.pk: 2.0}, now - half_life)
+        trending.record_activity({python.pk: 1.0, django.pk: 1.0}, now)
+
+        # Assert
+        scores = current_scores(now)
+        assert math.isclose(scores["Python"], 2.0)
+        assert math.isclose(scores["Django"], 1.0)
+        later = current_scores(now + half_life)
+        assert math.isclose(later["Python"], 1.0)
+        assert "Django" not in current_scores(now + half_life * 5)
+
+    def test_recent_activity_overtakes_old_activity(self, category, tags):
+        """【正常系】投稿とタグ付けがスコアに加算され、新しい活動が上位になる.
+
+        【テストの意図】
+        投稿作成・タグ付け・グループコミットの全経路でスコアが更新され、
+        古い大量の活動より最近の活動が優先されることを保証します。
+
+        【何を保証するか】
+        - タグ付けでTHREAD_WEIGHTが加算されること
+        - 投稿作成とグループコミットの投稿で、イベントログのコンシューマーが
+          POST_WEIGHTを加算すること
+        - 減衰によって最近の活動が上位に来ること
+
+        【テスト手順】
+        1. Pythonのスレッドに1日前の時刻で大量の活動を記録
+        2. Reactのスレッドを作成して投稿し、イベントログのコンシューマーを実行する
+
+        【期待する結果】
+        Reactが1位になり、スコアがタグ付けと投稿の重みの合計になる
+        """
+        # Arrange
+        python, _, react = tags
+        trending.record_activity(
+            {python.pk: 100.0}, timezone.now() - datetime.timedelta(days=1)
+        )
+        thread = Thread.objects.create(title="Reactスレ", category=category)
+
+        # Act
+        thread.tags.add(react)
+        Post.objects.create(thread=thread, content="1", post_number=1, is_op=True)
+        commit_posts([PendingPost(thread_id=thread.pk, content=str(n)) for n in "ab"])
+        consume_all()
+
+        # Assert
+        scores = current_scores()
+        assert list(scores) == ["React", "Python"]
+        assert math.isclose(scores["React"], 5.0 + 3 * 1.0, rel_tol=1e-3)
+
+    def test_consumer_decays_posts_within_batch(self, category, tags):
+        """【正常系】コンシューマーはバッチ内の投稿をそれぞれの時刻で加算する.
+
+        【テストの意図】
+        時刻の異なる投稿を1回の加算にまとめても、1件ずつ記録した場合と
+        同じスコアになることを保証します。
+
+        【何を保証するか】
+        - 半減期だけ前の投稿が重みの半分として加算されること
+
+        【テスト手順】
+        1. タグ付きのスレッドに、半減期前と現在の記録時刻の投稿イベントを作る
+        2. TrendingConsumer で1バッチとして処理する
+
+        【期待する結果】
+        現在のスコアが 1.0 + 0.5 になる
+        """
+        # Arrange
+        python = tags[0]
+        thread = Thread.objects.create(title="Python雑談", category=category)
+        thread.tags.add(python)
+        Tag.objects.filter(pk=python.pk).update(trend_score=0.0)
+        now = timezone.now()
+        events = []
+        for number, at in ((1, now - datetime.timedelta(hours=6)), (2, now)):
+            post = Post.objects.create(thread=thread, content="1", post_number=number)
+            event = BoardEvent.objects.get(
+                kind=BoardEvent.Kind.POST_CREATED, object_id=post.pk
+            )
+            event.created_at = at
+            events.append(event)
+
+        # Act
+        trending.TrendingConsumer().handle(events)
+
+        # Assert
+        assert math.isclose(current_scores(now)["Python"], 1.5, rel_tol=1e-9)
+
+    def test_trending_endpoint(self, api_client, tags, django_assert_num_queries):
+        """【正常系】トレンドタグをスコア順に1クエリで返す.
+
+        【テストの意図】
+        トレンドの取得時に投稿テーブルとの結合が不要であることを保証します。
+
+        【何を保証するか】
+        - スコア降順に並ぶこと
+        - 活動のないタグが含まれないこと
+        - 1クエリで応答すること
+
+        【テスト手順】
+        1. 2つのタグに活動を記録
+        2. /tags/trending/ を取得
+
+        【期待する結果】
+        活動量の多い順に2件が返る
+        """
+        # Arrange
+        python, django, _ = tags
+        trending.record_activity({python.pk: 1.0, django.pk: 3.0})
+
+        # Act
+        with django_assert_num_queries(1):
+            response = api_client.get("/api/v1/tags/trending/?limit=10")
+
+        # Assert
+        assert response.status_code == 200
+        assert [tag["name"] for tag in response.json()] == ["Django", "Python"]
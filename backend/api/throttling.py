@@ -0,0 +1,336 @@
+"""トークンバケットによるレート制限.
+
+投稿・スレッド作成・リアクションのような書き込みリクエストを、
+データベースのトランザクションに入る前にビューの入口で制限する。
+判定はプロセス内（またはDjangoキャッシュ）のトークンバケットだけで行い、
+データベースにはアクセスしない。
+
+バケットはスコープ（post / thread / reaction）ごとに、
+セッション・IPアドレス・スレッドの単位で持つ。
+レートは "10/min" のように「容量/補充期間」で指定し、
+容量分のバーストを許しつつ、期間あたり容量分のトークンを連続的に補充する。
+1リクエストは関係する全てのバケットから1トークンずつ消費し、
+いずれかが空の場合はどのバケットも消費せずに拒否する。
+
+拒否したリクエストは api.metrics のカウンター
+rate_limit_rejected_total（ラベル: scope, bucket）に記録する。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from api.metrics import metrics
+
+DEFAULT_RATE_LIMIT_SETTINGS = {
+    "ENABLED": True,
+    "BACKEND": "local",
+    "CACHE_ALIAS": "default",
+    "MAX_KEYS": 100_000,
+    "RATES": {
+        "post": {"session": "10/min", "ip": "30/min", "thread": "120/min"},
+        "thread": {"session": "3/hour", "ip": "10/hour"},
+        "reaction": {"session": "30/min", "ip": "60/min"},
+    },
+}
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def get_rate_limit_settings() -> dict:
+    """デフォルト値をマージしたレート制限設定を返す.
+
+    Returns:
+        settings.RATE_LIMITS にデフォルト値を補完した辞書
+    """
+    return {**DEFAULT_RATE_LIMIT_SETTINGS, **getattr(settings, "RATE_LIMITS", {})}
+
+
+def parse_rate(rate: str) -> tuple[int, float]:
+    """ "容量/期間" 形式のレートを解釈する.
+
+    期間は s, m(in), h(our), d(ay) の先頭1文字で判定する。
+
+    Args:
+        rate: レート文字列（例: "10/min"）
+
+    Returns:
+        バケットの容量と、1秒あたりの補充トークン数
+    """
+    capacity, period = rate.split("/")
+    return int(capacity), int(capacity) / PERIODS[period[0]]
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """消費対象のトークンバケット.
+
+    Attributes:
+        name: バケットの単位（session, ip, thread）
+        key: バケットを一意に識別するキー
+        capacity: 最大トークン数
+        refill_rate: 1秒あたりの補充トークン数
+    """
+
+    name: str
+    key: str
+    capacity: int
+    refill_rate: float
+
+    def refill(self, state: tuple[float, float] | None, now: float) -> float:
+        """保存されていた状態から現在のトークン数を求める.
+
+        Args:
+            state: (トークン数, 更新時刻)。未使用のバケットはNone
+            now: 現在時刻
+
+        Returns:
+            現在のトークン数
+        """
+        if state is None:
+            return float(self.capacity)
+        tokens, updated_at = state
+        return min(self.capacity, tokens + (now - updated_at) * self.refill_rate)
+
+
+def take(
+    buckets: list[Bucket], states: list[tuple[float, float] | None], now: float
+) -> tuple[list[tuple[float, float]] | None, Bucket | None, float]:
+    """全てのバケットから1トークンずつ消費できるかを判定する.
+
+    Args:
+        buckets: 消費対象のバケット
+        states: バケットと同じ順序の保存済みの状態
+        now: 現在時刻
+
+    Returns:
+        許可した場合は (新しい状態, None, 0.0)、
+        拒否した場合は (None, 空だったバケット, 次のトークンまでの秒数)
+    """
+    levels = [
+        bucket.refill(state, now) for bucket, state in zip(buckets, states, strict=True)
+    ]
+    for bucket, tokens in zip(buckets, levels, strict=True):
+        if tokens < 1:
+            return None, bucket, (1 - tokens) / bucket.refill_rate
+    return [(tokens - 1, now) for tokens in levels], None, 0.0
+
+
+class LocalBucketStore:
+    """プロセス内のメモリにバケットを保持するストア.
+
+    MAX_KEYS件を超えると、最も長く使われていないバケットから破棄する。
+    破棄されたバケットは満タンとして扱われるため、制限が緩む方向にしか誤らない。
+    """
+
+    def __init__(self) -> None:
+        """空のストアを初期化する."""
+        self._lock = threading.Lock()
+        self._states: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def consume(self, buckets: list[Bucket], max_keys: int):
+        """バケットからトークンを消費する.
+
+        Args:
+            buckets: 消費対象のバケット
+            max_keys: 保持するバケットの最大数
+
+        Returns:
+            take() と同じ (状態, 空だったバケット, 待ち秒数) の組
+        """
+        now = time.monotonic()
+        with self._lock:
+            states = [self._states.get(bucket.key) for bucket in buckets]
+            result = take(buckets, states, now)
+            if result[0] is not None:
+                for bucket, state in zip(buckets, result[0], strict=True):
+                    self._states[bucket.key] = state
+                    self._states.move_to_end(bucket.key)
+                while len(self._states) > max_keys:
+                    self._states.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        """全てのバケットを破棄する."""
+        with self._lock:
+            self._states.clear()
+
+
+class CacheBucketStore:
+    """Djangoキャッシュにバケットを保持するストア.
+
+    複数プロセスでバケットを共有する場合に使う。
+    読み取りと書き込みは get_many / set_many の2往復で、
+    プロセス間の同時更新は後勝ちになるため、厳密な上限ではなく近似となる。
+    バケットは満タンに戻るまでの時間（同時に消費したうち最長のもの）で期限切れにする。
+    """
+
+    def consume(self, buckets: list[Bucket], max_keys: int):
+        """バケットからトークンを消費する.
+
+        Args:
+            buckets: 消費対象のバケット
+            max_keys: 未使用（キャッシュ側の上限に従う）
+
+        Returns:
+            take() と同じ (状態, 空だったバケット, 待ち秒数) の組
+        """
+        cache = caches[get_rate_limit_settings()["CACHE_ALIAS"]]
+        now = time.time()
+        keys = [f"ratelimit:{bucket.key}" for bucket in buckets]
+        stored = cache.get_many(keys)
+        result = take(buckets, [stored.get(key) for key in keys], now)
+        if result[0] is not None:
+            timeout = max(
+                (bucket.capacity - state[0]) / bucket.refill_rate
+                for bucket, state in zip(buckets, result[0], strict=True)
+            )
+            cache.set_many(dict(zip(keys, result[0], strict=True)), int(timeout) + 1)
+        return result
+
+
+local_buckets = LocalBucketStore()
+cache_buckets = CacheBucketStore()
+
+
+def get_bucket_store():
+    """設定 BACKEND に対応するバケットストアを返す.
+
+    Returns:
+        "cache" の場合はCacheBucketStore、それ以外はLocalBucketStore
+    """
+    if get_rate_limit_settings()["BACKEND"] == "cache":
+        return cache_buckets
+    return local_buckets
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """トークンバケットによるDRFのスロットル.
+
+    サブクラスで scope を指定し、設定 RATES[scope] に定義された単位
+    （session, ip, thread）のバケットから1トークンずつ消費する。
+    識別できない単位（セッション未確立、スレッド未指定など）は対象外とする。
+    セッションは署名付きCookieのsession_id（request.user_session_key）で識別し、
+    判定のためにセッションを解決・作成することはない。
+    Cookieを持たないクライアントは、セッション単位のレートをIPアドレス単位で
+    適用する（Cookieを捨てるだけでセッション単位の制限を逃れられないように）。
+
+    Attributes:
+        scope: レート設定のスコープ名
+    """
+
+    scope: str
+
+    def get_bucket_keys(self, request, view) -> dict[str, str | None]:
+        """単位ごとのバケットの識別子を返す.
+
+        Args:
+            request: HTTPリクエスト
+            view: 呼び出し元のビュー
+
+        Returns:
+            単位名から識別子（識別できない場合None）への辞書
+        """
+        ident = self.get_ident(request)
+        return {
+            "session": getattr(request, "user_session_key", None) or f"ip-{ident}",
+            "ip": ident,
+            "thread": self.get_thread_key(request, view),
+        }
+
+    def get_thread_key(self, request, view) -> str | None:
+        """対象スレッドの識別子を返す.
+
+        Args:
+            request: HTTPリクエスト
+            view: 呼び出し元のビュー
+
+        Returns:
+            スレッドID（対象スレッドがないスコープではNone）
+        """
+        return None
+
+    def allow_request(self, request, view) -> bool:
+        """リクエストを許可するかを判定する.
+
+        Args:
+            request: HTTPリクエスト
+            view: 呼び出し元のビュー
+
+        Returns:
+            全てのバケットにトークンが残っていた場合True
+        """
+        config = get_rate_limit_settings()
+        self.wait_seconds = None
+        if not config["ENABLED"]:
+            return True
+        identifiers = self.get_bucket_keys(request, view)
+        buckets = []
+        for name, rate in config["RATES"].get(self.scope, {}).items():
+            identifier = identifiers.get(name)
+            if identifier is None:
+                continue
+            capacity, refill_rate = parse_rate(rate)
+            buckets.append(
+                Bucket(
+                    name=name,
+                    key=f"{self.scope}:{name}:{identifier}",
+                    capacity=capacity,
+                    refill_rate=refill_rate,
+                )
+            )
+        if not buckets:
+            return True
+
+        states, empty, wait = get_bucket_store().consume(buckets, config["MAX_KEYS"])
+        if states is not None:
+            return True
+        self.wait_seconds = wait
+        metrics.increment(
+            "rate_limit_rejected_total", scope=self.scope, bucket=empty.name
+        )
+        return False
+
+    def wait(self) -> float | None:
+        """次のリクエストが許可されるまでの秒数を返す.
+
+        Returns:
+            Retry-Afterに設定する秒数
+        """
+        return self.wait_seconds
+
+
+class PostRateThrottle(TokenBucketThrottle):
+    """投稿作成のスロットル（セッション・IP・投稿先スレッド単位）."""
+
+    scope = "post"
+
+    def get_thread_key(self, request, view) -> str | None:
+        """投稿先スレッドの識別子を返す.
+
+        Args:
+            request: HTTPリクエスト
+            view: 呼び出し元のビュー
+
+        Returns:
+            リクエストボディのthreadの値（未指定の場合None）
+        """
+        thread = request.data.get("thread")
+        return str(thread)[:20] if thread not in (None, "") else None
+
+
+class ThreadRateThrottle(TokenBucketThrottle):
+    """スレッド作成のスロットル（セッション・IP単位）."""
+
+    scope = "thread"
+
+
+class ReactionRateThrottle(TokenBucketThrottle):
+    """リアクションのスロットル（セッション・IP単位）."""
+
+    scope = "reaction"
@@ -0,0 +1,53 @@
+"""バッチリクエストエンドポイント用シリアライザー.
+
+複数の読み取りサブリクエストをまとめたリクエストボディを検証する。
+"""
+
+from rest_framework import serializers
+
+
+class SubRequestSerializer(serializers.Serializer):
+    """バッチに含まれる1件のサブリクエスト.
+
+    Attributes:
+        id: レスポンスと対応付けるためのクライアント指定の識別子
+        method: HTTPメソッド（読み取り専用のためGETのみ）
+        path: api/v1 からの相対パス（クエリ文字列を含めてよい）
+    """
+
+    id = serializers.CharField(
+        required=False, max_length=100, help_text="Client-defined identifier"
+    )
+    method = serializers.ChoiceField(choices=["GET"], default="GET")
+    path = serializers.CharField(
+        max_length=2000, help_text="Path under /api/v1/, e.g. threads/?page=2"
+    )
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    """バッチリクエスト全体のシリアライザー.
+
+    Attributes:
+        requests: 実行するサブリクエストのリスト（最大件数は設定で制限）
+    """
+
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        """サブリクエストの件数を検証する.
+
+        Args:
+            value: サブリクエストのリスト
+
+        Returns:
+            検証済みのサブリクエストのリスト
+
+        Raises:
+            ValidationError: 件数が上限を超える場合
+        """
+        max_requests = self.context["max_requests"]
+        if len(value) > max_requests:
+            raise serializers.ValidationError(
+                f"At most {max_requests} requests are allowed per batch"
+            )
+        return value
@@ -0,0 +1,9 @@
+"""URL routing for batch endpoint."""
+
+from django.urls import path
+
+from api.v1.batch.views import batch
+
+urlpatterns = [
+    path("", batch, name="batch"),
+]
@@ -0,0 +1,125 @@
+"""バッチリクエストエンドポイント用ビュー.
+
+ホーム画面のように複数のエンドポイントを同時に必要とするクライアント向けに、
+読み取り専用のサブリクエストを1回のHTTPリクエストでまとめて実行する。
+サブリクエストはミドルウェアを経由せず、プロセス内でapi.v1のビューを直接呼び出すため、
+DB接続やリクエスト単位の設定（レプリカ読み取りなど）を親リクエストと共有する。
+"""
+
+from django.conf import settings
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve, reverse
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from api.middleware.replica import replica_safe
+from api.v1.batch.serializers import BatchRequestSerializer
+
+DEFAULT_BATCH_SETTINGS = {
+    "MAX_REQUESTS": 10,
+}
+
+SUB_REQUEST_URLCONF = "api.v1.urls"
+
+# NOTE: サブリクエストには親リクエストのボディを引き継がない
+_BODY_META_KEYS = ("CONTENT_LENGTH", "CONTENT_TYPE", "wsgi.input")
+
+
+def get_batch_settings() -> dict:
+    """デフォルト値をマージしたバッチリクエスト設定を返す.
+
+    Returns:
+        settings.API_BATCH にデフォルト値を補完した辞書
+    """
+    return {**DEFAULT_BATCH_SETTINGS, **getattr(settings, "API_BATCH", {})}
+
+
+@replica_safe
+@api_view(["POST"])
+def batch(request):
+    """複数の読み取りサブリクエストをまとめて実行する.
+
+    Args:
+        request: サブリクエストのリストを含むHTTPリクエスト
+
+    Returns:
+        サブリクエストと同じ順序で、各レスポンスのステータスとボディを含むデータ
+    """
+    serializer = BatchRequestSerializer(
+        data=request.data,
+        context={"max_requests": get_batch_settings()["MAX_REQUESTS"]},
+    )
+    serializer.is_valid(raise_exception=True)
+
+    prefix = reverse("batch").removesuffix("batch/")
+    responses = [
+        _execute(request, sub_request, prefix)
+        for sub_request in serializer.validated_data["requests"]
+    ]
+    return Response({"responses": responses})
+
+
+def _execute(parent, sub_request: dict, prefix: str) -> dict:
+    """サブリクエストを解決し、対応するビューを呼び出す.
+
+    Args:
+        parent: 親のリクエスト
+        sub_request: 検証済みのサブリクエスト
+        prefix: api/v1 のURLプレフィックス（例: /api/v1/）
+
+    Returns:
+        id、status、bodyを持つサブレスポンス
+    """
+    path, _, query = sub_request["path"].partition("?")
+    path = path.removeprefix(prefix).lstrip("/")
+    result = {"status": 404, "body": {"detail": "Not found."}}
+    if "id" in sub_request:
+        result = {"id": sub_request["id"], **result}
+
+    try:
+        match = resolve(f"/{path}", urlconf=SUB_REQUEST_URLCONF)
+    except Resolver404:
+        return result
+    if match.func is batch:
+        result.update(status=400, body={"detail": "Batch requests cannot be nested"})
+        return result
+
+    http_request = _build_request(parent, prefix + path, query)
+    http_request.resolver_match = match
+    response = match.func(http_request, *match.args, **match.kwargs)
+    result.update(status=response.status_code, body=getattr(response, "data", None))
+    return result
+
+
+def _build_request(parent, path: str, query: str) -> HttpRequest:
+    """親リクエストのヘッダーと認証情報・匿名セッションを引き継いだGETリクエストを作成する.
+
+    Args:
+        parent: 親のリクエスト
+        path: サブリクエストのパス
+        query: サブリクエストのクエリ文字列
+
+    Returns:
+        サブリクエスト用のHttpRequest
+    """
+    request = HttpRequest()
+    request.method = "GET"
+    request.path = request.path_info = path
+    request.META = {
+        key: value for key, value in parent.META.items() if key not in _BODY_META_KEYS
+    }
+    request.META.update(
+        REQUEST_METHOD="GET",
+        PATH_INFO=path,
+        QUERY_STRING=query,
+        HTTP_ACCEPT="application/json",
+    )
+    request.GET = QueryDict(query)
+    request.COOKIES = parent.COOKIES
+    # NOTE: サブレスポンスは response.data をボディに使うため、
+    # ストリーミングレスポンスを返さないようビューに知らせる
+    request.is_batch_sub_request = True
+    for attribute in ("user", "session", "user_session", "user_session_key"):
+        if hasattr(parent, attribute):
+            setattr(request, attribute, getattr(parent, attribute))
+    return request
@@ -0,0 +1,26 @@
+"""カテゴリの高速読み取りパス.
+
+CategoryListSerializer、CategorySerializerと同一の出力を
+シリアライザーを経由せずに組み立てる。
+スレッド数は非正規化カウンター（Category.thread_count）をそのまま返す。
+"""
+
+from api.v1.fastpath import Column, FastReader
+
+CATEGORY_LIST_READER = FastReader(
+    Column("id"),
+    Column("name"),
+    Column("slug"),
+    Column("thread_count"),
+)
+
+CATEGORY_DETAIL_READER = FastReader(
+    Column("id"),
+    Column("name"),
+    Column("slug"),
+    Column("description"),
+    Column("display_order"),
+    Column("thread_count"),
+    Column("created_at", datetime=True),
+    Column("updated_at", datetime=True),
+)
@@ -19,7 +19,6 @@ class CategorySerializer(serializers.ModelSerializer):
     """
 
     thread_count = serializers.IntegerField(
-        source="threads.count",
         read_only=True,
         help_text="Number of threads in this category",
     )
@@ -50,7 +49,6 @@ class CategoryListSerializer(serializers.ModelSerializer):
     """
 
     thread_count = serializers.IntegerField(
-        source="threads.count",
         read_only=True,
         help_text="Number of threads in this category",
     )
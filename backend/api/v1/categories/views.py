@@ -5,25 +5,36 @@
 
 from rest_framework import viewsets
 from rest_framework.decorators import action
-from rest_framework.response import Response
 
 from api.models import Category
+from api.v1.categories.readers import CATEGORY_DETAIL_READER, CATEGORY_LIST_READER
 from api.v1.categories.serializers import CategoryListSerializer, CategorySerializer
+from api.v1.fastpath import FastReadMixin
+from api.v1.pagination import ThreadCursorPagination
+from api.v1.threads.readers import THREAD_LIST_READER
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(FastReadMixin, viewsets.ReadOnlyModelViewSet):
     """カテゴリ操作用ViewSet.
 
     カテゴリの読み取り専用エンドポイントを提供する。
     一覧表示、詳細表示、およびカテゴリに属するスレッドの取得が可能。
+    いずれもシリアライザーを経由しない高速パスで応答し、
+    ?fields= / ?omit= による出力フィールドの絞り込みに対応する。
 
     Attributes:
         queryset: カテゴリの全件QuerySet
         serializer_class: デフォルトのシリアライザー
+        list_reader: 一覧表示用のリーダー
+        detail_reader: 詳細表示用のリーダー
+        columnar_actions: 列指向表現に対応するアクション名
     """
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    list_reader = CATEGORY_LIST_READER
+    detail_reader = CATEGORY_DETAIL_READER
+    columnar_actions = ("list", "retrieve", "threads")
 
     def get_serializer_class(self):
         """アクションに応じた適切なシリアライザーを返す.
@@ -41,15 +52,15 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
         """特定カテゴリのスレッド一覧を取得する.
 
         Args:
-            request: HTTPリクエスト
+            request: HTTPリクエスト（?cursor= で続きのページを取得）
             pk: カテゴリID
 
         Returns:
-            カテゴリに属するスレッドのリスト
+            カテゴリに属するスレッドの1ページ分（作成日時の新しい順）と
+            前後のページのURL
         """
         category = self.get_object()
-        from api.v1.threads.serializers import ThreadListSerializer
-
-        threads = category.threads.all()
-        serializer = ThreadListSerializer(threads, many=True)
-        return Response(serializer.data)
+        reader = THREAD_LIST_READER.for_request(request)
+        return self.paginate_rows_by_cursor(
+            reader, category.threads.all(), ThreadCursorPagination()
+        )
@@ -0,0 +1,694 @@
+"""シリアライザーを経由しない読み取り専用の高速パス.
+
+DRFのModelSerializerはモデルインスタンスを丸ごと読み込み、
+フィールドごとに to_representation を呼び出すため、
+一覧ページや長いスレッドではCPU時間の大半を占める。
+
+このモジュールはレスポンスに必要な列だけを values() で取得し、
+事前に組み立てたフィールドマッパーで辞書を生成する。
+関連データ（タグ、リアクション集計など）は主キーのリストから一括取得する。
+出力は対応するシリアライザーと完全に一致しなければならない。
+
+子オブジェクトが多い場合（長いスレッドの投稿など）は、レスポンス全体を
+メモリ上に組み立てずに、子の行を QuerySet.iterator() でチャンクごとに読み、
+エンコードしたJSONを順に送るストリーミングレスポンスで返す（stream_nested()）。
+出力はバッファリングした場合とバイト単位で一致する。
+
+クエリパラメーター ?fields= / ?omit= で出力フィールドを絞り込むと、
+不要な列・JOIN・関連データの一括取得もクエリから取り除かれる。
+
+列指向表現（Acceptで列指向形式を要求された場合）では、
+一覧を列名のヘッダーと値の配列の組 {"fields": [...], "rows": [[...], ...]} で返し、
+日時をUNIXエポックからのミリ秒で表す。
+"""
+
+import datetime
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from itertools import batched
+from operator import itemgetter
+from typing import Any
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from api.renderers import (
+    ColumnarJSONRenderer,
+    FastJSONRenderer,
+    MessagePackRenderer,
+    dumps,
+    msgpack,
+)
+
+FIELDS_PARAM = "fields"
+OMIT_PARAM = "omit"
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.UTC)
+MILLISECOND = datetime.timedelta(milliseconds=1)
+
+DEFAULT_STREAMING_SETTINGS = {
+    "ENABLED": True,
+    "MIN_ITEMS": 500,
+    "CHUNK_SIZE": 200,
+}
+
+
+def get_streaming_settings() -> dict:
+    """デフォルト値をマージしたストリーミングレスポンス設定を返す.
+
+    Returns:
+        settings.STREAMING_RESPONSES にデフォルト値を補完した辞書
+    """
+    return {
+        **DEFAULT_STREAMING_SETTINGS,
+        **getattr(settings, "STREAMING_RESPONSES", {}),
+    }
+
+
+@dataclass(frozen=True)
+class Column:
+    """values()の列をそのまま、または日時表現に変換して出力するフィールド.
+
+    Attributes:
+        name: 出力キー
+        source: values()に渡すルックアップ（省略時はnameと同じ）
+        datetime: DRFのDateTimeFieldと同じISO 8601表現に変換するかどうか
+    """
+
+    name: str
+    source: str | None = None
+    datetime: bool = False
+
+    @property
+    def lookup(self) -> str:
+        """values()に渡すルックアップを返す.
+
+        Returns:
+            sourceが指定されていればsource、なければname
+        """
+        return self.source or self.name
+
+
+@dataclass(frozen=True)
+class Related:
+    """主キーのリストから一括取得した値を出力するフィールド.
+
+    Attributes:
+        name: 出力キー
+        loader: 主キーのリストを受け取り、主キーから値への辞書を返す関数
+        default: loaderの結果に含まれない行に使う値のファクトリ
+    """
+
+    name: str
+    loader: Callable[[list[int]], dict[int, Any]]
+    default: Callable[[], Any]
+
+
+@dataclass(frozen=True)
+class Nested:
+    """別のリーダーで組み立てた子オブジェクトのリストを出力するフィールド.
+
+    列指向表現では子オブジェクトも列指向形式で出力する。
+
+    Attributes:
+        name: 出力キー
+        reader: 子オブジェクトのリーダー（FastReader）
+        queryset: 親の主キーのリストを受け取り、子のクエリセットを返す関数
+        key: 子の行で親の主キーを表すルックアップ
+    """
+
+    name: str
+    reader: "FastReader"
+    queryset: Callable[[list[int]], Any]
+    key: str
+
+
+@dataclass(frozen=True)
+class Computed:
+    """複数の列から値を計算して出力するフィールド.
+
+    Attributes:
+        name: 出力キー
+        lookups: values()に渡し、computeに順に渡すルックアップ
+        compute: 列の値を受け取り、出力する値を返す関数
+    """
+
+    name: str
+    lookups: tuple[str, ...]
+    compute: Callable[..., Any]
+
+
+def epoch_milliseconds(value: datetime.datetime | None) -> int | None:
+    """日時をUNIXエポックからのミリ秒に変換する.
+
+    Args:
+        value: タイムゾーン付きの日時
+
+    Returns:
+        エポックミリ秒（Noneの場合はNone）
+    """
+    if value is None:
+        return None
+    return (value - EPOCH) // MILLISECOND
+
+
+def datetime_representation() -> Callable[[Any], str | None]:
+    """DRFのDateTimeField.to_representationと同じ変換関数を返す.
+
+    現在のタイムゾーン（settings.TIME_ZONE）を一度だけ解決し、
+    行ごとの変換ではタイムゾーン変換とisoformatのみを行う。
+
+    Returns:
+        日時をISO 8601文字列に変換する関数
+    """
+    tz = timezone.get_current_timezone()
+
+    def to_representation(value):
+        if not value:
+            return None
+        value = value.astimezone(tz).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return to_representation
+
+
+class FastReader:
+    """values()の行からレスポンス辞書を組み立てるリーダー.
+
+    Attributes:
+        fields: 出力順に並んだフィールド定義
+    """
+
+    def __init__(self, *fields: Column | Computed | Related | Nested) -> None:
+        """フィールド定義からリーダーを作成する.
+
+        Args:
+            *fields: 出力順に並んだフィールド定義
+        """
+        self.fields = fields
+
+    def names(self) -> list[str]:
+        """出力キーのリストを出力順に返す.
+
+        Returns:
+            各フィールドの出力キー
+        """
+        return [field.name for field in self.fields]
+
+    def select(self, names: Iterable[str]) -> "FastReader":
+        """指定したフィールドだけを出力するリーダーを返す.
+
+        Args:
+            names: 出力するフィールドの出力キー
+
+        Returns:
+            フィールドを絞り込んだリーダー（出力順は元のまま）
+        """
+        names = set(names)
+        return FastReader(*(field for field in self.fields if field.name in names))
+
+    def for_request(self, request) -> "FastReader":
+        """クエリパラメーターの ?fields= / ?omit= を適用したリーダーを返す.
+
+        どちらもカンマ区切りで出力キーを指定する。
+        fieldsは出力するフィールドを、omitは除外するフィールドを表し、
+        両方指定した場合はfieldsで絞り込んだ後にomitを除外する。
+
+        Args:
+            request: DRFのリクエスト
+
+        Returns:
+            フィールドを絞り込んだリーダー（指定がなければ自身）
+
+        Raises:
+            ValidationError: 存在しないフィールドが指定された場合
+        """
+        params = request.query_params
+        if FIELDS_PARAM not in params and OMIT_PARAM not in params:
+            return self
+        names = self.names()
+        selected = set(names)
+        for param in (FIELDS_PARAM, OMIT_PARAM):
+            if param not in params:
+                continue
+            requested = {name for name in params[param].split(",") if name}
+            unknown = requested.difference(names)
+            if unknown:
+                raise ValidationError(
+                    {param: [f"Unknown field(s): {', '.join(sorted(unknown))}"]}
+                )
+            if param == FIELDS_PARAM:
+                selected &= requested
+            else:
+                selected -= requested
+        return self.select(selected)
+
+    def lookups(self) -> list[str]:
+        """values()に渡すルックアップのリストを返す.
+
+        Returns:
+            主キーと各Column・Computedのルックアップ（重複なし）
+        """
+        lookups = ["id"]
+        for field in self.fields:
+            if isinstance(field, Column):
+                candidates = (field.lookup,)
+            elif isinstance(field, Computed):
+                candidates = field.lookups
+            else:
+                continue
+            lookups += [lookup for lookup in candidates if lookup not in lookups]
+        return lookups
+
+    def values(self, queryset, *extra: str):
+        """クエリセットを必要な列だけを取得するvalues()クエリセットに変換する.
+
+        Args:
+            queryset: 対象モデルのクエリセット
+            *extra: 出力しないが行に含めたい追加のルックアップ
+
+        Returns:
+            辞書を返すvalues()クエリセット
+        """
+        lookups = self.lookups()
+        lookups += [lookup for lookup in extra if lookup not in lookups]
+        return queryset.select_related(None).prefetch_related(None).values(*lookups)
+
+    def build(self, rows: Iterable[dict], *, columnar: bool = False) -> list[dict]:
+        """values()の行からレスポンス辞書のリストを組み立てる.
+
+        Args:
+            rows: values()クエリセットまたはその行のリスト
+            columnar: 日時をエポックミリ秒、子オブジェクトを列指向形式で出力するか
+
+        Returns:
+            シリアライザーの出力と同じ構造の辞書のリスト
+        """
+        rows = list(rows)
+        mapper = self.compile([row["id"] for row in rows], columnar=columnar)
+        return [mapper(row) for row in rows]
+
+    def build_chunks(
+        self, rows: Iterable[dict], chunk_size: int
+    ) -> Iterator[list[dict]]:
+        """values()の行を chunk_size 件ずつ組み立てる.
+
+        関連データはチャンクごとに一括取得するため、
+        一度にメモリに載る行と関連データはチャンク1つ分に限られる。
+
+        Args:
+            rows: values()の行のイテレーター（QuerySet.iterator() など）
+            chunk_size: 1チャンクの行数
+
+        Yields:
+            シリアライザーの出力と同じ構造の辞書のリスト
+        """
+        for chunk in batched(rows, chunk_size, strict=False):
+            mapper = self.compile([row["id"] for row in chunk])
+            yield [mapper(row) for row in chunk]
+
+    def build_columns(self, rows: Iterable[dict]) -> dict:
+        """values()の行から列指向形式のレスポンスを組み立てる.
+
+        Args:
+            rows: values()クエリセットまたはその行のリスト
+
+        Returns:
+            列名のリスト fields と、値の配列のリスト rows を持つ辞書
+        """
+        rows = list(rows)
+        getters = [
+            getter
+            for _, getter in self.getters([row["id"] for row in rows], columnar=True)
+        ]
+        return {
+            "fields": self.names(),
+            "rows": [[getter(row) for getter in getters] for row in rows],
+        }
+
+    def group(self, rows: Iterable[dict], key: str, *, columnar: bool) -> dict:
+        """行を親の主キーごとにまとめて組み立てる.
+
+        Args:
+            rows: values()の行（keyを含む）
+            key: 親の主キーを表すルックアップ
+            columnar: 列指向形式で組み立てるかどうか
+
+        Returns:
+            親の主キーから、辞書のリストまたは列指向形式の辞書への辞書
+        """
+        grouped: dict[Any, list[dict]] = defaultdict(list)
+        for row in rows:
+            grouped[row[key]].append(row)
+        if columnar:
+            return {
+                parent: self.build_columns(group) for parent, group in grouped.items()
+            }
+        mapper = self.compile(
+            [row["id"] for group in grouped.values() for row in group]
+        )
+        return {
+            parent: [mapper(row) for row in group] for parent, group in grouped.items()
+        }
+
+    def compile(
+        self, ids: list[int], *, columnar: bool = False
+    ) -> Callable[[dict], dict]:
+        """行を辞書に変換するマッパーを組み立てる.
+
+        Args:
+            ids: 変換対象の行の主キー
+            columnar: 日時をエポックミリ秒、子オブジェクトを列指向形式で出力するか
+
+        Returns:
+            1行を受け取りレスポンス辞書を返す関数
+        """
+        getters = self.getters(ids, columnar=columnar)
+
+        def mapper(row: dict) -> dict:
+            return {name: getter(row) for name, getter in getters}
+
+        return mapper
+
+    def getters(
+        self, ids: list[int], *, columnar: bool = False
+    ) -> list[tuple[str, Callable[[dict], Any]]]:
+        """フィールドごとに行から値を取り出すゲッターを組み立てる.
+
+        関連データは ids についてここで一括取得し、ゲッターに束縛する。
+
+        Args:
+            ids: 変換対象の行の主キー
+            columnar: 日時をエポックミリ秒、子オブジェクトを列指向形式で出力するか
+
+        Returns:
+            出力キーとゲッターの組のリスト（出力順）
+        """
+        getters: list[tuple[str, Callable[[dict], Any]]] = []
+        to_datetime = epoch_milliseconds if columnar else None
+        for field in self.fields:
+            if isinstance(field, Related):
+                values = field.loader(ids) if ids else {}
+                getters.append((field.name, _related_getter(values, field.default)))
+            elif isinstance(field, Nested):
+                getters.append((field.name, _nested_getter(field, ids, columnar)))
+            elif isinstance(field, Computed):
+                getters.append((field.name, _computed_getter(field)))
+            elif field.datetime:
+                to_datetime = to_datetime or datetime_representation()
+                getters.append(
+                    (field.name, _datetime_getter(field.lookup, to_datetime))
+                )
+            else:
+                getters.append((field.name, itemgetter(field.lookup)))
+        return getters
+
+
+def stream_json(data: dict, key: str, chunks: Iterable[list]) -> Iterator[bytes]:
+    """辞書の1つのキーの配列をチャンクごとに書き出すJSONを生成する.
+
+    FastJSONRenderer と同じコンパクトなJSONを、key の前のキー、
+    配列の要素のチャンク、key の後のキーの順に少しずつエンコードする。
+
+    Args:
+        data: 出力する辞書（key の値は無視される）
+        key: 配列をストリーミングするキー
+        chunks: 配列の要素のチャンク
+
+    Yields:
+        UTF-8でエンコードされたJSONの断片
+    """
+    names = list(data)
+    position = names.index(key)
+    before = {name: data[name] for name in names[:position]}
+    after = {name: data[name] for name in names[position + 1 :]}
+    head = dumps(before)[:-1] + b"," if before else b"{"
+    yield head + dumps(key) + b":["
+    separator = b""
+    for chunk in chunks:
+        if chunk:
+            yield separator + b",".join(dumps(item) for item in chunk)
+            separator = b","
+    yield b"]," + dumps(after)[1:] if after else b"]}"
+
+
+def _datetime_getter(lookup: str, to_datetime: Callable) -> Callable[[dict], Any]:
+    """日時列を変換して返すゲッターを作成する.
+
+    Args:
+        lookup: 行のキー
+        to_datetime: 日時の変換関数
+
+    Returns:
+        行から変換済みの日時表現を返す関数
+    """
+    return lambda row: to_datetime(row[lookup])
+
+
+def _computed_getter(field: Computed) -> Callable[[dict], Any]:
+    """複数の列から値を計算するゲッターを作成する.
+
+    Args:
+        field: 計算フィールドの定義
+
+    Returns:
+        行の列の値をcomputeに渡した結果を返す関数
+    """
+    getter = itemgetter(*field.lookups)
+    if len(field.lookups) == 1:
+        return lambda row: field.compute(getter(row))
+    return lambda row: field.compute(*getter(row))
+
+
+def _related_getter(
+    values: dict[int, Any], default: Callable[[], Any]
+) -> Callable[[dict], Any]:
+    """一括取得済みの関連データを返すゲッターを作成する.
+
+    Args:
+        values: 主キーから値への辞書
+        default: 値がない行に使う値のファクトリ
+
+    Returns:
+        行の主キーに対応する値（なければデフォルト値）を返す関数
+    """
+    return lambda row: values[row["id"]] if row["id"] in values else default()
+
+
+def _nested_getter(field: Nested, ids: list[int], columnar: bool) -> Callable:
+    """子オブジェクトを一括取得し、親ごとのリストを返すゲッターを作成する.
+
+    Args:
+        field: 子オブジェクトのフィールド定義
+        ids: 親の主キー
+        columnar: 列指向形式で組み立てるかどうか
+
+    Returns:
+        行の主キーに対応する子オブジェクトを返す関数
+    """
+    reader = field.reader
+    values = {}
+    if ids:
+        rows = reader.values(field.queryset(ids), field.key)
+        values = reader.group(rows, field.key, columnar=columnar)
+    if columnar:
+        return _related_getter(values, lambda: {"fields": reader.names(), "rows": []})
+    return _related_getter(values, list)
+
+
+class FastReadMixin:
+    """list/retrieveをFastReaderで応答するViewSet用ミックスイン.
+
+    columnar_actions に含まれるアクションでは、Acceptヘッダーで
+    列指向表現（JSON / MessagePack）を選択できる。
+
+    Attributes:
+        list_reader: 一覧表示に使うリーダー
+        detail_reader: 詳細表示に使うリーダー
+        columnar_actions: 列指向表現に対応するアクション名
+    """
+
+    list_reader: FastReader
+    detail_reader: FastReader
+    columnar_actions: tuple[str, ...] = ("list", "retrieve")
+
+    def get_renderers(self):
+        """アクションに応じて列指向表現のレンダラーを追加する.
+
+        Returns:
+            レンダラーのインスタンスのリスト
+        """
+        renderers = super().get_renderers()
+        if self.action in self.columnar_actions:
+            renderers.append(ColumnarJSONRenderer())
+            if msgpack is not None:
+                renderers.append(MessagePackRenderer())
+        return renderers
+
+    @property
+    def columnar(self) -> bool:
+        """列指向表現のレンダラーが選択されたかどうかを返す.
+
+        Returns:
+            列指向表現で応答する場合True
+        """
+        renderer = getattr(self.request, "accepted_renderer", None)
+        return getattr(renderer, "columnar", False)
+
+    def represent_rows(self, reader: FastReader, rows: Iterable[dict]):
+        """選択された表現で行のリストを組み立てる.
+
+        Args:
+            reader: 出力を組み立てるリーダー
+            rows: values()の行
+
+        Returns:
+            辞書のリスト、または列指向表現の辞書
+        """
+        if self.columnar:
+            return reader.build_columns(rows)
+        return reader.build(rows)
+
+    def represent_row(self, reader: FastReader, row: dict) -> dict:
+        """選択された表現で単一の行を組み立てる.
+
+        Args:
+            reader: 出力を組み立てるリーダー
+            row: values()の行
+
+        Returns:
+            レスポンス辞書
+        """
+        return reader.build([row], columnar=self.columnar)[0]
+
+    def can_stream(self, reader: FastReader, name: str, count: int) -> bool:
+        """子オブジェクトのリストをストリーミングで返すかどうかを判定する.
+
+        Args:
+            reader: 出力を組み立てるリーダー
+            name: 子オブジェクトのフィールドの出力キー
+            count: 子オブジェクトの件数（非正規化カウンターの値）
+
+        Returns:
+            設定が有効で、件数がMIN_ITEMS以上、フィールドが出力対象であり、
+            インデントなしのJSONで応答する場合True（バッチのサブリクエストでは
+            ボディを組み立てる必要があるため常にFalse）
+        """
+        config = get_streaming_settings()
+        renderer = getattr(self.request, "accepted_renderer", None)
+        return (
+            config["ENABLED"]
+            and not getattr(self.request, "is_batch_sub_request", False)
+            and count >= config["MIN_ITEMS"]
+            and name in reader.names()
+            and type(renderer) is FastJSONRenderer
+            and renderer.get_indent(self.request.accepted_media_type, {}) is None
+        )
+
+    def stream_nested(
+        self, reader: FastReader, row: dict, name: str
+    ) -> StreamingHttpResponse:
+        """子オブジェクトのリストを逐次エンコードするストリーミングレスポンスを返す.
+
+        子の行は QuerySet.iterator() でCHUNK_SIZE件ずつ読み
+        （PostgreSQLではサーバーサイドカーソル）、チャンクごとに関連データを
+        取得してJSONに書き出す。レスポンスの送信はビューを抜けた後に行われるため、
+        読み取り先のデータベースはここで確定しておく。
+
+        Args:
+            reader: 出力を組み立てるリーダー
+            row: 親のvalues()の行
+            name: ストリーミングする子オブジェクトのフィールドの出力キー
+
+        Returns:
+            represent_row() と同じJSONを返すストリーミングレスポンス
+        """
+        chunk_size = get_streaming_settings()["CHUNK_SIZE"]
+        field = next(field for field in reader.fields if field.name == name)
+        data = reader.select(set(reader.names()) - {name}).build([row])[0]
+        data = {key: data.get(key) for key in reader.names()}
+        queryset = field.queryset([row["id"]])
+        children = field.reader.values(queryset.using(queryset.db)).iterator(
+            chunk_size=chunk_size
+        )
+        return StreamingHttpResponse(
+            stream_json(data, name, field.reader.build_chunks(children, chunk_size)),
+            content_type="application/json",
+        )
+
+    def paginate_rows_by_cursor(self, reader: FastReader, queryset, paginator):
+        """キーセットページネーションで1ページ分の一覧レスポンスを返す.
+
+        カーソルの位置を求めるため、並び順のフィールドは
+        出力対象でなくても行に含めて取得する。
+
+        Args:
+            reader: 出力を組み立てるリーダー
+            queryset: 対象モデルのクエリセット
+            paginator: CursorPaginationのインスタンス
+
+        Returns:
+            next / previous / results を含むレスポンス
+        """
+        ordering = [field.lstrip("-") for field in paginator.ordering]
+        rows = reader.values(queryset, *ordering)
+        page = paginator.paginate_queryset(rows, self.request, view=self)
+        return paginator.get_paginated_response(self.represent_rows(reader, page))
+
+    def list(self, request, *args, **kwargs):
+        """ページネーション済みの一覧を取得する.
+
+        Args:
+            request: HTTPリクエスト
+            *args: 可変長引数
+            **kwargs: キーワード引数
+
+        Returns:
+            list_readerの出力形式の一覧
+        """
+        reader = self.list_reader.for_request(request)
+        rows = reader.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.represent_rows(reader, page))
+        return Response(self.represent_rows(reader, rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        """単一のオブジェクトを取得する.
+
+        Args:
+            request: HTTPリクエスト
+            *args: 可変長引数
+            **kwargs: キーワード引数
+
+        Returns:
+            detail_readerの出力形式のデータ
+        """
+        reader = self.detail_reader.for_request(request)
+        return Response(self.represent_row(reader, self.get_row(reader)))
+
+    def get_row(self, reader: FastReader, *extra: str) -> dict:
+        """URLのルックアップに一致する行を取得する.
+
+        Args:
+            reader: 取得する列を決めるリーダー
+            *extra: 出力しないが行に含めたい追加のルックアップ
+
+        Returns:
+            values()の行
+
+        Raises:
+            Http404: 該当する行が存在しない場合
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return get_object_or_404(
+            reader.values(self.filter_queryset(self.get_queryset()), *extra),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+        )
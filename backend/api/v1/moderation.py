@@ -0,0 +1,141 @@
+"""一括モデレーションエンドポイント用の共通シリアライザー.
+
+スレッド・投稿の bulk アクションは、対象を主キーのリスト（ids）または
+絞り込み条件（filter）のどちらか一方で指定する。どちらの場合も対象は
+BULK_MODERATION の MAX_IDS 件まで。処理は
+api.services.moderation がチャンクごとの集合操作で行う。
+"""
+
+from django.db.models import QuerySet
+from rest_framework import serializers
+
+from api.services.moderation import get_moderation_settings
+
+
+class BulkFilterSerializer(serializers.Serializer):
+    """一括操作の対象を絞り込む条件の基底クラス.
+
+    サブクラスは FILTERS に条件名からルックアップへの対応を定義する。
+    空の条件は全件を対象にしてしまうため受け付けない。
+
+    Attributes:
+        author_name: 作成者の一時名（完全一致）
+        q: 本文・タイトルの部分一致
+        created_after: この日時以降に作成された行
+        created_before: この日時より前に作成された行
+    """
+
+    FILTERS: dict[str, str] = {
+        "author_name": "author_session__temporary_name",
+        "created_after": "created_at__gte",
+        "created_before": "created_at__lt",
+    }
+
+    author_name = serializers.CharField(required=False)
+    q = serializers.CharField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        """少なくとも1つの条件が指定されていることを確認する.
+
+        Args:
+            attrs: 検証済みの条件
+
+        Returns:
+            検証済みの条件
+
+        Raises:
+            ValidationError: 条件が1つも指定されていない場合
+        """
+        if not attrs:
+            raise serializers.ValidationError("At least one condition is required.")
+        return attrs
+
+    def apply(self, queryset: QuerySet, conditions: dict) -> QuerySet:
+        """条件をクエリセットに適用する.
+
+        Args:
+            queryset: 対象モデルのクエリセット
+            conditions: 検証済みの条件
+
+        Returns:
+            絞り込んだクエリセット
+        """
+        return queryset.filter(
+            **{self.FILTERS[name]: value for name, value in conditions.items()}
+        )
+
+
+class BulkActionSerializer(serializers.Serializer):
+    """一括操作の要求の基底クラス.
+
+    サブクラスは action（ChoiceField）と filter（BulkFilterSerializer）を定義する。
+
+    Attributes:
+        ids: 対象の主キー（BULK_MODERATION の MAX_IDS 件まで）
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False
+    )
+
+    def validate_ids(self, value):
+        """主キーの件数が上限以下であることを確認する.
+
+        Args:
+            value: 主キーのリスト
+
+        Returns:
+            重複を除いた主キーのリスト
+
+        Raises:
+            ValidationError: 件数が上限を超える場合
+        """
+        limit = get_moderation_settings()["MAX_IDS"]
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} ids are allowed.")
+        return list(dict.fromkeys(value))
+
+    def validate(self, attrs):
+        """ids と filter のどちらか一方だけが指定されていることを確認する.
+
+        Args:
+            attrs: 検証済みの要求
+
+        Returns:
+            検証済みの要求
+
+        Raises:
+            ValidationError: 両方指定された場合、またはどちらも指定されていない場合
+        """
+        if ("ids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Specify exactly one of ids or filter.")
+        return attrs
+
+    def target(self, queryset: QuerySet) -> QuerySet:
+        """要求の対象をクエリセットとして返す.
+
+        filter の場合も対象は MAX_IDS 件までとし、一致した主キーをここで確定する。
+        1回の要求で処理する行数と、それを囲むトランザクションの大きさを
+        ids の場合と同じ上限に収めるため。
+
+        Args:
+            queryset: 対象モデルの全件のクエリセット
+
+        Returns:
+            ids または filter で絞り込んだクエリセット
+
+        Raises:
+            ValidationError: filter に一致する行が MAX_IDS 件を超える場合
+        """
+        if "ids" in self.validated_data:
+            return queryset.filter(pk__in=self.validated_data["ids"])
+        matches = self.fields["filter"].apply(queryset, self.validated_data["filter"])
+        limit = get_moderation_settings()["MAX_IDS"]
+        ids = list(matches.order_by("pk").values_list("pk", flat=True)[: limit + 1])
+        if len(ids) > limit:
+            raise serializers.ValidationError(
+                {"filter": [f"Matches more than {limit} rows, narrow the filter."]}
+            )
+        return queryset.filter(pk__in=ids)
@@ -0,0 +1,50 @@
+"""v1エンドポイント用のページネーション.
+
+件数の多いスレッド一覧には、OFFSETとCOUNT(*)を使わない
+キーセット（カーソル）ページネーションを用いる。
+どのページも並び順のインデックスを先頭から必要な件数だけ読むため、
+スレッド数に関係なく一定のコストで応答できる。
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class ThreadCursorPagination(CursorPagination):
+    """スレッド一覧用のキーセットページネーション.
+
+    作成日時の新しい順に並べ、前ページ最後の作成日時をカーソルとして
+    次ページを WHERE created_at < カーソル で取得する。
+    作成日時が同じスレッドはidで順序を固定する。
+
+    Attributes:
+        ordering: 並び順（先頭のフィールドがカーソルの位置になる）
+        page_size_query_param: 1ページの件数を指定するクエリパラメーター
+        max_page_size: 指定可能な最大件数
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class TaggedThreadCursorPagination(CursorPagination):
+    """タグごとのスレッド一覧用のキーセットページネーション.
+
+    スレッドではなくタグ付け（ThreadTag）の行をページングし、
+    (tag, 並び替えキー) のインデックスの範囲読み取りだけで
+    1ページ分のスレッドIDを決める。
+
+    Attributes:
+        orderings: ?sort= の値ごとの並び順
+        ordering: 既定の並び順（最終投稿日時の新しい順）
+        page_size_query_param: 1ページの件数を指定するクエリパラメーター
+        max_page_size: 指定可能な最大件数
+    """
+
+    orderings = {
+        "recent": ("-last_post_at", "-thread_id"),
+        "momentum": ("-momentum", "-thread_id"),
+    }
+    ordering = orderings["recent"]
+    page_size_query_param = "page_size"
+    max_page_size = 100
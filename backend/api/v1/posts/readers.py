@@ -0,0 +1,74 @@
+"""投稿の高速読み取りパス.
+
+PostSerializerと同一の出力をシリアライザーを経由せずに組み立てる。
+リアクション集計と返信数は投稿ごとのクエリではなく、
+ページ内の投稿についてまとめて集計する。表示用HTMLは保存時にレンダリングした
+content_html を返す。
+"""
+
+from collections import defaultdict
+
+from django.db.models import Count
+
+from api.models import Post, Reaction
+from api.services.rendering import current_html
+from api.v1.fastpath import Column, Computed, FastReader, Related
+
+
+def load_reaction_counts(post_ids: list[int]) -> dict[int, list[dict]]:
+    """投稿ごとのリアクション集計を1クエリで取得する.
+
+    Args:
+        post_ids: 対象投稿のIDリスト
+
+    Returns:
+        投稿IDからリアクションタイプ順の集計リストへの辞書
+    """
+    counts: dict[int, list[dict]] = defaultdict(list)
+    rows = (
+        Reaction.objects.filter(post_id__in=post_ids)
+        .values("post_id", "reaction_type")
+        .annotate(count=Count("id"))
+        .order_by("reaction_type")
+    )
+    for row in rows:
+        counts[row["post_id"]].append(
+            {"reaction_type": row["reaction_type"], "count": row["count"]}
+        )
+    return counts
+
+
+def load_reply_counts(post_ids: list[int]) -> dict[int, int]:
+    """投稿ごとの返信数を1クエリで取得する.
+
+    Args:
+        post_ids: 対象投稿のIDリスト
+
+    Returns:
+        投稿IDから返信数への辞書（返信がない投稿は含まない）
+    """
+    return dict(
+        Post.objects.filter(reply_to_id__in=post_ids)
+        .values("reply_to_id")
+        .annotate(count=Count("id"))
+        .order_by()
+        .values_list("reply_to_id", "count")
+    )
+
+
+POST_READER = FastReader(
+    Column("id"),
+    Column("thread", "thread_id"),
+    Column("content"),
+    Column("post_number"),
+    Column("reply_to", "reply_to_id"),
+    Column("is_op"),
+    Column("author_name", "author_session__temporary_name"),
+    Related("reaction_counts", load_reaction_counts, list),
+    Related("reply_count", load_reply_counts, int),
+    Column("created_at", datetime=True),
+    Column("updated_at", datetime=True),
+    Computed(
+        "content_html", ("content_html", "render_version", "content"), current_html
+    ),
+)
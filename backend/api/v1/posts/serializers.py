@@ -7,6 +7,10 @@
 from rest_framework import serializers
 
 from api.models import Post, Reaction
+from api.services.moderation import POST_ACTIONS
+from api.services.near_duplicates import screen
+from api.services.rendering import current_html
+from api.v1.moderation import BulkActionSerializer, BulkFilterSerializer
 
 
 class ReactionCountSerializer(serializers.Serializer):
@@ -31,6 +35,7 @@ class PostSerializer(serializers.ModelSerializer):
 
     Attributes:
         author_name: 投稿者の一時名（読み取り専用、NULL許可）
+        content_html: 保存時にレンダリングした本文の表示用HTML（メソッドフィールド）
         reaction_counts: リアクション種類別の集計（メソッドフィールド）
         reply_count: この投稿への返信数（読み取り専用）
     """
@@ -38,6 +43,7 @@ class PostSerializer(serializers.ModelSerializer):
     author_name = serializers.CharField(
         source="author_session.temporary_name", read_only=True, allow_null=True
     )
+    content_html = serializers.SerializerMethodField()
     reaction_counts = serializers.SerializerMethodField()
     reply_count = serializers.IntegerField(source="replies.count", read_only=True)
 
@@ -55,6 +61,7 @@ class PostSerializer(serializers.ModelSerializer):
             "reply_count",
             "created_at",
             "updated_at",
+            "content_html",
         ]
         read_only_fields = [
             "id",
@@ -65,8 +72,20 @@ class PostSerializer(serializers.ModelSerializer):
             "reply_count",
             "created_at",
             "updated_at",
+            "content_html",
         ]
 
+    def get_content_html(self, obj):
+        """本文の表示用HTMLを取得する.
+
+        Args:
+            obj: 対象のPostインスタンス
+
+        Returns:
+            現在のレンダラーのバージョンでレンダリングされたHTML
+        """
+        return current_html(obj.content_html, obj.render_version, obj.content)
+
     def get_reaction_counts(self, obj):
         """投稿のリアクション集計を取得する.
 
@@ -74,7 +93,7 @@ class PostSerializer(serializers.ModelSerializer):
             obj: 対象のPostインスタンス
 
         Returns:
-            リアクションタイプ別の集計データのリスト
+            リアクションタイプ順に並んだ集計データのリスト
         """
         from django.db.models import Count
 
@@ -82,6 +101,7 @@ class PostSerializer(serializers.ModelSerializer):
             Reaction.objects.filter(post=obj)
             .values("reaction_type")
             .annotate(count=Count("id"))
+            .order_by("reaction_type")
         )
         return ReactionCountSerializer(counts, many=True).data
 
@@ -97,6 +117,21 @@ class PostCreateSerializer(serializers.ModelSerializer):
         model = Post
         fields = ["thread", "content", "reply_to"]
 
+    def validate(self, attrs):
+        """直近のほぼ同一の投稿と照合し、コピペ連投を拒否する.
+
+        他のフィールドのバリデーションを通過した投稿だけを照合する。
+        指紋は fingerprint に保持し、保存が確定した後にビューが登録する。
+
+        Args:
+            attrs: フィールド単位のバリデーション済みデータ
+
+        Returns:
+            バリデーション済みデータ
+        """
+        self.fingerprint = screen(attrs["content"])
+        return attrs
+
 
 class ReactionSerializer(serializers.ModelSerializer):
     """リアクションモデル用シリアライザー.
@@ -109,3 +144,32 @@ class ReactionSerializer(serializers.ModelSerializer):
         model = Reaction
         fields = ["id", "post", "reaction_type", "created_at"]
         read_only_fields = ["id", "created_at"]
+
+
+class BulkPostFilterSerializer(BulkFilterSerializer):
+    """投稿の一括操作の絞り込み条件.
+
+    Attributes:
+        thread: スレッドID
+        q: 本文の部分一致
+    """
+
+    FILTERS = {
+        **BulkFilterSerializer.FILTERS,
+        "thread": "thread_id",
+        "q": "content__icontains",
+    }
+
+    thread = serializers.IntegerField(required=False)
+
+
+class BulkPostActionSerializer(BulkActionSerializer):
+    """投稿の一括操作の要求.
+
+    Attributes:
+        action: 操作（delete）
+        filter: 絞り込み条件（ids と排他）
+    """
+
+    action = serializers.ChoiceField(choices=POST_ACTIONS)
+    filter = BulkPostFilterSerializer(required=False)
@@ -3,31 +3,58 @@
 投稿（レス）のCRUD操作とリアクション機能を提供する。
 """
 
-from rest_framework import status, viewsets
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404
+from rest_framework import serializers, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
-from api.models import Post, Reaction
+from api.models import Post, Reaction, Thread
+from api.services import moderation, near_duplicates
+from api.services.ingestion import (
+    IngestionTimeout,
+    get_ingestion_queue,
+    ingestion_enabled,
+)
+from api.services.reply_tree import reply_tree, split_tree
+from api.throttling import PostRateThrottle, ReactionRateThrottle
+from api.v1.fastpath import FastReadMixin
+from api.v1.posts.readers import POST_READER
 from api.v1.posts.serializers import (
+    BulkPostActionSerializer,
     PostCreateSerializer,
     PostSerializer,
     ReactionSerializer,
 )
 
+TREE_DEFAULT_DEPTH = 10
+TREE_MAX_DEPTH = 50
+TREE_MAX_DESCENDANTS = 200
+
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(FastReadMixin, viewsets.ModelViewSet):
     """投稿操作用ViewSet.
 
     投稿のCRUD操作とリアクション追加機能を提供する。
     投稿番号は自動的に採番され、スレッド統計も更新される。
+    一覧・詳細はシリアライザーを経由しない高速パスで応答し、
+    ?fields= / ?omit= による出力フィールドの絞り込みに対応する。
+    /posts/{id}/tree/ は返信元と返信をたどった会話ツリーを1クエリで返す。
+    /posts/bulk/ は管理者向けの一括削除（api.services.moderation）。
 
     Attributes:
         queryset: 投稿の全件QuerySet
         serializer_class: デフォルトのシリアライザー
+        list_reader: 一覧表示用のリーダー
+        detail_reader: 詳細表示用のリーダー
     """
 
     queryset = Post.objects.all()
     serializer_class = PostSerializer
+    list_reader = POST_READER
+    detail_reader = POST_READER
 
     def get_serializer_class(self):
         """アクションに応じた適切なシリアライザーを返す.
@@ -40,6 +67,17 @@ class PostViewSet(viewsets.ModelViewSet):
             return PostCreateSerializer
         return PostSerializer
 
+    def get_throttles(self):
+        """アクションに応じたスロットルを返す.
+
+        Returns:
+            作成: 投稿のレート制限
+            その他: デフォルトのスロットル
+        """
+        if self.action == "create":
+            return [PostRateThrottle()]
+        return super().get_throttles()
+
     def create(self, request, *args, **kwargs):
         """新しい投稿を作成する.
 
@@ -54,35 +92,73 @@ class PostViewSet(viewsets.ModelViewSet):
         Note:
             投稿番号は自動的に採番される。
             スレッドの投稿数と最終投稿日時も更新される。
+            それ以外の派生データはイベントログのコンシューマーが後から反映する。
+            POST_INGESTION["ENABLED"]が有効な場合はグループコミットキュー経由で
+            他の投稿とまとめてコミットされる。
+            コピペ連投の照合用の指紋は、投稿のコミット後に登録する。
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # NOTE: ユーザーセッションの取得/作成は簡略化
-        # 完全な実装では、ミドルウェアまたはサービス層で処理
+        # NOTE: セッションはAnonymousSessionMiddlewareが解決・作成する
+        # （Cookieを持たないクライアントはNoneで、作成者なしの投稿になる）
+        author_session = request.user_session
         thread = serializer.validated_data["thread"]
 
-        # NOTE: 次の投稿番号を計算
-        last_post = Post.objects.filter(thread=thread).order_by("-post_number").first()
-        next_number = (last_post.post_number + 1) if last_post else 1
+        if ingestion_enabled():
+            reply_to = serializer.validated_data.get("reply_to")
+            try:
+                post = get_ingestion_queue().submit(
+                    thread_id=thread.pk,
+                    content=serializer.validated_data["content"],
+                    reply_to_id=reply_to.pk if reply_to else None,
+                    author_session_id=author_session.pk if author_session else None,
+                )
+            except IngestionTimeout as exc:
+                message = (
+                    "Post is still being committed, check the thread before retrying"
+                    if exc.committing
+                    else "Post could not be committed in time, please retry"
+                )
+                return Response(
+                    {"error": message}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            near_duplicates.record(serializer.fingerprint)
+            output_serializer = PostSerializer(post)
+            return Response(output_serializer.data, status=status.HTTP_201_CREATED)
 
-        post = Post.objects.create(
-            thread=thread,
-            content=serializer.validated_data["content"],
-            reply_to=serializer.validated_data.get("reply_to"),
-            post_number=next_number,
-            is_op=(next_number == 1),
-        )
+        # NOTE: 投稿とイベントログへの記録を同じトランザクションで行う
+        with transaction.atomic():
+            # NOTE: 次の投稿番号を計算
+            last_post = (
+                Post.objects.filter(thread=thread).order_by("-post_number").first()
+            )
+            next_number = (last_post.post_number + 1) if last_post else 1
+
+            post = Post.objects.create(
+                thread=thread,
+                content=serializer.validated_data["content"],
+                reply_to=serializer.validated_data.get("reply_to"),
+                author_session=author_session,
+                post_number=next_number,
+                is_op=(next_number == 1),
+            )
 
-        # NOTE: スレッド統計を更新
-        thread.post_count = Post.objects.filter(thread=thread).count()
-        thread.last_post_at = post.created_at
-        thread.save()
+            # NOTE: スレッド統計を1回のUPDATEで更新する（シグナルを送らないため、
+            # タグ付けの並び替えキー、勢い、トレンドスコア、ポイントは
+            # イベントログのコンシューマーが反映する）
+            Thread.objects.filter(pk=thread.pk).update(
+                post_count=F("post_count") + 1,
+                last_post_at=post.created_at,
+                updated_at=post.created_at,
+            )
 
+        # NOTE: 保存に失敗した投稿をコピペの件数に数えないよう、コミット後に登録する
+        near_duplicates.record(serializer.fingerprint)
         output_serializer = PostSerializer(post)
         return Response(output_serializer.data, status=status.HTTP_201_CREATED)
 
-    @action(detail=True, methods=["post"])
+    @action(detail=True, methods=["post"], throttle_classes=[ReactionRateThrottle])
     def react(self, request, pk=None):
         """投稿にリアクションを追加する.
 
@@ -94,8 +170,9 @@ class PostViewSet(viewsets.ModelViewSet):
             作成されたリアクションデータ
 
         Note:
-            現在の実装では重複リアクションを許可。
-            完全な実装では、ユーザーセッションによる重複防止を行う。
+            同じセッションからの同じ種類のリアクションは1件だけ記録し、
+            2回目以降は既存のリアクションを200で返す。セッションのない
+            （Cookieを持たない）クライアントのリアクションは毎回作成する。
         """
         post = self.get_object()
         reaction_type = request.data.get("reaction_type")
@@ -106,8 +183,108 @@ class PostViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # NOTE: 現時点では重複リアクションを許可（ユーザーセッション未追跡）
-        reaction = Reaction.objects.create(post=post, reaction_type=reaction_type)
+        user_session = request.user_session
+        # NOTE: リアクションとイベントログへの記録を同じトランザクションで行う
+        with transaction.atomic():
+            if user_session is None:
+                # NOTE: NULLのセッションは unique_together で重複を防げない
+                reaction = Reaction.objects.create(
+                    post=post, reaction_type=reaction_type
+                )
+                created = True
+            else:
+                reaction, created = Reaction.objects.get_or_create(
+                    post=post, user_session=user_session, reaction_type=reaction_type
+                )
 
         serializer = ReactionSerializer(reaction)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=["get"])
+    def tree(self, request, pk=None):
+        """投稿の会話ツリー（返信元の祖先と返信の子孫）を取得する.
+
+        祖先・子孫はそれぞれ ?depth= 段（デフォルト10、最大50）までたどり、
+        1回の再帰クエリで取得する。子孫は起点に近い段から TREE_MAX_DESCENDANTS 件
+        までで打ち切り、打ち切った場合は descendants_truncated を真にする。
+        各投稿は詳細表示と同じ形式で、?fields= / ?omit= による絞り込みにも対応する。
+
+        Args:
+            request: HTTPリクエスト
+            pk: 起点の投稿ID
+
+        Returns:
+            古い順の祖先 ancestors、起点 post、レス番号順の子孫 descendants、
+            子孫を打ち切ったかどうか descendants_truncated
+
+        Raises:
+            Http404: 投稿が存在しない場合
+        """
+        try:
+            post_id = int(pk)
+        except ValueError as exc:
+            raise Http404 from exc
+        depth = _depth(request)
+        reader = self.detail_reader.for_request(request)
+        # NOTE: 打ち切りを判定するため1件多く読む。返信は返信元より
+        # レス番号が大きいため、末尾の1件を除いても親のない子孫は残らない
+        tree = reply_tree(post_id, depth, TREE_MAX_DESCENDANTS + 1)
+        rows = list(reader.values(tree, "reply_to_id"))
+        ancestors, root, descendants = split_tree(rows, post_id)
+        if root is None:
+            raise Http404
+        truncated = len(descendants) > TREE_MAX_DESCENDANTS
+        descendants = descendants[:TREE_MAX_DESCENDANTS]
+        mapper = reader.compile([row["id"] for row in rows])
+        return Response(
+            {
+                "ancestors": [mapper(row) for row in ancestors],
+                "post": mapper(root),
+                "descendants": [mapper(row) for row in descendants],
+                "descendants_truncated": truncated,
+            }
+        )
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser])
+    def bulk(self, request):
+        """投稿を一括削除する（管理者のみ）.
+
+        対象は ids（主キーのリスト）または filter（絞り込み条件）で指定する。
+        チャンクごとに1回のDELETEで処理し、スレッドの投稿数・投稿者の統計・
+        イベントログも集合単位で更新する。
+
+        Args:
+            request: HTTPリクエスト
+
+        Returns:
+            操作名と、削除した投稿数 affected
+        """
+        serializer = BulkPostActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        affected = moderation.delete_posts(serializer.target(Post.objects.all()))
+        return Response(
+            {"action": serializer.validated_data["action"], "affected": affected}
+        )
+
+
+def _depth(request) -> int:
+    """クエリパラメーター ?depth= を検証して返す.
+
+    Args:
+        request: HTTPリクエスト
+
+    Returns:
+        祖先・子孫をたどる段数
+
+    Raises:
+        ValidationError: 1以上TREE_MAX_DEPTH以下の整数でない場合
+    """
+    field = serializers.IntegerField(min_value=1, max_value=TREE_MAX_DEPTH)
+    value = request.query_params.get("depth", TREE_DEFAULT_DEPTH)
+    try:
+        return field.run_validation(value)
+    except serializers.ValidationError as exc:
+        raise serializers.ValidationError({"depth": exc.detail}) from exc
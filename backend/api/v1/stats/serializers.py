@@ -52,6 +52,7 @@ class TopUserSerializer(serializers.Serializer):
     ポイント獲得上位のユーザー情報を提供する。
 
     Attributes:
+        rank: 総獲得ポイントの順位（同点は同順位）
         temporary_name: ユーザーの一時名
         total_points: 総獲得ポイント
         level: ユーザーレベル
@@ -59,6 +60,7 @@ class TopUserSerializer(serializers.Serializer):
         thread_count: スレッド作成数
     """
 
+    rank = serializers.IntegerField()
     temporary_name = serializers.CharField()
     total_points = serializers.IntegerField()
     level = serializers.IntegerField()
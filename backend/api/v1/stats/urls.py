@@ -2,11 +2,22 @@
 
 from django.urls import path
 
-from api.v1.stats.views import activity_feed, board_stats, top_users, trending_threads
+from api.v1.stats.views import (
+    activity_feed,
+    board_stats,
+    export_table,
+    my_rank,
+    process_metrics,
+    top_users,
+    trending_threads,
+)
 
 urlpatterns = [
     path("board/", board_stats, name="board-stats"),
     path("trending/", trending_threads, name="trending-threads"),
     path("top-users/", top_users, name="top-users"),
+    path("top-users/me/", my_rank, name="my-rank"),
     path("activity/", activity_feed, name="activity-feed"),
+    path("metrics/", process_metrics, name="process-metrics"),
+    path("export/<str:table>/", export_table, name="export-table"),
 ]
@@ -1,16 +1,29 @@
 """統計情報エンドポイント用ビュー.
 
 掲示板全体の統計情報、トレンドスレッド、トップユーザー、
-アクティビティフィードなどの集計データを提供する。
+アクティビティフィードなどの集計データと、
+管理者向けのプロセス内メトリクス、分析用のテーブルのエクスポートを提供する。
 """
 
 from datetime import timedelta
 
+from django.http import Http404, StreamingHttpResponse
 from django.utils import timezone
-from rest_framework.decorators import api_view
+from rest_framework import serializers, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
+from api.metrics import metrics
 from api.models import Post, Thread, UserSession
+from api.services.export import (
+    EXPORT_TABLES,
+    FORMATS,
+    STREAM_MEDIA_TYPES,
+    stream_table,
+)
+from api.services.points import leaderboard
+from api.services.sessions import session_directory
 from api.v1.stats.serializers import (
     ActivityFeedSerializer,
     BoardStatsSerializer,
@@ -70,12 +83,43 @@ def top_users(request):
 
     Returns:
         総ポイント降順で上位10件のユーザーデータ
+
+    Note:
+        並び順はプロセス内のランキング（api.services.points.leaderboard）から求め、
+        データベースは上位のセッションを主キーで取得するだけとする。
     """
-    users = UserSession.objects.all().order_by("-total_points")[:10]
-    serializer = TopUserSerializer(users, many=True)
+    ranking = leaderboard.top(10)
+    users = UserSession.objects.order_by().in_bulk([pk for pk, _ in ranking])
+    for user in users.values():
+        user.rank = leaderboard.rank(user.total_points)
+    serializer = TopUserSerializer(
+        [users[pk] for pk, _ in ranking if pk in users], many=True
+    )
     return Response(serializer.data)
 
 
+@api_view(["GET"])
+def my_rank(request):
+    """リクエストしたセッションのポイントと順位を取得する.
+
+    Args:
+        request: HTTPリクエスト
+
+    Returns:
+        トップユーザーと同じ形式のセッションのデータ
+        （セッションが確立していない場合は404）
+    """
+    session_key = request.user_session_key
+    session = session_directory.get(session_key) if session_key else None
+    user = UserSession.objects.filter(pk=session.pk).first() if session else None
+    if user is None:
+        return Response(
+            {"error": "No session for this client"}, status=status.HTTP_404_NOT_FOUND
+        )
+    user.rank = leaderboard.rank(user.total_points)
+    return Response(TopUserSerializer(user).data)
+
+
 @api_view(["GET"])
 def activity_feed(request):
     """最近のアクティビティフィードを取得する.
@@ -118,3 +162,77 @@ def activity_feed(request):
 
     serializer = ActivityFeedSerializer(activities, many=True)
     return Response(serializer.data)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def process_metrics(request):
+    """このプロセスで記録されたメトリクスを取得する（管理者のみ）.
+
+    Args:
+        request: HTTPリクエスト
+
+    Returns:
+        カウンター名からラベルと値のリストへの辞書
+        （例: rate_limit_rejected_total）
+
+    Note:
+        値は応答したワーカープロセスのもののみで、ワーカー間では合算されない。
+    """
+    return Response(metrics.snapshot())
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """テーブルのエクスポートのクエリパラメーター.
+
+    Attributes:
+        output: 出力形式（ndjson / columnar）
+        after_id: この主キーより後の行だけを返す
+        since: この日時以降に更新された行だけを返す
+    """
+
+    output = serializers.ChoiceField(choices=FORMATS, default="ndjson")
+    after_id = serializers.IntegerField(min_value=0, required=False)
+    since = serializers.DateTimeField(required=False)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def export_table(request, table):
+    """テーブルをNDJSONまたは列指向形式でストリーミングする（管理者のみ）.
+
+    行は主キー順に短いクエリで少しずつ読むため、大きなテーブルでも
+    長い読み取りトランザクションを保持しない。続きを取得する場合は、
+    受け取った最後の行の id を ?after_id= に指定する。
+
+    Args:
+        request: HTTPリクエスト
+        table: テーブル名（threads / posts / reactions / sessions）
+
+    Returns:
+        ストリーミングレスポンス（ndjson は1行が1つのJSONの application/x-ndjson、
+        columnar はチャンクの配列からなる1つの application/json の文書）
+
+    Raises:
+        Http404: テーブル名が不正な場合
+    """
+    if table not in EXPORT_TABLES:
+        raise Http404
+    query = ExportQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    fmt = query.validated_data["output"]
+    content_type, extension = STREAM_MEDIA_TYPES[fmt]
+    # NOTE: 本文はビューを抜けた後に生成されるため、読み取り先をここで確定する
+    using = EXPORT_TABLES[table].model.objects.all().db
+    response = StreamingHttpResponse(
+        stream_table(
+            table,
+            fmt,
+            after_id=query.validated_data.get("after_id"),
+            since=query.validated_data.get("since"),
+            using=using,
+        ),
+        content_type=content_type,
+    )
+    response["Content-Disposition"] = f'attachment; filename="{table}.{extension}"'
+    return response
@@ -0,0 +1,56 @@
+"""タグの高速読み取りパス.
+
+TagListSerializer、TagSerializerと同一の出力をシリアライザーを経由せずに組み立てる。
+"""
+
+from collections import defaultdict
+
+from api.models import ThreadTag
+from api.v1.fastpath import Column, FastReader
+
+
+def load_thread_tags(thread_ids: list[int]) -> dict[int, list[dict]]:
+    """スレッドごとのタグ一覧を1クエリで取得する.
+
+    Args:
+        thread_ids: 対象スレッドのIDリスト
+
+    Returns:
+        スレッドIDからTagListSerializer形式のタグリストへの辞書
+        （タグのデフォルト順序であるname順）
+    """
+    tags: dict[int, list[dict]] = defaultdict(list)
+    rows = (
+        ThreadTag.objects.filter(thread_id__in=thread_ids)
+        .order_by("tag__name")
+        .values_list("thread_id", "tag_id", "tag__name", "tag__slug")
+    )
+    for thread_id, tag_id, name, slug in rows:
+        tags[thread_id].append({"id": tag_id, "name": name, "slug": slug})
+    return tags
+
+
+TAG_LIST_READER = FastReader(Column("id"), Column("name"), Column("slug"))
+
+TAG_DETAIL_READER = FastReader(
+    Column("id"),
+    Column("name"),
+    Column("slug"),
+    Column("thread_count", "usage_count"),
+    Column("created_at", datetime=True),
+)
+
+TAG_POPULAR_READER = FastReader(
+    Column("id"),
+    Column("name"),
+    Column("slug"),
+    Column("thread_count", "usage_count"),
+)
+
+TAG_TRENDING_READER = FastReader(
+    Column("id"),
+    Column("name"),
+    Column("slug"),
+    Column("thread_count", "usage_count"),
+    Column("score"),
+)
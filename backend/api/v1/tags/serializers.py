@@ -15,11 +15,12 @@ class TagSerializer(serializers.ModelSerializer):
     タグの作成、更新、詳細表示に使用する。
 
     Attributes:
-        thread_count: このタグが付けられているスレッド数（読み取り専用）
+        thread_count: このタグが付けられているスレッド数（読み取り専用、
+            非正規化カウンター usage_count の値）
     """
 
     thread_count = serializers.IntegerField(
-        source="threads.count",
+        source="usage_count",
         read_only=True,
         help_text="Number of threads with this tag",
     )
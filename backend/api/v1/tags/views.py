@@ -3,27 +3,45 @@
 タグの一覧取得、詳細表示、およびタグが付けられたスレッド一覧を提供する。
 """
 
-from rest_framework import viewsets
+from rest_framework import serializers, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from api.models import Tag
+from api.models import Tag, Thread, ThreadTag
+from api.services.trending import trending_tags
+from api.v1.fastpath import FastReadMixin
+from api.v1.pagination import TaggedThreadCursorPagination
+from api.v1.tags.readers import (
+    TAG_DETAIL_READER,
+    TAG_LIST_READER,
+    TAG_POPULAR_READER,
+    TAG_TRENDING_READER,
+)
 from api.v1.tags.serializers import TagListSerializer, TagSerializer
+from api.v1.threads.readers import THREAD_LIST_READER
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(FastReadMixin, viewsets.ReadOnlyModelViewSet):
     """タグ操作用ViewSet.
 
     タグの読み取り専用エンドポイントを提供する。
     一覧表示、詳細表示、およびタグが付けられたスレッドの取得が可能。
+    いずれもシリアライザーを経由しない高速パスで応答し、
+    ?fields= / ?omit= による出力フィールドの絞り込みに対応する。
 
     Attributes:
         queryset: タグの全件QuerySet
         serializer_class: デフォルトのシリアライザー
+        list_reader: 一覧表示用のリーダー
+        detail_reader: 詳細表示用のリーダー
+        columnar_actions: 列指向表現に対応するアクション名
     """
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    list_reader = TAG_LIST_READER
+    detail_reader = TAG_DETAIL_READER
+    columnar_actions = ("list", "retrieve", "threads", "popular", "trending")
 
     def get_serializer_class(self):
         """アクションに応じた適切なシリアライザーを返す.
@@ -36,20 +54,117 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
             return TagListSerializer
         return TagSerializer
 
+    @action(detail=False, methods=["get"])
+    def popular(self, request):
+        """使用回数の多い順にタグを取得する（タグクラウド用）.
+
+        (-usage_count, name) のインデックスを使う1クエリで取得する。
+
+        Args:
+            request: HTTPリクエスト（?limit= で件数を指定、最大100件）
+
+        Returns:
+            使用回数降順のタグのリスト
+        """
+        reader = TAG_POPULAR_READER.for_request(request)
+        queryset = Tag.objects.order_by("-usage_count", "name")
+        rows = reader.values(queryset[: _limit(request)])
+        return Response(self.represent_rows(reader, rows))
+
+    @action(detail=False, methods=["get"])
+    def trending(self, request):
+        """最近の活動が多いトレンドタグを取得する.
+
+        スコアは投稿・タグ付けのたびに増分更新された指数減衰スコアで、
+        trend_score のインデックスを使う1クエリで取得する。
+
+        Args:
+            request: HTTPリクエスト（?limit= で件数を指定、最大100件）
+
+        Returns:
+            現在のスコア（score）降順のタグのリスト
+        """
+        reader = TAG_TRENDING_READER.for_request(request)
+        rows = reader.values(trending_tags()[: _limit(request)])
+        return Response(self.represent_rows(reader, rows))
+
     @action(detail=True, methods=["get"])
     def threads(self, request, pk=None):
         """特定タグが付けられたスレッド一覧を取得する.
 
+        タグ付けの行に写した並び替えキーのインデックスから1ページ分の
+        スレッドIDを読み、スレッドは主キーで取得するため、
+        タグの付いたスレッド数に関わらず一定のコストで応答する。
+
         Args:
-            request: HTTPリクエスト
+            request: HTTPリクエスト（?cursor= で続きのページを取得、
+                ?sort=recent|momentum で並び順を指定）
             pk: タグID
 
         Returns:
-            タグが付けられたスレッドのリスト
+            タグが付けられたスレッドの1ページ分と前後のページのURL
         """
         tag = self.get_object()
-        from api.v1.threads.serializers import ThreadListSerializer
+        reader = THREAD_LIST_READER.for_request(request)
+        paginator = TaggedThreadCursorPagination()
+        paginator.ordering = paginator.orderings[
+            _sort(request, paginator.orderings, "recent")
+        ]
+        links = ThreadTag.objects.filter(tag=tag).values(
+            *dict.fromkeys(
+                ["thread_id", *(field.lstrip("-") for field in paginator.ordering)]
+            )
+        )
+        page = [
+            link["thread_id"]
+            for link in paginator.paginate_queryset(links, request, view=self)
+        ]
+        threads = Thread.objects.filter(pk__in=page).order_by()
+        rows = {row["id"]: row for row in reader.values(threads)}
+        return paginator.get_paginated_response(
+            self.represent_rows(
+                reader, [rows[thread_id] for thread_id in page if thread_id in rows]
+            )
+        )
+
+
+def _sort(request, choices, default: str) -> str:
+    """クエリパラメーター ?sort= を検証して返す.
 
-        threads = tag.threads.all()
-        serializer = ThreadListSerializer(threads, many=True)
-        return Response(serializer.data)
+    Args:
+        request: HTTPリクエスト
+        choices: 指定可能な値
+        default: 指定がない場合の値
+
+    Returns:
+        並び順の名前
+
+    Raises:
+        ValidationError: 指定可能な値でない場合
+    """
+    field = serializers.ChoiceField(choices=list(choices))
+    try:
+        return field.run_validation(request.query_params.get("sort", default))
+    except serializers.ValidationError as exc:
+        raise serializers.ValidationError({"sort": exc.detail}) from exc
+
+
+def _limit(request, default: int = 30, maximum: int = 100) -> int:
+    """クエリパラメーター ?limit= を検証して返す.
+
+    Args:
+        request: HTTPリクエスト
+        default: 指定がない場合の件数
+        maximum: 指定可能な最大件数
+
+    Returns:
+        取得件数
+
+    Raises:
+        ValidationError: 1以上maximum以下の整数でない場合
+    """
+    field = serializers.IntegerField(min_value=1, max_value=maximum)
+    try:
+        return field.run_validation(request.query_params.get("limit", default))
+    except serializers.ValidationError as exc:
+        raise serializers.ValidationError({"limit": exc.detail}) from exc
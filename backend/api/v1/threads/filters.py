@@ -0,0 +1,143 @@
+"""スレッド一覧の絞り込みと並び替え.
+
+ThreadViewSet.list のクエリパラメーターを解釈する。
+どの並び順も、全体用とカテゴリ用のインデックス（Thread.Meta.indexes）の順に
+走査してソートを省略できる。人気順（popular）は POPULARITY と同じ式の
+インデックスを使う。
+
+タグの絞り込みは結合ではなく相関サブクエリ（EXISTS）で表し、スレッドの行が
+重複しないようにする。EXISTSは並び順のインデックスを走査しながら1行ずつ
+判定するため、少数のスレッドにしか付いていないタグでは走査が長くなる。
+タグごとの一覧は、並び替えキーを写したタグ付けのインデックスを範囲で
+読む /tags/{id}/threads/ を使う。
+
+検索語（q）はタイトルの部分一致で、SQLiteでは3文字以上の場合に
+FTS5 trigram の仮想テーブル（TITLE_SEARCH_TABLE）を、PostgreSQLでは
+pg_trgm のGINインデックスを使う（マイグレーション 0011）。
+"""
+
+import django_filters
+from django.db import connections
+from django.db.models import Exists, F, OuterRef
+from django.db.models.expressions import RawSQL
+
+from api.models import Thread, ThreadTag
+
+TITLE_SEARCH_TABLE = "board_thread_title_fts"
+
+# NOTE: trigram の全文検索は3文字未満の検索語では一致を判定できない
+TITLE_SEARCH_MIN_LENGTH = 3
+
+POPULARITY = F("view_count") + F("post_count")
+
+THREAD_SORTS = {
+    "active": ("-is_pinned", "-last_post_at", "-id"),
+    "momentum": ("-momentum", "-id"),
+    "new": ("-created_at", "-id"),
+    "posts": ("-post_count", "-id"),
+    "popular": (POPULARITY.desc(), "-id"),
+}
+
+DEFAULT_SORT = "active"
+
+
+class ThreadFilter(django_filters.FilterSet):
+    """スレッド一覧のフィルターセット.
+
+    Attributes:
+        category: カテゴリIDでの絞り込み
+        tags: カンマ区切りのタグスラッグでの絞り込み
+        match: 複数タグの結合方法（all: 全て含む / any: いずれかを含む）
+        q: タイトルの部分一致検索
+        sort: 並び順（active: ピン留め優先の最終投稿順 / momentum: 勢い順 /
+            new: 新着順 / posts: レス数順 / popular: 閲覧数 + レス数の人気順）
+    """
+
+    category = django_filters.NumberFilter(field_name="category_id")
+    tags = django_filters.CharFilter(method="filter_tags")
+    match = django_filters.ChoiceFilter(
+        choices=[("all", "all"), ("any", "any")], method="ignore"
+    )
+    q = django_filters.CharFilter(method="filter_q")
+    sort = django_filters.ChoiceFilter(
+        choices=[(name, name) for name in THREAD_SORTS], method="ignore"
+    )
+
+    class Meta:
+        model = Thread
+        fields = ["category", "tags", "match", "q", "sort"]
+
+    def ignore(self, queryset, name, value):
+        """他の条件と組み合わせて解釈するパラメーター用の何もしないフィルター.
+
+        Args:
+            queryset: 対象のクエリセット
+            name: パラメーター名
+            value: パラメーターの値
+
+        Returns:
+            変更しないクエリセット
+        """
+        return queryset
+
+    def filter_tags(self, queryset, name, value):
+        """指定したタグが付いたスレッドに絞り込む.
+
+        match=all の場合はタグごとのEXISTSを、match=any の場合は
+        IN条件を持つ1つのEXISTSを追加する。
+
+        Args:
+            queryset: 対象のクエリセット
+            name: パラメーター名
+            value: カンマ区切りのタグスラッグ
+
+        Returns:
+            絞り込んだクエリセット
+        """
+        slugs = list(dict.fromkeys(slug for slug in value.split(",") if slug))
+        if not slugs:
+            return queryset
+        links = ThreadTag.objects.filter(thread_id=OuterRef("pk"))
+        if self.form.cleaned_data.get("match") == "any":
+            return queryset.filter(Exists(links.filter(tag__slug__in=slugs)))
+        for slug in slugs:
+            queryset = queryset.filter(Exists(links.filter(tag__slug=slug)))
+        return queryset
+
+    def filter_q(self, queryset, name, value):
+        """タイトルに検索語を含む（大文字小文字を区別しない）スレッドに絞り込む.
+
+        Args:
+            queryset: 対象のクエリセット
+            name: パラメーター名
+            value: 検索語
+
+        Returns:
+            絞り込んだクエリセット
+        """
+        vendor = connections[queryset.db].vendor
+        if vendor != "sqlite" or len(value) < TITLE_SEARCH_MIN_LENGTH:
+            return queryset.filter(title__icontains=value)
+        # NOTE: 全体を二重引用符で囲んだフレーズにすると、trigram の連続一致
+        # （部分文字列の一致）として評価される
+        phrase = '"{}"'.format(value.replace('"', '""'))
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {TITLE_SEARCH_TABLE}"
+                f" WHERE {TITLE_SEARCH_TABLE} MATCH %s",
+                (phrase,),
+            )
+        )
+
+    def filter_queryset(self, queryset):
+        """絞り込みを適用し、指定された並び順でソートする.
+
+        Args:
+            queryset: 対象のクエリセット
+
+        Returns:
+            絞り込み・並び替え済みのクエリセット
+        """
+        queryset = super().filter_queryset(queryset)
+        sort = self.form.cleaned_data.get("sort") or DEFAULT_SORT
+        return queryset.order_by(*THREAD_SORTS[sort])
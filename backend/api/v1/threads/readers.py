@@ -0,0 +1,56 @@
+"""スレッドの高速読み取りパス.
+
+ThreadListSerializer、ThreadDetailSerializerと同一の出力を
+シリアライザーを経由せずに組み立てる。
+"""
+
+from api.models import Post
+from api.v1.fastpath import Column, FastReader, Nested, Related
+from api.v1.posts.readers import POST_READER
+from api.v1.tags.readers import load_thread_tags
+
+
+def thread_posts(thread_ids: list[int]):
+    """スレッドの全投稿をレス番号順に取得するクエリセットを返す.
+
+    Args:
+        thread_ids: 対象スレッドのIDリスト
+
+    Returns:
+        投稿のQuerySet
+    """
+    return Post.objects.filter(thread_id__in=thread_ids)
+
+
+THREAD_LIST_READER = FastReader(
+    Column("id"),
+    Column("title"),
+    Column("category_name", "category__name"),
+    Related("tags", load_thread_tags, list),
+    Column("author_name", "author_session__temporary_name"),
+    Column("post_count"),
+    Column("view_count"),
+    Column("momentum"),
+    Column("is_pinned"),
+    Column("is_locked"),
+    Column("created_at", datetime=True),
+    Column("last_post_at", datetime=True),
+)
+
+THREAD_DETAIL_READER = FastReader(
+    Column("id"),
+    Column("title"),
+    Column("category", "category_id"),
+    Column("category_name", "category__name"),
+    Related("tags", load_thread_tags, list),
+    Column("author_name", "author_session__temporary_name"),
+    Column("post_count"),
+    Column("view_count"),
+    Column("momentum"),
+    Column("is_pinned"),
+    Column("is_locked"),
+    Nested("posts", POST_READER, thread_posts, "thread_id"),
+    Column("created_at", datetime=True),
+    Column("updated_at", datetime=True),
+    Column("last_post_at", datetime=True),
+)
@@ -3,9 +3,15 @@
 スレッドの一覧取得、詳細表示、作成、更新のためのシリアライザーを提供する。
 """
 
+from functools import partial
+
+from django.db import transaction
 from rest_framework import serializers
 
-from api.models import Thread
+from api.models import Category, Thread
+from api.services.moderation import THREAD_ACTIONS
+from api.services.near_duplicates import record, screen
+from api.v1.moderation import BulkActionSerializer, BulkFilterSerializer
 from api.v1.posts.serializers import PostSerializer
 from api.v1.tags.serializers import TagListSerializer
 
@@ -126,6 +132,21 @@ class ThreadCreateSerializer(serializers.ModelSerializer):
         model = Thread
         fields = ["title", "category", "tag_ids", "initial_post_content"]
 
+    def validate(self, attrs):
+        """最初の投稿の内容をコピペ連投の照合にかける.
+
+        指紋は fingerprint に保持し、create() のコミット後に登録する。
+
+        Args:
+            attrs: フィールド単位のバリデーション済みデータ
+
+        Returns:
+            バリデーション済みデータ
+        """
+        self.fingerprint = screen(attrs["initial_post_content"])
+        return attrs
+
+    @transaction.atomic
     def create(self, validated_data):
         """スレッドと最初の投稿を作成する.
 
@@ -138,6 +159,7 @@ class ThreadCreateSerializer(serializers.ModelSerializer):
         Note:
             最初の投稿（post_number=1, is_op=True）を自動的に作成する。
             タグが指定されている場合は、スレッドに関連付ける。
+            最初の投稿の指紋は、コミットに成功した場合にのみ登録する。
         """
         tag_ids = validated_data.pop("tag_ids", [])
         initial_post_content = validated_data.pop("initial_post_content")
@@ -160,6 +182,59 @@ class ThreadCreateSerializer(serializers.ModelSerializer):
 
         thread.post_count = 1
         thread.last_post_at = thread.created_at
-        thread.save()
+        thread.save(update_fields=["post_count", "last_post_at", "updated_at"])
 
+        transaction.on_commit(partial(record, self.fingerprint))
         return thread
+
+
+class BulkThreadFilterSerializer(BulkFilterSerializer):
+    """スレッドの一括操作の絞り込み条件.
+
+    Attributes:
+        category: カテゴリID
+        q: タイトルの部分一致
+    """
+
+    FILTERS = {
+        **BulkFilterSerializer.FILTERS,
+        "category": "category_id",
+        "q": "title__icontains",
+    }
+
+    category = serializers.IntegerField(required=False)
+
+
+class BulkThreadActionSerializer(BulkActionSerializer):
+    """スレッドの一括操作の要求.
+
+    Attributes:
+        action: 操作（lock / unlock / pin / unpin / move / delete）
+        filter: 絞り込み条件（ids と排他）
+        category: 移動先のカテゴリ（move の場合のみ必須）
+    """
+
+    action = serializers.ChoiceField(choices=THREAD_ACTIONS)
+    filter = BulkThreadFilterSerializer(required=False)
+    category = serializers.PrimaryKeyRelatedField(
+        queryset=Category.objects.all(), required=False
+    )
+
+    def validate(self, attrs):
+        """move の場合に移動先のカテゴリが指定されていることを確認する.
+
+        Args:
+            attrs: 検証済みの要求
+
+        Returns:
+            検証済みの要求
+
+        Raises:
+            ValidationError: move で category が指定されていない場合
+        """
+        attrs = super().validate(attrs)
+        if attrs["action"] == "move" and "category" not in attrs:
+            raise serializers.ValidationError(
+                {"category": ["This field is required for move."]}
+            )
+        return attrs
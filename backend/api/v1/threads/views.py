@@ -4,26 +4,47 @@
 全機能を提供する。
 """
 
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
 from api.models import Thread
+from api.services import moderation
+from api.throttling import ThreadRateThrottle
+from api.v1.fastpath import FastReadMixin
+from api.v1.threads.filters import ThreadFilter
+from api.v1.threads.readers import THREAD_DETAIL_READER, THREAD_LIST_READER
 from api.v1.threads.serializers import (
+    BulkThreadActionSerializer,
     ThreadCreateSerializer,
     ThreadDetailSerializer,
     ThreadListSerializer,
 )
 
 
-class ThreadViewSet(viewsets.ModelViewSet):
+class ThreadViewSet(FastReadMixin, viewsets.ModelViewSet):
     """スレッド操作用ViewSet.
 
     スレッドのCRUD操作と各種アクション（トレンド、ピン留め、ロックなど）を提供する。
     パフォーマンスを考慮し、select_relatedとprefetch_relatedで関連データを最適化。
+    読み取り系のアクションはシリアライザーを経由しない高速パス（readers）で応答し、
+    ?fields= / ?omit= による出力フィールドの絞り込みに対応する。
+    一覧はカテゴリ・タグ・タイトル検索で絞り込み、?sort= で並び替えられる
+    （api.v1.threads.filters.ThreadFilter）。
+    /threads/bulk/ は管理者向けの一括ロック・ピン留め・移動・削除
+    （api.services.moderation）。
 
     Attributes:
         queryset: スレッドのQuerySet（関連データを最適化済み）
+        filter_backends: 一覧の絞り込みに使うバックエンド
+        filterset_class: 一覧のフィルターセット
+        list_reader: 一覧表示用のリーダー
+        detail_reader: 詳細表示用のリーダー
+        columnar_actions: 列指向表現に対応するアクション名
     """
 
     queryset = (
@@ -31,6 +52,11 @@ class ThreadViewSet(viewsets.ModelViewSet):
         .select_related("category", "author_session")
         .prefetch_related("tags")
     )
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ThreadFilter
+    list_reader = THREAD_LIST_READER
+    detail_reader = THREAD_DETAIL_READER
+    columnar_actions = ("list", "retrieve", "trending", "recent")
 
     def get_serializer_class(self):
         """アクションに応じた適切なシリアライザーを返す.
@@ -46,6 +72,25 @@ class ThreadViewSet(viewsets.ModelViewSet):
             return ThreadCreateSerializer
         return ThreadDetailSerializer
 
+    def get_throttles(self):
+        """アクションに応じたスロットルを返す.
+
+        Returns:
+            作成: スレッド作成のレート制限
+            その他: デフォルトのスロットル
+        """
+        if self.action == "create":
+            return [ThreadRateThrottle()]
+        return super().get_throttles()
+
+    def perform_create(self, serializer):
+        """リクエストのセッションを作成者としてスレッドを保存する.
+
+        Args:
+            serializer: バリデーション済みのThreadCreateSerializer
+        """
+        serializer.save(author_session=self.request.user_session)
+
     def retrieve(self, request, *args, **kwargs):
         """スレッドを取得し、閲覧数をインクリメントする.
 
@@ -55,13 +100,21 @@ class ThreadViewSet(viewsets.ModelViewSet):
             **kwargs: キーワード引数
 
         Returns:
-            スレッドの詳細データ
+            スレッドの詳細データ（投稿数が STREAMING_RESPONSES の MIN_ITEMS 以上の
+            場合は、投稿を逐次エンコードするストリーミングレスポンス）
         """
-        thread = self.get_object()
-        thread.view_count += 1
-        thread.save(update_fields=["view_count"])
-        serializer = self.get_serializer(thread)
-        return Response(serializer.data)
+        reader = self.detail_reader.for_request(request)
+        row = self.get_row(reader, "post_count")
+        # NOTE: ルーター経由の書き込みは以降の読み取り（ストリーミングする投稿を
+        # 含む）をプライマリに固定するため、閲覧数だけはプライマリを直接指定する
+        Thread.objects.using(DEFAULT_DB_ALIAS).filter(pk=row["id"]).update(
+            view_count=F("view_count") + 1
+        )
+        if "view_count" in row:
+            row["view_count"] += 1
+        if self.can_stream(reader, "posts", row["post_count"]):
+            return self.stream_nested(reader, row, "posts")
+        return Response(self.represent_row(reader, row))
 
     @action(detail=False, methods=["get"])
     def trending(self, request):
@@ -73,9 +126,9 @@ class ThreadViewSet(viewsets.ModelViewSet):
         Returns:
             勢いスコア降順で上位20件のスレッド
         """
-        threads = Thread.objects.all().order_by("-momentum")[:20]
-        serializer = ThreadListSerializer(threads, many=True)
-        return Response(serializer.data)
+        reader = self.list_reader.for_request(request)
+        rows = reader.values(Thread.objects.order_by("-momentum")[:20])
+        return Response(self.represent_rows(reader, rows))
 
     @action(detail=False, methods=["get"])
     def recent(self, request):
@@ -87,9 +140,9 @@ class ThreadViewSet(viewsets.ModelViewSet):
         Returns:
             最終投稿日時降順で上位20件のスレッド
         """
-        threads = Thread.objects.all().order_by("-last_post_at")[:20]
-        serializer = ThreadListSerializer(threads, many=True)
-        return Response(serializer.data)
+        reader = self.list_reader.for_request(request)
+        rows = reader.values(Thread.objects.order_by("-last_post_at")[:20])
+        return Response(self.represent_rows(reader, rows))
 
     @action(detail=True, methods=["post"])
     def pin(self, request, pk=None):
@@ -104,7 +157,8 @@ class ThreadViewSet(viewsets.ModelViewSet):
         """
         thread = self.get_object()
         thread.is_pinned = not thread.is_pinned
-        thread.save(update_fields=["is_pinned"])
+        with transaction.atomic():
+            thread.save(update_fields=["is_pinned"])
         serializer = self.get_serializer(thread)
         return Response(serializer.data)
 
@@ -121,6 +175,34 @@ class ThreadViewSet(viewsets.ModelViewSet):
         """
         thread = self.get_object()
         thread.is_locked = not thread.is_locked
-        thread.save(update_fields=["is_locked"])
+        with transaction.atomic():
+            thread.save(update_fields=["is_locked"])
         serializer = self.get_serializer(thread)
         return Response(serializer.data)
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser])
+    def bulk(self, request):
+        """スレッドを一括でロック・ピン留め・移動・削除する（管理者のみ）.
+
+        対象は ids（主キーのリスト）または filter（絞り込み条件）で指定する。
+        チャンクごとに1回のUPDATE/DELETEで処理し、カウンターと
+        イベントログも集合単位で更新する。
+
+        Args:
+            request: HTTPリクエスト
+
+        Returns:
+            操作名と、状態を変更したスレッド数 affected
+        """
+        serializer = BulkThreadActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        name = serializer.validated_data["action"]
+        threads = serializer.target(Thread.objects.all())
+        if name == "delete":
+            affected = moderation.delete_threads(threads)
+        elif name == "move":
+            category = serializer.validated_data["category"]
+            affected = moderation.move_threads(threads, category.pk)
+        else:
+            affected = moderation.set_thread_flag(threads, name)
+        return Response({"action": name, "affected": affected})
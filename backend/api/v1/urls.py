@@ -8,4 +8,5 @@ urlpatterns = [
     path("categories/", include("api.v1.categories.urls")),
     path("tags/", include("api.v1.tags.urls")),
     path("stats/", include("api.v1.stats.urls")),
+    path("batch/", include("api.v1.batch.urls")),
 ]
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
+import os
 from pathlib import Path
 
 PROJECT_DIR = Path(__file__).resolve().parent.parent
@@ -58,14 +59,17 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "api.middleware.compression.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "api.middleware.session.AnonymousSessionMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "wagtail.contrib.redirects.middleware.RedirectMiddleware",
+    "api.middleware.replica.ReplicaPinningMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -101,6 +105,22 @@ DATABASES = {
     }
 }
 
+# Read replicas
+# Aliases listed in REPLICAS must also be defined in DATABASES.
+# Safe reads under PATH_PREFIXES (the API) go to a replica whose lag is within
+# MAX_LAG_SECONDS; admin and Wagtail pages always read from the primary. A
+# client that has just written is pinned to the primary for PIN_SECONDS.
+DATABASE_ROUTERS = ["api.db.routers.PrimaryReplicaRouter"]
+
+DATABASE_REPLICATION = {
+    "REPLICAS": [],
+    "PATH_PREFIXES": ["/api/"],
+    "PIN_SECONDS": 5,
+    "PIN_COOKIE_NAME": "mb_primary_pin",
+    "MAX_LAG_SECONDS": 2.0,
+    "LAG_CHECK_INTERVAL": 1.0,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -203,10 +223,10 @@ WAGTAILDOCS_EXTENSIONS = [
 # Django REST Framework settings
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "api.renderers.FastJSONRenderer",
     ],
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        "api.parsers.FastJSONParser",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
@@ -214,6 +234,230 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Number of trusted reverse proxies in front of the app. Throttles key
+    # anonymous clients by IP; with 0 the X-Forwarded-For header is ignored,
+    # otherwise only the address appended by the outermost trusted proxy is used.
+    "NUM_PROXIES": int(os.environ.get("DRF_NUM_PROXIES", "0")),
+}
+
+# Response compression
+# Negotiated from Accept-Encoding; br and zstd require the optional
+# "performance" dependencies (brotli, zstandard). Only the API content types
+# are compressed: HTML that may carry CSRF tokens is left alone (BREACH).
+RESPONSE_COMPRESSION = {
+    "ENABLED": True,
+    "MIN_SIZE": 1024,
+    "ENCODINGS": ["zstd", "br", "gzip"],
+    "LEVELS": {"gzip": 6, "br": 5, "zstd": 3},
+    "CONTENT_TYPES": [
+        "application/json",
+        "application/vnd.modern-board.",
+        "application/x-ndjson",
+    ],
+}
+
+# Streaming responses (api.v1.fastpath)
+# Thread details with at least MIN_ITEMS posts are streamed: posts are read
+# with QuerySet.iterator() and encoded CHUNK_SIZE at a time instead of
+# building the whole response in memory. Streamed responses are compressed
+# incrementally, one flushed block per chunk.
+STREAMING_RESPONSES = {
+    "ENABLED": True,
+    "MIN_ITEMS": 500,
+    "CHUNK_SIZE": 200,
+}
+
+# Analytics export (api.services.export)
+# "manage.py export_board" and /api/v1/stats/export/<table>/ read CHUNK_SIZE
+# rows per short query in primary-key order; the command writes up to WORKERS
+# tables in parallel.
+BOARD_EXPORT = {
+    "CHUNK_SIZE": 5000,
+    "WORKERS": 4,
+}
+
+# Bulk moderation (api.services.moderation)
+# The admin-only threads/bulk/ and posts/bulk/ endpoints act on up to MAX_IDS
+# rows, given as ids or as a filter (a filter matching more is rejected), and
+# run one UPDATE/DELETE per table for every CHUNK_SIZE rows, adjusting counters
+# and the event log per chunk.
+BULK_MODERATION = {
+    "CHUNK_SIZE": 500,
+    "MAX_IDS": 10_000,
+}
+
+# Anonymous sessions (api.middleware.session)
+# The UserSession is identified by a signed COOKIE_NAME cookie and resolved
+# through a per-process LRU of MAX_LOCAL_ENTRIES, then the CACHE_ALIAS cache,
+# then the database. A write without the cookie is issued a new cookie but no
+# session row; the row is created when that cookie comes back on a later write,
+# so clients that drop cookies never create sessions.
+# last_activity_at is buffered per process and written in one UPDATE every
+# ACTIVITY_FLUSH_INTERVAL seconds or ACTIVITY_MAX_PENDING sessions.
+# Sessions idle for IDLE_SESSION_DAYS without any post, thread or reaction are
+# deleted by a periodic background task, IDLE_SESSION_BATCH_SIZE at a time.
+ANONYMOUS_SESSIONS = {
+    "COOKIE_NAME": "mb_session",
+    "COOKIE_AGE": 365 * 24 * 3600,
+    "CACHE_ALIAS": "default",
+    "CACHE_TIMEOUT": 24 * 3600,
+    "MAX_LOCAL_ENTRIES": 50_000,
+    "ACTIVITY_FLUSH_INTERVAL": 60,
+    "ACTIVITY_MAX_PENDING": 1000,
+    "IDLE_SESSION_DAYS": 30,
+    "IDLE_SESSION_BATCH_SIZE": 1000,
+}
+
+# Rate limiting (api.throttling)
+# Token buckets per session, client IP and target thread, checked before a
+# write touches the database. Rates are "capacity/period": a client may burst
+# up to capacity requests, refilled continuously at capacity per period.
+# BACKEND "local" keeps buckets in process memory; "cache" shares them through
+# the CACHE_ALIAS cache between workers (approximate under concurrency).
+# Clients without a session cookie get the session rate keyed by their IP.
+RATE_LIMITS = {
+    "ENABLED": True,
+    "BACKEND": "local",
+    "CACHE_ALIAS": "default",
+    "MAX_KEYS": 100_000,
+    "RATES": {
+        "post": {"session": "10/min", "ip": "30/min", "thread": "120/min"},
+        "thread": {"session": "3/hour", "ip": "10/hour"},
+        "reaction": {"session": "30/min", "ip": "60/min"},
+    },
+}
+
+# Near-duplicate posts (api.services.near_duplicates)
+# Each post gets a 64-bit SimHash of its normalized text, checked against the
+# posts accepted in the last WINDOW_SECONDS through an in-memory LSH index.
+# Once MAX_COPIES posts within MAX_DISTANCE bits are in the window, further
+# copies are rejected with 400 (ACTION "reject") or 429 until the oldest copy
+# expires (ACTION "throttle"). MAX_DISTANCE above 7 is not guaranteed to be
+# found, as the index splits fingerprints into eight 8-bit bands. Only the first
+# MAX_HASHED_LENGTH normalized characters are hashed, bounding the CPU time per
+# post. Fingerprints are registered only after the post has been committed.
+NEAR_DUPLICATE_POSTS = {
+    "ENABLED": True,
+    "ACTION": "reject",
+    "WINDOW_SECONDS": 600,
+    "MAX_COPIES": 3,
+    "MAX_DISTANCE": 6,
+    "MIN_LENGTH": 20,
+    "MAX_HASHED_LENGTH": 4000,
+}
+
+# Batch endpoint (/api/v1/batch/)
+# Maximum number of read-only sub-requests executed per batch request.
+API_BATCH = {
+    "MAX_REQUESTS": 10,
+}
+
+# Trending tags (api.services.trending)
+# Activity is decayed with HALF_LIFE_HOURS; a post counts POST_WEIGHT (added by
+# the "trending" event consumer) and tagging a thread counts THREAD_WEIGHT.
+# Tags whose decayed score falls below MIN_SCORE drop out of
+# /api/v1/tags/trending/.
+TRENDING_TAGS = {
+    "HALF_LIFE_HOURS": 6.0,
+    "POST_WEIGHT": 1.0,
+    "THREAD_WEIGHT": 5.0,
+    "MIN_SCORE": 0.05,
+}
+
+# Points and levels (api.services.points)
+# A session earns POST per post, THREAD per thread and REACTION_RECEIVED per
+# reaction on its posts; level = 1 + floor(sqrt(total_points / LEVEL_STEP)).
+# The in-process leaderboard keeps the top LEADERBOARD_SIZE sessions and ranks
+# by the distinct point values held. It loads every session once, then every
+# LEADERBOARD_REFRESH_SECONDS re-reads only the sessions whose
+# points_updated_at is newer than the last refresh, reaching back a further
+# LEADERBOARD_REFRESH_OVERLAP_SECONDS for transactions that committed late.
+POINTS = {
+    "POST": 1,
+    "THREAD": 5,
+    "REACTION_RECEIVED": 2,
+    "LEVEL_STEP": 100,
+    "LEADERBOARD_SIZE": 100,
+    "LEADERBOARD_REFRESH_SECONDS": 10,
+    "LEADERBOARD_REFRESH_OVERLAP_SECONDS": 60,
+}
+
+# Board event log (api.services.events)
+# Every post, thread and reaction write appends a BoardEvent in the same
+# transaction. CONSUMERS maps a name to an EventConsumer class path; run
+# "manage.py consume_events" (or the periodic consume_all task) to process new
+# events and "manage.py replay_events <name>" to rebuild a projection with
+# REPLAY_WORKERS threads. The built-in consumers apply what a new or deleted
+# post changes besides the post itself: momentum and tag sort keys, tag trend
+# scores and author points. Trending and points add increments, so they cannot
+# be replayed. Event ids skipped by a consumer because their
+# transaction had not committed yet are kept as gaps and processed once they
+# appear; a gap still empty GAP_TIMEOUT_SECONDS after the event that follows it
+# is treated as a rolled-back id and dropped.
+BOARD_EVENTS = {
+    "CONSUMERS": {
+        "momentum": "api.services.momentum.MomentumConsumer",
+        "trending": "api.services.trending.TrendingConsumer",
+        "points": "api.services.points.PointsConsumer",
+    },
+    "BATCH_SIZE": 500,
+    "REPLAY_WORKERS": 4,
+    "GAP_TIMEOUT_SECONDS": 300,
+}
+
+# Thread momentum (api.services.momentum)
+# Posts in the last WINDOW_HOURS per hour. Recomputed by the "momentum" event
+# consumer for threads with new or deleted posts, and periodically so that idle
+# threads decay.
+THREAD_MOMENTUM = {
+    "WINDOW_HOURS": 24.0,
+}
+
+# Background tasks (api.services.tasks)
+# Tasks are rows in board_task, executed by "manage.py run_tasks" with WORKERS
+# threads per process. Failed tasks are retried up to MAX_ATTEMPTS times after
+# RETRY_DELAY seconds, doubling each time; tasks still running after
+# LEASE_SECONDS are handed to another worker. SCHEDULE maps a function path to
+# the seconds between runs.
+BACKGROUND_TASKS = {
+    "WORKERS": 4,
+    "POLL_INTERVAL": 1.0,
+    "MAX_ATTEMPTS": 3,
+    "RETRY_DELAY": 10.0,
+    "LEASE_SECONDS": 300,
+    "KEEP_FINISHED_SECONDS": 7 * 24 * 3600,
+    "SCHEDULE": {
+        "api.services.momentum.recompute_momentum": 300,
+        "api.services.events.consume_all": 10,
+        "api.services.sessions.collect_idle_sessions": 3600,
+        "api.services.tasks.purge_finished": 3600,
+        "api.services.rendering.rerender_stale": 600,
+    },
+}
+
+# Counter reconciliation (api.services.reconcile)
+# "manage.py reconcile_counters" checks CHUNK_SIZE rows per transaction by
+# primary-key range, updates only the drifted rows and sleeps PAUSE_SECONDS
+# between chunks. On PostgreSQL each chunk waits at most LOCK_TIMEOUT_MS for
+# row locks and is retried up to RETRIES times.
+COUNTER_RECONCILIATION = {
+    "CHUNK_SIZE": 1000,
+    "PAUSE_SECONDS": 0.05,
+    "LOCK_TIMEOUT_MS": 2000,
+    "RETRIES": 3,
+}
+
+# Group commit for post creation
+# When enabled, validated posts are queued and committed in batches of up to
+# MAX_BATCH_SIZE posts, waiting at most MAX_DELAY_MS for a batch to fill.
+# A request waits at most TIMEOUT_SECONDS for its batch to start committing and
+# then at most COMMIT_TIMEOUT_SECONDS for the commit, answering 503 otherwise.
+POST_INGESTION = {
+    "ENABLED": False,
+    "MAX_BATCH_SIZE": 64,
+    "MAX_DELAY_MS": 5,
+    "TIMEOUT_SECONDS": 2.0,
+    "COMMIT_TIMEOUT_SECONDS": 5.0,
 }
 
 # drf-spectacular settings